@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare embedder inference backends (eager torch, TorchScript, ONNX Runtime).
+
+For each backend the script loads an ``Embedder``, checks CLS parity against
+eager PyTorch and measures steady-state throughput on random 256×256 tiles.
+
+Usage (from services/region-detector):
+    python scripts/benchmark_embedder_backends.py --tiles 256 --batch-size 16
+    python scripts/benchmark_embedder_backends.py --model /path/to/local/dinov2 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add the service root to the path to allow importing `src` as a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+from src.embedder import Embedder  # noqa: E402
+from src.embedder_backends import BACKENDS  # noqa: E402
+
+
+def _random_tiles(count: int, seed: int = 0) -> list[Image.Image]:
+    rng = np.random.default_rng(seed)
+    return [
+        Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), "RGB")
+        for _ in range(count)
+    ]
+
+
+def benchmark_backend(
+    backend: str,
+    model: str,
+    tiles: list[Image.Image],
+    batch_size: int,
+    warmup: int,
+) -> dict:
+    load_start = time.perf_counter()
+    embedder = Embedder(model_name=model, backend=backend)
+    load_s = time.perf_counter() - load_start
+
+    embedder.embed_batch(tiles[: batch_size * warmup], batch_size=batch_size)
+
+    start = time.perf_counter()
+    embedder.embed_batch(tiles, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": embedder.backend,
+        "requested_backend": backend,
+        "load_s": round(load_s, 3),
+        "embed_s": round(elapsed, 3),
+        "tiles_per_s": round(len(tiles) / elapsed, 2) if elapsed > 0 else None,
+        "max_abs_diff_vs_eager": embedder.check_parity(tiles[:8]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=settings.BACKBONE)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--tiles", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=2, help="Warm-up batches per backend")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    # Parity is reported per backend below rather than enforced on load.
+    settings.EMBEDDER_PARITY_CHECK = False
+    tiles = _random_tiles(args.tiles)
+
+    results = [
+        benchmark_backend(backend, args.model, tiles, args.batch_size, args.warmup)
+        for backend in args.backends
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = next((r for r in results if r["backend"] == "torch"), None)
+    print(f"\n{'backend':<12} {'load s':>8} {'tiles/s':>10} {'speedup':>8} {'max |Δ|':>10}")
+    for r in results:
+        speedup = (
+            r["tiles_per_s"] / baseline["tiles_per_s"]
+            if baseline and baseline["tiles_per_s"] and r["tiles_per_s"]
+            else float("nan")
+        )
+        print(
+            f"{r['backend']:<12} {r['load_s']:>8.2f} {r['tiles_per_s']:>10.1f} "
+            f"{speedup:>7.2f}× {r['max_abs_diff_vs_eager']:>10.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark heatmap rendering: per-cell colormap calls vs the vectorized LUT.
+
+Renders a synthetic ``--cells × --cells`` probability grid (30% skipped) with
+each strategy and reports wall time, output size and speedup:
+
+- ``legacy-grid``: the former nested ``for y / for x`` loop calling the
+  matplotlib colormap once per cell
+- ``lut-grid``: ``generate_heatmap`` grid fallback (256-entry LUT)
+- ``legacy-cells``: the former pixel-accurate mode, painting every cell into
+  a full-resolution RGBA array
+- ``lut-cells``: ``generate_heatmap`` pixel-accurate mode
+- ``lut-aligned``: aligned downscaled mode at ``--scale``
+
+Usage (from services/region-detector):
+    python scripts/benchmark_heatmap.py --cells 500 --cell-px 10
+    python scripts/benchmark_heatmap.py --cells 500 --scale 0.25 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+
+# Add the service root to the path to allow importing `src` as a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.heatmap import TileCell, generate_heatmap  # noqa: E402
+
+
+def legacy_grid(grid: np.ndarray, colormap: str, alpha: int = 160, skipped_alpha: int = 25):
+    cmap = matplotlib.colormaps[colormap]
+    rows, cols = grid.shape
+    rgba = np.zeros((rows, cols, 4), dtype=np.uint8)
+    for y in range(rows):
+        for x in range(cols):
+            prob = grid[y, x]
+            if prob < 0:
+                rgba[y, x] = [128, 128, 128, skipped_alpha]
+                continue
+            r, g, b, _ = cmap(prob)
+            rgba[y, x] = [int(r * 255), int(g * 255), int(b * 255), alpha]
+    return rgba
+
+
+def legacy_cells(cells, width: int, height: int, colormap: str, alpha: int = 160):
+    cmap = matplotlib.colormaps[colormap]
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    for cell in cells:
+        px1 = min(cell.pixel_x + cell.width, width)
+        py1 = min(cell.pixel_y + cell.height, height)
+        if cell.tumor_probability < 0:
+            rgba[cell.pixel_y:py1, cell.pixel_x:px1] = [128, 128, 128, 25]
+        else:
+            r, g, b, _ = cmap(cell.tumor_probability)
+            rgba[cell.pixel_y:py1, cell.pixel_x:px1] = [
+                int(r * 255), int(g * 255), int(b * 255), alpha
+            ]
+    return rgba
+
+
+def _timed(fn, repeats: int):
+    best = float("inf")
+    out = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    rng = np.random.default_rng(0)
+    grid = rng.random((args.cells, args.cells))
+    grid[rng.random(grid.shape) < 0.3] = -1.0
+    width = height = args.cells * args.cell_px
+    cells = [
+        TileCell(x * args.cell_px, y * args.cell_px, args.cell_px, args.cell_px, float(grid[y, x]))
+        for y in range(args.cells)
+        for x in range(args.cells)
+    ]
+
+    cases = {
+        "legacy-grid": lambda: legacy_grid(grid, args.colormap),
+        "lut-grid": lambda: generate_heatmap(grid, colormap=args.colormap),
+        "legacy-cells": lambda: legacy_cells(cells, width, height, args.colormap),
+        "lut-cells": lambda: generate_heatmap(
+            grid, colormap=args.colormap, image_width=width, image_height=height,
+            tile_cells=cells, output_scale=1.0,
+        ),
+        "lut-aligned": lambda: generate_heatmap(
+            grid, colormap=args.colormap, image_width=width, image_height=height,
+            tile_cells=cells, output_scale=args.scale,
+        ),
+    }
+
+    results = []
+    outputs = {}
+    for name, fn in cases.items():
+        repeats = 1 if name.startswith("legacy") else args.repeats
+        seconds, out = _timed(fn, repeats)
+        outputs[name] = np.asarray(out)
+        results.append({
+            "mode": name,
+            "seconds": round(seconds, 5),
+            "output": f"{outputs[name].shape[1]}×{outputs[name].shape[0]}",
+            "megabytes": round(outputs[name].nbytes / 1e6, 1),
+        })
+
+    by_mode = {r["mode"]: r for r in results}
+    for r in results:
+        baseline = "legacy-grid" if "grid" in r["mode"] else "legacy-cells"
+        r["speedup"] = round(by_mode[baseline]["seconds"] / r["seconds"], 1)
+    by_mode["lut-grid"]["matches_legacy"] = bool(
+        np.array_equal(outputs["lut-grid"], outputs["legacy-grid"])
+    )
+    by_mode["lut-cells"]["matches_legacy"] = bool(
+        np.array_equal(outputs["lut-cells"], outputs["legacy-cells"])
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cells", type=int, default=500, help="Grid side length in cells")
+    parser.add_argument("--cell-px", type=int, default=10, help="Full-res pixels per cell side")
+    parser.add_argument("--scale", type=float, default=0.25, help="Aligned downscaled output scale")
+    parser.add_argument("--colormap", default="RdYlGn_r")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'mode':<14} {'seconds':>10} {'speedup':>9} {'output':>13} {'MB':>7}  identical")
+    for r in results:
+        print(
+            f"{r['mode']:<14} {r['seconds']:>10.4f} {r['speedup']:>8.1f}× "
+            f"{r['output']:>13} {r['megabytes']:>7.1f}  {r.get('matches_legacy', '')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the region-detector hot kernels, checked against baselines.
+
+Kernels:
+
+- ``detect_tissue``: one 256 px RGB tile (array input, as the arena path)
+- ``heatmap_grid_N``: ``generate_heatmap`` grid fallback for an ``N × N`` grid
+- ``heatmap_cells_N``: pixel-accurate / aligned mode for ``N × N`` tile cells
+- ``tile_rect_100k``: ``tile_rects_in_fullres`` for 100k tiles
+- ``classifier_batch_N``: ``Classifier.predict_batch`` for N embeddings
+- ``embed_batch_N``: ``Embedder.embed_batch`` of N tiles with a tiny
+  random-weight DINOv2 (skipped without torch/transformers)
+
+Each kernel is timed ``timeit``-style: the call count per round is sized to
+about ``--min-round-s``, and the fastest of ``--rounds`` rounds is reported as
+seconds per call.  Baselines are stored in ``scripts/kernel_baselines.json``
+together with the time of a fixed numpy reference workload.  A check scales
+each baseline by how fast this machine runs that workload, then fails (exit
+status 1) when a kernel is more than ``--tolerance`` slower than expected.
+
+Usage (from services/region-detector):
+    python scripts/benchmark_kernels.py                     # check against baselines
+    python scripts/benchmark_kernels.py --only heatmap      # a subset
+    python scripts/benchmark_kernels.py --update            # record new baselines
+    python scripts/benchmark_kernels.py --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+
+# Add the service root to the path to allow importing `src` as a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.geometry import DZIShape, max_dzi_level, tile_rects_in_fullres  # noqa: E402
+from src.heatmap import TileCell, generate_heatmap  # noqa: E402
+from src.tissue_detector import detect_tissue  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "kernel_baselines.json"
+DEFAULT_TOLERANCE = 0.30
+
+HEATMAP_GRID_SIZES = (100, 500, 1000)
+HEATMAP_CELL_SIZES = (50, 200)
+CLASSIFIER_BATCH_SIZES = (16, 256, 4096)
+EMBED_BATCH_SIZES = (1, 8, 32)
+
+
+def time_per_call(fn: Callable[[], object], rounds: int, min_round_s: float) -> float:
+    """Fastest per-call time over *rounds* rounds of about *min_round_s* each."""
+    fn()  # warm-up (caches, lazy loads)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_s:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_round_s / elapsed) + 1)
+    best = elapsed / number
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def reference_workload() -> None:
+    """Fixed numpy work used to normalise baselines across machines."""
+    rng = np.random.default_rng(0)
+    a = rng.random((256, 256), dtype=np.float32)
+    for _ in range(4):
+        a = np.sort(a @ a.T, axis=1) / 256.0
+
+
+# ── Kernels ───────────────────────────────────────────────────────────────────
+
+
+def tissue_kernels() -> Dict[str, Callable[[], object]]:
+    rng = np.random.default_rng(0)
+    tile = np.clip(np.array([200, 120, 180]) + rng.normal(0, 20, (256, 256, 3)), 0, 255)
+    tile[:, :128] = 240  # half glass, half tissue
+    tile = tile.astype(np.uint8)
+    return {"detect_tissue": lambda: detect_tissue(tile)}
+
+
+def heatmap_kernels() -> Dict[str, Callable[[], object]]:
+    rng = np.random.default_rng(0)
+    kernels: Dict[str, Callable[[], object]] = {}
+    for n in HEATMAP_GRID_SIZES:
+        grid = rng.random((n, n))
+        grid[rng.random((n, n)) < 0.3] = -1.0
+        kernels[f"heatmap_grid_{n}"] = lambda grid=grid: generate_heatmap(grid)
+    for n in HEATMAP_CELL_SIZES:
+        probs = rng.random(n * n)
+        probs[rng.random(n * n) < 0.3] = -1.0
+        cells = [
+            TileCell(pixel_x=(i % n) * 256, pixel_y=(i // n) * 256, width=256, height=256,
+                     tumor_probability=float(p))
+            for i, p in enumerate(probs)
+        ]
+        kernels[f"heatmap_cells_{n}"] = lambda cells=cells, size=n * 256: generate_heatmap(
+            np.zeros((0, 0)), image_width=size, image_height=size, tile_cells=cells
+        )
+    return kernels
+
+
+def geometry_kernels() -> Dict[str, Callable[[], object]]:
+    shape = DZIShape(width=100_000, height=64_000, tile_size=256)
+    max_level = max_dzi_level(shape)
+    cols = -(-shape.width // shape.tile_size)
+    index = np.arange(100_000)
+    xs, ys = index % cols, index // cols
+
+    def rects():
+        tile_rects_in_fullres(shape=shape, tile_level=max_level, max_level=max_level, tile_x=xs, tile_y=ys)
+
+    return {"tile_rect_100k": rects}
+
+
+def classifier_kernels(workdir: Path) -> Dict[str, Callable[[], object]]:
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    from src.classifier import Classifier
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(512, 768)).astype(np.float32)
+    y = (x[:, 0] + 0.5 * x[:, 1] > 0).astype(int)
+    path = workdir / "head.pkl"
+    joblib.dump(LogisticRegression(max_iter=1000).fit(x, y), path)
+    classifier = Classifier(model_path=str(path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier.load()
+    return {
+        f"classifier_batch_{n}": lambda e=rng.normal(size=(n, 768)).astype(np.float32): (
+            classifier.predict_batch(e)
+        )
+        for n in CLASSIFIER_BATCH_SIZES
+    }
+
+
+def embedder_kernels(workdir: Path) -> Dict[str, Callable[[], object]]:
+    try:
+        import transformers
+
+        from src.embedder import Embedder
+    except ImportError:
+        return {}
+
+    path = workdir / "tiny_dinov2"
+    config = transformers.Dinov2Config(
+        hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, image_size=224, patch_size=14,
+    )
+    transformers.Dinov2Model(config).save_pretrained(path)
+    transformers.BitImageProcessor(
+        size={"shortest_edge": 256},
+        crop_size={"height": 224, "width": 224},
+        do_center_crop=True,
+        image_mean=[0.485, 0.456, 0.406],
+        image_std=[0.229, 0.224, 0.225],
+    ).save_pretrained(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        embedder = Embedder(model_name=str(path), backend="torch", precision="fp32")
+
+    rng = np.random.default_rng(0)
+    tiles = [rng.integers(0, 256, (256, 256, 3), dtype=np.uint8) for _ in range(max(EMBED_BATCH_SIZES))]
+    return {
+        f"embed_batch_{n}": lambda batch=tiles[:n]: embedder.embed_batch(batch, batch_size=len(batch))
+        for n in EMBED_BATCH_SIZES
+    }
+
+
+def collect_kernels(workdir: Path) -> Dict[str, Callable[[], object]]:
+    kernels: Dict[str, Callable[[], object]] = {}
+    kernels.update(tissue_kernels())
+    kernels.update(heatmap_kernels())
+    kernels.update(geometry_kernels())
+    kernels.update(classifier_kernels(workdir))
+    kernels.update(embedder_kernels(workdir))
+    return kernels
+
+
+# ── Baselines ─────────────────────────────────────────────────────────────────
+
+
+def check(results: Dict[str, float], reference_s: float, baseline: dict, tolerance: float) -> list:
+    """Rows of (name, seconds, expected seconds or None, ratio or None, regressed)."""
+    speed = reference_s / baseline["reference_s"]
+    rows = []
+    for name, seconds in results.items():
+        base = baseline["kernels"].get(name)
+        if base is None:
+            rows.append((name, seconds, None, None, False))
+            continue
+        expected = base * speed
+        ratio = seconds / expected
+        rows.append((name, seconds, expected, ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def _fmt_s(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="run kernels whose name contains this substring")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-round-s", type=float, default=0.2)
+    parser.add_argument("--tolerance", type=float,
+                        help=f"allowed slowdown (default: the baseline file's, else {DEFAULT_TOLERANCE})")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baselines")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        kernels = collect_kernels(Path(workdir))
+        if args.only:
+            kernels = {k: v for k, v in kernels.items() if args.only in k}
+        reference_s = time_per_call(reference_workload, args.rounds, args.min_round_s)
+        results = {}
+        for name, fn in kernels.items():
+            results[name] = time_per_call(fn, args.rounds, args.min_round_s)
+            print(f"[kernels] {name}: {_fmt_s(results[name])}", file=sys.stderr)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if args.update:
+        merged = {}
+        if baseline and args.only:
+            # Keep the kernels not re-run, rescaled to this run's reference time.
+            scale = reference_s / baseline["reference_s"]
+            merged = {k: v * scale for k, v in baseline["kernels"].items()}
+        merged.update(results)
+        args.baseline.write_text(json.dumps({
+            "host": {"node": platform.node(), "machine": platform.machine(),
+                     "python": platform.python_version(), "numpy": np.__version__},
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "tolerance": baseline.get("tolerance", DEFAULT_TOLERANCE) if baseline else DEFAULT_TOLERANCE,
+            "reference_s": reference_s,
+            "kernels": dict(sorted(merged.items())),
+        }, indent=2) + "\n")
+        print(f"[kernels] baselines written to {args.baseline}", file=sys.stderr)
+        return
+
+    if baseline is None:
+        print(f"[kernels] no baseline at {args.baseline}; run with --update", file=sys.stderr)
+        sys.exit(2)
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", DEFAULT_TOLERANCE)
+    rows = check(results, reference_s, baseline, tolerance)
+    regressed = [name for name, *_, bad in rows if bad]
+
+    if args.json:
+        print(json.dumps({
+            "reference_s": reference_s,
+            "tolerance": tolerance,
+            "kernels": {
+                name: {"seconds": s, "expected_s": e, "ratio": r, "regressed": bad}
+                for name, s, e, r, bad in rows
+            },
+            "regressed": regressed,
+        }, indent=2))
+    else:
+        print(f"{'kernel':<22} {'time':>10} {'expected':>10} {'ratio':>7}")
+        for name, seconds, expected, ratio, bad in rows:
+            exp = _fmt_s(expected) if expected is not None else "-"
+            rat = f"{ratio:.2f}" if ratio is not None else "new"
+            print(f"{name:<22} {_fmt_s(seconds):>10} {exp:>10} {rat:>7}{'  REGRESSED' if bad else ''}")
+    if regressed:
+        print(f"[kernels] {len(regressed)} kernel(s) slower than baseline by more than "
+              f"{tolerance:.0%}: {', '.join(regressed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
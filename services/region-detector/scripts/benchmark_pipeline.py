@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of ``run_analysis`` on a synthetic DZI slide.
+
+Builds a ``--width × --height`` Deep Zoom pyramid whose tissue covers
+``--tissue-fraction`` of the slide (a smooth random blob field, so tissue
+edges cut through tiles as on a real slide), with ``--tumour-fraction`` of
+the tissue stained darker.  The pyramid is written to one of the
+:mod:`src.tile_store` backends, which the pipeline then reads it from:
+
+- ``memory``: ``MemoryTileStore``, with ``--latency-ms`` of simulated round
+  trip per read and write
+- ``local``: ``LocalTileStore`` in a temporary directory (memory-mapped reads)
+- ``minio``: a real S3-compatible server (e.g. a local MinIO container)
+  configured through the usual ``MINIO_*`` / ``TILES_BUCKET`` settings
+
+and analysed ``--repeat`` times with the stub mean-colour embedder from the
+test suite (``--embedder stub``, the default) or the configured DINOv2
+model (``--embedder real``).  Every run reports tiles/s, wall-clock stage
+times from ``AnalysisResult.timings``, per-stage totals from the service
+metrics (summed over worker threads), storage request and byte counts and
+peak RSS.  The report is JSON so runs can be diffed across commits:
+
+Usage (from services/region-detector):
+    python scripts/benchmark_pipeline.py --width 8192 --height 6144
+    python scripts/benchmark_pipeline.py --latency-ms 5 --output before.json
+    python scripts/benchmark_pipeline.py --latency-ms 5 --compare before.json
+    python scripts/benchmark_pipeline.py --backend local
+    python scripts/benchmark_pipeline.py --backend minio --embedder real --repeat 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Add the service root to the path to allow importing `src` as a package
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import pipeline  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.tile_store import (  # noqa: E402
+    LocalTileStore,
+    MemoryTileStore,
+    MinioTileStore,
+    TileStore,
+    set_tile_store,
+)
+
+# Background glass, tissue, tumour.
+PALETTE = np.array([[240, 240, 240], [200, 120, 180], [120, 40, 140]], dtype=np.int16)
+# Full-resolution pixels per cell of the tissue label map.
+CELL_PX = 32
+
+# Per-thread metric totals reported for each run: name → histogram.
+STAGE_HISTOGRAMS = {
+    "tile_download": pipeline.TILE_DOWNLOAD_SECONDS,
+    "tile_decode": pipeline.TILE_DECODE_SECONDS,
+    "tissue_detect": pipeline.TISSUE_DETECT_SECONDS,
+    "embed": pipeline.EMBED_BATCH_SECONDS,
+    "classifier": pipeline.CLASSIFIER_SECONDS,
+}
+
+# minio_io helpers the pipeline imports, wrapped to count requests.
+STORAGE_FUNCTIONS = (
+    "parse_dzi",
+    "list_available_tile_levels",
+    "load_tile_manifest",
+    "list_tiles_at_level",
+    "download_tile_bytes",
+    "download_tile_image",
+    "upload_bytes",
+    "upload_json",
+)
+
+
+# ── Synthetic slide ───────────────────────────────────────────────────────────
+
+
+def _smooth_field(rng: np.random.Generator, rows: int, cols: int, blobs: int) -> np.ndarray:
+    """Random field with about *blobs* features across the slide, at cell resolution."""
+    aspect = cols / max(rows, 1)
+    coarse_rows = max(2, round(math.sqrt(blobs / aspect)))
+    coarse_cols = max(2, round(coarse_rows * aspect))
+    coarse = rng.random((coarse_rows, coarse_cols)).astype(np.float32)
+    return np.asarray(Image.fromarray(coarse, "F").resize((cols, rows), Image.Resampling.BICUBIC))
+
+
+class SyntheticPyramid:
+    """A DZI pyramid with a controllable fraction of tissue cells."""
+
+    def __init__(
+        self,
+        image_id: str = "bench-slide",
+        width: int = 8192,
+        height: int = 6144,
+        tile_size: int = 256,
+        tissue_fraction: float = 0.4,
+        tumour_fraction: float = 0.2,
+        seed: int = 0,
+        quality: int = 85,
+    ):
+        self.image_id = image_id
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.max_level = int(math.ceil(math.log2(max(width, height))))
+
+        rng = np.random.default_rng(seed)
+        rows, cols = math.ceil(height / CELL_PX), math.ceil(width / CELL_PX)
+        tissue_field = _smooth_field(rng, rows, cols, blobs=12)
+        tumour_field = _smooth_field(rng, rows, cols, blobs=40)
+        self.labels = np.zeros((rows, cols), dtype=np.uint8)
+        if tissue_fraction > 0:
+            tissue = tissue_field >= np.quantile(tissue_field, 1.0 - tissue_fraction)
+            self.labels[tissue] = 1
+            if tumour_fraction > 0:
+                cut = np.quantile(tumour_field[tissue], 1.0 - tumour_fraction)
+                self.labels[tissue & (tumour_field >= cut)] = 2
+        self.tissue_fraction = float(np.mean(self.labels > 0))
+
+        # A small bank of noise textures keeps generation fast.
+        noise_bank = rng.normal(0, 6, (8, tile_size, tile_size, 3)).astype(np.int16)
+        self.tiles: Dict[Tuple[int, int, int], bytes] = {}
+        for level in range(self.max_level + 1):
+            scale = 2 ** (self.max_level - level)
+            lw, lh = max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+            for ty in range(math.ceil(lh / tile_size)):
+                for tx in range(math.ceil(lw / tile_size)):
+                    x0, y0 = tx * tile_size, ty * tile_size
+                    w, h = min(tile_size, lw - x0), min(tile_size, lh - y0)
+                    ys = np.minimum((y0 + np.arange(h)) * scale // CELL_PX, rows - 1)
+                    xs = np.minimum((x0 + np.arange(w)) * scale // CELL_PX, cols - 1)
+                    rgb = PALETTE[self.labels[np.ix_(ys, xs)]]
+                    rgb += noise_bank[rng.integers(len(noise_bank)), :h, :w]
+                    buf = io.BytesIO()
+                    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB").save(
+                        buf, format="JPEG", quality=quality
+                    )
+                    self.tiles[(level, tx, ty)] = buf.getvalue()
+
+    def key(self, level: int, x: int, y: int) -> str:
+        return f"{self.image_id}/image_files/{level}/{x}_{y}.jpg"
+
+    def level_tile_counts(self) -> Dict[int, int]:
+        return dict(Counter(level for level, _, _ in self.tiles))
+
+    def dzi_xml(self) -> bytes:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="jpg" Overlap="0" TileSize="{self.tile_size}">'
+            f'<Size Width="{self.width}" Height="{self.height}"/></Image>'
+        ).encode()
+
+    def manifest(self) -> dict:
+        return {
+            "image_id": self.image_id,
+            "width": self.width,
+            "height": self.height,
+            "tile_size": self.tile_size,
+            "format": "jpg",
+            "available_levels": list(range(self.max_level + 1)),
+            "level_tile_counts": {str(k): v for k, v in self.level_tile_counts().items()},
+        }
+
+
+# ── Storage backends ──────────────────────────────────────────────────────────
+
+
+class LatencyMemoryStore(MemoryTileStore):
+    """:class:`MemoryTileStore` with a simulated round trip per request."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__()
+        self.latency_s = latency_ms / 1000.0
+
+    def read(self, key, bucket=None):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return super().read(key, bucket)
+
+    def write(self, key, data, content_type="application/octet-stream", bucket=None):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        super().write(key, data, content_type, bucket)
+
+
+def open_store(backend: str, latency_ms: float, local_root: Path) -> TileStore:
+    if backend == "memory":
+        return LatencyMemoryStore(latency_ms)
+    if backend == "local":
+        return LocalTileStore(local_root)
+    store = MinioTileStore()
+    store.ensure_bucket()
+    return store
+
+
+def populate(store: TileStore, pyramid: SyntheticPyramid) -> None:
+    """Write *pyramid* in the layout the tiling service produces."""
+    store.write(f"{pyramid.image_id}/image.dzi", pyramid.dzi_xml(), "application/xml")
+    store.write(f"{pyramid.image_id}/manifest.json", json.dumps(pyramid.manifest()).encode(), "application/json")
+    for (level, x, y), data in pyramid.tiles.items():
+        store.write(pyramid.key(level, x, y), data, "image/jpeg")
+
+
+class RequestCounter:
+    """Counts calls to, and bytes through, the storage helpers bound in ``pipeline``."""
+
+    def __init__(self):
+        self.requests: Counter = Counter()
+        self.bytes_downloaded = 0
+        self.bytes_uploaded = 0
+
+    def _wrap(self, name: str, fn: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            self.requests[name] += 1
+            if name == "upload_bytes":
+                self.bytes_uploaded += len(args[0] if args else kwargs["data"])
+            elif name == "upload_json":
+                payload = args[0] if args else kwargs["payload"]
+                self.bytes_uploaded += len(json.dumps(payload, indent=kwargs.get("indent", 2)))
+            result = fn(*args, **kwargs)
+            if isinstance(result, bytes):
+                self.bytes_downloaded += len(result)
+            return result
+
+        return counted
+
+    def install(self) -> None:
+        for name in STORAGE_FUNCTIONS:
+            setattr(pipeline, name, self._wrap(name, getattr(pipeline, name)))
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.bytes_downloaded = self.bytes_uploaded = 0
+
+
+# ── Models ────────────────────────────────────────────────────────────────────
+
+
+def install_models(kind: str) -> dict:
+    if kind == "stub":
+        from tests.fakes import MeanColourEmbedder, stub_classifier
+
+        pipeline._embedder = MeanColourEmbedder()
+        pipeline._classifier = stub_classifier()
+        pipeline._inference_server = None
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            pipeline.preload_models()
+    return pipeline.get_embedder().describe()
+
+
+# ── Runs ──────────────────────────────────────────────────────────────────────
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_once(image_id: str, counter: RequestCounter, analysis_kwargs: dict) -> dict:
+    stages_before = {name: h.snapshot()[1:] for name, h in STAGE_HISTOGRAMS.items()}
+    counter.reset()
+    # Pipeline logging goes to stderr so stdout carries only the report.
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        result = pipeline.run_analysis(None, image_id, **analysis_kwargs)
+        wall_s = time.perf_counter() - start
+
+    stage_totals = {}
+    for name, hist in STAGE_HISTOGRAMS.items():
+        _, total, count = hist.snapshot()
+        total_before, count_before = stages_before[name]
+        stage_totals[name] = {"seconds": round(total - total_before, 4), "count": int(count - count_before)}
+
+    summary = result.summary
+    return {
+        "wall_s": round(wall_s, 3),
+        "tiles_per_s": round(summary.total_tiles / wall_s, 1),
+        "tissue_tiles_per_s": round(summary.tissue_tiles / wall_s, 1),
+        "tile_level": result.tile_level,
+        "total_tiles": summary.total_tiles,
+        "tissue_tiles": summary.tissue_tiles,
+        "flagged_tiles": summary.flagged_tiles,
+        "timings": result.timings,
+        "stage_thread_seconds": stage_totals,
+        "requests": dict(sorted(counter.requests.items())),
+        "bytes_downloaded": counter.bytes_downloaded,
+        "bytes_uploaded": counter.bytes_uploaded,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """One line per headline number: baseline → current (relative change)."""
+    lines = []
+    for key in ("tiles_per_s_median", "tiles_per_s_best", "wall_s_median", "peak_rss_mb"):
+        old, new = baseline["summary"].get(key), report["summary"].get(key)
+        if not old or new is None:
+            continue
+        lines.append(f"{key:>20}: {old} → {new} ({(new - old) / old:+.1%})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=8192)
+    parser.add_argument("--height", type=int, default=6144)
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--tissue-fraction", type=float, default=0.4)
+    parser.add_argument("--tumour-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-id", default="bench-slide")
+    parser.add_argument("--backend", choices=["memory", "local", "minio"], default="memory")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated round trip per request (memory backend)")
+    parser.add_argument("--embedder", choices=["stub", "real"], default="stub")
+    parser.add_argument("--tile-level", type=int, help="default: the full-resolution level")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--prescreen", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--dedup", choices=["off", "exact", "perceptual"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline report to compare against")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    pyramid = SyntheticPyramid(
+        args.image_id, args.width, args.height, args.tile_size,
+        args.tissue_fraction, args.tumour_fraction, args.seed,
+    )
+    build_s = time.perf_counter() - t0
+    print(
+        f"[bench] {len(pyramid.tiles)} tiles over {pyramid.max_level + 1} levels "
+        f"({pyramid.tissue_fraction:.1%} tissue) built in {build_s:.1f}s",
+        file=sys.stderr,
+    )
+
+    local_root = tempfile.TemporaryDirectory(prefix="bench-tiles-")
+    store = open_store(args.backend, args.latency_ms, Path(local_root.name))
+    populate(store, pyramid)
+    set_tile_store(store)
+    counter = RequestCounter()
+    counter.install()
+    model = install_models(args.embedder)
+
+    analysis_kwargs = {
+        "tile_level": pyramid.max_level if args.tile_level is None else args.tile_level,
+        "batch_size": args.batch_size,
+        "prescreen": args.prescreen,
+        "dedup": args.dedup,
+    }
+    for _ in range(args.warmup):
+        run_once(args.image_id, counter, analysis_kwargs)
+    rss_before = _peak_rss_mb()
+    runs = []
+    for i in range(args.repeat):
+        runs.append(run_once(args.image_id, counter, analysis_kwargs))
+        print(f"[bench] run {i + 1}/{args.repeat}: {runs[-1]['tiles_per_s']} tiles/s", file=sys.stderr)
+
+    rates = [r["tiles_per_s"] for r in runs]
+    report = {
+        "benchmark": "pipeline",
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {"node": platform.node(), "machine": platform.machine(), "python": platform.python_version()},
+        "config": {
+            **{k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "model": model,
+            "settings": {
+                name: getattr(settings, name)
+                for name in ("DOWNLOAD_WORKERS", "DOWNLOAD_CHUNK_SIZE", "TISSUE_WORKERS",
+                             "DEFAULT_BATCH_SIZE", "INFERENCE_SERVER_ENABLED")
+            },
+        },
+        "slide": {
+            "width": pyramid.width,
+            "height": pyramid.height,
+            "levels": pyramid.max_level + 1,
+            "tiles": len(pyramid.tiles),
+            "tissue_fraction": round(pyramid.tissue_fraction, 4),
+            "build_s": round(build_s, 2),
+        },
+        "runs": runs,
+        "summary": {
+            "tiles_per_s_median": round(statistics.median(rates), 1) if rates else None,
+            "tiles_per_s_best": max(rates, default=None),
+            "wall_s_median": round(statistics.median(r["wall_s"] for r in runs), 3) if runs else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "peak_rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        },
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+        print(f"[bench] report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        for line in compare(report, json.loads(args.compare.read_text())):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Tile download throughput: SDK client vs. the dedicated fetch clients.
+
+Fetches and decodes ``--tiles`` JPEG tiles three ways:
+
+- ``sdk``: ``Minio.get_object`` + ``resp.read()`` from ``--workers`` threads,
+  i.e. ``download_tile_image`` before :mod:`src.tile_fetch`
+- ``pooled``: ``TileFetchClient`` (pool of ``--workers`` connections, cached
+  signing key, reused read buffers) from ``--workers`` threads
+- ``async``: ``AsyncTileFetcher`` with ``--concurrency`` requests in flight on
+  one thread, then decoding on ``--workers`` threads
+
+By default the tiles are served by the in-process S3 stand-in from the test
+suite with ``--latency-ms`` of delay per response, so the effect of
+connection reuse and concurrency is visible without a MinIO container.  With
+``--endpoint`` the tiles are uploaded under ``bench-fetch/`` in
+``TILES_BUCKET`` of a real server, using the ``MINIO_*`` credentials.
+
+Usage (from services/region-detector):
+    python scripts/benchmark_tile_fetch.py
+    python scripts/benchmark_tile_fetch.py --latency-ms 5 --tiles 5000
+    python scripts/benchmark_tile_fetch.py --endpoint localhost:9000 --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+# Add the service root to the path to allow importing `src` as a package
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import settings  # noqa: E402
+from src.tile_fetch import AsyncTileFetcher, TileFetchClient  # noqa: E402
+from src.tile_store import as_file  # noqa: E402
+
+MODES = ("sdk", "pooled", "async")
+PREFIX = "bench-fetch"
+
+
+def make_tiles(count: int, tile_size: int, distinct: int = 32) -> Dict[str, bytes]:
+    """*count* tile keys cycling over *distinct* noisy JPEG tiles."""
+    rng = np.random.default_rng(0)
+    blobs = []
+    for _ in range(distinct):
+        base = rng.integers(120, 220, 3)
+        pixels = np.clip(base + rng.normal(0, 25, (tile_size, tile_size, 3)), 0, 255).astype(np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, format="JPEG", quality=85)
+        blobs.append(buf.getvalue())
+    cols = max(1, int(count ** 0.5))
+    return {f"{PREFIX}/image_files/12/{i % cols}_{i // cols}.jpeg": blobs[i % distinct] for i in range(count)}
+
+
+def decode(data) -> None:
+    Image.open(as_file(data)).convert("RGB")
+
+
+def run_sdk(endpoint: str, bucket: str, keys: List[str], workers: int) -> None:
+    from minio import Minio
+
+    client = Minio(
+        endpoint,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        region=settings.MINIO_REGION,
+    )
+
+    def fetch(key: str) -> None:
+        resp = client.get_object(bucket, key)
+        try:
+            decode(resp.read())
+        finally:
+            resp.close()
+            resp.release_conn()
+
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(fetch, keys))
+
+
+def run_pooled(endpoint: str, bucket: str, keys: List[str], workers: int) -> None:
+    client = TileFetchClient(
+        endpoint,
+        settings.MINIO_ACCESS_KEY,
+        settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        region=settings.MINIO_REGION,
+        pool_size=workers,
+    )
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda key: decode(client.get(bucket, key)), keys))
+    client.close()
+
+
+def run_async(endpoint: str, bucket: str, keys: List[str], workers: int, concurrency: int) -> None:
+    fetcher = AsyncTileFetcher(
+        endpoint,
+        settings.MINIO_ACCESS_KEY,
+        settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        region=settings.MINIO_REGION,
+        concurrency=concurrency,
+    )
+    # Chunked as in the pipeline: fetch a chunk, then decode it.
+    chunk = settings.DOWNLOAD_CHUNK_SIZE
+    with ThreadPoolExecutor(workers) as pool:
+        for start in range(0, len(keys), chunk):
+            results = fetcher.fetch_many(bucket, keys[start:start + chunk])
+            for r in results:
+                if isinstance(r, Exception):
+                    raise r
+            list(pool.map(decode, results))
+    fetcher.close()
+
+
+def measure(fn: Callable[[], None], tiles: int, nbytes: int, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "seconds": best,
+        "tiles_per_s": tiles / best,
+        "mb_per_s": nbytes / best / 1e6,
+        "runs_s": times,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiles", type=int, default=2000)
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=settings.DOWNLOAD_WORKERS)
+    parser.add_argument("--concurrency", type=int, default=settings.TILE_FETCH_ASYNC_CONCURRENCY)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="per-response delay of the in-process server")
+    parser.add_argument("--endpoint", help="a real S3/MinIO endpoint instead of the in-process server")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    tiles = make_tiles(args.tiles, args.tile_size)
+    keys = list(tiles)
+    nbytes = sum(len(v) for v in tiles.values())
+    bucket = settings.TILES_BUCKET
+
+    with contextlib.ExitStack() as stack:
+        if args.endpoint:
+            from src.tile_store import MinioTileStore
+
+            endpoint = args.endpoint
+            settings.MINIO_ENDPOINT = endpoint
+            store = MinioTileStore(bucket)
+            store.ensure_bucket()
+            for key, data in tiles.items():
+                store.write(key, data, "image/jpeg")
+            server = None
+        else:
+            from tests.fakes import FakeS3Server
+
+            server = stack.enter_context(FakeS3Server(latency_ms=args.latency_ms))
+            for key, data in tiles.items():
+                server.put(bucket, key, data)
+            endpoint = server.endpoint
+
+        runners = {
+            "sdk": lambda: run_sdk(endpoint, bucket, keys, args.workers),
+            "pooled": lambda: run_pooled(endpoint, bucket, keys, args.workers),
+            "async": lambda: run_async(endpoint, bucket, keys, args.workers, args.concurrency),
+        }
+        report = {
+            "config": {
+                "tiles": args.tiles, "tile_bytes": nbytes // max(1, args.tiles), "workers": args.workers,
+                "concurrency": args.concurrency, "repeat": args.repeat,
+                "server": args.endpoint or f"in-process, {args.latency_ms} ms latency",
+            },
+            "modes": {},
+        }
+        for mode in args.modes.split(","):
+            opened = server.connections if server else 0
+            result = measure(runners[mode], len(keys), nbytes, args.repeat)
+            if server:
+                result["connections_per_run"] = (server.connections - opened) / args.repeat
+            report["modes"][mode] = result
+            print(f"[bench] {mode}: {result['tiles_per_s']:.0f} tiles/s", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    base = report["modes"].get("sdk")
+    print(f"{'mode':<8} {'tiles/s':>9} {'MB/s':>8} {'vs sdk':>7} {'conns':>6}")
+    for mode, r in report["modes"].items():
+        speedup = f"{r['tiles_per_s'] / base['tiles_per_s']:.2f}x" if base else "-"
+        conns = f"{r['connections_per_run']:.0f}" if "connections_per_run" in r else "-"
+        print(f"{mode:<8} {r['tiles_per_s']:>9.0f} {r['mb_per_s']:>8.1f} {speedup:>7} {conns:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark tile memory: per-tile PIL images vs the preallocated TileArena.
+
+Decodes ``--tiles`` synthetic H&E-like JPEG tiles in chunks of ``--chunk``
+(as the analysis loop does) and runs tissue detection on each, with:
+
+- ``pil``: the former path — one ``PIL.Image`` per tile kept alive for the
+  whole chunk, plus ``HSV`` and ``L`` converted copies for tissue detection
+- ``arena``: ``TileArena.decode`` into recycled slots and array-based
+  ``detect_tissue``
+
+Each mode runs in a fresh subprocess so peak RSS (``ru_maxrss``) is not
+shared.  Tile-sized buffer allocations are counted by wrapping the calls that
+create them (PIL decodes and conversions, and numpy ``asarray``/``array``
+copies of whole tiles).
+
+Usage (from services/region-detector):
+    python scripts/benchmark_tile_memory.py --tiles 1000
+    python scripts/benchmark_tile_memory.py --tiles 1000 --json
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add the service root to the path to allow importing `src` as a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tile_arena import TileArena  # noqa: E402
+from src.tissue_detector import detect_tissue  # noqa: E402
+
+
+def synthetic_tiles(count: int, tile_px: int, distinct: int = 32) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    encoded = []
+    for _ in range(distinct):
+        base = np.array([200, 120, 170]) + rng.normal(0, 25, size=(tile_px, tile_px, 3))
+        buf = io.BytesIO()
+        Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), "RGB").save(buf, format="JPEG", quality=90)
+        encoded.append(buf.getvalue())
+    return [encoded[i % distinct] for i in range(count)]
+
+
+def legacy_detect(img: Image.Image, threshold=0.15, saturation_floor=30, std_floor=8.0) -> bool:
+    sat = np.array(img.convert("HSV"))[:, :, 1]
+    if float(np.mean(sat > saturation_floor)) >= threshold:
+        return True
+    return float(np.std(np.array(img.convert("L"), dtype=np.float32))) >= std_floor
+
+
+def run_pil(tiles: list[bytes], chunk: int) -> int:
+    kept = 0
+    for start in range(0, len(tiles), chunk):
+        images = [Image.open(io.BytesIO(data)).convert("RGB") for data in tiles[start:start + chunk]]
+        kept += sum(legacy_detect(img) for img in images)
+        for img in images:
+            img.close()
+    return kept
+
+
+def run_arena(tiles: list[bytes], chunk: int, tile_px: int) -> int:
+    arena = TileArena(chunk, tile_px)
+    kept = 0
+    for start in range(0, len(tiles), chunk):
+        slots = []
+        for data in tiles[start:start + chunk]:
+            slot = arena.reserve()
+            slots.append(slot)
+            kept += detect_tissue(arena.decode(slot, data)).is_tissue
+        for slot in slots:
+            arena.release(slot)
+    return kept
+
+
+class AllocationCounter:
+    """Counts decoded/converted PIL images and whole-tile numpy copies."""
+
+    def __init__(self):
+        self.count = 0
+        self._patched = []
+
+    def _wrap(self, owner, name, allocates):
+        """Count calls of ``owner.name`` for which ``allocates(args, result)``."""
+        original = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            fresh = name == "load" and getattr(args[0], "_im", None) is None
+            result = original(*args, **kwargs)
+            if allocates(fresh, result):
+                self.count += 1
+            return result
+
+        self._patched.append((owner, name, original))
+        setattr(owner, name, wrapper)
+
+    def __enter__(self):
+        # load() allocates only on its first call, while the image is undecoded.
+        self._wrap(Image.Image, "load", lambda fresh, _: fresh)
+        self._wrap(Image.Image, "convert", lambda _, __: True)
+        self._wrap(np, "array", lambda _, a: a.ndim >= 2 and a.size >= 4096)
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+
+
+def measure(mode: str, count: int, chunk: int, tile_px: int) -> dict:
+    tiles = synthetic_tiles(count, tile_px)
+    run = (lambda: run_pil(tiles, chunk)) if mode == "pil" else (lambda: run_arena(tiles, chunk, tile_px))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    kept = run()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux.
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with AllocationCounter() as counter:
+        run()
+    return {
+        "mode": mode,
+        "tiles": count,
+        "tissue_tiles": int(kept),
+        "seconds": round(elapsed, 3),
+        "tile_buffers_per_1k": round(counter.count * 1000 / count),
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "peak_rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiles", type=int, default=1000)
+    parser.add_argument("--chunk", type=int, default=256)
+    parser.add_argument("--tile-px", type=int, default=256)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--mode", choices=["pil", "arena"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.tiles, args.chunk, args.tile_px)))
+        return
+
+    results = []
+    for mode in ("pil", "arena"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--tiles", str(args.tiles),
+             "--chunk", str(args.chunk), "--tile-px", str(args.tile_px)],
+            check=True, capture_output=True, text=True,
+        )
+        results.append(json.loads(out.stdout))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(
+            f"{r['mode']:>6}: {r['seconds']:.2f}s  peak RSS {r['peak_rss_mb']} MB "
+            f"(+{r['peak_rss_growth_mb']} MB)  tile buffers/1k tiles {r['tile_buffers_per_1k']}  "
+            f"tissue {r['tissue_tiles']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Evaluate reduced-precision embedding modes (bf16, int8) against fp32.
+
+Runs a held-out tile set through the embedder at every requested precision,
+classifies the embeddings with the trained head and reports, per mode:
+
+- max / mean absolute CLS deviation and minimum cosine similarity vs fp32
+- max absolute tumour-probability deviation vs fp32
+- ROC AUC and AUC delta vs fp32 (when labels are available)
+- embedding throughput and speedup vs fp32
+
+Labels are inferred from the directory layout: tiles under a ``tumor/`` (or
+``1/``) subdirectory are positive, tiles under ``normal/`` (or ``0/``) are
+negative.  Without labelled subdirectories the AUC columns are omitted.
+
+Usage (from services/region-detector):
+    python scripts/evaluate_precision.py --tiles-dir data/heldout --limit 512
+    python scripts/evaluate_precision.py --tiles-dir data/heldout --precisions bf16 int8 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add the service root to the path to allow importing `src` as a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.classifier import Classifier  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.embedder import Embedder, calibration_tiles  # noqa: E402
+from src.embedder_backends import PRECISIONS  # noqa: E402
+
+_POSITIVE = {"tumor", "tumour", "1", "positive"}
+_NEGATIVE = {"normal", "0", "negative"}
+
+
+def load_tiles(tiles_dir: str | None, limit: int) -> tuple[list[Image.Image], np.ndarray | None]:
+    if not tiles_dir:
+        return calibration_tiles(count=limit), None
+
+    images: list[Image.Image] = []
+    labels: list[int] = []
+    for path in sorted(Path(tiles_dir).rglob("*")):
+        if path.suffix.lower() not in {".png", ".jpg", ".jpeg"}:
+            continue
+        parent = path.parent.name.lower()
+        label = 1 if parent in _POSITIVE else 0 if parent in _NEGATIVE else -1
+        images.append(Image.open(path).convert("RGB"))
+        labels.append(label)
+        if len(images) >= limit:
+            break
+
+    if not images:
+        raise SystemExit(f"No tiles found under {tiles_dir}")
+    y = np.array(labels)
+    return images, (y if (y >= 0).all() and len(set(y)) == 2 else None)
+
+
+def _auc(labels: np.ndarray | None, probs: np.ndarray) -> float | None:
+    if labels is None:
+        return None
+    from sklearn.metrics import roc_auc_score
+
+    return float(roc_auc_score(labels, probs))
+
+
+def evaluate(args: argparse.Namespace) -> list[dict]:
+    images, labels = load_tiles(args.tiles_dir, args.limit)
+    classifier = Classifier(args.model_path)
+    classifier.load()
+
+    results: list[dict] = []
+    reference: dict | None = None
+    for precision in ["fp32", *[p for p in args.precisions if p != "fp32"]]:
+        embedder = Embedder(model_name=args.model, backend=args.backend, precision=precision)
+        embedder.embed_batch(images[: args.batch_size], batch_size=args.batch_size)  # warm-up
+
+        start = time.perf_counter()
+        embs = embedder.embed_batch(images, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        probs = classifier.predict_tumor_probability(embs)
+
+        row = {
+            "precision": precision,
+            "backend": embedder.backend,
+            "tiles": len(images),
+            "embed_s": round(elapsed, 3),
+            "tiles_per_s": round(len(images) / elapsed, 2),
+            "auc": _auc(labels, probs),
+        }
+        if reference is None:
+            reference = {"embs": embs, "probs": probs, **row}
+        else:
+            cos = np.sum(embs * reference["embs"], axis=1) / (
+                np.linalg.norm(embs, axis=1) * np.linalg.norm(reference["embs"], axis=1) + 1e-12
+            )
+            row.update(
+                max_abs_cls_diff=float(np.max(np.abs(embs - reference["embs"]))),
+                mean_abs_cls_diff=float(np.mean(np.abs(embs - reference["embs"]))),
+                min_cosine=float(np.min(cos)),
+                max_abs_prob_diff=float(np.max(np.abs(probs - reference["probs"]))),
+                auc_delta=(
+                    row["auc"] - reference["auc"] if row["auc"] is not None else None
+                ),
+                speedup=round(row["tiles_per_s"] / reference["tiles_per_s"], 3),
+            )
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tiles-dir", default=settings.EMBEDDER_CALIBRATION_DIR)
+    parser.add_argument("--limit", type=int, default=256)
+    parser.add_argument("--precisions", nargs="+", default=["bf16", "int8"], choices=PRECISIONS)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--model", default=settings.BACKBONE)
+    parser.add_argument("--model-path", default=settings.MODEL_PATH, help="Classifier .pkl")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    settings.EMBEDDER_PARITY_CHECK = False
+    results = evaluate(args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "n/a"
+
+    print(
+        f"\n{'precision':<10} {'tiles/s':>9} {'speedup':>8} {'max|Δcls|':>10} "
+        f"{'min cos':>8} {'max|Δp|':>8} {'AUC':>7} {'ΔAUC':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['precision']:<10} {r['tiles_per_s']:>9.1f} "
+            f"{fmt(r.get('speedup', 1.0), '>7.2f')}× "
+            f"{fmt(r.get('max_abs_cls_diff', 0.0), '>10.2e')} "
+            f"{fmt(r.get('min_cosine', 1.0), '>8.4f')} "
+            f"{fmt(r.get('max_abs_prob_diff', 0.0), '>8.4f')} "
+            f"{fmt(r['auc'], '>7.4f')} "
+            f"{fmt(r.get('auc_delta', 0.0 if r['auc'] is not None else None), '>+8.4f')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Startup calibration of batch size and worker counts for this host.
+
+``batch_size``, ``DOWNLOAD_WORKERS``, ``DOWNLOAD_CHUNK_SIZE`` and
+``TISSUE_WORKERS`` used to be static, yet their best values depend on the
+core count, memory and MinIO latency of each deployment.  At startup
+:func:`calibrate` measures:
+
+- embedding throughput per batch size (doubling until throughput stops
+  improving, the resident set has grown by more than half the memory
+  ceiling, or the time budget runs out);
+- tile download throughput per worker count, on a sample of tiles already
+  in the bucket (skipped when MinIO has none or is unreachable);
+- tissue-detection throughput per worker count.
+
+Each knob takes the smallest candidate within ``min_gain`` of the best
+tiles/s.  The download chunk is sized to keep every download worker busy
+while its arena (tiles of the sampled slide's size) stays within the other
+half of the ceiling.  Results are stored per host fingerprint (hostname,
+cores, memory and embedder configuration) in ``AUTOTUNE_CACHE_PATH`` and
+reused until they are older than ``AUTOTUNE_MAX_AGE_S``.
+
+Knobs the operator set in the environment (:data:`PINNED`) are neither
+measured nor overwritten.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .config import settings
+
+BATCH_CANDIDATES = (1, 2, 4, 8, 16, 32, 64)
+DOWNLOAD_WORKER_CANDIDATES = (4, 8, 16, 32, 64)
+TISSUE_WORKER_CANDIDATES = (1, 2, 4, 8, 16)
+
+# Settings :func:`apply` may change.
+TUNED_SETTINGS = (
+    "DEFAULT_BATCH_SIZE",
+    "INFERENCE_MAX_BATCH_SIZE",
+    "DOWNLOAD_WORKERS",
+    "DOWNLOAD_CHUNK_SIZE",
+    "TISSUE_WORKERS",
+)
+# Of those, the ones given explicitly (environment or .env) at startup.
+# Captured at import: assigning a setting later also marks it as set.
+PINNED = frozenset(settings.model_fields_set) & frozenset(TUNED_SETTINGS)
+
+# Arena tile side assumed when no slide could be sampled (the DZI default).
+DEFAULT_TILE_PX = 256
+
+
+@dataclass
+class TuningResult:
+    batch_size: int
+    download_workers: int
+    download_chunk_size: int
+    tissue_workers: int
+    host: str
+    calibrated_at: float
+    # Candidate → tiles/s for each knob that was measured.
+    measurements: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    source: str = "calibrated"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def host_fingerprint(embedder_config: Dict[str, Any]) -> str:
+    """Identifies the hardware and model configuration the tuning is valid for."""
+    try:
+        memory_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    except (ValueError, OSError, AttributeError):
+        memory_mb = 0
+    parts = [
+        platform.node(),
+        platform.machine(),
+        f"cpu={os.cpu_count()}",
+        f"mem={memory_mb}",
+        *(f"{k}={v}" for k, v in sorted(embedder_config.items())),
+    ]
+    return "|".join(parts)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process now.
+
+    ``ru_maxrss`` is a lifetime peak: once model loading has pushed it up,
+    batch-size growth below that peak would never show.  It is only the
+    fallback where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as fh:
+            resident_pages = int(fh.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KiB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def pick_best(
+    measure: Callable[[int], float],
+    candidates: Sequence[int],
+    *,
+    min_gain: float = 0.05,
+    deadline: float | None = None,
+    allowed: Callable[[int], bool] = lambda _: True,
+) -> Tuple[int, Dict[str, float]]:
+    """Smallest candidate whose throughput is within *min_gain* of the best.
+
+    Candidates are tried in order.  The search stops once a candidate is
+    *min_gain* slower than the best so far (past the knee), when *allowed*
+    rejects the one just measured, or at *deadline* (``time.monotonic``).
+    """
+    results: Dict[str, float] = {}
+    best = 0.0
+    for candidate in candidates:
+        if deadline is not None and results and time.monotonic() > deadline:
+            break
+        rate = measure(candidate)
+        if not allowed(candidate):
+            break
+        results[str(candidate)] = round(rate, 2)
+        if rate < best * (1.0 - min_gain):
+            break
+        best = max(best, rate)
+    if not results:
+        return candidates[0], results
+    chosen = next(int(c) for c, rate in results.items() if rate >= best * (1.0 - min_gain))
+    return chosen, results
+
+
+def _throughput(fn: Callable[[], int], repeats: int = 2) -> float:
+    """Items/s of the fastest of *repeats* runs (the first doubles as warm-up)."""
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        items = fn()
+        elapsed = time.perf_counter() - start
+        best = max(best, items / elapsed if elapsed > 0 else float("inf"))
+    return best
+
+
+def tune_batch_size(
+    embed_fn: Callable[[List[Any]], Any],
+    tiles: List[Any],
+    memory_mb: float,
+    deadline: float | None = None,
+    min_gain: float = 0.05,
+    candidates: Sequence[int] = BATCH_CANDIDATES,
+    rss_mb: Callable[[], float] = current_rss_mb,
+) -> Tuple[int, Dict[str, float]]:
+    """Batch size with the best embedding tiles/s whose RSS growth fits *memory_mb*."""
+    baseline = rss_mb()
+
+    def measure(batch: int) -> float:
+        sample = [tiles[i % len(tiles)] for i in range(batch)]
+
+        def run() -> int:
+            embed_fn(sample)
+            return batch
+
+        return _throughput(run)
+
+    return pick_best(
+        measure,
+        candidates,
+        min_gain=min_gain,
+        deadline=deadline,
+        allowed=lambda _: rss_mb() - baseline <= memory_mb,
+    )
+
+
+def tune_workers(
+    work_fn: Callable[[Any], Any],
+    items: List[Any],
+    candidates: Sequence[int],
+    deadline: float | None = None,
+    min_gain: float = 0.05,
+) -> Tuple[int, Dict[str, float]]:
+    """Worker count with the best items/s running *work_fn* over *items*."""
+
+    def measure(workers: int) -> float:
+        def run() -> int:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for _ in pool.map(work_fn, items):
+                    pass
+            return len(items)
+
+        return _throughput(run)
+
+    return pick_best(measure, candidates, min_gain=min_gain, deadline=deadline)
+
+
+def chunk_size_for(
+    download_workers: int, batch_size: int, memory_mb: float, tile_px: int = DEFAULT_TILE_PX
+) -> int:
+    """Enough tiles per chunk to keep the workers busy, within *memory_mb* of arena.
+
+    *tile_px* is the decoded tile side (DZI tile size plus twice the overlap).
+    """
+    by_memory = int(memory_mb * 2**20 // (tile_px * tile_px * 3)) - batch_size
+    wanted = max(64, 8 * download_workers)
+    chunk = max(batch_size, min(wanted, by_memory))
+    return max(batch_size, chunk - chunk % batch_size)
+
+
+def calibrate(
+    embed_fn: Callable[[List[Any]], Any],
+    tiles: List[np.ndarray],
+    fetch_fn: Callable[[str], Any] | None,
+    sample_keys: List[str],
+    detect_fn: Callable[[Any], Any],
+    host: str,
+    memory_mb: float,
+    budget_s: float,
+    tile_px: int = DEFAULT_TILE_PX,
+    pinned: Collection[str] = PINNED,
+) -> TuningResult:
+    """Run every measurement; *pinned* or unmeasurable knobs keep their settings."""
+    deadline = time.monotonic() + budget_s
+    measurements: Dict[str, Dict[str, float]] = {}
+
+    batch_size = settings.DEFAULT_BATCH_SIZE
+    if "DEFAULT_BATCH_SIZE" not in pinned:
+        batch_size, measurements["batch_size"] = tune_batch_size(
+            embed_fn, tiles, memory_mb / 2, deadline=deadline
+        )
+
+    download_workers = settings.DOWNLOAD_WORKERS
+    if fetch_fn is not None and sample_keys and "DOWNLOAD_WORKERS" not in pinned:
+        download_workers, measurements["download_workers"] = tune_workers(
+            fetch_fn, sample_keys, DOWNLOAD_WORKER_CANDIDATES, deadline=deadline
+        )
+
+    tissue_workers = settings.TISSUE_WORKERS
+    if "TISSUE_WORKERS" not in pinned:
+        tissue_candidates = [c for c in TISSUE_WORKER_CANDIDATES if c <= (os.cpu_count() or 1)]
+        tissue_workers, measurements["tissue_workers"] = tune_workers(
+            detect_fn, tiles * 8, tissue_candidates or [1], deadline=deadline
+        )
+
+    return TuningResult(
+        batch_size=batch_size,
+        download_workers=download_workers,
+        download_chunk_size=chunk_size_for(
+            download_workers, batch_size, memory_mb / 2, tile_px=tile_px
+        ),
+        tissue_workers=tissue_workers,
+        host=host,
+        calibrated_at=time.time(),
+        measurements=measurements,
+    )
+
+
+def load_cached(path: str, host: str, max_age_s: float) -> TuningResult | None:
+    try:
+        entries = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    entry = entries.get(host) if isinstance(entries, dict) else None
+    if not entry or time.time() - entry.get("calibrated_at", 0) > max_age_s:
+        return None
+    try:
+        result = TuningResult(**entry)
+    except TypeError:
+        return None
+    result.source = "cache"
+    return result
+
+
+def store_cached(path: str, result: TuningResult) -> None:
+    target = Path(path)
+    try:
+        entries = json.loads(target.read_text())
+        if not isinstance(entries, dict):
+            entries = {}
+    except (OSError, ValueError):
+        entries = {}
+    entries[result.host] = result.to_dict()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(json.dumps(entries, indent=2))
+    tmp.replace(target)
+
+
+def apply(result: TuningResult, pinned: Collection[str] = PINNED) -> None:
+    """Make *result* the service-wide defaults.
+
+    The shared inference server keeps AUTOTUNE_SERVER_BATCH_MULTIPLE per-job
+    batches of headroom so it can still merge tiles across jobs.  *pinned*
+    settings are left as they are.
+    """
+    values = {
+        "DEFAULT_BATCH_SIZE": result.batch_size,
+        "DOWNLOAD_WORKERS": result.download_workers,
+        "DOWNLOAD_CHUNK_SIZE": result.download_chunk_size,
+        "TISSUE_WORKERS": result.tissue_workers,
+    }
+    for name, value in values.items():
+        if name not in pinned:
+            setattr(settings, name, value)
+    if "INFERENCE_MAX_BATCH_SIZE" not in pinned:
+        settings.INFERENCE_MAX_BATCH_SIZE = settings.DEFAULT_BATCH_SIZE * max(
+            1, settings.AUTOTUNE_SERVER_BATCH_MULTIPLE
+        )
@@ -0,0 +1,57 @@
+"""Cooperative cancellation and preemption of running analyses.
+
+A :class:`CancellationToken` is shared between the API (``DELETE /jobs/{id}``),
+the executor (preemption) and the job thread, which polls it at safe points:
+after each tile download completes, at chunk boundaries and before each
+embedding batch.  A cancelled job raises :class:`JobCancelled` at the next
+safe point.  A preemption request raises :class:`JobPreempted` only at the
+next chunk boundary, once the tiles analysed so far are checkpointed, so the
+job can later resume where it stopped.
+"""
+
+from __future__ import annotations
+
+import threading
+
+
+class JobCancelled(Exception):
+    """The job was cancelled and must stop without producing results."""
+
+
+class JobPreempted(Exception):
+    """The job yielded its worker to a higher-priority job and will resume."""
+
+
+class CancellationToken:
+    """Thread-safe cancel and preempt flags for one job."""
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._preempt = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def preemption_requested(self) -> bool:
+        return self._preempt.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def request_preemption(self) -> None:
+        self._preempt.set()
+
+    def clear_preemption(self) -> None:
+        self._preempt.clear()
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def chunk_boundary(self) -> None:
+        """Safe point between chunks: honour cancellation, then preemption."""
+        self.raise_if_cancelled()
+        if self._preempt.is_set():
+            raise JobPreempted()
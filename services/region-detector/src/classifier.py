@@ -6,13 +6,20 @@ It is stored as a ``.pkl`` file created with ``joblib.dump()``.
 
 Input:  embedding vector (1-D numpy array, 768-d for dinov2-base)
 Output: ``ClassificationResult`` with label, probability, and class probabilities
+
+Linear heads (``LogisticRegression``, optionally behind a ``StandardScaler``
+in a ``Pipeline``) are reduced at load time to one weight vector and bias, so
+:meth:`Classifier.predict_tumor_probability` is a single matrix-vector
+product and sigmoid over the batch, returning an array instead of per-tile
+objects.  The fused head is only used if it reproduces ``predict_proba`` on
+probe embeddings; any other head goes through sklearn.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import joblib
 import numpy as np
@@ -27,12 +34,55 @@ class ClassificationResult:
     probabilities: Dict[str, float]  # {"Normal": ..., "Tumor": ...}
 
 
+# Max |Δ probability| between the fused head and predict_proba at load time.
+_FUSED_PARITY_ATOL = 1e-6
+
+
+@dataclass
+class LinearHead:
+    """``p(tumour) = sigmoid(x @ weights + bias)``, scaler folded in."""
+
+    weights: np.ndarray  # (embedding_dim,) float64
+    bias: float
+
+    @classmethod
+    def from_estimator(cls, clf) -> Optional["LinearHead"]:
+        """Extract a binary linear head, or ``None`` if *clf* is not one."""
+        steps = [step for _, step in getattr(clf, "steps", [("clf", clf)])]
+        head, transforms = steps[-1], steps[:-1]
+        coef = getattr(head, "coef_", None)
+        intercept = getattr(head, "intercept_", None)
+        if coef is None or intercept is None or not hasattr(head, "predict_proba"):
+            return None
+        if np.ndim(coef) != 2 or coef.shape[0] != 1 or len(getattr(head, "classes_", ())) != 2:
+            return None
+        weights = np.asarray(coef[0], dtype=np.float64)
+        bias = float(np.asarray(intercept).ravel()[0])
+
+        # (x - mean) / scale @ w + b  ==  x @ (w / scale) + (b - mean / scale @ w)
+        for transform in reversed(transforms):
+            if type(transform).__name__ != "StandardScaler":
+                return None
+            scale = getattr(transform, "scale_", None)
+            mean = getattr(transform, "mean_", None)
+            if scale is not None:
+                weights = weights / scale
+            if mean is not None:
+                bias -= float(mean @ weights)
+        return cls(weights=weights, bias=bias)
+
+    def tumor_probability(self, embeddings: np.ndarray) -> np.ndarray:
+        logits = np.asarray(embeddings) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
 class Classifier:
     """Wraps a sklearn classifier head loaded from a joblib file."""
 
     def __init__(self, model_path: str | None = None):
         self.model_path = model_path or settings.MODEL_PATH
         self._clf = None
+        self._head: Optional[LinearHead] = None
 
     def load(self) -> None:
         """Load the model from disk.  Idempotent — only loads once."""
@@ -46,6 +96,33 @@ class Classifier:
             )
         print(f"[Classifier] Loading model from {path}")
         self._clf = joblib.load(path)
+        self._head = self._fuse_linear_head()
+        print(f"[Classifier] Head: {'fused linear' if self._head else 'sklearn'}")
+
+    def _fuse_linear_head(self) -> Optional[LinearHead]:
+        head = LinearHead.from_estimator(self._clf)
+        if head is None:
+            return None
+        rng = np.random.default_rng(0)
+        probe = rng.normal(size=(64, head.weights.shape[0])).astype(np.float32)
+        expected = self._clf.predict_proba(probe)[:, 1]
+        deviation = float(np.max(np.abs(head.tumor_probability(probe) - expected)))
+        if deviation > _FUSED_PARITY_ATOL:
+            print(f"[Classifier] Fused head deviates by {deviation:.2e}; using sklearn.")
+            return None
+        return head
+
+    @property
+    def fused(self) -> bool:
+        return self._head is not None
+
+    def predict_tumor_probability(self, embeddings: np.ndarray) -> np.ndarray:
+        """Tumour probability per row of *embeddings*, shape ``(N,)`` float64."""
+        self.load()
+        if self._head is not None:
+            return self._head.tumor_probability(embeddings)
+        # sklearn class ordering: [Normal=0, Tumor=1]
+        return np.asarray(self._clf.predict_proba(embeddings), dtype=np.float64)[:, 1]
 
     def predict(
         self,
@@ -83,20 +160,20 @@ class Classifier:
         embeddings: np.ndarray,
         threshold: float | None = None,
     ) -> list[ClassificationResult]:
-        """Classify a batch of embedding vectors at once."""
-        self.load()
-        threshold = threshold if threshold is not None else settings.CLASSIFICATION_THRESHOLD
+        """Classify a batch of embedding vectors at once.
 
-        probs = self._clf.predict_proba(embeddings)  # (N, 2)
+        Prefer :meth:`predict_tumor_probability` in hot paths; this builds
+        one result object per row.
+        """
+        threshold = threshold if threshold is not None else settings.CLASSIFICATION_THRESHOLD
         results: list[ClassificationResult] = []
-        for p in probs:
-            tumor_prob = float(p[1])
+        for tumor_prob in self.predict_tumor_probability(embeddings).tolist():
             label = "Tumor" if tumor_prob >= threshold else "Normal"
             results.append(
                 ClassificationResult(
                     label=label,
                     tumor_probability=tumor_prob,
-                    probabilities={"Normal": float(p[0]), "Tumor": tumor_prob},
+                    probabilities={"Normal": 1.0 - tumor_prob, "Tumor": tumor_prob},
                 )
             )
         return results
@@ -0,0 +1,273 @@
+"""Cohort analysis: many slides with identical parameters in one job.
+
+Cohort studies submit hundreds of slides at once.  As separate jobs, each
+small slide ends with a partly filled embedding batch and the executor runs
+at most ``MAX_CONCURRENT_JOBS`` of them, so the model idles between slides.
+:func:`run_cohort` keeps ``slide_workers`` slides in flight inside one job;
+their tiles are embedded through the shared :class:`InferenceServer` under
+the cohort's job id, so tiles from different slides fill the same batches
+and the model stays saturated however large or small each slide is.
+
+Progress of all slides is folded into one ``(done, total)`` stream and the
+per-slide :class:`SlideSummary` rows are written as one columnar ``.npz``
+artifact (plus a JSON summary) under ``cohorts/{job_id}/``.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cancellation import CancellationToken, JobCancelled
+from .minio_io import upload_bytes, upload_json
+from .pipeline import AnalysisResult, ProgressCallback, run_analysis
+
+# ``image_id`` is widened to the longest id of each cohort (see
+# :func:`cohort_dtype`), so ids are never truncated into collisions.
+COHORT_DTYPE = np.dtype([
+    ("image_id", "U1"),
+    ("completed", np.bool_),
+    ("tile_level", np.int16),
+    ("total_tiles", np.int32),
+    ("tissue_tiles", np.int32),
+    ("skipped_tiles", np.int32),
+    ("flagged_tiles", np.int32),
+    ("tumor_area_percentage", np.float32),
+    ("aggregate_score", np.float32),
+    ("max_score", np.float32),
+    ("analysis_s", np.float32),
+])
+# SlideSummary fields copied into the table.
+_SUMMARY_COLUMNS = (
+    "total_tiles",
+    "tissue_tiles",
+    "skipped_tiles",
+    "flagged_tiles",
+    "tumor_area_percentage",
+    "aggregate_score",
+    "max_score",
+)
+
+
+@dataclass
+class CohortSlide:
+    image_id: str
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+    analysis_s: float = 0.0
+
+    @property
+    def completed(self) -> bool:
+        return self.result is not None
+
+
+@dataclass
+class CohortResult:
+    job_id: str
+    slides: List[CohortSlide]
+    summary_key: str
+    table_key: str
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[CohortSlide]:
+        return [s for s in self.slides if not s.completed]
+
+
+def cohort_dtype(image_ids: List[str]) -> np.dtype:
+    """:data:`COHORT_DTYPE` with an ``image_id`` column that fits every id."""
+    width = max([1, *(len(image_id) for image_id in image_ids)])
+    return np.dtype([
+        (name, f"U{width}" if name == "image_id" else COHORT_DTYPE[name])
+        for name in COHORT_DTYPE.names
+    ])
+
+
+def to_columnar(slides: List[CohortSlide]) -> np.ndarray:
+    """One :func:`cohort_dtype` row per slide; failed slides have zeroed metrics."""
+    table = np.zeros(len(slides), dtype=cohort_dtype([s.image_id for s in slides]))
+    for row, slide in zip(table, slides):
+        row["image_id"] = slide.image_id
+        row["analysis_s"] = slide.analysis_s
+        if slide.result is None:
+            continue
+        summary = slide.result.summary
+        row["completed"] = True
+        row["tile_level"] = slide.result.tile_level
+        for name in _SUMMARY_COLUMNS:
+            row[name] = getattr(summary, name)
+    return table
+
+
+def encode(table: np.ndarray, meta: Dict[str, Any]) -> bytes:
+    buf = io.BytesIO()
+    np.savez_compressed(buf, slides=table, meta=np.array(json.dumps(meta)))
+    return buf.getvalue()
+
+
+def decode(data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return npz["slides"], json.loads(str(npz["meta"]))
+
+
+class _CohortProgress:
+    """Sums per-slide ``(done, total)`` reports into one progress stream."""
+
+    def __init__(self, slides: int, progress_cb: ProgressCallback):
+        self.slides = slides
+        self.progress_cb = progress_cb
+        self.finished = 0
+        self._done: Dict[str, int] = {}
+        self._total: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def for_slide(self, image_id: str) -> ProgressCallback:
+        def report(done: int, total: int, msg: str, tile_level: int | None = None) -> None:
+            with self._lock:
+                self._done[image_id] = done
+                self._total[image_id] = total
+            self._emit(f"{image_id}: {msg}")
+
+        return report
+
+    def slide_finished(self, image_id: str) -> None:
+        with self._lock:
+            self.finished += 1
+            self._done[image_id] = self._total.get(image_id, 0)
+        self._emit(f"{self.finished}/{self.slides} slides analysed")
+
+    def _emit(self, msg: str) -> None:
+        if self.progress_cb is None:
+            return
+        with self._lock:
+            done = sum(self._done.values())
+            total = sum(self._total.values())
+            finished = self.finished
+        self.progress_cb(done, total, f"[{finished}/{self.slides} slides] {msg}", None)
+
+
+def run_cohort(
+    job_id: str,
+    image_ids: List[str],
+    *,
+    slide_workers: int = 4,
+    progress_cb: ProgressCallback = None,
+    cancel_token: CancellationToken | None = None,
+    **analysis_kwargs: Any,
+) -> CohortResult:
+    """Analyse every slide in *image_ids* with the same *analysis_kwargs*.
+
+    A slide that fails is recorded with its error and the cohort carries on;
+    cancellation stops every slide and raises :class:`JobCancelled`.
+    """
+    progress = _CohortProgress(len(image_ids), progress_cb)
+    slides = {image_id: CohortSlide(image_id) for image_id in image_ids}
+
+    def analyse(image_id: str) -> None:
+        start = time.perf_counter()
+        try:
+            slides[image_id].result = run_analysis(
+                job_id=job_id,
+                image_id=image_id,
+                progress_cb=progress.for_slide(image_id),
+                cancel_token=cancel_token,
+                **analysis_kwargs,
+            )
+        except JobCancelled:
+            raise
+        except Exception as exc:
+            print(f"[cohort] {job_id}: slide {image_id} failed: {exc}")
+            slides[image_id].error = str(exc)
+        finally:
+            slides[image_id].analysis_s = time.perf_counter() - start
+            progress.slide_finished(image_id)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, slide_workers)) as pool:
+        futures = [pool.submit(analyse, image_id) for image_id in slides]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            if cancel_token is not None:
+                cancel_token.cancel()
+            for future in futures:
+                future.cancel()
+            raise
+    wall_s = time.perf_counter() - t0
+
+    ordered = [slides[image_id] for image_id in image_ids]
+    completed = [s for s in ordered if s.completed]
+    tiles = sum(s.result.summary.total_tiles for s in completed)
+    tissue_tiles = sum(s.result.summary.tissue_tiles for s in completed)
+    timings = {
+        "wall_s": round(wall_s, 3),
+        "tiles_per_s": round(tiles / wall_s, 1) if wall_s else 0.0,
+        "tissue_tiles_per_s": round(tissue_tiles / wall_s, 1) if wall_s else 0.0,
+    }
+
+    prefix = f"cohorts/{job_id}"
+    table_key = f"{prefix}/cohort_summary.npz"
+    summary_key = f"{prefix}/cohort_summary.json"
+    meta = {"job_id": job_id, "slides": len(ordered), "parameters": _jsonable(analysis_kwargs)}
+    upload_bytes(encode(to_columnar(ordered), meta), table_key)
+    upload_json(
+        {
+            "job_id": job_id,
+            "cohort": {
+                "slides": len(ordered),
+                "completed": len(completed),
+                "failed": len(ordered) - len(completed),
+                "total_tiles": tiles,
+                "tissue_tiles": tissue_tiles,
+                "flagged_tiles": sum(s.result.summary.flagged_tiles for s in completed),
+            },
+            "parameters": meta["parameters"],
+            "slides": [_slide_record(s) for s in ordered],
+            "slides_columnar_key": table_key,
+            "timings": timings,
+        },
+        summary_key,
+    )
+    print(
+        f"[cohort] {job_id}: {len(completed)}/{len(ordered)} slides, "
+        f"{tiles} tiles in {wall_s:.1f}s ({timings['tiles_per_s']} tiles/s)"
+    )
+    return CohortResult(
+        job_id=job_id,
+        slides=ordered,
+        summary_key=summary_key,
+        table_key=table_key,
+        timings=timings,
+    )
+
+
+def _slide_record(slide: CohortSlide) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "image_id": slide.image_id,
+        "status": "completed" if slide.completed else "failed",
+        "analysis_s": round(slide.analysis_s, 3),
+    }
+    if slide.result is None:
+        record["error"] = slide.error
+        return record
+    record.update(
+        tile_level=slide.result.tile_level,
+        summary=asdict(slide.result.summary),
+        summary_key=slide.result.summary_key,
+        results_key=slide.result.results_key,
+        heatmap_key=slide.result.heatmap_key,
+    )
+    return record
+
+
+def _jsonable(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in params.items() if isinstance(v, (str, int, float, bool, type(None)))}
+
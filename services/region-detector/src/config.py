@@ -12,15 +12,102 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_SECURE: bool = False
     TILES_BUCKET: str = "histoflow-tiles"
+    MINIO_REGION: str = "us-east-1"
+
+    # ── Tile store ─────────────────────────────────────────────────────
+    # Where tiles and artifacts live: "minio", "local" (a directory laid out
+    # as {bucket}/{object_key}, e.g. a volume shared with the tiling
+    # service; tiles are memory-mapped) or "memory" (tests and benchmarks).
+    TILE_STORE: str = "minio"
+    TILE_STORE_LOCAL_ROOT: str = "/data/tiles"
+
+    # ── Tile fetching ──────────────────────────────────────────────────
+    # MinIO tile GETs use a dedicated keep-alive client (src/tile_fetch.py).
+    # "threads": one GET per download worker over a pool of
+    # TILE_FETCH_POOL_SIZE connections (0 = DOWNLOAD_WORKERS).
+    # "async": each download chunk is fetched by an aiohttp session on one
+    # asyncio thread with up to TILE_FETCH_ASYNC_CONCURRENCY requests in
+    # flight; the download workers only decode.
+    TILE_FETCH_MODE: str = "threads"
+    TILE_FETCH_POOL_SIZE: int = 0
+    TILE_FETCH_ASYNC_CONCURRENCY: int = 256
 
     # ── Model ──────────────────────────────────────────────────────────
     MODEL_PATH: str = "models/dinov2_classifier.pkl"
     BACKBONE: str = "facebook/dinov2-base"
 
+    # ── Embedder inference ─────────────────────────────────────────────
+    # "torch" runs the eager Hugging Face model; "torchscript" and "onnx"
+    # export it once (cached under EMBEDDER_CACHE_DIR) and run the export.
+    EMBEDDER_BACKEND: str = "torch"
+    EMBEDDER_CACHE_DIR: str = "/tmp/region_detector/embedder_cache"
+    # 0 = let the runtime decide.
+    EMBEDDER_INTRA_OP_THREADS: int = 0
+    # Compare the exported backend against the eager model on load and fall
+    # back to eager when the max abs deviation exceeds the tolerance.
+    EMBEDDER_PARITY_CHECK: bool = True
+    EMBEDDER_PARITY_ATOL: float = 1e-3
+    # "fp32" (reference), "bf16" (autocast, torch backend only) or "int8"
+    # (dynamic quantization of linear layers).  Reduced precision is CPU-only.
+    EMBEDDER_PRECISION: str = "fp32"
+    # Guardrail for reduced precision: on startup the tumour probabilities of
+    # the calibration tiles are compared against fp32 and the embedder reverts
+    # to fp32 if any differs by more than this.
+    EMBEDDER_PRECISION_MAX_PROB_DELTA: float = 0.05
+    # Directory of held-out tiles (*.png / *.jpg) used for that comparison.
+    # Seeded synthetic tiles are used when unset.
+    EMBEDDER_CALIBRATION_DIR: str | None = None
+
     # ── Analysis defaults ──────────────────────────────────────────────
     DEFAULT_TILE_LEVEL: int = 12
     TISSUE_THRESHOLD: float = 0.15
     CLASSIFICATION_THRESHOLD: float = 0.5
+    # Until a level yields its first tissue tile, the encoded bytes of
+    # rejected tiles are kept (up to this much) so the forced-content
+    # fallback does not download them again.  0 disables the cache.
+    FALLBACK_TILE_CACHE_MB: float = 64.0
+
+    # ── Hierarchical analysis ──────────────────────────────────────────
+    # Coarse-to-fine mode starts this many levels above the target level
+    # and refines a tile when its probability is >= the refine threshold
+    # or within HIERARCHICAL_UNCERTAINTY of the classification threshold.
+    HIERARCHICAL_LEVEL_STEPS: int = 1
+    HIERARCHICAL_REFINE_THRESHOLD: float = 0.3
+    HIERARCHICAL_UNCERTAINTY: float = 0.15
+    # Parents with a tissue ratio in (0, this) sit on the tissue boundary and
+    # are always refined.
+    HIERARCHICAL_SOLID_TISSUE_RATIO: float = 0.85
+
+    # ── Multi-level jobs ───────────────────────────────────────────────
+    # Build coarser-level tiles by 2×2 averaging of the finest level's
+    # downloaded tiles instead of fetching them (DZI overlap 0 only).
+    MULTILEVEL_DERIVE_TILES: bool = True
+
+    # ── Tissue pre-screen ──────────────────────────────────────────────
+    # Build a tissue mask from a thumbnail level at least
+    # PRESCREEN_LEVEL_OFFSET levels above the analysis level (and at most
+    # PRESCREEN_MAX_TILES tiles); only tiles touching it are downloaded.
+    PRESCREEN_ENABLED: bool = True
+    PRESCREEN_LEVEL_OFFSET: int = 4
+    PRESCREEN_MAX_TILES: int = 16
+    PRESCREEN_SATURATION_FLOOR: int = 30
+    # Safety margin, in thumbnail pixels, added around detected tissue.
+    PRESCREEN_DILATION_PX: int = 2
+
+    # ── Heatmap pyramid ────────────────────────────────────────────────
+    # Also emit the overlay as a DZI pyramid aligned with the slide; levels
+    # stop where one analysis cell spans HEATMAP_DZI_MIN_CELL_PX pixels.
+    HEATMAP_DZI_ENABLED: bool = True
+    HEATMAP_DZI_MIN_CELL_PX: int = 16
+    HEATMAP_DZI_UPLOAD_WORKERS: int = 16
+
+    # ── Tile dedup ─────────────────────────────────────────────────────
+    # "exact" embeds bit-identical tissue tiles once; "perceptual" also folds
+    # tiles whose TILE_DEDUP_GRID² block-mean colours match after
+    # quantisation to TILE_DEDUP_LEVELS steps.  "off" embeds every tile.
+    TILE_DEDUP: str = "off"
+    TILE_DEDUP_GRID: int = 4
+    TILE_DEDUP_LEVELS: int = 16
 
     # ── Worker ─────────────────────────────────────────────────────────
     TEMP_DIR: str = "/tmp/region_detector"
@@ -32,5 +119,65 @@ class Settings(BaseSettings):
     DOWNLOAD_CHUNK_SIZE: int = 256
     TISSUE_WORKERS: int = 8
 
+    # ── Autotuning ─────────────────────────────────────────────────────
+    # Opt-in: calibrate DEFAULT_BATCH_SIZE, DOWNLOAD_WORKERS,
+    # DOWNLOAD_CHUNK_SIZE and TISSUE_WORKERS at startup (see
+    # src/autotune.py); any of them set in the environment is kept.  Results
+    # are cached per host and reused until they are AUTOTUNE_MAX_AGE_S old.
+    AUTOTUNE_ENABLED: bool = False
+    AUTOTUNE_CACHE_PATH: str = "/tmp/region_detector/autotune.json"
+    AUTOTUNE_MAX_AGE_S: int = 30 * 24 * 3600
+    AUTOTUNE_BUDGET_S: float = 60.0
+    # Per-job ceiling split between embedding activations and the tile arena.
+    AUTOTUNE_MEMORY_CEILING_MB: float = 1024.0
+    AUTOTUNE_SAMPLE_TILES: int = 128
+    # Embedding batch size for requests that do not set one.
+    DEFAULT_BATCH_SIZE: int = 16
+    # The tuned INFERENCE_MAX_BATCH_SIZE is this many tuned per-job batches,
+    # leaving the shared server room to merge tiles across jobs.
+    AUTOTUNE_SERVER_BATCH_MULTIPLE: int = 2
+
+    # ── Job execution ──────────────────────────────────────────────────
+    # At most MAX_CONCURRENT_JOBS analyses run at once; queued jobs are
+    # admitted by priority while their estimated memory fits the budget.
+    MAX_CONCURRENT_JOBS: int = 2
+    JOB_MEMORY_BUDGET_MB: float = 4096.0
+    JOB_BASE_MEMORY_MB: float = 512.0
+    JOB_MEMORY_PER_TILE_KB: float = 2.0
+    JOB_STORE_PATH: str = "/tmp/region_detector/jobs.sqlite3"
+    # Finished jobs are evicted from the store after this long.
+    JOB_TTL_SECONDS: int = 7 * 24 * 3600
+    # A queued job may pause a running lower-priority job at its next chunk
+    # boundary; the paused job resumes later from its analysed tiles.
+    PREEMPTION_ENABLED: bool = True
+
+    # ── Cohort jobs ────────────────────────────────────────────────────
+    # POST /jobs/analyze-batch keeps this many slides in flight per job so
+    # their tiles keep the shared inference batches full.
+    COHORT_SLIDE_WORKERS: int = 4
+
+    # ── Results cache ──────────────────────────────────────────────────
+    # Serialised /jobs/{id}/results bodies (plus their gzip/brotli
+    # encodings) kept in memory, LRU-evicted beyond this budget.
+    RESULTS_CACHE_MAX_MB: float = 256.0
+    RESULTS_COMPRESS_MIN_BYTES: int = 1024
+    # Decoded prediction arrays and their spatial index behind
+    # GET /jobs/{id}/predictions, per job, level and artifact.
+    PREDICTION_INDEX_CACHE_MAX_MB: float = 256.0
+
+    # ── Progress events ────────────────────────────────────────────────
+    # GET /jobs/{id}/events (SSE): each subscriber gets at most one update
+    # per interval (newer updates replace pending ones); comments keep idle
+    # streams alive through proxies.
+    EVENTS_MIN_INTERVAL_S: float = 0.5
+    EVENTS_HEARTBEAT_S: float = 15.0
+
+    # ── Inference server ───────────────────────────────────────────────
+    # Route embedding through one in-process worker that batches tiles
+    # across all running jobs (see src/inference_server.py).
+    INFERENCE_SERVER_ENABLED: bool = True
+    INFERENCE_MAX_BATCH_SIZE: int = 32
+    INFERENCE_MAX_WAIT_MS: float = 10.0
+
 
 settings = Settings()
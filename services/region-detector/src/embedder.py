@@ -6,11 +6,18 @@ and batched embedding for GPU efficiency.
 
 The model is loaded **once** at import time (module-level singleton) so
 consecutive calls reuse the same weights.
+
+The forward pass runs through a pluggable backend selected by
+``settings.EMBEDDER_BACKEND`` (see :mod:`src.embedder_backends`): eager
+PyTorch, a cached TorchScript trace, or a cached ONNX export executed by
+ONNX Runtime on CPU.  ``settings.EMBEDDER_PRECISION`` optionally trades a
+little accuracy for CPU throughput (bf16 autocast or dynamic int8).
 """
 
 from __future__ import annotations
 
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List
 
 import numpy as np
 import torch
@@ -18,48 +25,184 @@ from PIL import Image
 from transformers import AutoImageProcessor, AutoModel
 
 from .config import settings
+from .tissue_detector import TileInput
+from .embedder_backends import (
+    BACKENDS,
+    eager_runner,
+    export_cache_path,
+    onnx_runner,
+    torchscript_runner,
+    validate_precision,
+)
 
 
 class Embedder:
     """Thin wrapper around a DINOv2 model for feature extraction."""
 
-    def __init__(self, model_name: str | None = None):
+    def __init__(
+        self,
+        model_name: str | None = None,
+        backend: str | None = None,
+        precision: str | None = None,
+    ):
         self.model_name = model_name or settings.BACKBONE
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.backend = (backend or settings.EMBEDDER_BACKEND).lower()
+        self.precision = (precision or settings.EMBEDDER_PRECISION).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown EMBEDDER_BACKEND {self.backend!r}; expected one of {BACKENDS}"
+            )
+        # ONNX Runtime is only wired up with the CPU execution provider.
+        if self.backend == "onnx" or not torch.cuda.is_available():
+            self.device = "cpu"
+        else:
+            self.device = "cuda"
+        validate_precision(self.backend, self.precision, self.device)
+
+        if settings.EMBEDDER_INTRA_OP_THREADS > 0:
+            torch.set_num_threads(settings.EMBEDDER_INTRA_OP_THREADS)
 
-        print(f"[Embedder] Loading {self.model_name} on {self.device}")
+        print(
+            f"[Embedder] Loading {self.model_name} on {self.device} "
+            f"({self.backend}, {self.precision})"
+        )
         self.processor = AutoImageProcessor.from_pretrained(self.model_name)
         self.model = AutoModel.from_pretrained(self.model_name).to(self.device)
         self.model.eval()
 
+        # fp32 eager runner: the reference for parity and precision checks.
+        self._eager = eager_runner(self.model, self.device)
+        self._runner = self._build_runner(self.backend, self.precision)
+
+        # Reduced precision is expected to deviate; it is guarded on
+        # classifier probabilities instead (see ``pipeline.get_embedder``).
+        if self.backend != "torch" and self.precision == "fp32" and settings.EMBEDDER_PARITY_CHECK:
+            deviation = self.check_parity()
+            if deviation > settings.EMBEDDER_PARITY_ATOL:
+                print(
+                    f"[Embedder] WARNING: {self.backend} backend deviates from eager "
+                    f"by {deviation:.2e} (> {settings.EMBEDDER_PARITY_ATOL:.0e}). "
+                    "Falling back to eager PyTorch."
+                )
+                self.backend = "torch"
+                self._runner = self._eager
+            else:
+                print(f"[Embedder] {self.backend} parity OK (max abs diff {deviation:.2e})")
+
     @property
     def embedding_dim(self) -> int:
         """Dimensionality of the output embedding (768 for dinov2-base)."""
         return self.model.config.hidden_size
 
+    # ── Backend plumbing ──────────────────────────────────────────────
+
+    def _example_input(self, batch: int = 1) -> torch.Tensor:
+        """Dummy ``pixel_values`` with the processor's output geometry."""
+        blank = Image.new("RGB", (256, 256), (255, 255, 255))
+        pixel_values = self.processor(images=[blank], return_tensors="pt")["pixel_values"]
+        return pixel_values.repeat(batch, 1, 1, 1)
+
+    def _build_runner(self, backend: str, precision: str):
+        if backend == "torch":
+            if precision == "fp32":
+                return self._eager
+            return eager_runner(self.model, self.device, precision)
+        cache_path = export_cache_path(
+            self.model, self.model_name, backend, settings.EMBEDDER_CACHE_DIR, tag=precision
+        )
+        example = self._example_input(batch=2)
+        if backend == "torchscript":
+            return torchscript_runner(
+                self.model, self.device, cache_path, example, precision=precision
+            )
+        return onnx_runner(
+            self.model,
+            cache_path,
+            example,
+            intra_op_threads=settings.EMBEDDER_INTRA_OP_THREADS,
+            precision=precision,
+        )
+
+    def use_fp32(self) -> None:
+        """Drop reduced precision and run the backend at full fp32."""
+        if self.precision == "fp32":
+            return
+        self.precision = "fp32"
+        self._runner = self._build_runner(self.backend, "fp32")
+
+    def describe(self) -> Dict[str, Any]:
+        """Backbone / backend / precision, recorded with each analysis."""
+        return {
+            "backbone": self.model_name,
+            "backend": self.backend,
+            "precision": self.precision,
+        }
+
+    def embed_batch_reference(self, images: List[Image.Image]) -> np.ndarray:
+        """fp32 eager embeddings for *images*, regardless of the active mode."""
+        pixel_values = self.processor(images=images, return_tensors="pt")["pixel_values"]
+        return self._eager(pixel_values)
+
+    def _forward(self, images: List[TileInput]) -> np.ndarray:
+        pixel_values = self.processor(images=images, return_tensors="pt")["pixel_values"]
+        return self._runner(pixel_values)
+
+    def check_parity(self, images: List[Image.Image] | None = None) -> float:
+        """Max absolute CLS deviation of the active backend versus eager fp32.
+
+        Uses a handful of seeded synthetic tiles when *images* is omitted.
+        """
+        if images is None:
+            images = calibration_tiles(count=4)
+        pixel_values = self.processor(images=images, return_tensors="pt")["pixel_values"]
+        reference = self._eager(pixel_values)
+        candidate = self._runner(pixel_values)
+        return float(np.max(np.abs(reference - candidate)))
+
     # ── Single image ──────────────────────────────────────────────────
 
-    @torch.no_grad()
     def embed(self, image: Image.Image) -> np.ndarray:
         """Return a 1-D numpy array of shape ``(embedding_dim,)``."""
-        inputs = self.processor(images=image, return_tensors="pt").to(self.device)
-        outputs = self.model(**inputs)
         # CLS token = representative vector for the entire image
-        cls = outputs.last_hidden_state[:, 0]
-        return cls.cpu().numpy().flatten()
+        return self._forward([image]).flatten()
 
     # ── Batched ───────────────────────────────────────────────────────
 
-    @torch.no_grad()
     def embed_batch(
-        self, images: List[Image.Image], batch_size: int = 16
+        self, images: List[TileInput], batch_size: int = 16
     ) -> np.ndarray:
-        """Return array of shape ``(len(images), embedding_dim)``."""
+        """Return array of shape ``(len(images), embedding_dim)``.
+
+        *images* may be PIL images or ``(H, W, 3)`` uint8 arrays (arena views).
+        """
         all_embs: list[np.ndarray] = []
         for i in range(0, len(images), batch_size):
-            batch = images[i : i + batch_size]
-            inputs = self.processor(images=batch, return_tensors="pt").to(self.device)
-            outputs = self.model(**inputs)
-            embs = outputs.last_hidden_state[:, 0].cpu().numpy()
-            all_embs.append(embs)
+            all_embs.append(self._forward(images[i : i + batch_size]))
         return np.vstack(all_embs)
+
+
+def calibration_tiles(directory: str | None = None, count: int = 16) -> List[Image.Image]:
+    """Held-out tiles for precision/parity checks.
+
+    Reads up to *count* ``*.png`` / ``*.jpg`` files from *directory*.  Without
+    a directory, returns seeded synthetic tiles: stain-tinted noise with a
+    white background patch, so both tissue and glass statistics are covered.
+    """
+    if directory:
+        paths = sorted(
+            p for p in Path(directory).rglob("*") if p.suffix.lower() in {".png", ".jpg", ".jpeg"}
+        )[:count]
+        if paths:
+            return [Image.open(p).convert("RGB") for p in paths]
+
+    rng = np.random.default_rng(0)
+    tiles: List[Image.Image] = []
+    for _ in range(count):
+        stain = rng.integers(90, 200, 3)
+        arr = np.clip(
+            stain + rng.normal(0, 25, (256, 256, 3)), 0, 255
+        ).astype(np.uint8)
+        glass = rng.integers(0, 192)
+        arr[glass : glass + 64] = 245
+        tiles.append(Image.fromarray(arr, "RGB"))
+    return tiles
@@ -0,0 +1,240 @@
+"""Inference backends for the DINOv2 embedder.
+
+Every backend takes the ``pixel_values`` tensor produced by the Hugging Face
+image processor and returns the CLS embeddings as a ``(N, embedding_dim)``
+float32 numpy array, so :class:`~src.embedder.Embedder` can swap them freely.
+
+Backends
+--------
+``torch``
+    Eager ``AutoModel`` forward pass (the reference implementation).
+``torchscript``
+    ``torch.jit.trace`` of the CLS-only forward pass.
+``onnx``
+    ONNX export run through ONNX Runtime on CPU with tuned intra-op threads.
+
+Exports are produced once and cached on disk under
+``settings.EMBEDDER_CACHE_DIR``, keyed by the model revision, so restarts and
+additional workers skip the (slow) export step.
+
+Precision
+---------
+``fp32`` is the reference.  ``bf16`` runs the eager model under
+``torch.autocast``; ``int8`` applies dynamic quantization to the linear
+layers (``torch.ao`` for torch/TorchScript, ``onnxruntime.quantization`` for
+ONNX).  Reduced precision is CPU-only and trades a little accuracy for
+throughput; see ``scripts/evaluate_precision.py``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import inspect
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import torch
+
+BACKENDS = ("torch", "torchscript", "onnx")
+PRECISIONS = ("fp32", "bf16", "int8")
+
+# Backends that can run each precision.
+_SUPPORTED = {
+    "fp32": set(BACKENDS),
+    "bf16": {"torch"},
+    "int8": set(BACKENDS),
+}
+
+Runner = Callable[[torch.Tensor], np.ndarray]
+
+
+class _ClsHead(torch.nn.Module):
+    """Expose only the CLS token so exports have a single tensor output."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model(pixel_values=pixel_values).last_hidden_state[:, 0]
+
+
+def model_revision(model: torch.nn.Module) -> str:
+    """Return a stable identifier for the loaded weights.
+
+    Hub checkouts carry their commit hash on the config.  Local directories
+    do not, so fall back to the size and mtime of the weight files.
+    """
+    config = model.config
+    commit = getattr(config, "_commit_hash", None)
+    if commit:
+        return str(commit)
+
+    source = Path(str(getattr(config, "name_or_path", "") or ""))
+    if source.is_dir():
+        parts = [
+            f"{p.name}:{p.stat().st_size}:{int(p.stat().st_mtime)}"
+            for p in sorted(source.iterdir())
+            if p.suffix in {".safetensors", ".bin", ".json"}
+        ]
+        if parts:
+            return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+    return "unversioned"
+
+
+def export_cache_path(
+    model: torch.nn.Module,
+    model_name: str,
+    backend: str,
+    cache_dir: str,
+    tag: str = "fp32",
+) -> Path:
+    """Location of the cached export for *model* under *cache_dir*."""
+    key = "|".join([model_name, model_revision(model), backend, tag, torch.__version__])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    safe_name = model_name.strip("/").replace("/", "--")
+    suffix = ".onnx" if backend == "onnx" else ".pt"
+    return Path(cache_dir) / f"{safe_name}-{backend}-{tag}-{digest}{suffix}"
+
+
+def validate_precision(backend: str, precision: str, device: str) -> None:
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unknown EMBEDDER_PRECISION {precision!r}; expected one of {PRECISIONS}"
+        )
+    if backend not in _SUPPORTED[precision]:
+        raise ValueError(f"EMBEDDER_PRECISION={precision} is not supported by the {backend} backend")
+    if precision != "fp32" and device != "cpu":
+        raise ValueError(f"EMBEDDER_PRECISION={precision} is only supported on CPU")
+
+
+def _quantize_linear(module: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization of every ``nn.Linear``; returns a copy."""
+    return torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _atomic_target(path: Path) -> Path:
+    """Temporary sibling of *path*; renamed into place once fully written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    return Path(tmp)
+
+
+# ── Runners ──────────────────────────────────────────────────────────────────
+
+
+def eager_runner(model: torch.nn.Module, device: str, precision: str = "fp32") -> Runner:
+    head = _ClsHead(model).eval()
+    if precision == "int8":
+        head = _quantize_linear(head)
+
+    def autocast():
+        if precision == "bf16":
+            return torch.autocast(device_type=device, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    @torch.no_grad()
+    def run(pixel_values: torch.Tensor) -> np.ndarray:
+        with autocast():
+            return head(pixel_values.to(device)).float().cpu().numpy()
+
+    return run
+
+
+def torchscript_runner(
+    model: torch.nn.Module,
+    device: str,
+    cache_path: Path,
+    example: torch.Tensor,
+    precision: str = "fp32",
+) -> Runner:
+    if not cache_path.exists():
+        print(f"[Embedder] Tracing TorchScript export → {cache_path}")
+        head = _ClsHead(model).eval()
+        if precision == "int8":
+            head = _quantize_linear(head)
+        with torch.no_grad():
+            traced = torch.jit.trace(head, example.to(device), check_trace=False)
+        tmp = _atomic_target(cache_path)
+        traced.save(str(tmp))
+        os.replace(tmp, cache_path)
+
+    scripted = torch.jit.load(str(cache_path), map_location=device)
+    scripted.eval()
+
+    @torch.no_grad()
+    def run(pixel_values: torch.Tensor) -> np.ndarray:
+        return scripted(pixel_values.to(device)).float().cpu().numpy()
+
+    return run
+
+
+def _legacy_onnx_exporter() -> dict:
+    """Keyword that selects the TorchScript-based ONNX exporter.
+
+    torch >= 2.5 has a ``dynamo`` switch (the default flips to the dynamo
+    exporter in later releases); older versions only have the TorchScript
+    exporter and reject the keyword.
+    """
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        return {"dynamo": False}
+    return {}
+
+
+def onnx_runner(
+    model: torch.nn.Module,
+    cache_path: Path,
+    example: torch.Tensor,
+    intra_op_threads: int = 0,
+    precision: str = "fp32",
+) -> Runner:
+    try:
+        import onnxruntime as ort
+    except ImportError as exc:  # pragma: no cover - depends on the image
+        raise RuntimeError(
+            "EMBEDDER_BACKEND=onnx requires the 'onnxruntime' package"
+        ) from exc
+
+    if not cache_path.exists():
+        print(f"[Embedder] Exporting ONNX graph → {cache_path}")
+        head = _ClsHead(model).eval()
+        tmp = _atomic_target(cache_path)
+        fp32_path = tmp.with_suffix(".fp32.onnx") if precision == "int8" else tmp
+        with torch.no_grad():
+            torch.onnx.export(
+                head,
+                (example.cpu(),),
+                str(fp32_path),
+                input_names=["pixel_values"],
+                output_names=["cls"],
+                dynamic_axes={"pixel_values": {0: "batch"}, "cls": {0: "batch"}},
+                opset_version=17,
+                **_legacy_onnx_exporter(),
+            )
+        if precision == "int8":
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(str(fp32_path), str(tmp), weight_type=QuantType.QInt8)
+            fp32_path.unlink(missing_ok=True)
+        os.replace(tmp, cache_path)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads > 0:
+        options.intra_op_num_threads = intra_op_threads
+    session = ort.InferenceSession(
+        str(cache_path), sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+    def run(pixel_values: torch.Tensor) -> np.ndarray:
+        feed = {"pixel_values": pixel_values.cpu().numpy().astype(np.float32, copy=False)}
+        return session.run(["cls"], feed)[0]
+
+    return run
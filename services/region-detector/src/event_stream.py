@@ -0,0 +1,223 @@
+"""In-process broadcast of job progress to Server-Sent Events subscribers.
+
+Pipeline threads call :meth:`EventHub.publish`, which only records the event
+and hands it to each subscriber's event loop with ``call_soon_threadsafe`` —
+no network I/O and no waiting on slow clients.  A subscriber keeps just the
+newest pending event (older ones are coalesced away) and is sent at most one
+every ``min_interval_s``, so a fast job cannot flood a viewer and any number
+of viewers cost the job nothing beyond one dict copy per update.  Terminal
+events are never coalesced away or delayed.
+
+:class:`BackendNotifier` does the same for the backend's job-event webhook:
+callers enqueue, and one background thread does the blocking POSTs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set
+
+# Reconnect delay suggested to EventSource clients after a dropped stream.
+_RETRY_MS = 3000
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    seq: int
+    name: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    terminal: bool = False
+
+
+def format_sse(event: JobEvent) -> str:
+    return f"id: {event.seq}\nevent: {event.name}\ndata: {json.dumps(event.data)}\n\n"
+
+
+class Subscription:
+    """One viewer of one job; all methods run on the subscriber's event loop."""
+
+    def __init__(self, job_id: str, loop: asyncio.AbstractEventLoop, min_interval_s: float):
+        self.job_id = job_id
+        self.loop = loop
+        self.min_interval_s = min_interval_s
+        self._pending: Optional[JobEvent] = None
+        self._wake = asyncio.Event()
+        self._last_sent = float("-inf")
+
+    @property
+    def has_pending(self) -> bool:
+        return self._pending is not None
+
+    def offer(self, event: JobEvent) -> None:
+        # A terminal event is final: later or reordered updates must not hide it.
+        if self._pending is not None and self._pending.terminal and not event.terminal:
+            return
+        self._pending = event
+        self._wake.set()
+
+    async def next(self, timeout: float) -> Optional[JobEvent]:
+        """Next event, rate-limited; ``None`` after *timeout* seconds without one."""
+        if self._pending is None:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        delay = self._last_sent + self.min_interval_s - self.loop.time()
+        if delay > 0 and not self._pending.terminal:
+            # Updates arriving meanwhile replace the pending one.
+            await asyncio.sleep(delay)
+        event, self._pending = self._pending, None
+        self._last_sent = self.loop.time()
+        return event
+
+
+class EventHub:
+    """Latest event per job plus the subscriptions watching it.
+
+    ``publish`` is thread-safe; ``subscribe`` must be called from a running
+    event loop.  The last event of up to *max_retained* jobs is kept so a
+    viewer that connects mid-job starts from the current state.
+    """
+
+    def __init__(self, min_interval_s: float = 0.5, max_retained: int = 1024):
+        self.min_interval_s = min_interval_s
+        self.max_retained = max_retained
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._latest: "OrderedDict[str, JobEvent]" = OrderedDict()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._published = 0
+
+    def make_event(self, name: str, data: Dict[str, Any], terminal: bool = False) -> JobEvent:
+        with self._lock:
+            return JobEvent(next(self._seq), name, dict(data), terminal)
+
+    def publish(self, job_id: str, name: str, data: Dict[str, Any], terminal: bool = False) -> None:
+        with self._lock:
+            event = JobEvent(next(self._seq), name, dict(data), terminal)
+            self._latest[job_id] = event
+            self._latest.move_to_end(job_id)
+            while len(self._latest) > self.max_retained:
+                self._latest.popitem(last=False)
+            self._published += 1
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:  # the subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+    def latest(self, job_id: str) -> Optional[JobEvent]:
+        with self._lock:
+            return self._latest.get(job_id)
+
+    def subscribe(self, job_id: str) -> Subscription:
+        """Register a viewer, primed with the job's latest event if any."""
+        subscription = Subscription(job_id, asyncio.get_running_loop(), self.min_interval_s)
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+            latest = self._latest.get(job_id)
+        if latest is not None:
+            subscription.offer(latest)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.job_id]
+
+    async def stream(self, subscription: Subscription, heartbeat_s: float) -> AsyncIterator[str]:
+        """SSE body for *subscription*; ends after the terminal event."""
+        try:
+            yield f"retry: {_RETRY_MS}\n\n"
+            while True:
+                event = await subscription.next(heartbeat_s)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+                if event.terminal:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "jobs_watched": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "events_published": self._published,
+            }
+
+
+class BackendNotifier:
+    """Sends job events to the backend from one background thread.
+
+    :meth:`submit` never blocks on the network.  Events of a job are sent in
+    submission order; a progress event (``coalesce=True``) replaces that
+    job's progress event still waiting in the queue, so a slow backend sees
+    the latest progress instead of a growing backlog.  Other events are
+    never dropped or merged.
+    """
+
+    def __init__(self, post: Callable[[str, Dict[str, Any]], None]):
+        self._post = post
+        self._cond = threading.Condition()
+        self._queue: Deque[List[Any]] = deque()
+        # Each job's queued progress entry, updated in place by newer progress.
+        self._progress: Dict[str, List[Any]] = {}
+        self._sending = False
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.coalesced = 0
+
+    def submit(self, job_id: str, payload: Dict[str, Any], coalesce: bool = False) -> None:
+        with self._cond:
+            entry = self._progress.get(job_id) if coalesce else None
+            if entry is not None:
+                entry[1] = payload
+                self.coalesced += 1
+                return
+            entry = [job_id, payload]
+            self._queue.append(entry)
+            if coalesce:
+                self._progress[job_id] = entry
+            else:
+                # Progress submitted after this event must be sent after it.
+                self._progress.pop(job_id, None)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="backend-notifier", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued event has been sent; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._sending, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                job_id, payload = entry = self._queue.popleft()
+                if self._progress.get(job_id) is entry:
+                    del self._progress[job_id]
+                self._sending = True
+            try:
+                self._post(job_id, payload)
+            except Exception as exc:  # a notifier failure must not stop later events
+                print(f"[analysis] Backend notify failed for {job_id}: {exc}")
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self.sent += 1
+                    self._cond.notify_all()
@@ -4,6 +4,9 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
 
 
 @dataclass
@@ -56,3 +59,38 @@ def tile_rect_in_fullres(
     height = max(0, min(height, shape.height - pixel_y))
 
     return pixel_x, pixel_y, width, height
+
+
+def tile_rects_in_fullres(
+    *,
+    shape: DZIShape,
+    tile_level: int,
+    max_level: int,
+    tile_x: np.ndarray,
+    tile_y: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised :func:`tile_rect_in_fullres` for arrays of tile coordinates.
+
+    Returns: int64 arrays (pixel_x, pixel_y, width, height).
+    """
+    if tile_level > max_level:
+        raise ValueError(f"tile_level {tile_level} exceeds max_level {max_level}")
+
+    scale = 2 ** (max_level - tile_level)
+
+    level_width = int(math.ceil(shape.width / scale))
+    level_height = int(math.ceil(shape.height / scale))
+
+    level_px = np.asarray(tile_x, dtype=np.int64) * shape.tile_size
+    level_py = np.asarray(tile_y, dtype=np.int64) * shape.tile_size
+
+    level_w = np.clip(level_width - level_px, 0, shape.tile_size)
+    level_h = np.clip(level_height - level_py, 0, shape.tile_size)
+
+    pixel_x = level_px * scale
+    pixel_y = level_py * scale
+    width = np.maximum(0, np.minimum(level_w * scale, shape.width - pixel_x))
+    height = np.maximum(0, np.minimum(level_h * scale, shape.height - pixel_y))
+
+    return pixel_x, pixel_y, width, height
@@ -5,38 +5,53 @@ The output is a semi-transparent PNG where:
     Green/Blue  → low tumour probability
     Transparent → non-tissue (background / glass)
 
-Two rendering modes:
+Three rendering modes:
 
 * **Pixel-accurate** (default when image dimensions are provided): each tile
   cell is painted at its exact full-resolution pixel extent (``pixel_x``,
-  ``pixel_y``, ``width``, ``height`` from TilePrediction).  This aligns the
+  ``pixel_y``, ``width``, ``height`` from the tile predictions).  This aligns the
   heatmap perfectly with the region-box overlays rendered by the viewer,
   which use the same coordinate space.  Used for images whose total pixel
   count is ≤ ``MAX_FULLRES_PIXELS`` (default 25 MP).
 
+* **Aligned downscaled**: the same cell geometry rendered at
+  ``output_scale`` (< 1).  Cell boundaries are the full-resolution
+  boundaries scaled to the output, so the overlay still lines up with the
+  region boxes when stretched over the canvas.  Used for larger images
+  (automatically sized to ``MAX_DOWNSCALED_PIXELS``) or when
+  ``output_scale`` is passed explicitly.
+
 * **Grid fallback**: a compact 1-pixel-per-cell image that is stretched to
-  cover the image canvas.  Used for very large slides where rendering at
-  full resolution would be impractical.  Slight cell-boundary drift occurs at
-  edge tiles, but this is acceptable for large pathology slides where the
-  analysis level tiles are many pixels in full-res space.
+  cover the image canvas.  Used when no tile cells are given.  Slight
+  cell-boundary drift occurs at edge tiles.
+
+Colours come from a 256-entry lookup table built once per colour map and
+applied with NumPy indexing, so rendering cost no longer scales with a
+Python-level call per cell.
 """
 
 from __future__ import annotations
 
 import io
+import math
 from dataclasses import dataclass
-from typing import List, Optional, Sequence
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple, Union
 
 import matplotlib
-import matplotlib.cm as cm
 import numpy as np
 from PIL import Image
 
 # Use a non-interactive backend so we don't need a display
 matplotlib.use("Agg")
 
-# Images above this pixel count fall back to the compact grid rendering.
+# Images above this pixel count are rendered aligned-downscaled instead of
+# at full resolution.
 MAX_FULLRES_PIXELS = 25_000_000  # 25 MP
+# Larger images are rendered aligned-downscaled to at most this many pixels.
+MAX_DOWNSCALED_PIXELS = 4_000_000  # 4 MP
+
+SKIPPED_RGB = (128, 128, 128)
 
 
 @dataclass
@@ -50,6 +65,135 @@ class TileCell:
     tumor_probability: float  # -1.0 = skipped/non-tissue, 0-1 = classified
 
 
+@dataclass
+class TileCellArrays:
+    """Many :class:`TileCell` s as one array per field, e.g. columns of the predictions."""
+
+    pixel_x: np.ndarray
+    pixel_y: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    tumor_probability: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pixel_x)
+
+
+TileCells = Union[Sequence[TileCell], TileCellArrays]
+
+
+@lru_cache(maxsize=16)
+def colormap_lut(colormap: str) -> np.ndarray:
+    """``(256, 3)`` uint8 RGB table for *colormap*.
+
+    Matches ``int(c * 255)`` of ``cmap(prob)`` exactly: matplotlib itself
+    quantises float inputs to 256 bins before the lookup.
+    """
+    cmap = matplotlib.colormaps[colormap].resampled(256)
+    rgb = cmap(np.arange(256))[:, :3]
+    lut = (rgb * 255).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+
+def colorize(
+    probs: np.ndarray,
+    colormap: str = "RdYlGn_r",
+    alpha: int = 160,
+    skipped_alpha: int = 25,
+) -> np.ndarray:
+    """Map an array of probabilities (``-1`` = skipped) to RGBA uint8."""
+    probs = np.asarray(probs, dtype=np.float64)
+    lut = colormap_lut(colormap)
+    idx = np.clip((probs * 256).astype(np.int64), 0, 255)
+
+    rgba = np.empty(probs.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = lut[idx]
+    rgba[..., 3] = alpha
+    skipped = probs < 0
+    rgba[skipped] = (*SKIPPED_RGB, skipped_alpha) if skipped_alpha > 0 else (0, 0, 0, 0)
+    return rgba
+
+
+def _cell_arrays(tile_cells: TileCells) -> Tuple[np.ndarray, ...]:
+    if isinstance(tile_cells, TileCellArrays):
+        return (
+            np.asarray(tile_cells.pixel_x, dtype=np.int64),
+            np.asarray(tile_cells.pixel_y, dtype=np.int64),
+            np.asarray(tile_cells.width, dtype=np.int64),
+            np.asarray(tile_cells.height, dtype=np.int64),
+            np.asarray(tile_cells.tumor_probability, dtype=np.float64),
+        )
+    xs = np.fromiter((c.pixel_x for c in tile_cells), dtype=np.int64, count=len(tile_cells))
+    ys = np.fromiter((c.pixel_y for c in tile_cells), dtype=np.int64, count=len(tile_cells))
+    ws = np.fromiter((c.width for c in tile_cells), dtype=np.int64, count=len(tile_cells))
+    hs = np.fromiter((c.height for c in tile_cells), dtype=np.int64, count=len(tile_cells))
+    probs = np.fromiter(
+        (c.tumor_probability for c in tile_cells), dtype=np.float64, count=len(tile_cells)
+    )
+    return xs, ys, ws, hs, probs
+
+
+def render_cells(
+    tile_cells: TileCells,
+    image_width: int,
+    image_height: int,
+    output_scale: float = 1.0,
+    colormap: str = "RdYlGn_r",
+    alpha: int = 160,
+    skipped_alpha: int = 25,
+) -> np.ndarray:
+    """Paint *tile_cells* onto an RGBA canvas of the image scaled by *output_scale*.
+
+    Output pixel ``(i, j)`` takes the colour of the cell containing the
+    full-resolution point at its centre, so at ``output_scale=1`` this is
+    identical to painting every cell rectangle, and at smaller scales the
+    boundaries stay where the full-resolution ones fall.  Cells that tile a
+    rectilinear grid (every analysis level does) are resolved with two
+    ``searchsorted`` calls; anything else is painted cell by cell.
+    """
+    out_w = max(1, int(math.ceil(image_width * output_scale)))
+    out_h = max(1, int(math.ceil(image_height * output_scale)))
+    rgba = np.zeros((out_h, out_w, 4), dtype=np.uint8)
+    if len(tile_cells) == 0:
+        return rgba
+
+    xs, ys, ws, hs, probs = _cell_arrays(tile_cells)
+    x1 = np.minimum(xs + ws, image_width)
+    y1 = np.minimum(ys + hs, image_height)
+    colours = colorize(probs, colormap, alpha, skipped_alpha)
+
+    col_edges = np.unique(np.concatenate([xs, x1]))
+    row_edges = np.unique(np.concatenate([ys, y1]))
+    ci = np.searchsorted(col_edges, xs)
+    ri = np.searchsorted(row_edges, ys)
+    on_grid = np.all(np.searchsorted(col_edges, x1) - ci == 1) and np.all(
+        np.searchsorted(row_edges, y1) - ri == 1
+    )
+
+    centres_x = (np.arange(out_w) + 0.5) / output_scale
+    centres_y = (np.arange(out_h) + 0.5) / output_scale
+
+    if on_grid:
+        cell_rgba = np.zeros((len(row_edges), len(col_edges), 4), dtype=np.uint8)
+        cell_rgba[ri, ci] = colours
+        # Index len(edges) - 1 (and -1 → clipped below) is a transparent gap.
+        col_of = np.searchsorted(col_edges, centres_x, side="right") - 1
+        row_of = np.searchsorted(row_edges, centres_y, side="right") - 1
+        col_of = np.where(col_of < 0, len(col_edges) - 1, col_of)
+        row_of = np.where(row_of < 0, len(row_edges) - 1, row_of)
+        # Gather whole RGBA pixels as uint32, rows first then columns.
+        packed = cell_rgba.view(np.uint32)[..., 0]
+        out = np.ascontiguousarray(packed[row_of][:, col_of])
+        return out.view(np.uint8).reshape(out_h, out_w, 4)
+
+    for x0, y0, cx1, cy1, colour in zip(xs, ys, x1, y1, colours):
+        j0, j1 = np.searchsorted(centres_x, [x0, cx1])
+        i0, i1 = np.searchsorted(centres_y, [y0, cy1])
+        rgba[i0:i1, j0:j1] = colour
+    return rgba
+
+
 def generate_heatmap(
     grid: np.ndarray,
     tile_size: int = 256,
@@ -60,7 +204,8 @@ def generate_heatmap(
     # Pixel-accurate rendering — pass these for correct alignment:
     image_width: Optional[int] = None,
     image_height: Optional[int] = None,
-    tile_cells: Optional[Sequence[TileCell]] = None,
+    tile_cells: Optional[TileCells] = None,
+    output_scale: Optional[float] = None,
 ) -> Image.Image:
     """Create a colour-mapped overlay from a probability grid.
 
@@ -85,55 +230,42 @@ def generate_heatmap(
         Full-resolution dimensions of the source image.  Required for
         pixel-accurate rendering.
     tile_cells:
-        Sequence of :class:`TileCell` objects describing each tile's exact
-        full-resolution pixel extent and probability.  Required for
-        pixel-accurate rendering.
+        Sequence of :class:`TileCell` objects (or one :class:`TileCellArrays`)
+        describing each tile's exact full-resolution pixel extent and
+        probability.  Required for pixel-accurate rendering.
+    output_scale:
+        Render the tile cells at this fraction of full resolution (aligned
+        downscaled mode).  Defaults to 1 up to ``MAX_FULLRES_PIXELS`` and to
+        the scale that fits ``MAX_DOWNSCALED_PIXELS`` above it.
 
     Returns
     -------
     PIL.Image.Image
         RGBA image.
     """
-    cmap = cm.get_cmap(colormap)
-
-    # ── Pixel-accurate mode ───────────────────────────────────────────────────
-    if (
-        image_width is not None
-        and image_height is not None
-        and tile_cells is not None
-        and image_width * image_height <= MAX_FULLRES_PIXELS
-    ):
-        rgba = np.zeros((image_height, image_width, 4), dtype=np.uint8)
-        for cell in tile_cells:
-            px0 = cell.pixel_x
-            py0 = cell.pixel_y
-            px1 = min(px0 + cell.width, image_width)
-            py1 = min(py0 + cell.height, image_height)
-            prob = cell.tumor_probability
-            if prob < 0:
-                if skipped_alpha > 0:
-                    rgba[py0:py1, px0:px1] = [128, 128, 128, skipped_alpha]
-            else:
-                r, g, b, _ = cmap(prob)
-                rgba[py0:py1, px0:px1] = [
-                    int(r * 255), int(g * 255), int(b * 255), alpha
-                ]
+    # ── Pixel-accurate / aligned downscaled mode ──────────────────────────────
+    if image_width is not None and image_height is not None and tile_cells is not None:
+        if output_scale is None:
+            pixels = image_width * image_height
+            output_scale = (
+                1.0
+                if pixels <= MAX_FULLRES_PIXELS
+                else math.sqrt(MAX_DOWNSCALED_PIXELS / pixels)
+            )
+        rgba = render_cells(
+            tile_cells,
+            image_width,
+            image_height,
+            output_scale=output_scale,
+            colormap=colormap,
+            alpha=alpha,
+            skipped_alpha=skipped_alpha,
+        )
         return Image.fromarray(rgba, "RGBA")
 
     # ── Grid fallback ─────────────────────────────────────────────────────────
     rows, cols = grid.shape
-    rgba = np.zeros((rows, cols, 4), dtype=np.uint8)
-    for y in range(rows):
-        for x in range(cols):
-            prob = grid[y, x]
-            if prob < 0:
-                if skipped_alpha > 0:
-                    rgba[y, x] = [128, 128, 128, skipped_alpha]
-                continue
-            r, g, b, _ = cmap(prob)
-            rgba[y, x] = [int(r * 255), int(g * 255), int(b * 255), alpha]
-
-    img = Image.fromarray(rgba, "RGBA")
+    img = Image.fromarray(colorize(grid, colormap, alpha, skipped_alpha), "RGBA")
     if upscale:
         img = img.resize(
             (cols * tile_size, rows * tile_size), Image.Resampling.NEAREST
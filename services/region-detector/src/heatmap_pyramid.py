@@ -0,0 +1,218 @@
+"""Heatmap overlay as a Deep Zoom (DZI) tile pyramid.
+
+A single heatmap PNG is either stretched (and misaligned) on large slides or
+very large.  :func:`build_heatmap_pyramid` instead writes the overlay as
+``heatmap.dzi`` plus ``heatmap_files/{level}/{x}_{y}.png`` with the same tile
+size and level numbering as the slide's own pyramid, so a viewer can stream
+it at any zoom exactly like the slide.
+
+Tiles are rendered on demand from the analysis-level probability grid —
+each output pixel looks up the analysis cell it falls in — so the full
+overlay is never materialised.  Pyramid levels stop at
+:func:`deepest_heatmap_level`, where one analysis cell already spans
+``min_cell_px`` pixels.  The descriptor therefore declares the size of
+that level (the slide size divided by ``2**level_offset``), so a standard
+viewer never asks for deeper levels; placed over the slide with the slide's
+width, it magnifies the deepest level further.
+
+Fully transparent tiles are not uploaded.  They are listed in
+``heatmap_manifest.json`` together with the key of one shared transparent
+tile, which clients load instead of requesting a listed tile.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .geometry import DZIShape, max_dzi_level
+from .heatmap import colorize
+
+UploadFn = Callable[[bytes, str, str], None]
+
+DZI_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+    'Format="png" Overlap="0" TileSize="{tile_size}">\n'
+    '  <Size Width="{width}" Height="{height}"/>\n'
+    "</Image>\n"
+)
+
+
+@dataclass
+class HeatmapPyramidResult:
+    dzi_key: str
+    manifest_key: str
+    max_level: int
+    transparent_tile_key: str
+    tiles_uploaded: int
+    tiles_skipped: int
+
+
+def deepest_heatmap_level(tile_level: int, tile_size: int, min_cell_px: int) -> int:
+    """Finest level at which an analysis cell still spans >= *min_cell_px* pixels."""
+    extra = int(math.floor(math.log2(max(1, tile_size // max(1, min_cell_px)))))
+    return max(0, tile_level - extra)
+
+
+class HeatmapTileRenderer:
+    """Renders individual heatmap pyramid tiles from a probability grid."""
+
+    def __init__(
+        self,
+        prob_grid: np.ndarray,
+        shape: DZIShape,
+        tile_level: int,
+        colormap: str = "RdYlGn_r",
+        alpha: int = 160,
+        skipped_alpha: int = 0,
+    ):
+        self.shape = shape
+        self.tile_level = tile_level
+        self.max_level = max_dzi_level(shape)
+        self.rows, self.cols = prob_grid.shape
+        # One RGBA value per analysis cell, plus a transparent sentinel cell
+        # for pixels outside the grid.
+        colours = np.zeros((self.rows + 1, self.cols + 1, 4), dtype=np.uint8)
+        colours[: self.rows, : self.cols] = colorize(prob_grid, colormap, alpha, skipped_alpha)
+        self._packed = colours.view(np.uint32)[..., 0]
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        scale = 2 ** (self.max_level - level)
+        return (
+            max(1, math.ceil(self.shape.width / scale)),
+            max(1, math.ceil(self.shape.height / scale)),
+        )
+
+    def tile_grid(self, level: int) -> Tuple[int, int]:
+        width, height = self.level_size(level)
+        return math.ceil(width / self.shape.tile_size), math.ceil(height / self.shape.tile_size)
+
+    def _cells(self, start: int, stop: int, level: int, count: int) -> np.ndarray:
+        """Analysis-cell index of level pixels ``start..stop`` (sentinel when outside)."""
+        shift = self.tile_level - level
+        pixels = np.arange(start, stop, dtype=np.int64)
+        if shift >= 0:
+            # Sample each output pixel at its centre in analysis-level pixels.
+            centres = (pixels << shift) + ((1 << shift) >> 1)
+        else:
+            centres = pixels >> -shift
+        cells = centres // self.shape.tile_size
+        return np.where(cells < count, cells, count)
+
+    def render(self, level: int, x: int, y: int) -> np.ndarray:
+        """RGBA array for tile ``(x, y)`` at *level*."""
+        width, height = self.level_size(level)
+        ts = self.shape.tile_size
+        x0, y0 = x * ts, y * ts
+        x1, y1 = min(width, x0 + ts), min(height, y0 + ts)
+        cols = self._cells(x0, x1, level, self.cols)
+        rows = self._cells(y0, y1, level, self.rows)
+        packed = np.ascontiguousarray(self._packed[rows][:, cols])
+        return packed.view(np.uint8).reshape(y1 - y0, x1 - x0, 4)
+
+    def tiles(self, max_level: int) -> Iterator[Tuple[int, int, int]]:
+        for level in range(max_level + 1):
+            cols, rows = self.tile_grid(level)
+            for ty in range(rows):
+                for tx in range(cols):
+                    yield level, tx, ty
+
+
+def _encode_png(rgba: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def build_heatmap_pyramid(
+    prob_grid: np.ndarray,
+    shape: DZIShape,
+    tile_level: int,
+    prefix: str,
+    upload: UploadFn,
+    *,
+    min_cell_px: int = 16,
+    workers: int = 8,
+    colormap: str = "RdYlGn_r",
+    alpha: int = 160,
+    skipped_alpha: int = 0,
+) -> HeatmapPyramidResult:
+    """Render and upload the heatmap pyramid under *prefix*.
+
+    ``upload(data, object_key, content_type)`` is called once per
+    non-transparent tile (from *workers* threads), then for the shared
+    transparent tile, the manifest and the ``.dzi`` descriptor.
+    """
+    renderer = HeatmapTileRenderer(
+        prob_grid, shape, tile_level, colormap=colormap, alpha=alpha, skipped_alpha=skipped_alpha
+    )
+    top_level = min(
+        renderer.max_level, deepest_heatmap_level(tile_level, shape.tile_size, min_cell_px)
+    )
+    files_prefix = f"{prefix}/heatmap_files"
+
+    def render_and_upload(coords: Tuple[int, int, int]) -> Optional[Tuple[int, int, int]]:
+        level, x, y = coords
+        rgba = renderer.render(level, x, y)
+        if not rgba[..., 3].any():
+            return coords
+        upload(_encode_png(rgba), f"{files_prefix}/{level}/{x}_{y}.png", "image/png")
+        return None
+
+    skipped: Dict[str, List[List[int]]] = {}
+    level_tile_counts: Dict[str, int] = {}
+    uploaded = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for coords, transparent in zip(
+            renderer.tiles(top_level), pool.map(render_and_upload, renderer.tiles(top_level))
+        ):
+            level = str(coords[0])
+            if transparent is not None:
+                skipped.setdefault(level, []).append([coords[1], coords[2]])
+            else:
+                level_tile_counts[level] = level_tile_counts.get(level, 0) + 1
+                uploaded += 1
+
+    transparent_tile_key = f"{prefix}/heatmap_transparent.png"
+    blank = np.zeros((shape.tile_size, shape.tile_size, 4), dtype=np.uint8)
+    upload(_encode_png(blank), transparent_tile_key, "image/png")
+
+    width, height = renderer.level_size(top_level)
+    manifest_key = f"{prefix}/heatmap_manifest.json"
+    manifest = {
+        "width": width,
+        "height": height,
+        "slide_width": shape.width,
+        "slide_height": shape.height,
+        "level_offset": renderer.max_level - top_level,
+        "tile_size": shape.tile_size,
+        "format": "png",
+        "min_level": 0,
+        "max_level": top_level,
+        "analysis_level": tile_level,
+        "level_tile_counts": level_tile_counts,
+        "transparent_tiles": skipped,
+        "transparent_tile_key": transparent_tile_key,
+    }
+    upload(json.dumps(manifest).encode("utf-8"), manifest_key, "application/json")
+
+    dzi_key = f"{prefix}/heatmap.dzi"
+    dzi = DZI_TEMPLATE.format(tile_size=shape.tile_size, width=width, height=height)
+    upload(dzi.encode("utf-8"), dzi_key, "application/xml")
+
+    return HeatmapPyramidResult(
+        dzi_key=dzi_key,
+        manifest_key=manifest_key,
+        max_level=top_level,
+        transparent_tile_key=transparent_tile_key,
+        tiles_uploaded=uploaded,
+        tiles_skipped=sum(len(v) for v in skipped.values()),
+    )
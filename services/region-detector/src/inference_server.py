@@ -0,0 +1,261 @@
+"""In-process dynamic micro-batching for embedder inference.
+
+Each analysis job used to call ``embedder.embed_batch`` with its own small
+batch, so concurrent jobs competed for the CPU with many small forward
+passes.  :class:`InferenceServer` owns a single worker thread fed by a
+request queue; it forms batches across *all* active jobs (up to
+``max_batch_size`` tiles, waiting at most ``max_wait_ms`` for a batch to
+fill) and routes each slice of the output back to its caller through a
+``Future``.
+
+Early dispatch
+--------------
+A job thread blocks on its own request, so once every job has queued one,
+waiting longer cannot grow the batch.  Jobs announce themselves with
+:meth:`InferenceServer.session`; while sessions are open, a batch is
+dispatched as soon as each session's job has a request queued, rather
+than only when ``max_batch_size`` tiles are queued or ``max_wait_ms`` has
+passed.  With a single job the server therefore never waits.
+
+Fairness
+--------
+Pending tiles are kept in one FIFO per job and batches are filled
+round-robin, one tile per job per pass, starting from a different job each
+batch.  A job that submits thousands of tiles cannot starve a job that
+submits a handful: every active job gets an equal share of each batch.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+EmbedFn = Callable[[List[Any]], np.ndarray]
+
+
+@dataclass
+class _Request:
+    job_id: str
+    size: int
+    future: Future
+    rows: List[np.ndarray | None] = field(default_factory=list)
+    remaining: int = 0
+    # Items still waiting in the queue (not yet taken into a batch).
+    queued: int = 0
+
+    def __post_init__(self) -> None:
+        self.rows = [None] * self.size
+        self.remaining = self.size
+        self.queued = self.size
+
+
+@dataclass
+class _Item:
+    request: _Request
+    index: int
+    payload: Any
+    enqueued_at: float
+
+
+class InferenceServer:
+    """Batches embedding requests from concurrent jobs onto one worker."""
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self._embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+
+        self._queues: "OrderedDict[str, Deque[_Item]]" = OrderedDict()
+        self._pending = 0
+        # Open sessions and requests still queued, per job.
+        self._sessions: Dict[str, int] = {}
+        self._queued_requests: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+        self._batches = 0
+        self._items = 0
+        self._early_batches = 0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+
+    def start(self) -> "InferenceServer":
+        with self._cond:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(
+                    target=self._loop, name="inference-server", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    # ── Client API ────────────────────────────────────────────────────
+
+    def submit(self, payloads: Sequence[Any], job_id: str) -> "Future[np.ndarray]":
+        """Queue *payloads* for embedding; resolves to ``(len(payloads), dim)``."""
+        future: Future = Future()
+        if not payloads:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+
+        request = _Request(job_id=job_id, size=len(payloads), future=future)
+        now = time.perf_counter()
+        with self._cond:
+            if self._stopped or self._thread is None:
+                raise RuntimeError("InferenceServer is not running")
+            queue = self._queues.setdefault(job_id, deque())
+            queue.extend(_Item(request, idx, p, now) for idx, p in enumerate(payloads))
+            self._pending += len(payloads)
+            self._queued_requests[job_id] = self._queued_requests.get(job_id, 0) + 1
+            self._cond.notify_all()
+        return future
+
+    @contextmanager
+    def session(self, job_id: str) -> Iterator[None]:
+        """Count the calling thread as one active submitter for *job_id*."""
+        with self._cond:
+            self._sessions[job_id] = self._sessions.get(job_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._sessions[job_id] -= 1
+                if not self._sessions[job_id]:
+                    del self._sessions[job_id]
+                # One submitter fewer may complete the batch being formed.
+                self._cond.notify_all()
+
+    def embed(self, payloads: Sequence[Any], job_id: str) -> np.ndarray:
+        """Blocking convenience wrapper around :meth:`submit`."""
+        return self.submit(payloads, job_id).result()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "early_batches": self._early_batches,
+                "pending": self._pending,
+                "active_jobs": len(self._queues),
+                "sessions": sum(self._sessions.values()),
+            }
+
+    # ── Worker ────────────────────────────────────────────────────────
+
+    def _oldest_enqueue_time(self) -> float:
+        return min(queue[0].enqueued_at for queue in self._queues.values())
+
+    def _every_session_queued(self) -> bool:
+        """Each session's job has a request queued; requests outside sessions do not count."""
+        return bool(self._sessions) and all(
+            self._queued_requests.get(job_id, 0) >= count
+            for job_id, count in self._sessions.items()
+        )
+
+    def _take_batch(self) -> List[_Item]:
+        """Round-robin one item per job until the batch is full."""
+        batch: List[_Item] = []
+        taken = 0
+        while len(batch) < self.max_batch_size and self._queues:
+            for job_id in list(self._queues):
+                queue = self._queues[job_id]
+                item = queue.popleft()
+                taken += 1
+                item.request.queued -= 1
+                if item.request.queued == 0:
+                    self._queued_requests[job_id] -= 1
+                    if not self._queued_requests[job_id]:
+                        del self._queued_requests[job_id]
+                if not queue:
+                    del self._queues[job_id]
+                # Requests that already failed need no further compute.
+                if not item.request.future.done():
+                    batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+        self._pending -= taken
+        # Rotate so the next batch starts with a different job.
+        if len(self._queues) > 1:
+            self._queues.move_to_end(next(iter(self._queues)))
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and self._pending == 0:
+                    self._cond.wait()
+                if self._stopped:
+                    self._fail_pending(RuntimeError("InferenceServer stopped"))
+                    return
+                deadline = self._oldest_enqueue_time() + self.max_wait_s
+                while (
+                    not self._stopped
+                    and self._pending < self.max_batch_size
+                    and not self._every_session_queued()
+                    and (remaining := deadline - time.perf_counter()) > 0
+                ):
+                    self._cond.wait(timeout=remaining)
+                if self._stopped:
+                    self._fail_pending(RuntimeError("InferenceServer stopped"))
+                    return
+                if self._pending < self.max_batch_size and time.perf_counter() < deadline:
+                    self._early_batches += 1
+                batch = self._take_batch()
+
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Item]) -> None:
+        try:
+            embeddings = self._embed_fn([item.payload for item in batch])
+        except BaseException as exc:  # noqa: BLE001 - forwarded to callers
+            for request in {id(item.request): item.request for item in batch}.values():
+                if not request.future.done():
+                    request.future.set_exception(exc)
+            return
+
+        with self._cond:
+            self._batches += 1
+            self._items += len(batch)
+
+        for item, row in zip(batch, embeddings):
+            request = item.request
+            if request.future.done():
+                continue
+            request.rows[item.index] = row
+            request.remaining -= 1
+            if request.remaining == 0:
+                request.future.set_result(np.stack(request.rows))
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for queue in self._queues.values():
+            for item in queue:
+                if not item.request.future.done():
+                    item.request.future.set_exception(exc)
+        self._queues.clear()
+        self._pending = 0
+        self._queued_requests.clear()
@@ -0,0 +1,173 @@
+"""Bounded, priority-ordered executor for analysis jobs.
+
+Every ``POST /jobs/analyze`` used to start ``run_analysis`` straight away, so
+two large slides at once doubled peak memory.  :class:`JobExecutor` caps the
+number of concurrent analyses and admits queued jobs by priority (higher
+first, FIFO within a priority) as long as their estimated memory fits in the
+remaining budget.  The head of the queue is never skipped for a smaller job,
+which keeps ordering predictable and prevents starvation; a job larger than
+the whole budget still runs once nothing else is running.
+
+When the head of the queue cannot start, one running job of lower priority
+that was submitted with an ``on_preempt`` callback is asked to yield.  A job
+yields by raising :class:`~src.cancellation.JobPreempted`; it is then put
+back in the queue with its original position, so it resumes ahead of later
+submissions of the same priority.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+from .cancellation import JobPreempted
+from .config import settings
+
+
+@dataclass(order=True)
+class _QueuedJob:
+    sort_key: tuple
+    job_id: str = field(compare=False)
+    memory_mb: float = field(compare=False)
+    fn: Callable[[], None] = field(compare=False)
+    priority: int = field(default=0, compare=False)
+    on_preempt: Optional[Callable[[], None]] = field(default=None, compare=False)
+
+
+def estimate_job_memory_mb(tile_count: int | None) -> float:
+    """Rough peak RSS of one analysis, from the number of tiles at its level.
+
+    A fixed base covers the in-flight download chunk, the model activations
+    and the heatmap canvas; the per-tile term covers predictions and the
+    serialised results artifact.
+    """
+    tiles = max(0, tile_count or 0)
+    return settings.JOB_BASE_MEMORY_MB + tiles * settings.JOB_MEMORY_PER_TILE_KB / 1024.0
+
+
+class JobExecutor:
+    """Runs submitted callables with bounded concurrency and memory."""
+
+    def __init__(self, max_concurrent: int, memory_budget_mb: float):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        self.max_concurrent = max_concurrent
+        self.memory_budget_mb = memory_budget_mb
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="analysis-job"
+        )
+        self._queue: List[_QueuedJob] = []
+        self._running: Dict[str, _QueuedJob] = {}
+        self._preempting: Set[str] = set()
+        self._preemptions = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    # ── Submission ────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        job_id: str,
+        fn: Callable[[], None],
+        priority: int = 0,
+        memory_mb: float = 0.0,
+        on_preempt: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queue *fn*; *on_preempt* asks it to yield to a higher-priority job."""
+        with self._lock:
+            heapq.heappush(
+                self._queue,
+                _QueuedJob(
+                    (-priority, next(self._seq)), job_id, memory_mb, fn, priority, on_preempt
+                ),
+            )
+        self._dispatch()
+        self._preempt_for_head()
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a queued job; False if it is not queued (running or unknown)."""
+        with self._lock:
+            for idx, job in enumerate(self._queue):
+                if job.job_id == job_id:
+                    self._queue.pop(idx)
+                    heapq.heapify(self._queue)
+                    return True
+        return False
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while self._queue and len(self._running) < self.max_concurrent:
+                head = self._queue[0]
+                reserved = sum(job.memory_mb for job in self._running.values())
+                if self._running and reserved + head.memory_mb > self.memory_budget_mb:
+                    break
+                heapq.heappop(self._queue)
+                self._running[head.job_id] = head
+                self._pool.submit(self._run, head)
+
+    def _preempt_for_head(self) -> None:
+        """Ask one lower-priority running job to yield if the queue head is blocked."""
+        with self._lock:
+            if not self._queue or self._preempting:
+                return
+            head = self._queue[0]
+            candidates = [
+                job
+                for job in self._running.values()
+                if job.on_preempt is not None and job.priority < head.priority
+            ]
+            if not candidates:
+                return
+            # Lowest priority first; among equals, the most recently submitted.
+            victim = min(candidates, key=lambda job: (job.priority, -job.sort_key[1]))
+            self._preempting.add(victim.job_id)
+        print(f"[executor] Preempting job {victim.job_id} for {head.job_id}")
+        victim.on_preempt()
+
+    def _run(self, job: _QueuedJob) -> None:
+        preempted = False
+        try:
+            job.fn()
+        except JobPreempted:
+            preempted = True
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                self._preempting.discard(job.job_id)
+                if preempted:
+                    self._preemptions += 1
+                    heapq.heappush(self._queue, job)
+            self._dispatch()
+
+    # ── Introspection ─────────────────────────────────────────────────
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs, or None if not queued."""
+        with self._lock:
+            ordered = sorted(self._queue)
+        for idx, job in enumerate(ordered, start=1):
+            if job.job_id == job_id:
+                return idx
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "max_concurrent": self.max_concurrent,
+                "reserved_memory_mb": round(
+                    sum(job.memory_mb for job in self._running.values()), 1
+                ),
+                "memory_budget_mb": self.memory_budget_mb,
+                "preemptions": self._preemptions,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._queue.clear()
+        self._pool.shutdown(wait=wait)
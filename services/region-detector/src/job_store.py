@@ -0,0 +1,148 @@
+"""SQLite-backed persistence for region-detection job state.
+
+Jobs used to live only in an in-memory dict, so a restart lost every job and
+finished jobs were never evicted.  :class:`JobStore` keeps one row per job
+(request parameters, progress and artifact keys) in a local SQLite file.
+Finished jobs are evicted once they are older than ``JOB_TTL_SECONDS``.
+
+The store is shared by the FastAPI event loop and the worker threads; a
+single connection guarded by a lock keeps it simple and fast enough for the
+handful of writes per job.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+_COLUMNS = (
+    "job_id",
+    "image_id",
+    "status",
+    "priority",
+    "request_json",
+    "tile_level",
+    "threshold",
+    "tissue_threshold",
+    "tiles_processed",
+    "total_tiles",
+    "message",
+    "summary_key",
+    "results_key",
+    "heatmap_key",
+    "error",
+    "created_at",
+    "updated_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id           TEXT PRIMARY KEY,
+    image_id         TEXT NOT NULL,
+    status           TEXT NOT NULL,
+    priority         INTEGER NOT NULL DEFAULT 0,
+    request_json     TEXT,
+    tile_level       INTEGER,
+    threshold        REAL,
+    tissue_threshold REAL,
+    tiles_processed  INTEGER NOT NULL DEFAULT 0,
+    total_tiles      INTEGER NOT NULL DEFAULT 0,
+    message          TEXT,
+    summary_key      TEXT,
+    results_key      TEXT,
+    heatmap_key      TEXT,
+    error            TEXT,
+    created_at       REAL NOT NULL,
+    updated_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at);
+"""
+
+
+class JobStore:
+    """Small persistent job table with TTL eviction of finished jobs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── Writes ────────────────────────────────────────────────────────
+
+    def save(self, record: Dict[str, Any]) -> None:
+        """Insert or update a job row.  Missing columns keep their defaults."""
+        now = time.time()
+        row = {key: record.get(key) for key in _COLUMNS if key in record}
+        if isinstance(row.get("request_json"), dict):
+            row["request_json"] = json.dumps(row["request_json"])
+        row.setdefault("created_at", now)
+        row["updated_at"] = now
+
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{key}" for key in row)
+        updates = ", ".join(
+            f"{key} = excluded.{key}" for key in row if key not in {"job_id", "created_at"}
+        )
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(job_id) DO UPDATE SET {updates}",
+                row,
+            )
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            return cur.rowcount > 0
+
+    def evict_expired(self, ttl_seconds: float, now: float | None = None) -> int:
+        """Delete finished jobs last updated more than *ttl_seconds* ago."""
+        cutoff = (now if now is not None else time.time()) - ttl_seconds
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(TERMINAL_STATUSES))}) "
+                "AND updated_at < ?",
+                (*TERMINAL_STATUSES, cutoff),
+            )
+            return cur.rowcount
+
+    # ── Reads ─────────────────────────────────────────────────────────
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _to_dict(row) if row is not None else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))}) "
+                "ORDER BY created_at",
+                TERMINAL_STATUSES,
+            ).fetchall()
+        return [_to_dict(row) for row in rows]
+
+
+def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    if record.get("request_json"):
+        record["request"] = json.loads(record["request_json"])
+    record.pop("request_json", None)
+    return record
@@ -2,28 +2,64 @@
 
 Endpoints
 ---------
-POST /jobs/analyze      Submit a new region-detection job (runs in background)
-GET  /jobs/{id}/status  Poll job progress
+POST /jobs/analyze      Submit a new region-detection job (queued, runs in background);
+                        ``tile_levels`` analyses several DZI levels in one job
+POST /jobs/analyze-batch
+                        Submit one job analysing a cohort of slides with shared parameters
+GET  /jobs/{id}/status  Poll job progress (includes queue position while queued)
+GET  /jobs/{id}/events  Server-Sent Events stream of job progress
+DELETE /jobs/{id}       Cancel a queued or running job (or forget a finished one)
 GET  /jobs/{id}/results Get full results (tile predictions + summary + heatmap)
+GET  /jobs/{id}/predictions
+                        Page through tile predictions, optionally within a bbox
 GET  /health            Health-check
+GET  /metrics           Per-stage metrics in Prometheus text format
 """
 
 from __future__ import annotations
 
 import json
+import math
 import threading
+import time
 import traceback
 import uuid
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, List, Literal, Optional
 from urllib import error, request
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator, model_validator
 
+from . import metrics
+from .autotune import TuningResult
+from .cancellation import CancellationToken, JobCancelled, JobPreempted
+from .cohort import run_cohort
 from .config import settings
-from .minio_io import download_json
-from .pipeline import preload_models, run_analysis
+from .event_stream import BackendNotifier, EventHub
+from .job_executor import JobExecutor, estimate_job_memory_mb
+from .job_store import JobStore
+from .geometry import DZIShape, max_dzi_level
+from .minio_io import download_bytes, download_json, load_tile_manifest
+from .predictions_store import PredictionIndex, decode, to_columnar, to_records
+from .results_cache import (
+    DecodedCache,
+    ResultsCache,
+    choose_encoding,
+    encoded_etag,
+    etag_matches,
+)
+from .pipeline import (
+    AnalysisCheckpoint,
+    autotune_settings,
+    preload_models,
+    run_analysis,
+    run_multilevel_analysis,
+)
+from .tile_levels import select_analysis_level
 
 # ── App ───────────────────────────────────────────────────────────────────────
 
@@ -37,12 +73,19 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event() -> None:
     """Pre-load ML models so the first analysis job starts immediately."""
+    global _tuning
+    if settings.AUTOTUNE_ENABLED:
+        _tuning = autotune_settings()
     print("[startup] Pre-loading ML models into memory…")
     preload_models()
     print("[startup] Models ready.")
+    evicted = _store.evict_expired(settings.JOB_TTL_SECONDS)
+    if evicted:
+        print(f"[startup] Evicted {evicted} expired job(s) from the job store.")
+    _resume_unfinished_jobs()
 
 
-# ── In-memory job store ───────────────────────────────────────────────────────
+# ── Job state ─────────────────────────────────────────────────────────────────
 
 
 class JobStatus(str, Enum):
@@ -50,6 +93,41 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+_TERMINAL_STATUSES = {
+    JobStatus.COMPLETED.value,
+    JobStatus.FAILED.value,
+    JobStatus.CANCELLED.value,
+}
+
+
+def _status_payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": record["status"],
+        "image_id": record["image_id"],
+        "tile_level": record["tile_level"],
+        "tiles_processed": record["tiles_processed"],
+        "total_tiles": record["total_tiles"],
+        "message": record["message"],
+    }
+
+
+def _publish_status(record: Dict[str, Any]) -> None:
+    """Push *record* to SSE subscribers; cheap enough for the pipeline thread."""
+    terminal = record["status"] in _TERMINAL_STATUSES
+    _events.publish(
+        record["job_id"],
+        record["status"] if terminal else "progress",
+        _status_payload(record),
+        terminal=terminal,
+    )
+
+
+# Progress updates are persisted at most this often; status transitions are
+# persisted immediately.
+_PERSIST_INTERVAL_S = 2.0
 
 
 class JobState:
@@ -60,6 +138,9 @@ class JobState:
         tile_level: int,
         threshold: float,
         tissue_threshold: float | None,
+        priority: int = 0,
+        request_payload: Dict[str, Any] | None = None,
+        notify_backend: bool = True,
     ):
         self.job_id = job_id
         self.image_id = image_id
@@ -74,7 +155,41 @@ class JobState:
         self.results_key: Optional[str] = None
         self.heatmap_key: Optional[str] = None
         self.error: Optional[str] = None
+        self.priority = priority
+        self.request_payload = request_payload or {}
+        # Cohort jobs are unknown to the backend, which tracks single slides.
+        self.notify_backend = notify_backend
+        # Cancel/preempt flags, and the tiles already analysed if preempted.
+        self.token = CancellationToken()
+        self.checkpoint = AnalysisCheckpoint()
         self._lock = threading.Lock()
+        self._persisted_at = 0.0
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "image_id": self.image_id,
+            "status": self.status.value,
+            "priority": self.priority,
+            "request_json": self.request_payload,
+            "tile_level": self.tile_level,
+            "threshold": self.threshold,
+            "tissue_threshold": self.tissue_threshold,
+            "tiles_processed": self.tiles_processed,
+            "total_tiles": self.total_tiles,
+            "message": self.message,
+            "summary_key": self.summary_key,
+            "results_key": self.results_key,
+            "heatmap_key": self.heatmap_key,
+            "error": self.error,
+        }
+
+    def persist(self, force: bool = True) -> None:
+        now = time.monotonic()
+        if not force and now - self._persisted_at < _PERSIST_INTERVAL_S:
+            return
+        self._persisted_at = now
+        _store.save(self.to_record())
 
     def update_progress(
         self,
@@ -83,53 +198,169 @@ class JobState:
         msg: str,
         tile_level: int | None = None,
     ) -> None:
+        """Record progress and hand it on; no network I/O on the caller's thread.
+
+        The lock only covers the state change.  The store write is throttled,
+        SSE publishing is a queue hand-off and the backend POST is queued
+        on :data:`_notifier`, coalesced with any progress not yet sent.
+        """
         with self._lock:
             self.tiles_processed = done
             self.total_tiles = total
             self.message = msg
             if tile_level is not None:
                 self.tile_level = tile_level
-            if self.status == JobStatus.ACCEPTED:
+            became_active = self.status == JobStatus.ACCEPTED
+            if became_active:
                 self.status = JobStatus.PROCESSING
-            _notify_job_event(
-                job_id=self.job_id,
-                payload={
-                    "status": "PROCESSING",
-                    "image_id": self.image_id,
-                    "tile_level": self.tile_level,
-                    "threshold": self.threshold,
-                    "tissue_threshold": self.tissue_threshold,
-                    "tiles_processed": self.tiles_processed,
-                    "total_tiles": self.total_tiles,
-                    "message": self.message,
-                },
-            )
+            record = self.to_record()
+            now = time.monotonic()
+            save = became_active or now - self._persisted_at >= _PERSIST_INTERVAL_S
+            if save:
+                self._persisted_at = now
+        if save:
+            _store.save(record)
+        _publish_status(record)
+        if not self.notify_backend:
+            return
+        _notify_job_event(
+            job_id=self.job_id,
+            payload={
+                "status": "PROCESSING",
+                "image_id": record["image_id"],
+                "tile_level": record["tile_level"],
+                "threshold": record["threshold"],
+                "tissue_threshold": record["tissue_threshold"],
+                "tiles_processed": record["tiles_processed"],
+                "total_tiles": record["total_tiles"],
+                "message": record["message"],
+            },
+            coalesce=True,
+        )
 
-    def to_status_dict(self) -> Dict[str, Any]:
+    def snapshot(self) -> Dict[str, Any]:
         with self._lock:
-            return {
-                "status": self.status.value,
-                "image_id": self.image_id,
-                "tile_level": self.tile_level,
-                "tiles_processed": self.tiles_processed,
-                "total_tiles": self.total_tiles,
-                "message": self.message,
-            }
+            return self.to_record()
 
 
+# Live state for queued and running jobs; finished jobs are served from the
+# persistent store.
 _jobs: Dict[str, JobState] = {}
+_store = JobStore(settings.JOB_STORE_PATH)
+_executor = JobExecutor(
+    max_concurrent=settings.MAX_CONCURRENT_JOBS,
+    memory_budget_mb=settings.JOB_MEMORY_BUDGET_MB,
+)
+# Settings chosen by the startup calibration, reported on /health.
+_tuning: Optional[TuningResult] = None
+# Progress fan-out for GET /jobs/{id}/events.
+_events = EventHub(min_interval_s=settings.EVENTS_MIN_INTERVAL_S)
+# Backend job-event POSTs, sent off the pipeline threads.
+_notifier = BackendNotifier(lambda job_id, payload: _post_job_event(job_id, payload))
+# Completed results are immutable; serve repeat requests from memory.
+_results_cache = ResultsCache(
+    max_bytes=int(settings.RESULTS_CACHE_MAX_MB * 1024 * 1024),
+    compress_min_bytes=settings.RESULTS_COMPRESS_MIN_BYTES,
+)
+# Decoded predictions + spatial index, so paging a viewport does not
+# download and decode the artifact again on every request.
+_prediction_indexes = DecodedCache(
+    max_bytes=int(settings.PREDICTION_INDEX_CACHE_MAX_MB * 1024 * 1024)
+)
+# The level summary each (job, tile_level) query resolves to, so paging does
+# not download summary.json (twice for multi-level jobs) on every request.
+_prediction_summaries = DecodedCache(max_bytes=8 * 1024 * 1024)
+# Read from the executor at scrape time.
+metrics.gauge(
+    "region_detector_active_jobs",
+    "Jobs currently running.",
+    lambda: _executor.stats()["running"],
+)
+metrics.gauge(
+    "region_detector_queue_depth",
+    "Jobs waiting for a run slot.",
+    lambda: _executor.stats()["queued"],
+)
 
 
 # ── Request / Response models ─────────────────────────────────────────────────
 
 
-class AnalyzeRequest(BaseModel):
-    job_id: Optional[str] = None
-    image_id: str
+class AnalysisOptions(BaseModel):
     tile_level: Optional[int] = None
     threshold: Optional[float] = None
     tissue_threshold: Optional[float] = None
-    batch_size: int = 16
+    # Default: DEFAULT_BATCH_SIZE (autotuned at startup when enabled).
+    batch_size: Optional[int] = None
+    # Higher runs first; equal priorities run in submission order.
+    priority: int = 0
+    # Coarse-to-fine: classify a coarse level, refine only suspicious regions.
+    hierarchical: bool = False
+    coarse_level: Optional[int] = None
+    refine_threshold: Optional[float] = None
+    # Skip tiles outside a thumbnail tissue mask (default: PRESCREEN_ENABLED).
+    prescreen: Optional[bool] = None
+    # Embed duplicate tiles once (default: TILE_DEDUP).
+    dedup: Optional[Literal["off", "exact", "perceptual"]] = None
+
+    def analysis_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments shared by ``run_analysis`` and ``run_cohort``."""
+        return {
+            "tile_level": self.tile_level,
+            "threshold": self.threshold,
+            "tissue_threshold": self.tissue_threshold,
+            "batch_size": self.batch_size,
+            "hierarchical": self.hierarchical,
+            "coarse_level": self.coarse_level,
+            "refine_threshold": self.refine_threshold,
+            "prescreen": self.prescreen,
+            "dedup": self.dedup,
+        }
+
+
+class AnalyzeRequest(AnalysisOptions):
+    job_id: Optional[str] = None
+    image_id: str
+    # Several levels in one job; coarser tiles are derived from the finest.
+    tile_levels: Optional[List[int]] = Field(default=None, min_length=1)
+
+    @model_validator(mode="after")
+    def _check_tile_levels(self) -> "AnalyzeRequest":
+        if self.tile_levels is None:
+            return self
+        if len(set(self.tile_levels)) != len(self.tile_levels):
+            raise ValueError("tile_levels must be unique")
+        if self.tile_level is not None:
+            raise ValueError("set either tile_level or tile_levels, not both")
+        if self.hierarchical:
+            raise ValueError("tile_levels cannot be combined with hierarchical mode")
+        return self
+
+    @property
+    def target_level(self) -> Optional[int]:
+        """The level the job reports progress against (the finest requested)."""
+        return max(self.tile_levels) if self.tile_levels else self.tile_level
+
+    def multilevel_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for ``run_multilevel_analysis``."""
+        kwargs = self.analysis_kwargs()
+        for key in ("tile_level", "hierarchical", "coarse_level", "refine_threshold"):
+            del kwargs[key]
+        return {**kwargs, "tile_levels": self.tile_levels}
+
+
+class BatchAnalyzeRequest(AnalysisOptions):
+    job_id: Optional[str] = None
+    image_ids: List[str] = Field(min_length=1)
+    # Slides analysed concurrently (default: COHORT_SLIDE_WORKERS).
+    slide_workers: Optional[int] = Field(default=None, ge=1)
+
+    @field_validator("image_ids")
+    @classmethod
+    def _unique_image_ids(cls, image_ids: List[str]) -> List[str]:
+        if len(set(image_ids)) != len(image_ids):
+            raise ValueError("image_ids must be unique")
+        return image_ids
 
 
 class AnalyzeResponse(BaseModel):
@@ -143,19 +374,30 @@ class AnalyzeResponse(BaseModel):
 
 def _run_job(job_id: str, req: AnalyzeRequest) -> None:
     state = _jobs[job_id]
+    state.token.clear_preemption()
+    state.message = "Resuming analysis" if state.checkpoint.tiles_done else "Starting analysis"
+    preempted = False
     try:
-        result = run_analysis(
+        run_kwargs = dict(
             job_id=job_id,
             image_id=req.image_id,
-            tile_level=req.tile_level,
-            threshold=req.threshold,
-            tissue_threshold=req.tissue_threshold,
-            batch_size=req.batch_size,
             progress_cb=state.update_progress,
+            cancel_token=state.token,
+            checkpoint=state.checkpoint,
         )
+        levels_payload: Dict[str, Any] = {}
+        if req.tile_levels:
+            multi = run_multilevel_analysis(**run_kwargs, **req.multilevel_kwargs())
+            # The backend stores one slide summary; it gets the finest level's.
+            result = multi.levels[multi.tile_levels[-1]]
+            summary_key = multi.summary_key
+            levels_payload = {"tile_levels": multi.tile_levels, "levels_summary_key": summary_key}
+        else:
+            result = run_analysis(**run_kwargs, **req.analysis_kwargs())
+            summary_key = result.summary_key
 
         state.tile_level = result.tile_level
-        state.summary_key = result.summary_key
+        state.summary_key = summary_key
         state.results_key = result.results_key
         state.heatmap_key = result.heatmap_key
         state.status = JobStatus.COMPLETED
@@ -175,9 +417,23 @@ def _run_job(job_id: str, req: AnalyzeRequest) -> None:
                 "tumor_area_percentage": result.summary.tumor_area_percentage,
                 "aggregate_score": result.summary.aggregate_score,
                 "max_score": result.summary.max_score,
+                **levels_payload,
             },
         )
 
+    except JobPreempted:
+        # The executor re-queues the job; it resumes from its checkpoint.
+        preempted = True
+        state.status = JobStatus.ACCEPTED
+        state.message = (
+            f"Paused for a higher-priority job after {state.checkpoint.tiles_done} tiles"
+        )
+        print(f"[analysis] Job {job_id} preempted; re-queued")
+        raise
+
+    except JobCancelled:
+        _mark_cancelled(state)
+
     except Exception as exc:
         traceback.print_exc()
         state.status = JobStatus.FAILED
@@ -195,80 +451,533 @@ def _run_job(job_id: str, req: AnalyzeRequest) -> None:
                 "error_message": state.error,
             },
         )
+    finally:
+        state.persist()
+        _publish_status(state.snapshot())
+        if not preempted:
+            _jobs.pop(job_id, None)
+
+
+def _run_batch_job(job_id: str, req: BatchAnalyzeRequest) -> None:
+    state = _jobs[job_id]
+    state.message = f"Starting analysis of {len(req.image_ids)} slides"
+    try:
+        result = run_cohort(
+            job_id,
+            req.image_ids,
+            slide_workers=req.slide_workers or settings.COHORT_SLIDE_WORKERS,
+            progress_cb=state.update_progress,
+            cancel_token=state.token,
+            **req.analysis_kwargs(),
+        )
+        state.summary_key = result.summary_key
+        state.status = JobStatus.COMPLETED
+        state.message = (
+            f"Cohort complete: {len(result.slides) - len(result.failed)}/"
+            f"{len(result.slides)} slides analysed"
+        )
+    except JobCancelled:
+        _mark_cancelled(state)
+    except Exception as exc:
+        traceback.print_exc()
+        state.status = JobStatus.FAILED
+        state.error = str(exc)
+        state.message = f"Failed: {exc}"
+    finally:
+        state.persist()
+        _publish_status(state.snapshot())
+        _jobs.pop(job_id, None)
+
+
+def _mark_cancelled(state: JobState) -> None:
+    state.status = JobStatus.CANCELLED
+    state.message = "Cancelled"
+    state.checkpoint = AnalysisCheckpoint()
+    print(f"[analysis] Job {state.job_id} cancelled")
+    if not state.notify_backend:
+        return
+    # The backend's job model has no cancelled state; report it as a failure.
+    _notify_job_event(
+        job_id=state.job_id,
+        payload={
+            "status": "FAILED",
+            "image_id": state.image_id,
+            "tile_level": state.tile_level,
+            "tiles_processed": state.tiles_processed,
+            "total_tiles": state.total_tiles,
+            "message": state.message,
+            "error_message": "Cancelled",
+        },
+    )
+
+
+def _estimate_tile_count(image_id: str, tile_level: int | None) -> int | None:
+    """Tiles at the level the job will analyse, from the tiling manifest."""
+    try:
+        manifest = load_tile_manifest(image_id)
+    except Exception as exc:  # admission control must not block submission
+        print(f"[analysis] Could not load manifest for {image_id}: {exc}")
+        return None
+    if manifest is None or not manifest.level_tile_counts:
+        return None
+    level = select_analysis_level(
+        manifest.level_tile_counts.keys(),
+        requested_level=tile_level,
+        default_level=settings.DEFAULT_TILE_LEVEL,
+    )
+    return manifest.level_tile_counts.get(level)
+
+
+def _enqueue(state: JobState, req: AnalyzeRequest, tile_count: int | None) -> None:
+    _jobs[state.job_id] = state
+    state.persist()
+    _publish_status(state.snapshot())
+    _executor.submit(
+        state.job_id,
+        lambda: _run_job(state.job_id, req),
+        priority=req.priority,
+        memory_mb=estimate_job_memory_mb(tile_count),
+        on_preempt=state.token.request_preemption if settings.PREEMPTION_ENABLED else None,
+    )
+
+
+def _enqueue_batch(state: JobState, req: BatchAnalyzeRequest) -> None:
+    _jobs[state.job_id] = state
+    state.persist()
+    _publish_status(state.snapshot())
+    workers = req.slide_workers or settings.COHORT_SLIDE_WORKERS
+    _executor.submit(
+        state.job_id,
+        lambda: _run_batch_job(state.job_id, req),
+        priority=req.priority,
+        memory_mb=estimate_job_memory_mb(None) * min(workers, len(req.image_ids)),
+    )
+
+
+def _batch_state(job_id: str, req: BatchAnalyzeRequest) -> JobState:
+    return JobState(
+        job_id=job_id,
+        image_id=f"cohort:{len(req.image_ids)}",
+        tile_level=req.tile_level or settings.DEFAULT_TILE_LEVEL,
+        threshold=req.threshold or 0.5,
+        tissue_threshold=req.tissue_threshold,
+        priority=req.priority,
+        request_payload=req.model_dump(),
+        notify_backend=False,
+    )
+
+
+def _resume_unfinished_jobs() -> None:
+    """Re-queue jobs that were queued or running when the service stopped."""
+    for record in _store.unfinished():
+        payload = record.get("request")
+        if not payload or record["job_id"] in _jobs:
+            continue
+        if "image_ids" in payload:
+            batch = BatchAnalyzeRequest(**payload)
+            state = _batch_state(record["job_id"], batch)
+            state.message = "Re-queued after service restart"
+            print(f"[startup] Re-queuing cohort job {state.job_id}")
+            _enqueue_batch(state, batch)
+            continue
+        req = AnalyzeRequest(**payload)
+        state = JobState(
+            job_id=record["job_id"],
+            image_id=record["image_id"],
+            tile_level=record["tile_level"],
+            threshold=record["threshold"],
+            tissue_threshold=record["tissue_threshold"],
+            priority=record["priority"],
+            request_payload=payload,
+        )
+        state.message = "Re-queued after service restart"
+        print(f"[startup] Re-queuing job {state.job_id} for image {state.image_id}")
+        _enqueue(state, req, _estimate_tile_count(req.image_id, req.target_level))
+
+
+def _lookup_job(job_id: str) -> Dict[str, Any]:
+    """Current record for *job_id* from live state or the persistent store."""
+    state = _jobs.get(job_id)
+    if state is not None:
+        return state.snapshot()
+    record = _store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return record
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 
 @app.post("/jobs/analyze", response_model=AnalyzeResponse)
-async def submit_analysis(req: AnalyzeRequest, background_tasks: BackgroundTasks):
+async def submit_analysis(req: AnalyzeRequest):
     """Submit a region-detection job. Returns immediately."""
     job_id = req.job_id or str(uuid.uuid4())
     state = JobState(
         job_id=job_id,
         image_id=req.image_id,
-        tile_level=req.tile_level or settings.DEFAULT_TILE_LEVEL,
+        tile_level=req.target_level or settings.DEFAULT_TILE_LEVEL,
         threshold=req.threshold or 0.5,
         tissue_threshold=req.tissue_threshold,
+        priority=req.priority,
+        request_payload=req.model_dump(),
     )
-    _jobs[job_id] = state
-    background_tasks.add_task(_run_job, job_id, req)
+    tile_count = await run_in_threadpool(_estimate_tile_count, req.image_id, req.target_level)
+    _store.evict_expired(settings.JOB_TTL_SECONDS)
+    _enqueue(state, req, tile_count)
     return AnalyzeResponse(
         job_id=job_id,
         status="accepted",
-        message="Region detection job accepted and started in the background.",
+        message="Region detection job accepted and queued for processing.",
+    )
+
+
+@app.post("/jobs/analyze-batch", response_model=AnalyzeResponse)
+async def submit_batch_analysis(req: BatchAnalyzeRequest):
+    """Submit one job that analyses every slide in ``image_ids``.
+
+    Slides share the job's parameters, progress and embedding batches; the
+    results are a cohort summary with one row per slide.
+    """
+    job_id = req.job_id or str(uuid.uuid4())
+    _store.evict_expired(settings.JOB_TTL_SECONDS)
+    _enqueue_batch(_batch_state(job_id, req), req)
+    return AnalyzeResponse(
+        job_id=job_id,
+        status="accepted",
+        message=f"Cohort job for {len(req.image_ids)} slides accepted and queued for processing.",
     )
 
 
 @app.get("/jobs/{job_id}/status")
 async def get_status(job_id: str):
     """Poll the progress of a running analysis job."""
+    record = _lookup_job(job_id)
+    payload = _status_payload(record)
+    if record["status"] == JobStatus.ACCEPTED.value:
+        payload["queue_position"] = _executor.queue_position(job_id)
+    return payload
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, or forget a finished one.
+
+    Queued jobs are cancelled immediately.  Running jobs stop at their next
+    safe point (202 ``cancelling``); watch ``/status`` or ``/events`` for the
+    final ``cancelled`` state.  For finished jobs the record and any cached
+    results are dropped; artifacts in MinIO are left in place.
+    """
     state = _jobs.get(job_id)
     if state is None:
-        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-    return state.to_status_dict()
+        record = _lookup_job(job_id)
+        if record["status"] not in _TERMINAL_STATUSES:
+            # Unfinished record without a live job (e.g. it could not be resumed).
+            record["status"] = JobStatus.CANCELLED.value
+            record["message"] = "Cancelled"
+            _store.save(record)
+            _publish_status(record)
+            return {"job_id": job_id, "status": JobStatus.CANCELLED.value}
+        _store.delete(job_id)
+        _results_cache.invalidate((job_id, True))
+        _results_cache.invalidate((job_id, False))
+        _prediction_indexes.invalidate_where(lambda key: key[0] == job_id)
+        _prediction_summaries.invalidate_where(lambda key: key[0] == job_id)
+        return {"job_id": job_id, "status": "deleted"}
+
+    state.token.cancel()
+    if _executor.cancel(job_id):
+        _mark_cancelled(state)
+        state.persist()
+        _publish_status(state.snapshot())
+        _jobs.pop(job_id, None)
+        return {"job_id": job_id, "status": JobStatus.CANCELLED.value}
+    return JSONResponse(
+        status_code=202, content={"job_id": job_id, "status": "cancelling"}
+    )
 
 
-@app.get("/jobs/{job_id}/results")
-async def get_results(job_id: str):
-    """Retrieve full results once the job is complete."""
-    state = _jobs.get(job_id)
-    if state is None:
-        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+@app.get("/jobs/{job_id}/events")
+async def stream_events(job_id: str):
+    """Server-Sent Events stream of the job's status, ending when it finishes.
+
+    Sends the current state first, then ``progress`` events at most every
+    ``EVENTS_MIN_INTERVAL_S`` and a final ``completed`` or ``failed`` event.
+    """
+    record = _lookup_job(job_id)
+    subscription = _events.subscribe(job_id)
+    if not subscription.has_pending:
+        # Finished before this process started, or no longer retained.
+        terminal = record["status"] in _TERMINAL_STATUSES
+        subscription.offer(_events.make_event(
+            record["status"] if terminal else "progress",
+            _status_payload(record),
+            terminal=terminal,
+        ))
+    return StreamingResponse(
+        _events.stream(subscription, settings.EVENTS_HEARTBEAT_S),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _completed_record(job_id: str) -> Dict[str, Any]:
+    record = _lookup_job(job_id)
+
+    if record["status"] == JobStatus.FAILED.value:
+        raise HTTPException(status_code=500, detail=record["error"])
 
-    if state.status == JobStatus.FAILED:
-        raise HTTPException(status_code=500, detail=state.error)
+    if record["status"] == JobStatus.CANCELLED.value:
+        raise HTTPException(status_code=409, detail="Job was cancelled")
 
-    if state.status != JobStatus.COMPLETED:
+    if record["status"] != JobStatus.COMPLETED.value:
         raise HTTPException(
             status_code=202,
             detail={
-                "status": state.status.value,
+                "status": record["status"],
                 "message": "Analysis is still in progress. Poll /status to track.",
-                "tiles_processed": state.tiles_processed,
-                "total_tiles": state.total_tiles,
+                "tiles_processed": record["tiles_processed"],
+                "total_tiles": record["total_tiles"],
             },
         )
 
-    if not state.summary_key:
+    if not record["summary_key"]:
         raise HTTPException(status_code=500, detail="Analysis summary artifact missing")
+    return record
 
-    summary = download_json(state.summary_key)
-    predictions = download_json(state.results_key) if state.results_key else []
-    return {
+
+def _build_results(record: Dict[str, Any], include_predictions: bool) -> Dict[str, Any]:
+    summary_key = record["summary_key"]
+    results_key = record["results_key"]
+
+    summary = download_json(summary_key)
+    response = {
         **summary,
-        "summary_key": state.summary_key,
-        "results_key": state.results_key,
-        "tile_predictions": predictions,
+        "summary_key": summary_key,
+        "results_key": results_key,
+    }
+    if not include_predictions:
+        return response
+    if "levels" in summary:
+        # Multi-level job: each level carries its own predictions.
+        response["levels"] = {
+            level: {**entry, "tile_predictions": download_json(entry["results_key"])}
+            for level, entry in summary["levels"].items()
+        }
+    else:
+        response["tile_predictions"] = download_json(results_key) if results_key else []
+    return response
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_results(job_id: str, request: Request, include_predictions: bool = True):
+    """Retrieve full results once the job is complete.
+
+    Pass ``include_predictions=false`` to get only the summary; use
+    ``/jobs/{id}/predictions`` to page through tiles.  Responses carry a
+    strong ETag (``If-None-Match`` → 304) and are gzip/brotli compressed
+    when the client accepts it.
+    """
+    record = _completed_record(job_id)
+    cache_key = (job_id, include_predictions)
+    entry = _results_cache.get(cache_key)
+    if entry is None:
+        payload = await run_in_threadpool(_build_results, record, include_predictions)
+        entry = await run_in_threadpool(_results_cache.put, cache_key, payload)
+
+    headers = {
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
     }
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding"), _results_cache.encodings
+    )
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        _results_cache.record_not_modified()
+        headers["ETag"] = encoded_etag(
+            entry.etag, _results_cache.effective_encoding(entry, encoding)
+        )
+        return Response(status_code=304, headers=headers)
+
+    body, used = await run_in_threadpool(_results_cache.encode, cache_key, entry, encoding)
+    headers["ETag"] = encoded_etag(entry.etag, used)
+    if used is not None:
+        headers["Content-Encoding"] = used
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _load_predictions(summary: Dict[str, Any], results_key: str | None, tissue_only: bool):
+    """Columnar predictions and their geometry for a finished job."""
+    key = summary.get(
+        "tile_predictions_tissue_key" if tissue_only else "tile_predictions_columnar_key"
+    )
+    if key:
+        return decode(download_bytes(key))
+
+    # Jobs finished before the columnar artifact existed: convert the JSON.
+    rows = download_json(results_key) if results_key else []
+    predictions = to_columnar(SimpleNamespace(**row) for row in rows)
+    if tissue_only:
+        predictions = predictions[predictions["is_tissue"]]
+    dzi = summary["dzi"]
+    shape = DZIShape(width=dzi["width"], height=dzi["height"], tile_size=dzi["tile_size"])
+    meta = {
+        "tile_level": summary["tile_level"],
+        "tile_size": dzi["tile_size"],
+        "max_level": max_dzi_level(shape),
+        "width": dzi["width"],
+        "height": dzi["height"],
+    }
+    return predictions, meta
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    try:
+        x0, y0, x1, y1 = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be 'x0,y0,x1,y1'")
+    if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+        raise HTTPException(status_code=422, detail="bbox coordinates must be finite")
+    if x1 <= x0 or y1 <= y0:
+        raise HTTPException(status_code=422, detail="bbox must have x1 > x0 and y1 > y0")
+    return x0, y0, x1, y1
+
+
+def _level_summary(
+    record: Dict[str, Any], tile_level: Optional[int]
+) -> tuple[Dict[str, Any], Optional[str]]:
+    """Summary and results key of the level a predictions query reads."""
+    cache_key = (record["job_id"], tile_level)
+    cached = _prediction_summaries.get(cache_key)
+    if cached is not None:
+        return cached
+    summary = download_json(record["summary_key"])
+    results_key = record["results_key"]
+    if "cohort" in summary:
+        raise HTTPException(
+            status_code=422,
+            detail="Cohort jobs have no tile predictions; use each slide's results_key",
+        )
+    if "levels" in summary:
+        entry = summary["levels"].get(str(tile_level if tile_level is not None else max(summary["tile_levels"])))
+        if entry is None:
+            raise HTTPException(
+                status_code=422, detail=f"tile_level must be one of {summary['tile_levels']}"
+            )
+        summary = download_json(entry["summary_key"])
+        results_key = entry["results_key"]
+    elif tile_level is not None and tile_level != summary["tile_level"]:
+        raise HTTPException(
+            status_code=422, detail=f"The job analysed tile_level {summary['tile_level']} only"
+        )
+    return _prediction_summaries.put(
+        cache_key, (summary, results_key), len(json.dumps(summary))
+    )
+
+
+def _query_predictions(
+    record: Dict[str, Any],
+    bbox: Optional[str],
+    level: Optional[int],
+    page: int,
+    page_size: int,
+    tissue_only: bool,
+    tile_level: Optional[int] = None,
+) -> Dict[str, Any]:
+    summary, results_key = _level_summary(record, tile_level)
+    artifact = summary.get(
+        "tile_predictions_tissue_key" if tissue_only else "tile_predictions_columnar_key"
+    ) or (results_key, tissue_only)
+    cache_key = (record["job_id"], summary["tile_level"], artifact)
+    cached = _prediction_indexes.get(cache_key)
+    if cached is None:
+        predictions, meta = _load_predictions(summary, results_key, tissue_only)
+        cell_px = meta["tile_size"] * 2 ** (meta["max_level"] - meta["tile_level"])
+        index = PredictionIndex(predictions, cell_px)
+        cached = _prediction_indexes.put(
+            cache_key, (index, meta), predictions.nbytes + index.cells.nbytes
+        )
+    index, meta = cached
+    predictions = index.predictions
+
+    max_level = meta["max_level"]
+    if level is not None and not 0 <= level <= max_level:
+        raise HTTPException(status_code=422, detail=f"level must be within 0..{max_level}")
+
+    if bbox:
+        # bbox is given in pixel coordinates of `level` (default: full resolution).
+        scale = 2 ** (max_level - level) if level is not None else 1
+        x0, y0, x1, y1 = (v * scale for v in _parse_bbox(bbox))
+        rows = index.query(x0, y0, x1, y1)
+    else:
+        rows = index.all_rows()
+
+    total = int(len(rows))
+    start = (page - 1) * page_size
+    page_rows = predictions[rows[start:start + page_size]]
+    return {
+        "job_id": record["job_id"],
+        "tile_level": meta["tile_level"],
+        "level": level,
+        "bbox": bbox,
+        "tissue_only": tissue_only,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": max(1, -(-total // page_size)),
+        "predictions": to_records(page_rows, meta["tile_level"]),
+    }
+
+
+@app.get("/jobs/{job_id}/predictions")
+async def get_predictions(
+    job_id: str,
+    bbox: Optional[str] = None,
+    level: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(1000, ge=1, le=10_000),
+    tissue_only: bool = False,
+    tile_level: Optional[int] = None,
+):
+    """Page through tile predictions, optionally only those in a viewport.
+
+    ``bbox=x0,y0,x1,y1`` is in pixel coordinates of DZI ``level`` (full
+    resolution when ``level`` is omitted).  Tiles come back in row-major
+    order of the analysis grid.  ``tile_level`` picks one level of a
+    multi-level job (default: the finest).
+    """
+    record = _completed_record(job_id)
+    return await run_in_threadpool(
+        _query_predictions, record, bbox, level, page, page_size, tissue_only, tile_level
+    )
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "service": "region-detector"}
+    return {
+        "status": "ok",
+        "service": "region-detector",
+        "executor": _executor.stats(),
+        "results_cache": _results_cache.stats(),
+        "prediction_index_cache": _prediction_indexes.stats(),
+        "events": _events.stats(),
+        "autotune": _tuning.to_dict() if _tuning is not None else {"enabled": False},
+    }
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _notify_job_event(job_id: str, payload: Dict[str, Any], coalesce: bool = False) -> None:
+    """Queue *payload* for the backend; *coalesce* for progress updates."""
+    if not settings.BACKEND_INTERNAL_BASE_URL:
+        return
+    _notifier.submit(job_id, payload, coalesce=coalesce)
 
 
-def _notify_job_event(job_id: str, payload: Dict[str, Any]) -> None:
+def _post_job_event(job_id: str, payload: Dict[str, Any]) -> None:
     if not settings.BACKEND_INTERNAL_BASE_URL:
         return
 
@@ -1,42 +1,33 @@
-"""MinIO I/O helpers for the region-detector service.
+"""Storage helpers for the region-detector service.
 
 Provides listing, downloading, and uploading of tile images and analysis
-artifacts from/to the MinIO object store.
+artifacts.  The reads and writes go through the configured
+:class:`~src.tile_store.TileStore` (MinIO by default; see ``TILE_STORE``).
 """
 
 from __future__ import annotations
 
-import io
 import json
-import re
-import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, List
 from xml.etree import ElementTree
 
-from minio import Minio
-from minio.error import S3Error
 from PIL import Image
 
-from .config import settings
+from . import metrics
+from .tile_levels import select_analysis_level
+from .tile_store import ObjectData, ObjectNotFound, TileRef, as_file, get_tile_store
 
 
-_client_instance: Optional[Minio] = None
-_client_lock = threading.Lock()
-
-
-def _client() -> Minio:
-    global _client_instance
-    with _client_lock:
-        if _client_instance is None:
-            _client_instance = Minio(
-                settings.MINIO_ENDPOINT,
-                access_key=settings.MINIO_ACCESS_KEY,
-                secret_key=settings.MINIO_SECRET_KEY,
-                secure=settings.MINIO_SECURE,
-            )
-    return _client_instance
+BYTES_TRANSFERRED = metrics.counter(
+    "region_detector_minio_bytes_total", "Bytes transferred to or from the tile store.", ["direction"]
+)
+_BYTES_DOWNLOADED = BYTES_TRANSFERRED.labels("download")
+_BYTES_UPLOADED = BYTES_TRANSFERRED.labels("upload")
+UPLOAD_SECONDS = metrics.histogram(
+    "region_detector_upload_seconds", "Latency of one artifact upload to the tile store."
+)
 
 
 # ── Data classes ──────────────────────────────────────────────────────────────
@@ -53,16 +44,6 @@ class DZIInfo:
     format: str  # e.g. "jpg"
 
 
-@dataclass
-class TileRef:
-    """Reference to a single tile in MinIO, with its grid coordinates."""
-
-    level: int
-    x: int
-    y: int
-    object_key: str
-
-
 @dataclass
 class TileManifest:
     image_id: str
@@ -79,17 +60,9 @@ class TileManifest:
 
 def parse_dzi(image_id: str, bucket: str | None = None) -> DZIInfo:
     """Download and parse the DZI XML descriptor for *image_id*."""
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    dzi_key = f"{image_id}/image.dzi"
-    resp = client.get_object(bucket, dzi_key)
-    try:
-        xml_bytes = resp.read()
-    finally:
-        resp.close()
-        resp.release_conn()
+    xml_bytes = get_tile_store().read(f"{image_id}/image.dzi", bucket)
 
-    root = ElementTree.fromstring(xml_bytes)
+    root = ElementTree.fromstring(bytes(xml_bytes))
     # DZI namespace varies; handle with or without it
     ns = ""
     if root.tag.startswith("{"):
@@ -121,25 +94,48 @@ def list_tiles_at_level(
     bucket: str | None = None,
 ) -> List[TileRef]:
     """Return all tile object keys for *image_id* at the given DZI *level*."""
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    prefix = f"{image_id}/image_files/{level}/"
-    tile_pattern = re.compile(r"(\d+)_(\d+)\.\w+$")
-    tiles: List[TileRef] = []
-
-    for obj in client.list_objects(bucket, prefix=prefix, recursive=True):
-        m = tile_pattern.search(obj.object_name)
-        if m:
-            tiles.append(
-                TileRef(
-                    level=level,
-                    x=int(m.group(1)),
-                    y=int(m.group(2)),
-                    object_key=obj.object_name,
-                )
-            )
-
-    return tiles
+    return get_tile_store().list_tiles(image_id, level, bucket)
+
+
+@dataclass
+class TileSample:
+    """Tiles of one slide at the level an analysis would use."""
+
+    image_id: str
+    level: int
+    tile_px: int  # decoded tile side: DZI tile size plus twice the overlap
+    keys: List[str]
+
+
+def sample_analysis_tiles(
+    limit: int,
+    default_level: int,
+    bucket: str | None = None,
+) -> TileSample | None:
+    """Up to *limit* tiles, spread over the analysis level of the first slide.
+
+    The level is chosen as a job without ``tile_level`` would choose it, so
+    the sample has the size and encoding of the tiles jobs download.
+    Returns None when the bucket holds no slide.
+    """
+    store = get_tile_store()
+    descriptors = (key for key in store.list_keys("", bucket) if key.endswith("/image.dzi"))
+    image_id = next((key[: -len("/image.dzi")] for key in descriptors), None)
+    if image_id is None:
+        return None
+    levels = list_available_tile_levels(image_id, bucket)
+    if not levels:
+        return None
+    dzi = parse_dzi(image_id, bucket)
+    level = select_analysis_level(levels, default_level=default_level)
+    refs = list_tiles_at_level(image_id, level, bucket)
+    step = max(1, len(refs) // max(1, limit))
+    return TileSample(
+        image_id=image_id,
+        level=level,
+        tile_px=dzi.tile_size + 2 * dzi.overlap,
+        keys=[ref.object_key for ref in refs[::step][:limit]],
+    )
 
 
 def list_available_tile_levels(
@@ -147,39 +143,17 @@ def list_available_tile_levels(
     bucket: str | None = None,
 ) -> List[int]:
     """Return all available DZI levels for *image_id*."""
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    prefix = f"{image_id}/image_files/"
-    levels: set[int] = set()
-
-    for obj in client.list_objects(bucket, prefix=prefix, recursive=True):
-        relative_path = obj.object_name[len(prefix):]
-        level_token = relative_path.split("/", 1)[0]
-        if level_token.isdigit():
-            levels.add(int(level_token))
-
-    return sorted(levels)
+    return get_tile_store().list_levels(image_id, bucket)
 
 
 def load_tile_manifest(
     image_id: str,
     bucket: str | None = None,
 ) -> TileManifest | None:
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    object_key = f"{image_id}/manifest.json"
-    try:
-        resp = client.get_object(bucket, object_key)
-    except S3Error as exc:
-        if exc.code in {"NoSuchKey", "NoSuchObject"}:
-            return None
-        raise
-
     try:
-        payload = json.loads(resp.read())
-    finally:
-        resp.close()
-        resp.release_conn()
+        payload = json.loads(bytes(get_tile_store().read(f"{image_id}/manifest.json", bucket)))
+    except ObjectNotFound:
+        return None
 
     counts = {
         int(level): int(count)
@@ -196,20 +170,41 @@ def load_tile_manifest(
     )
 
 
+def download_tile_bytes(
+    object_key: str,
+    bucket: str | None = None,
+) -> ObjectData:
+    """A tile's encoded bytes, to be decoded straight away.
+
+    From MinIO this is a view of a per-thread buffer that the thread's next
+    download reuses (copy it with ``bytes()`` to keep it); from the local
+    store it is a read-only mmap.
+    """
+    data = get_tile_store().read_tile(object_key, bucket)
+    _BYTES_DOWNLOADED.inc(len(data))
+    return data
+
+
+def download_tile_batch(
+    object_keys: List[str],
+    bucket: str | None = None,
+) -> List[ObjectData | Exception]:
+    """Encoded bytes of every tile in *object_keys*, fetched concurrently.
+
+    A tile that could not be read yields its exception instead.
+    """
+    results = get_tile_store().read_many(object_keys, bucket)
+    _BYTES_DOWNLOADED.inc(sum(len(r) for r in results if not isinstance(r, Exception)))
+    return results
+
+
 def download_tile_image(
     object_key: str,
     bucket: str | None = None,
 ) -> Image.Image:
-    """Download a tile from MinIO and return it as a PIL Image."""
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    resp = client.get_object(bucket, object_key)
-    try:
-        data = resp.read()
-    finally:
-        resp.close()
-        resp.release_conn()
-    return Image.open(io.BytesIO(data)).convert("RGB")
+    """Download a tile and return it as a PIL Image."""
+    data = download_tile_bytes(object_key, bucket)
+    return Image.open(as_file(data)).convert("RGB")
 
 
 def upload_bytes(
@@ -218,36 +213,33 @@ def upload_bytes(
     content_type: str = "application/octet-stream",
     bucket: str | None = None,
 ) -> None:
-    """Upload raw bytes to MinIO."""
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    client.put_object(
-        bucket,
-        object_key,
-        data=io.BytesIO(data),
-        length=len(data),
-        content_type=content_type,
-    )
+    """Upload raw bytes to the tile store."""
+    with UPLOAD_SECONDS.time():
+        get_tile_store().write(object_key, data, content_type, bucket)
+    _BYTES_UPLOADED.inc(len(data))
 
 
 def upload_json(
     payload: Any,
     object_key: str,
     bucket: str | None = None,
+    indent: int | None = 2,
 ) -> None:
-    data = json.dumps(payload, indent=2).encode("utf-8")
+    data = json.dumps(payload, indent=indent).encode("utf-8")
     upload_bytes(data, object_key, content_type="application/json", bucket=bucket)
 
 
+def download_bytes(
+    object_key: str,
+    bucket: str | None = None,
+) -> bytes:
+    data = bytes(get_tile_store().read(object_key, bucket))
+    _BYTES_DOWNLOADED.inc(len(data))
+    return data
+
+
 def download_json(
     object_key: str,
     bucket: str | None = None,
 ) -> Any:
-    bucket = bucket or settings.TILES_BUCKET
-    client = _client()
-    resp = client.get_object(bucket, object_key)
-    try:
-        return json.loads(resp.read())
-    finally:
-        resp.close()
-        resp.release_conn()
+    return json.loads(download_bytes(object_key, bucket=bucket))
@@ -4,13 +4,15 @@ Steps
 -----
 1. Parse the DZI descriptor to learn the tile grid dimensions.
 2. List all tiles at the requested zoom level.
-3. Download all tiles concurrently from MinIO.
+3. Pre-screen them against a tissue mask from a coarse thumbnail level, then
+   download the remaining tiles concurrently from MinIO.
 4. For each tile:
    a. Run tissue detection (skip if background).
    b. Embed tissue tiles with DINOv2 (batched).
    c. Classify each embedding with the sklearn head.
 5. Aggregate tile-level results into a slide-level summary.
-6. Generate a heatmap overlay image and upload it to MinIO.
+6. Generate a heatmap overlay image (and a DZI pyramid of it) and upload it
+   to MinIO.
 7. Return the full result (tile predictions + summary + heatmap path).
 
 Performance notes
@@ -20,36 +22,113 @@ Performance notes
   analysis request.
 - Tile downloads are parallelised with a thread pool (DOWNLOAD_WORKERS threads)
   to saturate network I/O and hide per-tile round-trip latency.
+- Embedding goes through a shared :class:`InferenceServer` (when
+  INFERENCE_SERVER_ENABLED) so concurrent jobs are batched together instead
+  of competing with small per-job forward passes.
+- Hierarchical mode classifies a coarse level first and only refines
+  suspicious or uncertain regions, so mostly-benign slides touch a fraction
+  of the target-level tiles.
+- Analysis tiles are decoded straight into a per-job :class:`TileArena`;
+  tissue detection and embedding read views of it instead of PIL images.
+- With tile dedup enabled, tiles whose pixels hash alike are embedded once
+  and share that representative's classification.
+- A :class:`CancellationToken` is polled between downloads, at chunk
+  boundaries and before each embedding batch.  Preemption stops the job at a
+  chunk boundary; outcomes analysed so far stay in its
+  :class:`AnalysisCheckpoint`, so the next run skips those tiles.
 """
 
 from __future__ import annotations
 
+import functools
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
+from .cancellation import CancellationToken
+from . import autotune, metrics
 from .classifier import Classifier
 from .config import settings
-from .embedder import Embedder
-from .geometry import DZIShape, max_dzi_level, tile_rect_in_fullres
-from .heatmap import TileCell, generate_heatmap, heatmap_to_png_bytes
+from .embedder import Embedder, calibration_tiles
+from .geometry import DZIShape, max_dzi_level, tile_rects_in_fullres
+from .heatmap import TileCellArrays, generate_heatmap, heatmap_to_png_bytes
+from .heatmap_pyramid import build_heatmap_pyramid
+from .inference_server import InferenceServer
 from .minio_io import (
+    DZIInfo,
     TileRef,
+    download_tile_batch,
+    download_tile_bytes,
     download_tile_image,
     list_available_tile_levels,
     list_tiles_at_level,
+    sample_analysis_tiles,
     load_tile_manifest,
     parse_dzi,
     upload_json,
     upload_bytes,
 )
+from .predictions_store import BUFFER_DTYPE, LABEL_CODES, PREDICTION_DTYPE, to_records
+from .predictions_store import encode as encode_predictions
+from .prescreen import (
+    TissuePrescreen,
+    choose_prescreen_level,
+    level_size,
+    level_tile_grid,
+    stitch_level,
+)
+from .tile_arena import TileArena
+from .tile_dedup import TileDeduplicator
 from .tile_levels import select_analysis_level
-from .tissue_detector import TissueResult, detect_tissue
+from .tile_store import tile_fetch_mode
+from .tissue_detector import TileInput, TissueResult, detect_tissue, recheck_tissue
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+TILE_DOWNLOAD_SECONDS = metrics.histogram(
+    "region_detector_tile_download_seconds", "Latency of one analysis tile download."
+)
+TILE_DECODE_SECONDS = metrics.histogram(
+    "region_detector_tile_decode_seconds", "Time to decode one tile into the arena."
+)
+TISSUE_DETECT_SECONDS = metrics.histogram(
+    "region_detector_tissue_detect_seconds", "Tissue detection time per tile."
+)
+EMBED_BATCH_SECONDS = metrics.histogram(
+    "region_detector_embed_batch_seconds", "Embedder forward-pass latency per batch."
+)
+EMBED_BATCH_SIZE = metrics.histogram(
+    "region_detector_embed_batch_size", "Tiles per embedder forward pass.", metrics.SIZE_BUCKETS
+)
+CLASSIFIER_SECONDS = metrics.histogram(
+    "region_detector_classifier_seconds", "Classifier head latency per batch."
+)
+TILES_TOTAL = metrics.counter(
+    "region_detector_tiles_total",
+    "Analysis tiles by outcome (processed = classified, skipped = not tissue, "
+    "failed = download failed).",
+    ["outcome"],
+)
+TILES_PROCESSED = TILES_TOTAL.labels("processed")
+TILES_SKIPPED = TILES_TOTAL.labels("skipped")
+TILES_FAILED = TILES_TOTAL.labels("failed")
+DOWNLOAD_THREADS_BUSY = metrics.gauge(
+    "region_detector_download_threads_busy", "Download pool threads currently fetching a tile."
+)
+TISSUE_THREADS_BUSY = metrics.gauge(
+    "region_detector_tissue_threads_busy", "Tissue pool threads currently checking a tile."
+)
+metrics.gauge(
+    "region_detector_inference_queue_depth",
+    "Tiles waiting in the shared inference server.",
+    lambda: _inference_server.stats()["pending"] if _inference_server is not None else 0,
+)
 
 
 # ── Module-level model singletons ────────────────────────────────────────────
@@ -58,7 +137,9 @@ from .tissue_detector import TissueResult, detect_tissue
 
 _embedder: Optional[Embedder] = None
 _classifier: Optional[Classifier] = None
-_model_lock = threading.Lock()
+_inference_server: Optional[InferenceServer] = None
+# Re-entrant: the embedder's precision guardrail needs the classifier.
+_model_lock = threading.RLock()
 
 
 def get_embedder() -> Embedder:
@@ -66,7 +147,10 @@ def get_embedder() -> Embedder:
     with _model_lock:
         if _embedder is None:
             print("[pipeline] Loading DINOv2 embedder…")
-            _embedder = Embedder()
+            embedder = Embedder()
+            if embedder.precision != "fp32":
+                _apply_precision_guardrail(embedder, get_classifier())
+            _embedder = embedder
             print("[pipeline] Embedder ready.")
     return _embedder
 
@@ -82,30 +166,135 @@ def get_classifier() -> Classifier:
     return _classifier
 
 
+def get_inference_server() -> InferenceServer:
+    """Shared cross-job batching worker around the embedder singleton."""
+    global _inference_server
+    embedder = get_embedder()
+    with _model_lock:
+        if _inference_server is None:
+            _inference_server = InferenceServer(
+                lambda images: _embed_batch(embedder, images),
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            ).start()
+    return _inference_server
+
+
+def _embed_batch(embedder: Embedder, images: List[TileInput]) -> np.ndarray:
+    """One forward pass over *images*, recorded in the embed metrics."""
+    EMBED_BATCH_SIZE.observe(len(images))
+    with EMBED_BATCH_SECONDS.time():
+        return embedder.embed_batch(images, batch_size=len(images))
+
+
+def _inference_session(run: Callable[..., Any]) -> Callable[..., Any]:
+    """Hold an inference-server session for the duration of an analysis.
+
+    The server can then dispatch a batch as soon as every running analysis
+    has queued its tiles instead of waiting out ``INFERENCE_MAX_WAIT_MS``.
+    """
+
+    @functools.wraps(run)
+    def wrapper(job_id: str | None, image_id: str, *args: Any, **kwargs: Any) -> Any:
+        if not settings.INFERENCE_SERVER_ENABLED:
+            return run(job_id, image_id, *args, **kwargs)
+        with get_inference_server().session(job_id or f"adhoc-{image_id}"):
+            return run(job_id, image_id, *args, **kwargs)
+
+    return wrapper
+
+
+def embed_images(images: List[TileInput], job_key: str) -> np.ndarray:
+    """Embed *images* on behalf of *job_key* (the fairness unit)."""
+    if settings.INFERENCE_SERVER_ENABLED:
+        return get_inference_server().embed(images, job_id=job_key)
+    return _embed_batch(get_embedder(), images)
+
+
+def precision_deviation(embedder: Embedder, classifier: Classifier, images) -> float:
+    """Max |Δ tumour probability| of the active precision versus fp32."""
+    reduced = classifier.predict_tumor_probability(
+        embedder.embed_batch(images, batch_size=len(images))
+    )
+    reference = classifier.predict_tumor_probability(embedder.embed_batch_reference(images))
+    return float(np.max(np.abs(reduced - reference)))
+
+
+def _apply_precision_guardrail(embedder: Embedder, classifier: Classifier) -> None:
+    images = calibration_tiles(settings.EMBEDDER_CALIBRATION_DIR)
+    deviation = precision_deviation(embedder, classifier, images)
+    if deviation > settings.EMBEDDER_PRECISION_MAX_PROB_DELTA:
+        print(
+            f"[pipeline] WARNING: {embedder.precision} embeddings shift tumour "
+            f"probability by up to {deviation:.3f} "
+            f"(> {settings.EMBEDDER_PRECISION_MAX_PROB_DELTA}). Reverting to fp32."
+        )
+        embedder.use_fp32()
+    else:
+        print(
+            f"[pipeline] {embedder.precision} guardrail OK "
+            f"(max probability delta {deviation:.4f})"
+        )
+
+
+def autotune_settings() -> autotune.TuningResult:
+    """Apply this host's cached tuning, calibrating first if there is none."""
+    embedder = get_embedder()
+    pinned = autotune.PINNED
+    # Tuning made under other pinned values does not apply.
+    host = autotune.host_fingerprint(
+        {**embedder.describe(), **{name: getattr(settings, name) for name in sorted(pinned)}}
+    )
+    result = autotune.load_cached(settings.AUTOTUNE_CACHE_PATH, host, settings.AUTOTUNE_MAX_AGE_S)
+    if result is None:
+        print("[pipeline] Calibrating batch size and worker counts…")
+        tiles = [np.asarray(img) for img in calibration_tiles(settings.EMBEDDER_CALIBRATION_DIR)]
+        try:
+            sample = sample_analysis_tiles(
+                settings.AUTOTUNE_SAMPLE_TILES, settings.DEFAULT_TILE_LEVEL
+            )
+        except Exception as exc:  # no MinIO yet: keep the static download settings
+            print(f"[pipeline] Skipping download calibration: {exc}")
+            sample = None
+        result = autotune.calibrate(
+            embed_fn=lambda images: embedder.embed_batch(images, batch_size=len(images)),
+            tiles=tiles,
+            fetch_fn=download_tile_bytes,
+            sample_keys=sample.keys if sample is not None else [],
+            detect_fn=detect_tissue,
+            host=host,
+            memory_mb=settings.AUTOTUNE_MEMORY_CEILING_MB,
+            budget_s=settings.AUTOTUNE_BUDGET_S,
+            tile_px=sample.tile_px if sample is not None else autotune.DEFAULT_TILE_PX,
+            pinned=pinned,
+        )
+        try:
+            autotune.store_cached(settings.AUTOTUNE_CACHE_PATH, result)
+        except OSError as exc:  # unwritable cache: keep the in-memory result
+            print(f"[pipeline] Could not cache tuning in {settings.AUTOTUNE_CACHE_PATH}: {exc}")
+    autotune.apply(result, pinned)
+    print(
+        f"[pipeline] Tuning ({result.source}): batch_size={result.batch_size}, "
+        f"download_workers={result.download_workers}, "
+        f"download_chunk_size={result.download_chunk_size}, "
+        f"tissue_workers={result.tissue_workers}"
+        + (f"; kept from the environment: {', '.join(sorted(pinned))}" if pinned else "")
+    )
+    return result
+
+
 def preload_models() -> None:
     """Eagerly initialise both models.  Call this at service startup."""
+    tile_fetch_mode()  # fail at startup on a mistyped TILE_FETCH_MODE
     get_embedder()
     get_classifier()
+    if settings.INFERENCE_SERVER_ENABLED:
+        get_inference_server()
 
 
 # ── Result data classes ───────────────────────────────────────────────────────
 
 
-@dataclass
-class TilePrediction:
-    tile_x: int
-    tile_y: int
-    tile_level: int
-    pixel_x: int
-    pixel_y: int
-    width: int
-    height: int
-    is_tissue: bool
-    tissue_ratio: float
-    tumor_probability: float
-    label: str
-
-
 @dataclass
 class SlideSummary:
     total_tiles: int
@@ -130,6 +319,18 @@ class AnalysisResult:
     summary_key: str
     results_key: str
     timings: Dict[str, float]
+    hierarchy: Optional[Dict[str, Any]] = None
+    heatmap_dzi_key: Optional[str] = None
+
+
+@dataclass
+class MultiLevelResult:
+    image_id: str
+    job_id: str
+    tile_levels: List[int]
+    levels: Dict[int, AnalysisResult]
+    summary_key: str
+    timings: Dict[str, float]
 
 
 # ── Progress callback ─────────────────────────────────────────────────────────
@@ -146,14 +347,25 @@ def _download_tiles_parallel(
     progress_cb: ProgressCallback = None,
     progress_offset: int = 0,
     progress_total: int | None = None,
-) -> Dict[str, Optional[Image.Image]]:
-    """Download all tiles concurrently. Returns {object_key: PIL.Image | None}."""
-    results: Dict[str, Optional[Image.Image]] = {}
+    token: CancellationToken | None = None,
+    fetch: Callable[[TileRef], Any] | None = None,
+) -> Dict[str, Any]:
+    """Download all tiles concurrently. Returns {object_key: tile | None}.
+
+    Tiles are PIL images unless *fetch* (called on a worker thread per ref)
+    returns something else.  On cancellation, queued downloads are dropped,
+    the images fetched so far are closed and the call returns without
+    waiting for in-flight requests.
+    """
+    results: Dict[str, Any] = {}
     total = progress_total or len(tile_refs)
     done = 0
+    if fetch is None:
+        fetch = lambda tref: download_tile_image(tref.object_key)  # noqa: E731
 
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        futures = {pool.submit(download_tile_image, t.object_key): t for t in tile_refs}
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(fetch, t): t for t in tile_refs}
         for future in as_completed(futures):
             tref = futures[future]
             try:
@@ -161,6 +373,9 @@ def _download_tiles_parallel(
             except Exception as exc:
                 print(f"[pipeline] Failed to download {tref.object_key}: {exc}")
                 results[tref.object_key] = None
+            if token is not None and token.cancelled:
+                _close_images(results.values())
+                token.raise_if_cancelled()
             done += 1
             absolute_done = progress_offset + done
             if absolute_done % 50 == 0 or absolute_done == total:
@@ -170,12 +385,27 @@ def _download_tiles_parallel(
                     total,
                     f"Downloading tiles ({absolute_done}/{total})",
                 )
-
+    except BaseException:
+        # Drop queued downloads; in-flight ones finish in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
     return results
 
 
+def _close_images(images) -> None:
+    for image in images:
+        if isinstance(image, Image.Image):
+            image.close()
+
+
+def _timed_detect_tissue(image: TileInput, threshold: float) -> TissueResult:
+    with TISSUE_THREADS_BUSY.track_inprogress(), TISSUE_DETECT_SECONDS.time():
+        return detect_tissue(image, threshold=threshold)
+
+
 def _detect_tissue_parallel(
-    images: Dict[str, Image.Image],
+    images: Dict[str, TileInput],
     threshold: float,
 ) -> Dict[str, TissueResult]:
     if not images:
@@ -184,7 +414,7 @@ def _detect_tissue_parallel(
     results: Dict[str, TissueResult] = {}
     with ThreadPoolExecutor(max_workers=settings.TISSUE_WORKERS) as pool:
         futures = {
-            pool.submit(detect_tissue, image, threshold=threshold): object_key
+            pool.submit(_timed_detect_tissue, image, threshold): object_key
             for object_key, image in images.items()
         }
         for future in as_completed(futures):
@@ -196,26 +426,1071 @@ def _iter_chunks(items: List[TileRef], chunk_size: int) -> List[List[TileRef]]:
     return [items[idx: idx + chunk_size] for idx in range(0, len(items), chunk_size)]
 
 
+# ── Thumbnail pre-screen ──────────────────────────────────────────────────────
+
+
+def _build_prescreen(
+    dzi: DZIInfo,
+    image_id: str,
+    available_levels: List[int],
+    tile_level: int,
+    token: CancellationToken | None = None,
+) -> Tuple[TissuePrescreen | None, int]:
+    """Tissue mask from a coarse level; returns ``(prescreen, tiles_downloaded)``."""
+    shape = DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size)
+    level = choose_prescreen_level(
+        shape,
+        available_levels,
+        tile_level,
+        level_offset=settings.PRESCREEN_LEVEL_OFFSET,
+        max_tiles=settings.PRESCREEN_MAX_TILES,
+    )
+    if level is None:
+        return None, 0
+
+    refs = list_tiles_at_level(image_id, level)
+    images = _download_tiles_parallel(refs, max_workers=settings.DOWNLOAD_WORKERS, token=token)
+    if any(images.get(t.object_key) is None for t in refs):
+        # A hole in the thumbnail would hide tissue; analyse everything instead.
+        print(f"[pipeline] Pre-screen tiles missing for {image_id}; skipping pre-screen.")
+        return None, len(refs)
+
+    rgb = stitch_level(
+        {(t.x, t.y): images[t.object_key] for t in refs},
+        shape,
+        level,
+        overlap=dzi.overlap,
+    )
+    for image in images.values():
+        image.close()
+    screen = TissuePrescreen.from_thumbnail(
+        rgb,
+        mask_level=level,
+        tile_size=dzi.tile_size,
+        saturation_floor=settings.PRESCREEN_SATURATION_FLOOR,
+        dilation_px=settings.PRESCREEN_DILATION_PX,
+    )
+    return screen, len(refs)
+
+
+# ── Tile analysis pass ────────────────────────────────────────────────────────
+
+
+TileKey = Tuple[int, int]
+
+# Row states of :class:`LevelOutcomes`.
+_PENDING, _ANALYSED, _FAILED = 0, 1, 2
+
+# Permissive content test of the forced-content fallback.
+FORCED_CONTENT_THRESHOLD = 0.0
+FORCED_CONTENT_STD_FLOOR = 3.0
+
+
+class LevelOutcomes:
+    """Results of the download → tissue → embed → classify pass for one level.
+
+    ``rows`` is a ``BUFFER_DTYPE`` array with one row per tile of the level's
+    grid (``y * cols + x``), its geometry filled in up front; the analysis
+    writes is_tissue, tissue_ratio, tumor_probability and label straight into
+    a tile's row.  ``state`` tells pending, analysed and failed tiles apart,
+    and ``gray_std`` keeps the first-pass greyscale std of rejected tiles for
+    the forced-content check.
+    """
+
+    def __init__(self, shape: DZIShape, level: int):
+        self.cols, grid_rows = level_tile_grid(shape, level)
+        size = self.cols * grid_rows
+        self.rows = np.zeros(size, dtype=BUFFER_DTYPE)
+        self.rows["tile_x"] = np.arange(size) % self.cols
+        self.rows["tile_y"] = np.arange(size) // self.cols
+        (
+            self.rows["pixel_x"],
+            self.rows["pixel_y"],
+            self.rows["width"],
+            self.rows["height"],
+        ) = tile_rects_in_fullres(
+            shape=shape,
+            tile_level=level,
+            max_level=max_dzi_level(shape),
+            tile_x=self.rows["tile_x"],
+            tile_y=self.rows["tile_y"],
+        )
+        self.state = np.full(size, _PENDING, dtype=np.uint8)
+        self.gray_std = np.full(size, np.nan)
+
+    def index(self, tref: TileRef) -> int:
+        return tref.y * self.cols + tref.x
+
+    def indexes(self, tile_refs: List[TileRef]) -> np.ndarray:
+        return np.fromiter(
+            (t.y * self.cols + t.x for t in tile_refs), dtype=np.int64, count=len(tile_refs)
+        )
+
+    def done(self, tref: TileRef) -> bool:
+        return self.state[self.index(tref)] != _PENDING
+
+    @property
+    def tiles_done(self) -> int:
+        return int(np.count_nonzero(self.state != _PENDING))
+
+    @property
+    def has_tissue(self) -> bool:
+        return bool(self.rows["is_tissue"].any())
+
+    def record_tissue(self, index: int, tissue_ratio: float, probability: float, label: str) -> None:
+        self.rows["is_tissue"][index] = True
+        self.rows["tissue_ratio"][index] = tissue_ratio
+        self.rows["tumor_probability"][index] = probability
+        self.rows["label"][index] = LABEL_CODES[label]
+        self.state[index] = _ANALYSED
+
+    def record_rejected(self, index: int, tissue: TissueResult) -> None:
+        self.rows["tissue_ratio"][index] = tissue.tissue_ratio
+        if tissue.gray_std is not None:
+            self.gray_std[index] = tissue.gray_std
+        self.state[index] = _ANALYSED
+
+    def record_failed(self, index: int) -> None:
+        self.state[index] = _FAILED
+
+    def fill_background(self, tile_refs: List[TileRef]) -> None:
+        """Mark the still pending *tile_refs* as analysed background."""
+        index = self.indexes(tile_refs)
+        self.state[index[self.state[index] == _PENDING]] = _ANALYSED
+
+    def inherit(self, index: np.ndarray, parent: "LevelOutcomes", parent_index: np.ndarray) -> None:
+        """Copy the outcomes of *parent* rows into the rows at *index*."""
+        for name in ("is_tissue", "tissue_ratio", "tumor_probability", "label"):
+            self.rows[name][index] = parent.rows[name][parent_index]
+        self.state[index] = parent.state[parent_index]
+        self.gray_std[index] = parent.gray_std[parent_index]
+
+    def copy(self) -> "LevelOutcomes":
+        clone = object.__new__(LevelOutcomes)
+        clone.cols = self.cols
+        clone.rows = self.rows.copy()
+        clone.state = self.state.copy()
+        clone.gray_std = self.gray_std.copy()
+        return clone
+
+    def predictions(self, tile_refs: List[TileRef]) -> np.ndarray:
+        """Analysed rows of *tile_refs*, in their order; failed and pending tiles are left out."""
+        index = self.indexes(tile_refs)
+        return self.rows[index[self.state[index] == _ANALYSED]]
+
+
+@dataclass
+class AnalysisCheckpoint:
+    """Tile outcomes already analysed, per level; survives preemption.
+
+    Only tissue-pass outcomes are kept (a few columns per tile, no pixels),
+    so a preempted job releases its images and resumes from here.
+    """
+
+    outcomes: Dict[int, LevelOutcomes] = field(default_factory=dict)
+
+    def level(self, shape: DZIShape, tile_level: int) -> LevelOutcomes:
+        if tile_level not in self.outcomes:
+            self.outcomes[tile_level] = LevelOutcomes(shape, tile_level)
+        return self.outcomes[tile_level]
+
+    @property
+    def tiles_done(self) -> int:
+        return sum(level.tiles_done for level in self.outcomes.values())
+
+
+class _TileAnalyser:
+    """Runs tiles through download, tissue detection, embedding and classification.
+
+    Shared by the flat and hierarchical modes so both apply identical tissue
+    filtering and batching.  Outcomes go into the checkpoint's
+    :class:`LevelOutcomes` for each level.
+    """
+
+    def __init__(
+        self,
+        *,
+        tissue_threshold: float,
+        threshold: float,
+        batch_size: int,
+        job_key: str,
+        classifier: Classifier,
+        progress_cb: ProgressCallback,
+        token: CancellationToken | None = None,
+        checkpoint: AnalysisCheckpoint | None = None,
+        shape: DZIShape,
+        tile_px: int = 256,
+        dedup: TileDeduplicator | None = None,
+    ):
+        self.tissue_threshold = tissue_threshold
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.job_key = job_key
+        self.classifier = classifier
+        self.progress_cb = progress_cb
+        self.token = token
+        self.checkpoint = checkpoint if checkpoint is not None else AnalysisCheckpoint()
+        self.shape = shape
+        self.download_s = 0.0
+        self.embed_s = 0.0
+        self.tiles_embedded = 0
+        self.tiles_evaluated = 0
+        self.dedup = dedup
+
+        # A full chunk plus a partly filled batch carried over from the last one.
+        self._arena = TileArena(settings.DOWNLOAD_CHUNK_SIZE + batch_size, tile_px)
+        self._slots: Dict[str, int] = {}
+        self._batch_tiles: List[TileRef] = []
+        self._batch_images: List[np.ndarray] = []
+        self._batch_tissue: List[TissueResult] = []
+        self._batch_keys: List[bytes] = []
+        # Duplicates of a tile in the pending batch, resolved when it is classified.
+        self._followers: Dict[bytes, List[Tuple[TileRef, TissueResult]]] = {}
+        self._outcomes: LevelOutcomes | None = None
+        # Encoded bytes of rejected tiles, kept while the level has no tissue
+        # so the forced-content fallback need not download them again.
+        self._caching = False
+        self._fallback_cache: Dict[str, bytes] = {}
+        self._fallback_cache_bytes = 0
+        self.fallback_cache_hits = 0
+        self.fallback_downloads = 0
+        # Sees every downloaded tile (None if the download failed) before it
+        # is released; multi-level jobs derive coarser tiles from it.
+        self.observer: Callable[[TileRef, Optional[np.ndarray]], None] | None = None
+
+    def _download_chunk(
+        self,
+        chunk: List[TileRef],
+        prefetched: Dict[str, Any] | None = None,
+        keep_encoded: Dict[str, bytes] | None = None,
+        **progress: Any,
+    ) -> Dict[str, Optional[np.ndarray]]:
+        """Download *chunk* into arena slots; failed tiles map to ``None``.
+
+        Tiles in *prefetched* (encoded bytes) are decoded without a download.
+        If *keep_encoded* is given, each tile's encoded bytes are copied into it.
+        """
+        slots = {tref.object_key: self._arena.reserve() for tref in chunk}
+        prefetched = dict(prefetched or {})
+
+        def fetch(tref: TileRef) -> np.ndarray:
+            with DOWNLOAD_THREADS_BUSY.track_inprogress():
+                data = prefetched.pop(tref.object_key, None)
+                if data is None:
+                    with TILE_DOWNLOAD_SECONDS.time():
+                        data = download_tile_bytes(tref.object_key)
+                elif isinstance(data, Exception):
+                    raise data
+                if keep_encoded is not None:
+                    # A copy: the download buffer is reused for the next tile.
+                    keep_encoded[tref.object_key] = bytes(data)
+                with TILE_DECODE_SECONDS.time():
+                    return self._arena.decode(slots[tref.object_key], data)
+
+        download_start = time.perf_counter()
+        try:
+            if tile_fetch_mode() == "async":
+                # One event loop fetches the whole chunk; workers only decode.
+                keys = [tref.object_key for tref in chunk if tref.object_key not in prefetched]
+                prefetched.update(zip(keys, download_tile_batch(keys)))
+            tiles = _download_tiles_parallel(
+                chunk,
+                max_workers=settings.DOWNLOAD_WORKERS,
+                token=self.token,
+                fetch=fetch,
+                **progress,
+            )
+        except BaseException:
+            for slot in slots.values():
+                self._arena.release(slot)
+            raise
+        finally:
+            self.download_s += time.perf_counter() - download_start
+        for object_key, tile in tiles.items():
+            if tile is None:
+                self._arena.release(slots.pop(object_key))
+        self._slots.update(slots)
+        return tiles
+
+    def _cache_rejected(self, object_key: str, encoded: Dict[str, bytes]) -> None:
+        data = encoded.get(object_key)
+        budget = settings.FALLBACK_TILE_CACHE_MB * 1024 * 1024
+        if data is not None and self._fallback_cache_bytes + len(data) <= budget:
+            self._fallback_cache[object_key] = data
+            self._fallback_cache_bytes += len(data)
+
+    def _stop_caching(self) -> None:
+        """Tissue was found, so the fallback cannot run: drop the cache."""
+        self._caching = False
+        self._fallback_cache.clear()
+        self._fallback_cache_bytes = 0
+
+    def _release_tile(self, tref: TileRef) -> None:
+        slot = self._slots.pop(tref.object_key, None)
+        if slot is not None:
+            self._arena.release(slot)
+
+    def _flush_batch(self) -> None:
+        if not self._batch_images:
+            return
+        if self.token is not None:
+            self.token.raise_if_cancelled()
+        embed_start = time.perf_counter()
+        embeddings = embed_images(self._batch_images, self.job_key)
+        self.embed_s += time.perf_counter() - embed_start
+        self.tiles_embedded += len(self._batch_images)
+        with CLASSIFIER_SECONDS.time():
+            probs = self.classifier.predict_tumor_probability(embeddings).tolist()
+        for bt, btr, prob in zip(self._batch_tiles, self._batch_tissue, probs):
+            self._record(bt, btr, prob)
+        for key, prob in zip(self._batch_keys, probs):
+            self.dedup.results[key] = prob
+            for ft, ftr in self._followers.pop(key):
+                self._record(ft, ftr, prob)
+        self._release_batch()
+
+    def _record(self, tref: TileRef, tissue: TissueResult, prob: float) -> None:
+        TILES_PROCESSED.inc()
+        self._outcomes.record_tissue(
+            self._outcomes.index(tref),
+            tissue.tissue_ratio,
+            prob,
+            "Tumor" if prob >= self.threshold else "Normal",
+        )
+
+    def _release_batch(self) -> None:
+        for tref in self._batch_tiles:
+            self._release_tile(tref)
+        self._batch_tiles.clear()
+        self._batch_images.clear()
+        self._batch_tissue.clear()
+        self._batch_keys.clear()
+        self._followers.clear()
+
+    def _chunk_boundary(self) -> None:
+        """Yield point: pending tiles are classified first so the checkpoint is complete."""
+        if self.token is None:
+            return
+        self.token.raise_if_cancelled()
+        if self.token.preemption_requested:
+            self._flush_batch()
+            self.token.chunk_boundary()
+
+    def _enqueue(self, tref: TileRef, image: np.ndarray, tissue: TissueResult) -> None:
+        if self.dedup is not None and self._fold(tref, image, tissue):
+            self._release_tile(tref)
+            return
+        self._batch_tiles.append(tref)
+        self._batch_images.append(image)
+        self._batch_tissue.append(tissue)
+        if len(self._batch_images) >= self.batch_size:
+            self._flush_batch()
+
+    def _fold(self, tref: TileRef, image: np.ndarray, tissue: TissueResult) -> bool:
+        """Attach *tref* to an already seen duplicate; False makes it a representative."""
+        key = self.dedup.key(image)
+        prob = self.dedup.results.get(key)
+        if prob is not None:
+            self._record(tref, tissue, prob)
+        elif key in self._followers:
+            self._followers[key].append((tref, tissue))
+        else:
+            self._followers[key] = []
+            self._batch_keys.append(key)
+            return False
+        self.dedup.folded += 1
+        return True
+
+    def outcomes(self, tile_level: int) -> LevelOutcomes:
+        return self.checkpoint.level(self.shape, tile_level)
+
+    def analyse(
+        self,
+        tile_refs: List[TileRef],
+        tile_level: int,
+        progress_offset: int = 0,
+        progress_total: int | None = None,
+        message: str = "Analysing tiles",
+    ) -> Tuple[LevelOutcomes, List[TileRef]]:
+        """Analyse *tile_refs*; returns the level's outcomes and the soft-skipped refs.
+
+        Soft-skipped tiles failed the tissue check and are candidates for the
+        forced-content fallback.  Tiles already in the checkpoint for
+        *tile_level* (or pending from :meth:`analyse_images`) are not
+        analysed again.
+        """
+        self._outcomes = self.outcomes(tile_level)
+        self._flush_batch()
+        remaining = [t for t in tile_refs if not self._outcomes.done(t)]
+        self._stop_caching()
+        self._caching = settings.FALLBACK_TILE_CACHE_MB > 0 and not self._outcomes.has_tissue
+        total = progress_total or len(tile_refs)
+        processed_count = progress_offset + len(tile_refs) - len(remaining)
+
+        try:
+            self._analyse_chunks(remaining, tile_level, processed_count, total, message)
+        except BaseException:
+            self._release_batch()
+            raise
+
+        outcomes = self._outcomes
+        index = outcomes.indexes(tile_refs)
+        rejected = (outcomes.state[index] == _ANALYSED) & ~outcomes.rows["is_tissue"][index]
+        soft_skipped = [tref for tref, skip in zip(tile_refs, rejected) if skip]
+        return outcomes, soft_skipped
+
+    def _analyse_chunks(
+        self,
+        tile_refs: List[TileRef],
+        tile_level: int,
+        processed_count: int,
+        total: int,
+        message: str,
+    ) -> None:
+        for chunk in _iter_chunks(tile_refs, settings.DOWNLOAD_CHUNK_SIZE):
+            self._chunk_boundary()
+            encoded: Dict[str, bytes] | None = {} if self._caching else None
+            tile_images = self._download_chunk(
+                chunk,
+                keep_encoded=encoded,
+                progress_cb=self.progress_cb,
+                progress_offset=processed_count,
+                progress_total=total,
+            )
+            tissue_inputs = {
+                object_key: image
+                for object_key, image in tile_images.items()
+                if image is not None
+            }
+            tissue_results = _detect_tissue_parallel(tissue_inputs, self.tissue_threshold)
+
+            for tref in chunk:
+                img = tile_images.get(tref.object_key)
+                processed_count += 1
+                self.tiles_evaluated += 1
+                if self.observer is not None:
+                    self.observer(tref, img)
+                if img is None:
+                    TILES_FAILED.inc()
+                    self._outcomes.record_failed(self._outcomes.index(tref))
+                elif not tissue_results[tref.object_key].is_tissue:
+                    TILES_SKIPPED.inc()
+                    self._outcomes.record_rejected(
+                        self._outcomes.index(tref), tissue_results[tref.object_key]
+                    )
+                    if self._caching:
+                        self._cache_rejected(tref.object_key, encoded)
+                    self._release_tile(tref)
+                else:
+                    if self._caching:
+                        self._stop_caching()
+                    self._enqueue(tref, img, tissue_results[tref.object_key])
+
+                if processed_count % 20 == 0 or processed_count == total:
+                    _report(self.progress_cb, processed_count, total, message, tile_level)
+
+        self._flush_batch()
+
+    def analyse_images(self, tiles: List[Tuple[TileRef, np.ndarray]], tile_level: int) -> None:
+        """Tissue-check and enqueue tiles whose pixels are already at hand.
+
+        The batch is left pending; the next :meth:`analyse` of *tile_level*
+        classifies it first and skips these tiles.
+        """
+        self._outcomes = self.outcomes(tile_level)
+        tiles = [(tref, img) for tref, img in tiles if not self._outcomes.done(tref)]
+        tissue_results = _detect_tissue_parallel(
+            {tref.object_key: img for tref, img in tiles}, self.tissue_threshold
+        )
+        try:
+            for tref, img in tiles:
+                self.tiles_evaluated += 1
+                tissue = tissue_results[tref.object_key]
+                if tissue.is_tissue:
+                    self._enqueue(tref, img, tissue)
+                    continue
+                TILES_SKIPPED.inc()
+                self._outcomes.record_rejected(self._outcomes.index(tref), tissue)
+        except BaseException:
+            self._release_batch()
+            raise
+
+    def force_content(self, tile_refs: List[TileRef], tile_level: int) -> None:
+        """Re-check *tile_refs* with the permissive variance-only content test.
+
+        The check is decided from the first pass's tile statistics where they
+        were recorded, so only tiles that pass are fetched again, and those
+        kept in the fallback cache are decoded without a download.  Tiles
+        that pass overwrite their first-pass rows in the level's outcomes.
+        """
+        self._outcomes = first_pass = self.outcomes(tile_level)
+        decided: Dict[str, TissueResult] = {}
+        needed: List[TileRef] = []
+        unknown = 0  # no usable first-pass stats: decided after the download
+        for tref in tile_refs:
+            index = first_pass.index(tref)
+            content = None
+            if first_pass.state[index] != _PENDING:
+                gray_std = float(first_pass.gray_std[index])
+                content = recheck_tissue(
+                    TissueResult(
+                        False,
+                        float(first_pass.rows["tissue_ratio"][index]),
+                        None if np.isnan(gray_std) else gray_std,
+                    ),
+                    threshold=FORCED_CONTENT_THRESHOLD,
+                    std_floor=FORCED_CONTENT_STD_FLOOR,
+                )
+            if content is None or content.is_tissue:
+                needed.append(tref)
+            if content is not None:
+                decided[tref.object_key] = content
+            else:
+                unknown += 1
+
+        fallback_processed = 0
+        passed = 0
+        for chunk in _iter_chunks(needed, settings.DOWNLOAD_CHUNK_SIZE):
+            if self.token is not None:
+                self.token.raise_if_cancelled()
+            cached = {
+                tref.object_key: self._fallback_cache.pop(tref.object_key)
+                for tref in chunk
+                if tref.object_key in self._fallback_cache
+            }
+            self.fallback_cache_hits += len(cached)
+            self.fallback_downloads += len(chunk) - len(cached)
+            refetched = self._download_chunk(chunk, prefetched=cached)
+            for tref in chunk:
+                img = refetched.get(tref.object_key)
+                if img is None:
+                    continue
+
+                content = decided.get(tref.object_key) or detect_tissue(
+                    img,
+                    threshold=FORCED_CONTENT_THRESHOLD,
+                    variance_fallback=True,
+                    std_floor=FORCED_CONTENT_STD_FLOOR,
+                )
+                if not content.is_tissue:
+                    self._release_tile(tref)
+                    continue
+                self._enqueue(tref, img, content)
+                passed += 1
+
+            fallback_processed += len(chunk)
+            _report(
+                self.progress_cb,
+                fallback_processed,
+                len(needed),
+                "Forced content analysis",
+                tile_level,
+            )
+
+        self._flush_batch()
+        self._stop_caching()
+        print(
+            f"[pipeline] Forced content: {passed}/{len(tile_refs)} tiles passed "
+            f"({unknown} without first-pass stats were checked after download); "
+            f"{self.fallback_cache_hits} decoded from the fallback cache, "
+            f"{self.fallback_downloads} downloaded again"
+        )
+
+
+def _needs_refinement(
+    outcomes: LevelOutcomes,
+    index: np.ndarray,
+    threshold: float,
+    refine_threshold: float,
+    uncertainty: float,
+) -> np.ndarray:
+    """Mask of the parents at *index* that are suspicious, uncertain, mixed, or unknown.
+
+    A parent only partly covered by tissue straddles the tissue boundary, so
+    its children cannot simply inherit its tissue/background call.
+    """
+    state = outcomes.state[index]
+    rows = outcomes.rows[index]
+    ratio = rows["tissue_ratio"]
+    prob = rows["tumor_probability"]
+    mixed = (0.0 < ratio) & (ratio < settings.HIERARCHICAL_SOLID_TISSUE_RATIO)
+    suspicious = rows["is_tissue"] & (
+        (prob >= refine_threshold) | (np.abs(prob - threshold) <= uncertainty)
+    )
+    return (state == _FAILED) | ((state == _ANALYSED) & (mixed | suspicious))
+
+
+def _run_hierarchical(
+    analyser: _TileAnalyser,
+    image_id: str,
+    target_refs: List[TileRef],
+    levels: List[int],
+    refine_threshold: float,
+    uncertainty: float,
+    screen: TissuePrescreen | None = None,
+    flat_tiles: int | None = None,
+) -> Tuple[LevelOutcomes, Dict[str, Any]]:
+    """Coarse-to-fine pass over *levels* (ascending, ending at the target).
+
+    Every tile of the coarsest level (that passes *screen*) is analysed.  A tile is refined — its
+    children at the next level are analysed — only if it looks suspicious or
+    uncertain (see :func:`_needs_refinement`).  Target-level tiles that were
+    never reached inherit the outcome of their deepest analysed ancestor.
+    """
+    target_level = levels[-1]
+    decided: Dict[int, LevelOutcomes] = {}
+    evaluated_by_level: Dict[str, int] = {}
+    # Parents at the previous level whose children are analysed; None = every tile.
+    refine: np.ndarray | None = None
+    gap = 0
+
+    for idx, level in enumerate(levels):
+        refs = target_refs if level == target_level else list_tiles_at_level(image_id, level)
+        if refine is not None:
+            parent_cols = decided[levels[idx - 1]].cols
+            refs = [t for t in refs if refine[(t.y >> gap) * parent_cols + (t.x >> gap)]]
+        if screen is not None and level >= screen.mask_level:
+            refs, _ = screen.filter(refs)
+        outcomes, _ = analyser.analyse(
+            refs, tile_level=level, message=f"Analysing level {level} tiles"
+        )
+        decided[level] = outcomes
+        evaluated_by_level[str(level)] = len(refs)
+        if level == target_level:
+            break
+
+        gap = levels[idx + 1] - level
+        index = outcomes.indexes(refs)
+        refine = np.zeros(len(outcomes.state), dtype=bool)
+        refine[index[_needs_refinement(
+            outcomes, index, analyser.threshold, refine_threshold, uncertainty
+        )]] = True
+
+    # A copy: inherited rows must not look analysed to a later flat pass.
+    final = decided[target_level].copy()
+    index = final.indexes(target_refs)
+    pending = index[final.state[index] == _PENDING]
+    inherited = len(pending)
+    for level in reversed(levels[:-1]):
+        if not len(pending):
+            break
+        parent = decided[level]
+        shift = target_level - level
+        parent_index = (
+            ((pending // final.cols) >> shift) * parent.cols + ((pending % final.cols) >> shift)
+        )
+        found = parent.state[parent_index] != _PENDING
+        final.inherit(pending[found], parent, parent_index[found])
+        pending = pending[~found]
+
+    evaluated = sum(evaluated_by_level.values())
+    flat_tiles = flat_tiles or len(target_refs)
+    stats = {
+        "levels": levels,
+        "refine_threshold": refine_threshold,
+        "uncertainty": uncertainty,
+        "tiles_evaluated": evaluated,
+        "tiles_evaluated_by_level": evaluated_by_level,
+        "target_tiles_inherited": inherited,
+        "flat_tiles": flat_tiles,
+        "evaluated_fraction": round(evaluated / flat_tiles, 4) if flat_tiles else 0.0,
+    }
+    return final, stats
+
+
+# ── Multi-level jobs ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class _DerivedLevel:
+    analyser: _TileAnalyser
+    level: int
+    shift: int
+    size: Tuple[int, int]
+    # Derivable parents not yet complete, and how many children each still needs.
+    parents: Dict[TileKey, TileRef]
+    missing: Dict[TileKey, int]
+    canvases: Dict[TileKey, np.ndarray] = field(default_factory=dict)
+    ready: List[Tuple[TileRef, np.ndarray]] = field(default_factory=list)
+    derived: int = 0
+
+
+class _TileDeriver:
+    """Builds coarser-level tiles from the finest level's downloaded tiles.
+
+    With DZI overlap 0, tile ``(x, y)`` at level ``L - k`` covers the
+    ``2^k × 2^k`` block of level-``L`` tiles below it, shrunk by ``2^k`` —
+    which is how the tiler builds the pyramid in the first place.  A parent
+    is derived only if every one of its children is in this pass, and is
+    handed to its level's analyser once the last child has been seen, so
+    the finest tiles should arrive block by block.
+    """
+
+    def __init__(
+        self,
+        finest_level: int,
+        finest_refs: List[TileRef],
+        analysed_refs: List[TileRef],
+        targets: Dict[int, Tuple[_TileAnalyser, List[TileRef]]],
+        shape: DZIShape,
+    ):
+        self.tile_size = shape.tile_size
+        analysed = {(t.x, t.y) for t in analysed_refs}
+        self._levels: List[_DerivedLevel] = []
+        for level, (analyser, refs) in targets.items():
+            shift = finest_level - level
+            children: Dict[TileKey, List[TileKey]] = {}
+            for t in finest_refs:
+                children.setdefault((t.x >> shift, t.y >> shift), []).append((t.x, t.y))
+            parents = {
+                (t.x, t.y): t
+                for t in refs
+                if (t.x, t.y) in children and all(c in analysed for c in children[(t.x, t.y)])
+            }
+            self._levels.append(
+                _DerivedLevel(
+                    analyser=analyser,
+                    level=level,
+                    shift=shift,
+                    size=level_size(shape, level),
+                    parents=parents,
+                    missing={key: len(children[key]) for key in parents},
+                )
+            )
+
+    @property
+    def tiles_derived(self) -> Dict[int, int]:
+        return {d.level: d.derived for d in self._levels}
+
+    def add(self, tref: TileRef, image: Optional[np.ndarray]) -> None:
+        """Fold one finest-level tile into its parents (``None``: download failed)."""
+        for d in self._levels:
+            key = (tref.x >> d.shift, tref.y >> d.shift)
+            if key not in d.parents:
+                continue
+            if image is None:
+                # The parent is fetched by the level's own pass instead.
+                del d.parents[key]
+                d.canvases.pop(key, None)
+                continue
+            self._paste(d, key, tref, image)
+            d.missing[key] -= 1
+            if d.missing[key] == 0:
+                d.ready.append((d.parents.pop(key), d.canvases.pop(key)))
+                d.derived += 1
+                if len(d.ready) >= settings.DOWNLOAD_CHUNK_SIZE:
+                    self._flush(d)
+
+    def _paste(self, d: _DerivedLevel, key: TileKey, tref: TileRef, image: np.ndarray) -> None:
+        ts = self.tile_size
+        factor = 2 ** d.shift
+        canvas = d.canvases.get(key)
+        if canvas is None:
+            width = min(ts, d.size[0] - key[0] * ts)
+            height = min(ts, d.size[1] - key[1] * ts)
+            canvas = d.canvases[key] = np.zeros((height, width, 3), dtype=np.uint8)
+        small = np.asarray(Image.fromarray(image).reduce(factor))
+        ox = (tref.x - key[0] * factor) * (ts // factor)
+        oy = (tref.y - key[1] * factor) * (ts // factor)
+        h = max(0, min(small.shape[0], canvas.shape[0] - oy))
+        w = max(0, min(small.shape[1], canvas.shape[1] - ox))
+        canvas[oy:oy + h, ox:ox + w] = small[:h, :w]
+
+    def _flush(self, d: _DerivedLevel) -> None:
+        if d.ready:
+            d.analyser.analyse_images(d.ready, d.level)
+            d.ready = []
+
+    def finish(self) -> None:
+        """Hand over the remaining derived tiles; incomplete parents are dropped."""
+        for d in self._levels:
+            self._flush(d)
+            d.parents.clear()
+            d.canvases.clear()
+
+
+@_inference_session
+def run_multilevel_analysis(
+    job_id: str | None,
+    image_id: str,
+    tile_levels: List[int],
+    threshold: float | None = None,
+    tissue_threshold: float | None = None,
+    batch_size: int | None = None,
+    progress_cb: ProgressCallback = None,
+    prescreen: bool | None = None,
+    cancel_token: CancellationToken | None = None,
+    checkpoint: AnalysisCheckpoint | None = None,
+    dedup: str | None = None,
+) -> MultiLevelResult:
+    """Analyse *image_id* at each of *tile_levels* in one job.
+
+    The DZI, models and thumbnail pre-screen are shared by every level.  The
+    finest level is downloaded as in :func:`run_analysis`; with
+    ``MULTILEVEL_DERIVE_TILES`` the coarser levels' tiles are built from it
+    (see :class:`_TileDeriver`) and only those that cannot be derived are
+    fetched.  Each level gets the artifacts of a single-level run under
+    ``{run}/level_{L}/``, and ``{run}/summary.json`` lists them all.
+    """
+    threshold = threshold if threshold is not None else settings.CLASSIFICATION_THRESHOLD
+    tissue_thresh = (
+        tissue_threshold if tissue_threshold is not None else settings.TISSUE_THRESHOLD
+    )
+    dedup = dedup if dedup is not None else settings.TILE_DEDUP
+    batch_size = batch_size or settings.DEFAULT_BATCH_SIZE
+    checkpoint = checkpoint if checkpoint is not None else AnalysisCheckpoint()
+
+    timings: Dict[str, Any] = {}
+    _check_cancelled(cancel_token)
+
+    t0 = time.perf_counter()
+    dzi = parse_dzi(image_id)
+    timings["parse_dzi_s"] = round(time.perf_counter() - t0, 3)
+    _report(progress_cb, 0, 0, "Parsed DZI descriptor")
+
+    # ── Resolve every level against the available ones ────────────────
+    t0 = time.perf_counter()
+    manifest = load_tile_manifest(image_id)
+    available_levels = manifest.available_levels if manifest is not None else list_available_tile_levels(image_id)
+    if not available_levels:
+        raise ValueError(f"No tiles found for image_id={image_id}")
+    levels = sorted({
+        select_analysis_level(
+            available_levels=available_levels,
+            requested_level=level,
+            default_level=settings.DEFAULT_TILE_LEVEL,
+        )
+        for level in tile_levels
+    })
+    if levels != sorted(set(tile_levels)):
+        _report(
+            progress_cb, 0, 0,
+            f"Requested levels {sorted(set(tile_levels))} unavailable. Using levels {levels}",
+        )
+    finest = levels[-1]
+    refs_by_level = {level: list_tiles_at_level(image_id, level) for level in levels}
+    timings["list_tiles_s"] = round(time.perf_counter() - t0, 3)
+    for level, refs in refs_by_level.items():
+        if not refs:
+            raise ValueError(f"No tiles found for image_id={image_id} at level={level}")
+    total = sum(len(refs) for refs in refs_by_level.values())
+    _report(progress_cb, 0, total, f"Found {total} tiles at levels {levels}", finest)
+
+    t0 = time.perf_counter()
+    embedder = get_embedder()
+    classifier = get_classifier()
+    job_key = job_id or f"adhoc-{image_id}"
+    timings["model_load_s"] = round(time.perf_counter() - t0, 3)
+
+    # ── One pre-screen for the coarsest level serves every finer one ──
+    screen: TissuePrescreen | None = None
+    if prescreen if prescreen is not None else settings.PRESCREEN_ENABLED:
+        t0 = time.perf_counter()
+        screen, thumbnail_tiles = _build_prescreen(
+            dzi, image_id, available_levels, levels[0], token=cancel_token
+        )
+        if screen is not None:
+            timings["prescreen_level"] = screen.mask_level
+        timings["prescreen_s"] = round(time.perf_counter() - t0, 3)
+        timings["prescreen_tiles_downloaded"] = thumbnail_tiles
+    analysis_refs: Dict[int, List[TileRef]] = {}
+    screened_out: Dict[int, List[TileRef]] = {}
+    for level, refs in refs_by_level.items():
+        analysis_refs[level], screened_out[level] = screen.filter(refs) if screen is not None else (refs, [])
+
+    # ── Analysers, one per level, sharing models and the checkpoint ───
+    shape = DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size)
+    deduplicators: Dict[int, TileDeduplicator | None] = {}
+    analysers: Dict[int, _TileAnalyser] = {}
+    for level in levels:
+        deduplicators[level] = (
+            TileDeduplicator(dedup, settings.TILE_DEDUP_GRID, settings.TILE_DEDUP_LEVELS)
+            if dedup != "off"
+            else None
+        )
+        analysers[level] = _TileAnalyser(
+            tissue_threshold=tissue_thresh,
+            threshold=threshold,
+            batch_size=batch_size,
+            job_key=job_key,
+            classifier=classifier,
+            progress_cb=progress_cb,
+            token=cancel_token,
+            checkpoint=checkpoint,
+            shape=shape,
+            tile_px=dzi.tile_size + 2 * dzi.overlap,
+            dedup=deduplicators[level],
+        )
+    if checkpoint.tiles_done:
+        _report(
+            progress_cb, 0, total,
+            f"Resuming after {checkpoint.tiles_done} checkpointed tiles",
+            finest,
+        )
+
+    finest_refs = analysis_refs[finest]
+    deriver: _TileDeriver | None = None
+    derivable = [lvl for lvl in levels[:-1] if dzi.tile_size % 2 ** (finest - lvl) == 0]
+    if settings.MULTILEVEL_DERIVE_TILES and dzi.overlap == 0 and derivable:
+        def pending(level: int) -> List[TileRef]:
+            done = analysers[level].outcomes(level)
+            return [t for t in analysis_refs[level] if not done.done(t)]
+
+        deriver = _TileDeriver(
+            finest,
+            refs_by_level[finest],
+            pending(finest),
+            {lvl: (analysers[lvl], pending(lvl)) for lvl in derivable},
+            shape,
+        )
+        analysers[finest].observer = deriver.add
+        # Block by block, so each derived parent completes within a chunk or two.
+        shift = finest - derivable[0]
+        finest_refs = sorted(finest_refs, key=lambda t: (t.y >> shift, t.x >> shift, t.y, t.x))
+
+    # ── Finest level first, then whatever could not be derived ────────
+    level_outcomes: Dict[int, LevelOutcomes] = {}
+    level_timings: Dict[int, Dict[str, Any]] = {}
+    progress_total = sum(len(refs) for refs in analysis_refs.values())
+    progress_offset = 0
+    t_analysis = time.perf_counter()
+    for level in reversed(levels):
+        t_level = time.perf_counter()
+        analyser = analysers[level]
+        refs = finest_refs if level == finest else analysis_refs[level]
+        outcomes, soft_skipped = analyser.analyse(
+            refs,
+            level,
+            progress_offset=progress_offset,
+            progress_total=progress_total,
+            message=f"Analysing level {level} tiles",
+        )
+        progress_offset += len(refs)
+        if level == finest and deriver is not None:
+            analyser.observer = None
+            deriver.finish()
+
+        lt = level_timings[level] = dict(timings)
+        lt["tiles_screened_out"] = len(screened_out[level])
+        lt["tiles_derived"] = deriver.tiles_derived.get(level, 0) if deriver is not None else 0
+        _forced_content_fallback(
+            analyser, image_id, outcomes, soft_skipped, level, len(refs_by_level[level]), progress_cb, lt
+        )
+        outcomes.fill_background(screened_out[level])
+        _record_analysis_timings(analyser, deduplicators[level], lt)
+        lt["analysis_s"] = round(time.perf_counter() - t_level, 3)
+        level_outcomes[level] = outcomes
+    timings["analysis_s"] = round(time.perf_counter() - t_analysis, 3)
+    timings["tiles_derived"] = sum(lt["tiles_derived"] for lt in level_timings.values())
+    _check_cancelled(cancel_token)
+
+    # ── Per-level artifacts and the combined summary ──────────────────
+    artifact_run_id = job_id or f"adhoc-{int(time.time() * 1000)}"
+    run_prefix = f"{image_id}/analysis/{artifact_run_id}"
+    results: Dict[int, AnalysisResult] = {}
+    for level in levels:
+        results[level] = _publish_level(
+            image_id=image_id,
+            artifact_run_id=artifact_run_id,
+            artifact_prefix=f"{run_prefix}/level_{level}",
+            dzi=dzi,
+            tile_level=level,
+            tile_refs=refs_by_level[level],
+            outcomes=level_outcomes[level],
+            threshold=threshold,
+            embedder=embedder,
+            timings=level_timings[level],
+            hierarchy=None,
+            progress_cb=progress_cb,
+            cancel_token=cancel_token,
+        )
+
+    summary_key = f"{run_prefix}/summary.json"
+    upload_json(
+        {
+            "image_id": image_id,
+            "tile_levels": levels,
+            "dzi": results[finest].dzi,
+            "levels": {
+                str(level): {
+                    "tile_level": level,
+                    "summary_key": r.summary_key,
+                    "results_key": r.results_key,
+                    "heatmap_key": r.heatmap_key,
+                    "heatmap_dzi_key": r.heatmap_dzi_key,
+                    "summary": asdict(r.summary),
+                }
+                for level, r in results.items()
+            },
+            "embedder": embedder.describe(),
+            "timings": timings,
+        },
+        summary_key,
+    )
+    print(
+        f"[pipeline] Multi-level analysis of {image_id} at levels {levels}: "
+        f"{timings['tiles_derived']} tiles derived from level {finest}"
+    )
+    return MultiLevelResult(
+        image_id=image_id,
+        job_id=artifact_run_id,
+        tile_levels=levels,
+        levels=results,
+        summary_key=summary_key,
+        timings=timings,
+    )
+
+
 # ── Pipeline ──────────────────────────────────────────────────────────────────
 
 
+@_inference_session
 def run_analysis(
     job_id: str | None,
     image_id: str,
     tile_level: int | None = None,
     threshold: float | None = None,
     tissue_threshold: float | None = None,
-    batch_size: int = 16,
+    batch_size: int | None = None,
     progress_cb: ProgressCallback = None,
+    hierarchical: bool = False,
+    coarse_level: int | None = None,
+    refine_threshold: float | None = None,
+    prescreen: bool | None = None,
+    cancel_token: CancellationToken | None = None,
+    checkpoint: AnalysisCheckpoint | None = None,
+    dedup: str | None = None,
 ) -> AnalysisResult:
-    """Run the full region-detection pipeline for *image_id*."""
+    """Run the full region-detection pipeline for *image_id*.
+
+    With *hierarchical* set, the slide is first classified at *coarse_level*
+    (default: ``HIERARCHICAL_LEVEL_STEPS`` levels above the target) and only
+    suspicious or uncertain regions are refined down to the target level.
+
+    With *prescreen* (default ``PRESCREEN_ENABLED``) a tissue mask from a
+    coarse thumbnail level decides which tiles are downloaded at all; tiles
+    outside it are reported as Background.
+
+    *dedup* (default ``TILE_DEDUP``) is ``"off"``, ``"exact"`` or
+    ``"perceptual"``; see :mod:`src.tile_dedup`.
+
+    *cancel_token* can stop the run (``JobCancelled``) or preempt it at a
+    chunk boundary (``JobPreempted``); passing the same *checkpoint* to the
+    next call resumes from the tiles already analysed.
+    """
     requested_tile_level = tile_level if tile_level is not None else settings.DEFAULT_TILE_LEVEL
     threshold = threshold if threshold is not None else settings.CLASSIFICATION_THRESHOLD
     tissue_thresh = (
         tissue_threshold if tissue_threshold is not None else settings.TISSUE_THRESHOLD
     )
+    refine_threshold = (
+        refine_threshold if refine_threshold is not None else settings.HIERARCHICAL_REFINE_THRESHOLD
+    )
+    dedup = dedup if dedup is not None else settings.TILE_DEDUP
+    batch_size = batch_size or settings.DEFAULT_BATCH_SIZE
 
     timings: Dict[str, float] = {}
+    _check_cancelled(cancel_token)
 
     # ── 1. Parse DZI ──────────────────────────────────────────────────
     t0 = time.perf_counter()
@@ -251,219 +1526,216 @@ def run_analysis(
     if total == 0:
         raise ValueError(f"No tiles found for image_id={image_id} at level={tile_level}")
 
-    # Grid dims and DZI shape
-    max_x = max(t.x for t in tile_refs)
-    max_y = max(t.y for t in tile_refs)
-    grid_cols = max_x + 1
-    grid_rows = max_y + 1
-    max_level = max_dzi_level(DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size))
-
     # ── 3. Initialise models (singletons — fast after first call) ──────
     t0 = time.perf_counter()
     embedder = get_embedder()
     classifier = get_classifier()
+    job_key = job_id or f"adhoc-{image_id}"
     timings["model_load_s"] = round(time.perf_counter() - t0, 3)
 
+    # ── 4. Thumbnail tissue pre-screen ────────────────────────────────
+    analysis_refs = tile_refs
+    screened_out: List[TileRef] = []
+    screen: TissuePrescreen | None = None
+    if prescreen if prescreen is not None else settings.PRESCREEN_ENABLED:
+        t0 = time.perf_counter()
+        screen, thumbnail_tiles = _build_prescreen(
+            dzi, image_id, available_levels, tile_level, token=cancel_token
+        )
+        if screen is not None:
+            analysis_refs, screened_out = screen.filter(tile_refs)
+            timings["prescreen_level"] = screen.mask_level
+            _report(
+                progress_cb, 0, total,
+                f"Pre-screen kept {len(analysis_refs)} of {total} tiles",
+                tile_level,
+            )
+        timings["prescreen_s"] = round(time.perf_counter() - t0, 3)
+        timings["prescreen_tiles_downloaded"] = thumbnail_tiles
+        timings["tiles_screened_out"] = len(screened_out)
+        timings["downloads_saved"] = len(screened_out) - thumbnail_tiles
+
     _report(progress_cb, 0, total, "Downloading tiles…", tile_level)
 
-    # ── 4. Chunked tile download + analysis ────────────────────────────
+    # ── 5. Chunked tile download + analysis ────────────────────────────
     t_analysis = time.perf_counter()
-    download_elapsed = 0.0
-    prob_grid = np.full((grid_rows, grid_cols), -1.0)
-    predictions: List[TilePrediction] = []
-    tissue_count = 0
-    skipped_count = 0
-    flagged_count = 0
-    download_failed_count = 0
-
-    # Track soft-skipped tile refs. These are re-downloaded only if the
-    # initial tissue/content pass rejects every tile.
-    soft_skipped: List[TileRef] = []
-
-    batch_tiles: List[TileRef] = []
-    batch_images: List[Image.Image] = []
-    batch_tissue: List[TissueResult] = []
-
-    def flush_batch() -> None:
-        nonlocal flagged_count
-        if not batch_images:
-            return
-        embeddings = embedder.embed_batch(batch_images, batch_size=len(batch_images))
-        cls_results = classifier.predict_batch(embeddings, threshold=threshold)
-        for bt, btr, cls_r in zip(batch_tiles, batch_tissue, cls_results):
-            prob_grid[bt.y, bt.x] = cls_r.tumor_probability
-            if cls_r.label == "Tumor":
-                flagged_count += 1
-            px, py, w, h = tile_rect_in_fullres(
-                shape=DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size),
-                tile_level=tile_level,
-                max_level=max_level,
-                tile_x=bt.x,
-                tile_y=bt.y,
-            )
-            predictions.append(
-                TilePrediction(
-                    tile_x=bt.x,
-                    tile_y=bt.y,
-                    tile_level=tile_level,
-                    pixel_x=px,
-                    pixel_y=py,
-                    width=w,
-                    height=h,
-                    is_tissue=True,
-                    tissue_ratio=btr.tissue_ratio,
-                    tumor_probability=cls_r.tumor_probability,
-                    label=cls_r.label,
-                )
-            )
-        for image in batch_images:
-            image.close()
-        batch_tiles.clear()
-        batch_images.clear()
-        batch_tissue.clear()
-
-    processed_count = 0
-    for chunk in _iter_chunks(tile_refs, settings.DOWNLOAD_CHUNK_SIZE):
-        download_start = time.perf_counter()
-        tile_images = _download_tiles_parallel(
-            chunk,
-            max_workers=settings.DOWNLOAD_WORKERS,
-            progress_cb=progress_cb,
-            progress_offset=processed_count,
-            progress_total=total,
+    deduplicator = (
+        TileDeduplicator(dedup, settings.TILE_DEDUP_GRID, settings.TILE_DEDUP_LEVELS)
+        if dedup != "off"
+        else None
+    )
+    analyser = _TileAnalyser(
+        tissue_threshold=tissue_thresh,
+        threshold=threshold,
+        batch_size=batch_size,
+        job_key=job_key,
+        classifier=classifier,
+        progress_cb=progress_cb,
+        token=cancel_token,
+        checkpoint=checkpoint,
+        shape=DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size),
+        tile_px=dzi.tile_size + 2 * dzi.overlap,
+        dedup=deduplicator,
+    )
+    if checkpoint is not None and checkpoint.tiles_done:
+        _report(
+            progress_cb, 0, total,
+            f"Resuming after {checkpoint.tiles_done} checkpointed tiles",
+            tile_level,
         )
-        download_elapsed += time.perf_counter() - download_start
-        tissue_inputs = {
-            object_key: image
-            for object_key, image in tile_images.items()
-            if image is not None
-        }
-        tissue_results = _detect_tissue_parallel(tissue_inputs, tissue_thresh)
-
-        for tref in chunk:
-            img = tile_images.get(tref.object_key)
-            processed_count += 1
-            if img is None:
-                skipped_count += 1
-                download_failed_count += 1
-                if processed_count % 20 == 0 or processed_count == total:
-                    _report(progress_cb, processed_count, total, "Analysing tiles", tile_level)
-                continue
 
-            tissue = tissue_results[tref.object_key]
-
-            if not tissue.is_tissue:
-                skipped_count += 1
-                soft_skipped.append(tref)
-                px, py, w, h = tile_rect_in_fullres(
-                    shape=DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size),
-                    tile_level=tile_level,
-                    max_level=max_level,
-                    tile_x=tref.x,
-                    tile_y=tref.y,
-                )
-                predictions.append(
-                    TilePrediction(
-                        tile_x=tref.x,
-                        tile_y=tref.y,
-                        tile_level=tile_level,
-                        pixel_x=px,
-                        pixel_y=py,
-                        width=w,
-                        height=h,
-                        is_tissue=False,
-                        tissue_ratio=tissue.tissue_ratio,
-                        tumor_probability=0.0,
-                        label="Background",
-                    )
+    hierarchy: Dict[str, Any] | None = None
+    outcomes: LevelOutcomes | None = None
+    soft_skipped: List[TileRef] = []
+    if hierarchical:
+        start_level = (
+            coarse_level
+            if coarse_level is not None
+            else tile_level - settings.HIERARCHICAL_LEVEL_STEPS
+        )
+        levels = sorted(lvl for lvl in set(available_levels) if start_level <= lvl <= tile_level)
+        if len(levels) > 1:
+            outcomes, hierarchy = _run_hierarchical(
+                analyser,
+                image_id,
+                analysis_refs,
+                levels,
+                refine_threshold=refine_threshold,
+                uncertainty=settings.HIERARCHICAL_UNCERTAINTY,
+                screen=screen,
+                flat_tiles=total,
+            )
+            if not outcomes.has_tissue:
+                # Nothing passed the tissue check at any level: rerun flat so
+                # the forced-content fallback below sees every tile.
+                print(
+                    f"[pipeline] Hierarchical pass found no tissue for {image_id}; "
+                    "re-running flat."
                 )
-                img.close()
-                if processed_count % 20 == 0 or processed_count == total:
-                    _report(progress_cb, processed_count, total, "Analysing tiles", tile_level)
-                continue
-
-            tissue_count += 1
-            batch_tiles.append(tref)
-            batch_images.append(img)
-            batch_tissue.append(tissue)
-
-            if len(batch_images) >= batch_size:
-                flush_batch()
-
-            if processed_count % 20 == 0 or processed_count == total:
-                _report(progress_cb, processed_count, total, "Analysing tiles", tile_level)
+                hierarchy["fell_back_to_flat"] = True
+                outcomes = None
 
-    flush_batch()
-    timings["download_s"] = round(download_elapsed, 3)
+    if outcomes is None:
+        outcomes, soft_skipped = analyser.analyse(analysis_refs, tile_level)
     _report(progress_cb, total, total, "Initial tile pass complete", tile_level)
 
-    # ── Auto-fallback for non-pathology / non-H&E images ─────────────
-    # When the H&E saturation check (and variance fallback) reject everything,
-    # it means the image is truly uniform-looking at the tile level.  Force
-    # all successfully-downloaded tiles through inference so the heatmap is
-    # always meaningful.
-    if tissue_count == 0 and soft_skipped:
-        print(
-            f"[pipeline] WARNING: 0 content tiles detected for {image_id} "
-            f"(all {len(soft_skipped)} tiles failed tissue/content check). "
-            "Falling back to forced inference on all non-blank tiles."
-        )
-        _report(progress_cb, 0, total, "Retrying with forced content detection…", tile_level)
+    _forced_content_fallback(
+        analyser, image_id, outcomes, soft_skipped, tile_level, total, progress_cb, timings
+    )
 
-        # Clear the background predictions written above — we will re-classify
-        # these tiles properly and update prob_grid.
-        predictions = [p for p in predictions if p.label != "Background"]
-        skipped_count = download_failed_count
+    outcomes.fill_background(screened_out)
 
-        fallback_processed = 0
-        for chunk in _iter_chunks(soft_skipped, settings.DOWNLOAD_CHUNK_SIZE):
-            redownloaded = _download_tiles_parallel(
-                chunk,
-                max_workers=settings.DOWNLOAD_WORKERS,
-            )
-            for idx, tref in enumerate(chunk, start=1):
-                img = redownloaded.get(tref.object_key)
-                fallback_processed += 1
-                if img is None:
-                    continue
+    _record_analysis_timings(analyser, deduplicator, timings)
+    timings["analysis_s"] = round(time.perf_counter() - t_analysis, 3)
+    _check_cancelled(cancel_token)
 
-                content = detect_tissue(img, threshold=0.0, variance_fallback=True, std_floor=3.0)
-                if not content.is_tissue:
-                    img.close()
-                    continue
+    artifact_run_id = job_id or f"adhoc-{int(time.time() * 1000)}"
+    return _publish_level(
+        image_id=image_id,
+        artifact_run_id=artifact_run_id,
+        artifact_prefix=f"{image_id}/analysis/{artifact_run_id}",
+        dzi=dzi,
+        tile_level=tile_level,
+        tile_refs=tile_refs,
+        outcomes=outcomes,
+        threshold=threshold,
+        embedder=embedder,
+        timings=timings,
+        hierarchy=hierarchy,
+        progress_cb=progress_cb,
+        cancel_token=cancel_token,
+    )
 
-                tissue_count += 1
-                skipped_count -= 1
-                batch_tiles.append(tref)
-                batch_images.append(img)
-                batch_tissue.append(content)
-
-                if len(batch_images) >= batch_size:
-                    flush_batch()
-
-                if idx % 20 == 0 or idx == len(chunk):
-                    _report(
-                        progress_cb,
-                        fallback_processed,
-                        len(soft_skipped),
-                        "Forced content analysis",
-                        tile_level,
-                    )
 
-        flush_batch()
+def _forced_content_fallback(
+    analyser: _TileAnalyser,
+    image_id: str,
+    outcomes: LevelOutcomes,
+    soft_skipped: List[TileRef],
+    tile_level: int,
+    total: int,
+    progress_cb: ProgressCallback,
+    timings: Dict[str, Any],
+) -> None:
+    """Auto-fallback for non-pathology / non-H&E images.
+
+    When the H&E saturation check (and variance fallback) reject everything,
+    it means the image is truly uniform-looking at the tile level.  Force
+    all successfully-downloaded tiles through inference so the heatmap is
+    always meaningful.
+    """
+    if not soft_skipped or outcomes.has_tissue:
+        return
+    print(
+        f"[pipeline] WARNING: 0 content tiles detected for {image_id} "
+        f"(all {len(soft_skipped)} tiles failed tissue/content check). "
+        "Falling back to forced inference on all non-blank tiles."
+    )
+    _report(progress_cb, 0, total, "Retrying with forced content detection…", tile_level)
+    analyser.force_content(soft_skipped, tile_level)
+    timings["fallback_cache_hits"] = analyser.fallback_cache_hits
+    timings["fallback_downloads"] = analyser.fallback_downloads
+
 
-    timings["analysis_s"] = round(time.perf_counter() - t_analysis, 3)
+def _record_analysis_timings(
+    analyser: _TileAnalyser,
+    deduplicator: TileDeduplicator | None,
+    timings: Dict[str, Any],
+) -> None:
+    timings["download_s"] = round(analyser.download_s, 3)
+    timings["embed_s"] = round(analyser.embed_s, 3)
+    if deduplicator is not None:
+        # Saved time is estimated from the mean embed cost of the tiles that ran.
+        per_tile_s = analyser.embed_s / analyser.tiles_embedded if analyser.tiles_embedded else 0.0
+        timings["dedup_tiles_folded"] = deduplicator.folded
+        timings["dedup_rate"] = round(deduplicator.rate, 4)
+        timings["dedup_hash_s"] = round(deduplicator.hash_s, 3)
+        timings["dedup_saved_inference_s"] = round(deduplicator.folded * per_tile_s, 3)
+
+
+def _publish_level(
+    *,
+    image_id: str,
+    artifact_run_id: str,
+    artifact_prefix: str,
+    dzi: DZIInfo,
+    tile_level: int,
+    tile_refs: List[TileRef],
+    outcomes: LevelOutcomes,
+    threshold: float,
+    embedder: Embedder,
+    timings: Dict[str, Any],
+    hierarchy: Dict[str, Any] | None,
+    progress_cb: ProgressCallback,
+    cancel_token: CancellationToken | None,
+) -> AnalysisResult:
+    """Predictions, summary, heatmaps and artifacts for one analysed level."""
+    total = len(tile_refs)
+    grid_cols = max(t.x for t in tile_refs) + 1
+    grid_rows = max(t.y for t in tile_refs) + 1
+    shape = DZIShape(width=dzi.width, height=dzi.height, tile_size=dzi.tile_size)
+    max_level = max_dzi_level(shape)
+
+    # ── 6. Build tile predictions ─────────────────────────────────────
+    predictions = outcomes.predictions(tile_refs)
+    tissue = predictions["is_tissue"]
+    prob_grid = np.full((grid_rows, grid_cols), -1.0)
+    prob_grid[predictions["tile_y"][tissue], predictions["tile_x"][tissue]] = (
+        predictions["tumor_probability"][tissue]
+    )
 
-    # ── 6. Aggregate ──────────────────────────────────────────────────
-    tissue_probs = [p.tumor_probability for p in predictions if p.is_tissue]
-    agg_score = float(np.mean(tissue_probs)) if tissue_probs else 0.0
-    max_score = float(np.max(tissue_probs)) if tissue_probs else 0.0
+    # ── 7. Aggregate ──────────────────────────────────────────────────
+    tissue_probs = predictions["tumor_probability"][tissue]
+    tissue_count = len(tissue_probs)
+    flagged_count = int(np.count_nonzero(predictions["label"] == LABEL_CODES["Tumor"]))
+    agg_score = float(np.mean(tissue_probs)) if tissue_count else 0.0
+    max_score = float(np.max(tissue_probs)) if tissue_count else 0.0
     tumor_pct = (flagged_count / tissue_count * 100.0) if tissue_count > 0 else 0.0
 
     summary = SlideSummary(
         total_tiles=total,
         tissue_tiles=tissue_count,
-        skipped_tiles=skipped_count,
+        skipped_tiles=total - tissue_count,
         flagged_tiles=flagged_count,
         tumor_area_percentage=round(tumor_pct, 2),
         aggregate_score=round(agg_score, 4),
@@ -472,22 +1744,20 @@ def run_analysis(
         threshold=threshold,
     )
 
-    # ── 7. Heatmap ────────────────────────────────────────────────────
+    # ── 8. Heatmap ────────────────────────────────────────────────────
+    _check_cancelled(cancel_token)
     t0 = time.perf_counter()
     _report(progress_cb, total, total, "Generating heatmap", tile_level)
 
-    # Build TileCell list from predictions so the heatmap uses the same
+    # Cells come from the predictions so the heatmap uses the same
     # full-resolution pixel coordinates as the region-box overlays.
-    tile_cells = [
-        TileCell(
-            pixel_x=p.pixel_x,
-            pixel_y=p.pixel_y,
-            width=p.width,
-            height=p.height,
-            tumor_probability=p.tumor_probability if p.is_tissue else -1.0,
-        )
-        for p in predictions
-    ]
+    tile_cells = TileCellArrays(
+        pixel_x=predictions["pixel_x"],
+        pixel_y=predictions["pixel_y"],
+        width=predictions["width"],
+        height=predictions["height"],
+        tumor_probability=np.where(tissue, predictions["tumor_probability"], -1.0),
+    )
 
     heatmap_img = generate_heatmap(
         prob_grid,
@@ -497,15 +1767,50 @@ def run_analysis(
         tile_cells=tile_cells,
     )
     heatmap_bytes = heatmap_to_png_bytes(heatmap_img)
-    artifact_run_id = job_id or f"adhoc-{int(time.time() * 1000)}"
-    artifact_prefix = f"{image_id}/analysis/{artifact_run_id}"
     heatmap_key = f"{artifact_prefix}/heatmap_level_{tile_level}.png"
     upload_bytes(heatmap_bytes, heatmap_key, content_type="image/png")
     timings["heatmap_s"] = round(time.perf_counter() - t0, 3)
 
+    heatmap_dzi_key: str | None = None
+    heatmap_manifest_key: str | None = None
+    if settings.HEATMAP_DZI_ENABLED:
+        t0 = time.perf_counter()
+        pyramid = build_heatmap_pyramid(
+            prob_grid,
+            shape,
+            tile_level,
+            prefix=artifact_prefix,
+            upload=lambda data, key, content_type: upload_bytes(
+                data, key, content_type=content_type
+            ),
+            min_cell_px=settings.HEATMAP_DZI_MIN_CELL_PX,
+            workers=settings.HEATMAP_DZI_UPLOAD_WORKERS,
+        )
+        heatmap_dzi_key = pyramid.dzi_key
+        heatmap_manifest_key = pyramid.manifest_key
+        timings["heatmap_dzi_s"] = round(time.perf_counter() - t0, 3)
+        timings["heatmap_dzi_tiles"] = pyramid.tiles_uploaded
+        timings["heatmap_dzi_transparent_tiles"] = pyramid.tiles_skipped
+
     results_key = f"{artifact_prefix}/tile_predictions.json"
     summary_key = f"{artifact_prefix}/summary.json"
-    upload_json([asdict(prediction) for prediction in predictions], results_key)
+    upload_json(to_records(predictions, tile_level, decimals=None), results_key, indent=None)
+
+    # Columnar copies for /jobs/{id}/predictions: all tiles and tissue only.
+    columnar = predictions.astype(PREDICTION_DTYPE)
+    columnar_meta = {
+        "tile_level": tile_level,
+        "tile_size": dzi.tile_size,
+        "max_level": max_level,
+        "width": dzi.width,
+        "height": dzi.height,
+    }
+    columnar_key = f"{artifact_prefix}/tile_predictions.npz"
+    tissue_key = f"{artifact_prefix}/tile_predictions_tissue.npz"
+    upload_bytes(encode_predictions(columnar, columnar_meta), columnar_key)
+    upload_bytes(
+        encode_predictions(columnar[columnar["is_tissue"]], columnar_meta), tissue_key
+    )
     upload_json(
         {
             "image_id": image_id,
@@ -518,7 +1823,13 @@ def run_analysis(
             },
             "summary": asdict(summary),
             "heatmap_key": heatmap_key,
+            "heatmap_dzi_key": heatmap_dzi_key,
+            "heatmap_manifest_key": heatmap_manifest_key,
             "tile_predictions_key": results_key,
+            "tile_predictions_columnar_key": columnar_key,
+            "tile_predictions_tissue_key": tissue_key,
+            "embedder": embedder.describe(),
+            "hierarchical": hierarchy,
             "timings": timings,
         },
         summary_key,
@@ -541,9 +1852,16 @@ def run_analysis(
         summary_key=summary_key,
         results_key=results_key,
         timings=timings,
+        hierarchy=hierarchy,
+        heatmap_dzi_key=heatmap_dzi_key,
     )
 
 
+def _check_cancelled(token: CancellationToken | None) -> None:
+    if token is not None:
+        token.raise_if_cancelled()
+
+
 def _report(
     cb: ProgressCallback,
     done: int,
@@ -0,0 +1,168 @@
+"""Columnar tile-prediction artifacts and a grid spatial index over them.
+
+``tile_predictions.json`` (one dict per tile, background included) is tens
+of MB for 100k-tile slides and has to be parsed in full for any query.
+Predictions are therefore also stored as a NumPy structured array in an
+``.npz`` file: fixed-width columns, labels as small integer codes and the
+geometry needed to query it in a ``meta`` entry, so the artifact is
+self-describing.  A sparse variant keeps only tissue tiles.
+
+:class:`PredictionIndex` maps analysis-level tile coordinates to rows, so a
+viewport (bounding box) query touches only the tiles it covers.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+LABELS = ("Background", "Normal", "Tumor")
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+
+PREDICTION_DTYPE = np.dtype([
+    ("tile_x", np.int32),
+    ("tile_y", np.int32),
+    ("pixel_x", np.int64),
+    ("pixel_y", np.int64),
+    ("width", np.int32),
+    ("height", np.int32),
+    ("is_tissue", np.bool_),
+    ("tissue_ratio", np.float32),
+    ("tumor_probability", np.float32),
+    ("label", np.uint8),
+])
+
+# PREDICTION_DTYPE at full float precision: what the pipeline builds
+# predictions in before writing the JSON and (narrowed) ``.npz`` artifacts.
+BUFFER_DTYPE = np.dtype([
+    (name, np.float64 if PREDICTION_DTYPE[name].kind == "f" else PREDICTION_DTYPE[name])
+    for name in PREDICTION_DTYPE.names
+])
+
+
+@dataclass
+class TilePrediction:
+    """One row of ``tile_predictions.json`` (see :func:`to_records`)."""
+
+    tile_x: int
+    tile_y: int
+    tile_level: int
+    pixel_x: int
+    pixel_y: int
+    width: int
+    height: int
+    is_tissue: bool
+    tissue_ratio: float
+    tumor_probability: float
+    label: str
+
+
+def to_columnar(predictions: Iterable[Any]) -> np.ndarray:
+    """Structured array from :class:`TilePrediction`-like objects."""
+    rows = [
+        (
+            p.tile_x,
+            p.tile_y,
+            p.pixel_x,
+            p.pixel_y,
+            p.width,
+            p.height,
+            p.is_tissue,
+            p.tissue_ratio,
+            p.tumor_probability,
+            LABEL_CODES[p.label],
+        )
+        for p in predictions
+    ]
+    return np.array(rows, dtype=PREDICTION_DTYPE)
+
+
+def encode(predictions: np.ndarray, meta: Dict[str, Any]) -> bytes:
+    """Serialise *predictions* plus *meta* (tile level, DZI geometry) to ``.npz`` bytes."""
+    buf = io.BytesIO()
+    np.savez_compressed(buf, predictions=predictions, meta=np.array(json.dumps(meta)))
+    return buf.getvalue()
+
+
+def decode(data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return npz["predictions"], json.loads(str(npz["meta"]))
+
+
+def to_records(
+    predictions: np.ndarray, tile_level: int, decimals: int | None = 6
+) -> List[Dict[str, Any]]:
+    """Rows as ``asdict(TilePrediction)``-shaped dicts.
+
+    Ratios and probabilities are rounded to *decimals* places (``None``:
+    as stored).
+    """
+    columns = {name: predictions[name].tolist() for name in PREDICTION_DTYPE.names}
+    labels = [LABELS[code] for code in columns.pop("label")]
+    if decimals is not None:
+        for name in ("tissue_ratio", "tumor_probability"):
+            columns[name] = [round(v, decimals) for v in columns[name]]
+    return [
+        {
+            "tile_x": tx,
+            "tile_y": ty,
+            "tile_level": tile_level,
+            "pixel_x": px,
+            "pixel_y": py,
+            "width": w,
+            "height": h,
+            "is_tissue": tissue,
+            "tissue_ratio": ratio,
+            "tumor_probability": prob,
+            "label": label,
+        }
+        for tx, ty, px, py, w, h, tissue, ratio, prob, label in zip(
+            columns["tile_x"],
+            columns["tile_y"],
+            columns["pixel_x"],
+            columns["pixel_y"],
+            columns["width"],
+            columns["height"],
+            columns["is_tissue"],
+            columns["tissue_ratio"],
+            columns["tumor_probability"],
+            labels,
+        )
+    ]
+
+
+class PredictionIndex:
+    """Grid spatial index: ``cells[tile_y, tile_x]`` is a row number or -1.
+
+    *cell_px* is the side of one analysis-level tile in full-resolution
+    pixels (``tile_size * 2 ** (max_level - tile_level)``).
+    """
+
+    def __init__(self, predictions: np.ndarray, cell_px: int):
+        self.predictions = predictions
+        self.cell_px = cell_px
+        cols = int(predictions["tile_x"].max()) + 1 if len(predictions) else 0
+        rows = int(predictions["tile_y"].max()) + 1 if len(predictions) else 0
+        self.cells = np.full((rows, cols), -1, dtype=np.int64)
+        self.cells[predictions["tile_y"], predictions["tile_x"]] = np.arange(len(predictions))
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Row numbers (row-major tile order) of tiles intersecting the full-res bbox."""
+        rows, cols = self.cells.shape
+        cx0 = max(0, int(math.floor(x0 / self.cell_px)))
+        cy0 = max(0, int(math.floor(y0 / self.cell_px)))
+        cx1 = min(cols, int(math.ceil(x1 / self.cell_px)))
+        cy1 = min(rows, int(math.ceil(y1 / self.cell_px)))
+        if cx0 >= cx1 or cy0 >= cy1:
+            return np.empty(0, dtype=np.int64)
+        window = self.cells[cy0:cy1, cx0:cx1].ravel()
+        return window[window >= 0]
+
+    def all_rows(self) -> np.ndarray:
+        cells = self.cells.ravel()
+        return cells[cells >= 0]
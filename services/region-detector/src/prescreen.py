@@ -0,0 +1,155 @@
+"""Thumbnail-level tissue pre-screen.
+
+Most of a slide is glass, yet every analysis-level tile used to be downloaded
+just to be rejected by the tissue detector.  A single coarse DZI level covers
+the whole slide in a handful of tiles (a level-8 tile spans 16×16 level-12
+tiles), so one saturation mask over that thumbnail tells us which
+analysis-level tiles can possibly contain tissue.
+
+The mask uses the same HSV saturation test as :func:`detect_tissue`, is
+dilated by a safety margin so tissue edges are never lost, and is consulted
+through an integral image so each tile lookup is O(1).  Slides with no
+saturated pixels at all (unstained or non-H&E content) yield no pre-screen;
+every tile is then analysed as before.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .geometry import DZIShape, max_dzi_level
+from .minio_io import TileRef
+
+
+def level_size(shape: DZIShape, level: int) -> Tuple[int, int]:
+    """Pixel dimensions of *level* in the DZI pyramid."""
+    scale = 2 ** (max_dzi_level(shape) - level)
+    return max(1, math.ceil(shape.width / scale)), max(1, math.ceil(shape.height / scale))
+
+
+def level_tile_grid(shape: DZIShape, level: int) -> Tuple[int, int]:
+    """``(columns, rows)`` of tiles at *level*."""
+    width, height = level_size(shape, level)
+    return math.ceil(width / shape.tile_size), math.ceil(height / shape.tile_size)
+
+
+def choose_prescreen_level(
+    shape: DZIShape,
+    available_levels: Iterable[int],
+    tile_level: int,
+    level_offset: int,
+    max_tiles: int,
+) -> int | None:
+    """Finest available level at least *level_offset* above *tile_level*
+    whose tile grid has at most *max_tiles* tiles, or None if there is none.
+    """
+    for level in sorted(set(available_levels), reverse=True):
+        if level > tile_level - level_offset:
+            continue
+        cols, rows = level_tile_grid(shape, level)
+        if cols * rows <= max_tiles:
+            return level
+    return None
+
+
+def stitch_level(
+    tiles: Dict[Tuple[int, int], Image.Image],
+    shape: DZIShape,
+    level: int,
+    overlap: int = 0,
+) -> np.ndarray:
+    """Paste the tiles of one level into a single RGB array (white where missing)."""
+    width, height = level_size(shape, level)
+    canvas = Image.new("RGB", (width, height), (255, 255, 255))
+    for (x, y), tile in tiles.items():
+        left = x * shape.tile_size - (overlap if x > 0 else 0)
+        top = y * shape.tile_size - (overlap if y > 0 else 0)
+        canvas.paste(tile.convert("RGB"), (left, top))
+    return np.asarray(canvas)
+
+
+def tissue_mask(rgb: np.ndarray, saturation_floor: int = 30) -> np.ndarray:
+    """Per-pixel tissue mask from the HSV saturation channel."""
+    hsv = np.asarray(Image.fromarray(rgb).convert("HSV"))
+    return hsv[:, :, 1] > saturation_floor
+
+
+def dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Square binary dilation by *radius* pixels."""
+    if radius <= 0 or not mask.any():
+        return mask.copy()
+    counts = _integral(mask)
+    h, w = mask.shape
+    ys = np.arange(h)
+    xs = np.arange(w)
+    y0 = np.clip(ys - radius, 0, h)[:, None]
+    y1 = np.clip(ys + radius + 1, 0, h)[:, None]
+    x0 = np.clip(xs - radius, 0, w)[None, :]
+    x1 = np.clip(xs + radius + 1, 0, w)[None, :]
+    window = counts[y1, x1] - counts[y0, x1] - counts[y1, x0] + counts[y0, x0]
+    return window > 0
+
+
+def _integral(mask: np.ndarray) -> np.ndarray:
+    counts = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+    counts[1:, 1:] = np.cumsum(np.cumsum(mask, axis=0), axis=1)
+    return counts
+
+
+@dataclass
+class TissuePrescreen:
+    """Dilated tissue mask at *mask_level*, queried per analysis tile."""
+
+    mask: np.ndarray
+    mask_level: int
+    tile_size: int
+    tissue_fraction: float
+
+    def __post_init__(self) -> None:
+        self._counts = _integral(self.mask)
+
+    @classmethod
+    def from_thumbnail(
+        cls,
+        rgb: np.ndarray,
+        mask_level: int,
+        tile_size: int,
+        saturation_floor: int = 30,
+        dilation_px: int = 2,
+    ) -> "TissuePrescreen | None":
+        """Build a pre-screen, or None if the thumbnail shows no tissue at all."""
+        raw = tissue_mask(rgb, saturation_floor=saturation_floor)
+        if not raw.any():
+            return None
+        return cls(
+            mask=dilate(raw, dilation_px),
+            mask_level=mask_level,
+            tile_size=tile_size,
+            tissue_fraction=float(raw.mean()),
+        )
+
+    def intersects(self, level: int, x: int, y: int) -> bool:
+        """True if tile ``(x, y)`` at *level* overlaps the dilated mask."""
+        if level < self.mask_level:
+            raise ValueError(f"level {level} is coarser than the mask level {self.mask_level}")
+        scale = 2 ** (level - self.mask_level)
+        h, w = self.mask.shape
+        x0 = min(w, (x * self.tile_size) // scale)
+        y0 = min(h, (y * self.tile_size) // scale)
+        x1 = min(w, max(x0 + 1, math.ceil((x + 1) * self.tile_size / scale)))
+        y1 = min(h, max(y0 + 1, math.ceil((y + 1) * self.tile_size / scale)))
+        c = self._counts
+        return bool(c[y1, x1] - c[y0, x1] - c[y1, x0] + c[y0, x0] > 0)
+
+    def filter(self, tile_refs: List[TileRef]) -> Tuple[List[TileRef], List[TileRef]]:
+        """Split *tile_refs* into ``(kept, skipped)``."""
+        kept: List[TileRef] = []
+        skipped: List[TileRef] = []
+        for tref in tile_refs:
+            (kept if self.intersects(tref.level, tref.x, tref.y) else skipped).append(tref)
+        return kept, skipped
@@ -0,0 +1,247 @@
+"""Size-bounded LRU cache of serialised job results.
+
+Completed results never change, yet every ``GET /jobs/{id}/results`` used
+to download ``summary.json`` and ``tile_predictions.json`` from MinIO and
+re-serialise them.  :class:`ResultsCache` keeps the serialised JSON body of
+recent results, a strong ETag derived from it, and compressed encodings
+created on first request, evicting least-recently-used entries once the
+total cached bytes exceed the budget.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it; gzip otherwise.
+
+:class:`DecodedCache` is the same LRU for decoded objects that are costly to
+rebuild, such as the spatial index behind ``GET /jobs/{id}/predictions``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+try:  # optional: better ratio than gzip for large JSON
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+@dataclass
+class CachedResult:
+    body: bytes
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong ETags must differ per content-coding: ``"<hash>-gzip"``."""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def _etag_core(tag: str) -> str:
+    tag = tag.strip().removeprefix("W/").strip('"')
+    return tag.split("-", 1)[0]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` check (weak comparison, as RFC 9110 requires).
+
+    Any content-coding variant of the same body matches.
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or _etag_core(etag) in {_etag_core(tag) for tag in candidates}
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Preferred encoding from *available* that the client accepts (q > 0)."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class ResultsCache:
+    """Thread-safe LRU of :class:`CachedResult` bounded by total bytes."""
+
+    def __init__(self, max_bytes: int, compress_min_bytes: int = 1024):
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self._entries: "OrderedDict[Hashable, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._not_modified = 0
+
+    @property
+    def encodings(self) -> tuple[str, ...]:
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def get(self, key: Hashable) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, payload: Any) -> CachedResult:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        entry = CachedResult(body=body, etag=make_etag(body))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += entry.size
+                self._evict()
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def effective_encoding(self, entry: CachedResult, encoding: Optional[str]) -> Optional[str]:
+        """Encoding actually used for *entry*: small bodies stay uncompressed."""
+        return None if len(entry.body) < self.compress_min_bytes else encoding
+
+    def encode(
+        self, key: Hashable, entry: CachedResult, encoding: Optional[str]
+    ) -> tuple[bytes, Optional[str]]:
+        """``(body, encoding_used)`` for *entry*, compressing at most once.
+
+        Bodies below ``compress_min_bytes`` are always sent uncompressed.
+        """
+        encoding = self.effective_encoding(entry, encoding)
+        if encoding is None:
+            return entry.body, None
+        data = entry.encoded.get(encoding)
+        if data is not None:
+            return data, encoding
+        data = _compress(entry.body, encoding)
+        with self._lock:
+            if encoding not in entry.encoded:
+                entry.encoded[encoding] = data
+                if self._entries.get(key) is entry:
+                    self._bytes += len(data)
+                    self._evict()
+        return data, encoding
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._not_modified += 1
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "not_modified": self._not_modified,
+            }
+
+
+class DecodedCache:
+    """Thread-safe LRU of decoded objects bounded by their reported bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value for *key*, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> Any:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self._evictions += 1
+        return value
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,69 @@
+"""Preallocated uint8 storage for decoded tiles.
+
+The analysis loop used to keep one ``PIL.Image`` per downloaded tile (a
+256-tile chunk at a time), plus the HSV and greyscale copies made by tissue
+detection and the array copies made by the embedder's processor.
+:class:`TileArena` holds one ``(capacity, H, W, 3)`` uint8 block per job.
+Download workers decode each tile into the slot reserved for it, and tissue
+detection, batching and preprocessing work on views of that slot.  A slot is
+reused as soon as its tile is classified or rejected, so steady-state
+allocation no longer scales with the number of tiles.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from .tile_store import ObjectData, as_file
+
+
+class ArenaFull(RuntimeError):
+    """More tiles are in flight than the arena was sized for."""
+
+
+class TileArena:
+    """Fixed pool of ``tile_px × tile_px`` RGB slots.
+
+    Slots are reserved and released by the job thread only; a download
+    worker writes just the slot it was handed, so no locking is needed.
+    """
+
+    def __init__(self, capacity: int, tile_px: int):
+        self.capacity = capacity
+        self.tile_px = tile_px
+        # np.empty: pages are only committed once a slot is first written.
+        self.buffer = np.empty((capacity, tile_px, tile_px, 3), dtype=np.uint8)
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self.oversized = 0
+
+    @property
+    def in_use(self) -> int:
+        return self.capacity - len(self._free)
+
+    def reserve(self) -> int:
+        if not self._free:
+            raise ArenaFull(f"all {self.capacity} tile slots are in use")
+        return self._free.pop()
+
+    def release(self, slot: int) -> None:
+        self._free.append(slot)
+
+    def decode(self, slot: int, data: ObjectData) -> np.ndarray:
+        """Decode image *data* into *slot*; returns the ``(h, w, 3)`` view.
+
+        Tiles larger than a slot (a descriptor with the wrong overlap, say)
+        get a private array instead of failing.
+        """
+        with Image.open(as_file(data)) as img:
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            width, height = img.size
+            if width > self.tile_px or height > self.tile_px:
+                self.oversized += 1
+                return np.asarray(img).copy()
+            view = self.buffer[slot, :height, :width]
+            view[...] = np.asarray(img)
+        return view
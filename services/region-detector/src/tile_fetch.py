@@ -0,0 +1,264 @@
+"""Dedicated HTTP client for tile GETs against MinIO / S3.
+
+The ``Minio`` SDK client keeps urllib3's default pool of 10 connections, so
+with ``DOWNLOAD_WORKERS`` = 16 threads queue for a connection or open
+throwaway ones.  Each GET also derives a fresh SigV4 signing key (four
+HMACs) and ``resp.read()`` assembles a new ``bytes`` object.  Tiles are
+small and numerous, so this overhead adds up per tile.
+
+:class:`TileFetchClient` is used for tile reads only:
+
+- a keep-alive pool of exactly ``pool_size`` connections (threads block for
+  a free one rather than opening extras);
+- a signing key cached per UTC day;
+- responses are read into a per-thread buffer that is reused for the next
+  tile, so steady-state fetching allocates no per-tile response objects.
+
+:class:`AsyncTileFetcher` issues GETs through an ``aiohttp`` session on one
+background event-loop thread, over up to ``concurrency`` keep-alive
+connections, so hundreds of requests can be in flight without a thread each.
+
+Listing, metadata and artifact uploads stay on the SDK client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+from urllib.parse import quote
+
+import aiohttp
+import urllib3
+from yarl import URL
+
+from . import metrics
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+FETCH_SECONDS = metrics.histogram(
+    "region_detector_tile_fetch_seconds", "Latency of one tile GET on the dedicated fetch client."
+)
+
+
+class TileFetchError(RuntimeError):
+    def __init__(self, status: int, key: str, body: bytes = b""):
+        super().__init__(f"GET {key} failed with HTTP {status}: {body[:200]!r}")
+        self.status = status
+        self.key = key
+
+
+class SigV4Signer:
+    """AWS Signature V4 for bodiless S3 GETs, with the signing key cached per day."""
+
+    def __init__(self, access_key: str, secret_key: str, region: str = "us-east-1"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self._keys: Dict[str, bytes] = {}
+
+    def signing_key(self, day: str) -> bytes:
+        key = self._keys.get(day)
+        if key is None:
+            key = ("AWS4" + self.secret_key).encode()
+            for part in (day, self.region, "s3", "aws4_request"):
+                key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+            # One entry per day is enough; drop yesterday's.
+            self._keys = {day: key}
+        return key
+
+    def headers(self, host: str, path: str, now: datetime | None = None) -> Dict[str, str]:
+        """Headers for ``GET path`` (already URI-encoded) on *host*."""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        day = amz_date[:8]
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        signed = "host;x-amz-content-sha256;x-amz-date"
+        canonical = (
+            f"GET\n{path}\n\n"
+            f"host:{host}\nx-amz-content-sha256:{EMPTY_SHA256}\nx-amz-date:{amz_date}\n\n"
+            f"{signed}\n{EMPTY_SHA256}"
+        )
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+            f"{hashlib.sha256(canonical.encode()).hexdigest()}"
+        )
+        signature = hmac.new(self.signing_key(day), string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return {
+            "Host": host,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": EMPTY_SHA256,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                f"SignedHeaders={signed}, Signature={signature}"
+            ),
+        }
+
+
+def object_path(bucket: str, key: str) -> str:
+    return f"/{quote(bucket, safe='')}/{quote(key, safe='/-_.~')}"
+
+
+class TileFetchClient:
+    """Thread-safe tile GETs over a keep-alive pool of *pool_size* connections."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        access_key: str,
+        secret_key: str,
+        *,
+        secure: bool = False,
+        region: str = "us-east-1",
+        pool_size: int = 16,
+        timeout_s: float = 30.0,
+    ):
+        self.host = endpoint
+        self.pool_size = pool_size
+        self.signer = SigV4Signer(access_key, secret_key, region)
+        hostname, _, port = endpoint.partition(":")
+        pool_cls = urllib3.HTTPSConnectionPool if secure else urllib3.HTTPConnectionPool
+        self._pool = pool_cls(
+            hostname,
+            int(port) if port else (443 if secure else 80),
+            maxsize=pool_size,
+            block=True,
+            timeout=urllib3.Timeout(connect=5.0, read=timeout_s),
+            retries=urllib3.Retry(total=2, connect=2, read=2, status=0, backoff_factor=0.1),
+        )
+        self._local = threading.local()
+
+    def _buffer(self, size: int) -> bytearray:
+        buf = getattr(self._local, "buffer", None)
+        if buf is None or len(buf) < size:
+            # A new bytearray rather than a resize: a caller may still hold
+            # a view of the old one.
+            buf = bytearray(max(size, 64 * 1024))
+            self._local.buffer = buf
+        return buf
+
+    def get(self, bucket: str, key: str) -> memoryview:
+        """The object's bytes, as a view of this thread's reusable buffer.
+
+        The view is only valid until this thread's next :meth:`get`; copy it
+        with ``bytes()`` to keep it.
+        """
+        path = object_path(bucket, key)
+        start = time.perf_counter()
+        resp = self._pool.urlopen(
+            "GET", path, headers=self.signer.headers(self.host, path),
+            preload_content=False, release_conn=False,
+        )
+        try:
+            if resp.status != 200:
+                raise TileFetchError(resp.status, key, resp.read())
+            length = int(resp.headers.get("Content-Length", 0))
+            buf = self._buffer(length)
+            view = memoryview(buf)
+            n = 0
+            while True:
+                if n == len(buf):  # longer than announced
+                    buf = self._buffer(2 * len(buf))
+                    buf[:n] = view[:n]
+                    view = memoryview(buf)
+                read = resp.readinto(view[n:])
+                if not read:
+                    break
+                n += read
+        except BaseException:
+            # Never hand a half-read connection back to the pool.
+            resp.close()
+            raise
+        finally:
+            resp.release_conn()
+        FETCH_SECONDS.observe(time.perf_counter() - start)
+        return view[:n]
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+# ── asyncio ───────────────────────────────────────────────────────────────────
+
+
+class AsyncTileFetcher:
+    """Many concurrent tile GETs from one event-loop thread over an ``aiohttp`` pool.
+
+    The loop and its ``aiohttp.ClientSession`` (with up to ``concurrency``
+    keep-alive connections) persist across :meth:`fetch_many` calls;
+    concurrent callers share them and the ``concurrency`` limit.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        access_key: str,
+        secret_key: str,
+        *,
+        secure: bool = False,
+        region: str = "us-east-1",
+        concurrency: int = 256,
+        timeout_s: float = 30.0,
+    ):
+        self.host = endpoint
+        self.base_url = f"{'https' if secure else 'http'}://{endpoint}"
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self.signer = SigV4Signer(access_key, secret_key, region)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+        # Only touched from the loop thread.
+        self._session: aiohttp.ClientSession | None = None
+
+    def _running_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="tile-fetch-loop", daemon=True).start()
+            return self._loop
+
+    def fetch_many(self, bucket: str, keys: Sequence[str]) -> List[bytes | Exception]:
+        """Bytes of each key in order; a failed GET yields its exception.
+
+        Blocks the calling thread until every GET has finished.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(bucket, list(keys)), self._running_loop())
+        return future.result()
+
+    def close(self) -> None:
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    async def _close_session(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _fetch_all(self, bucket: str, keys: List[str]) -> List[bytes | Exception]:
+        if self._session is None:
+            # The connector's limit queues requests beyond ``concurrency``.
+            self._session = aiohttp.ClientSession(
+                self.base_url,
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=5.0, sock_read=self.timeout_s),
+                auto_decompress=False,
+            )
+        return await asyncio.gather(*(self._get(bucket, k) for k in keys), return_exceptions=True)
+
+    async def _get(self, bucket: str, key: str) -> bytes:
+        path = object_path(bucket, key)
+        start = time.perf_counter()
+        # ``encoded``: the path goes out exactly as it was signed.
+        async with self._session.get(URL(path, encoded=True), headers=self.signer.headers(self.host, path)) as resp:
+            body = await resp.read()
+        if resp.status != 200:
+            raise TileFetchError(resp.status, key, body)
+        FETCH_SECONDS.observe(time.perf_counter() - start)
+        return body
@@ -0,0 +1,375 @@
+"""Storage backends for slide tiles and analysis artifacts.
+
+Every read and write in :mod:`src.minio_io` goes through a :class:`TileStore`,
+chosen by ``TILE_STORE``:
+
+``minio``
+    The S3-compatible object store (the default).
+``local``
+    A directory tree under ``TILE_STORE_LOCAL_ROOT`` laid out as
+    ``{bucket}/{object_key}``, e.g. a volume shared with the tiling service.
+    Tiles are memory-mapped rather than read, so decoding works straight
+    from the page cache without copying the file into a ``bytes`` object.
+``memory``
+    A dict, for tests and benchmarks.
+
+A store deals in object keys within a bucket.  The slide layout
+(``{image_id}/image_files/{level}/{x}_{y}.{ext}``) is interpreted once, in
+:meth:`TileStore.list_levels` and :meth:`TileStore.list_tiles`.
+"""
+
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .config import settings
+
+TILE_STORES = ("minio", "local", "memory")
+TILE_FETCH_MODES = ("threads", "async")
+
+# What a read returns: bytes, a read-only mmap (local store) or, from
+# ``read_tile`` on MinIO, a view of a reused buffer.  All support len(),
+# slicing and the buffer protocol; use :func:`as_file` to hand one to a
+# decoder.
+ObjectData = Union[bytes, memoryview, mmap.mmap]
+
+_TILE_PATTERN = re.compile(r"(\d+)_(\d+)\.\w+$")
+
+
+class ObjectNotFound(LookupError):
+    """The requested object key does not exist in the bucket."""
+
+
+@dataclass
+class TileRef:
+    """Reference to a single tile in the store, with its grid coordinates."""
+
+    level: int
+    x: int
+    y: int
+    object_key: str
+
+
+def as_file(data: ObjectData) -> BinaryIO:
+    """File-like view of *data* for ``Image.open``; an mmap is used directly."""
+    return data if isinstance(data, mmap.mmap) else io.BytesIO(data)
+
+
+class TileStore:
+    """Reads, writes and lists objects; subclasses implement the primitives."""
+
+    name = ""
+
+    def __init__(self, bucket: str | None = None):
+        self.bucket = bucket or settings.TILES_BUCKET
+
+    # ── Primitives ────────────────────────────────────────────────────
+
+    def read(self, key: str, bucket: str | None = None) -> ObjectData:
+        """Contents of *key*; raises :class:`ObjectNotFound` if it is missing."""
+        raise NotImplementedError
+
+    def write(
+        self,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        bucket: str | None = None,
+    ) -> None:
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str = "", bucket: str | None = None) -> Iterator[str]:
+        """Every key starting with *prefix* (recursively)."""
+        raise NotImplementedError
+
+    # ── Derived operations ────────────────────────────────────────────
+
+    def read_tile(self, key: str, bucket: str | None = None) -> ObjectData:
+        """Like :meth:`read`, for a tile decoded straight away.
+
+        The result may share a buffer with this thread's next ``read_tile``.
+        """
+        return self.read(key, bucket)
+
+    def read_many(self, keys: Sequence[str], bucket: str | None = None) -> List[ObjectData | Exception]:
+        """Contents of each of *keys*, in order; a failed read yields its exception."""
+        results: List[ObjectData | Exception] = []
+        for key in keys:
+            try:
+                results.append(self.read(key, bucket))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    def list_levels(self, image_id: str, bucket: str | None = None) -> List[int]:
+        """DZI levels that have at least one tile for *image_id*."""
+        prefix = f"{image_id}/image_files/"
+        levels = set()
+        for key in self.list_keys(prefix, bucket):
+            token = key[len(prefix):].split("/", 1)[0]
+            if token.isdigit():
+                levels.add(int(token))
+        return sorted(levels)
+
+    def list_tiles(self, image_id: str, level: int, bucket: str | None = None) -> List[TileRef]:
+        """Every tile of *image_id* at DZI *level*."""
+        tiles = []
+        for key in self.list_keys(f"{image_id}/image_files/{level}/", bucket):
+            m = _TILE_PATTERN.search(key)
+            if m:
+                tiles.append(TileRef(level=level, x=int(m.group(1)), y=int(m.group(2)), object_key=key))
+        return tiles
+
+
+# ── MinIO ─────────────────────────────────────────────────────────────────────
+
+
+class MinioTileStore(TileStore):
+    """The SDK client for listing and artifacts; tiles use :mod:`src.tile_fetch`."""
+
+    name = "minio"
+
+    def __init__(self, bucket: str | None = None, client=None):
+        super().__init__(bucket)
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._fetcher = None
+        self._async_fetcher = None
+
+    @property
+    def client(self):
+        if self._client is not None:
+            return self._client
+        with self._client_lock:
+            if self._client is None:
+                from minio import Minio
+
+                self._client = Minio(
+                    settings.MINIO_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE,
+                )
+        return self._client
+
+    def read(self, key, bucket=None):
+        from minio.error import S3Error
+
+        try:
+            resp = self.client.get_object(bucket or self.bucket, key)
+        except S3Error as exc:
+            if exc.code in {"NoSuchKey", "NoSuchObject"}:
+                raise ObjectNotFound(key) from exc
+            raise
+        try:
+            return resp.read()
+        finally:
+            resp.close()
+            resp.release_conn()
+
+    @property
+    def fetcher(self):
+        """Tile GET client with one pooled connection per download worker."""
+        from .tile_fetch import TileFetchClient
+
+        pool_size = settings.TILE_FETCH_POOL_SIZE or settings.DOWNLOAD_WORKERS
+        fetcher = self._fetcher
+        if fetcher is not None and fetcher.pool_size == pool_size:
+            return fetcher
+        with self._client_lock:
+            # Rebuilt when autotuning changes the worker count.
+            if self._fetcher is None or self._fetcher.pool_size != pool_size:
+                if self._fetcher is not None:
+                    self._fetcher.close()
+                self._fetcher = TileFetchClient(
+                    settings.MINIO_ENDPOINT,
+                    settings.MINIO_ACCESS_KEY,
+                    settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE,
+                    region=settings.MINIO_REGION,
+                    pool_size=pool_size,
+                )
+            return self._fetcher
+
+    @property
+    def async_fetcher(self):
+        from .tile_fetch import AsyncTileFetcher
+
+        if self._async_fetcher is not None:
+            return self._async_fetcher
+        with self._client_lock:
+            if self._async_fetcher is None:
+                self._async_fetcher = AsyncTileFetcher(
+                    settings.MINIO_ENDPOINT,
+                    settings.MINIO_ACCESS_KEY,
+                    settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE,
+                    region=settings.MINIO_REGION,
+                    concurrency=settings.TILE_FETCH_ASYNC_CONCURRENCY,
+                )
+            return self._async_fetcher
+
+    def read_tile(self, key, bucket=None):
+        from .tile_fetch import TileFetchError
+
+        try:
+            return self.fetcher.get(bucket or self.bucket, key)
+        except TileFetchError as exc:
+            if exc.status == 404:
+                raise ObjectNotFound(key) from exc
+            raise
+
+    def read_many(self, keys, bucket=None):
+        from .tile_fetch import TileFetchError
+
+        results = self.async_fetcher.fetch_many(bucket or self.bucket, keys)
+        return [
+            ObjectNotFound(key) if isinstance(r, TileFetchError) and r.status == 404 else r
+            for key, r in zip(keys, results)
+        ]
+
+    def write(self, key, data, content_type="application/octet-stream", bucket=None):
+        self.client.put_object(
+            bucket or self.bucket,
+            key,
+            data=io.BytesIO(data),
+            length=len(data),
+            content_type=content_type,
+        )
+
+    def list_keys(self, prefix="", bucket=None):
+        for obj in self.client.list_objects(bucket or self.bucket, prefix=prefix, recursive=True):
+            yield obj.object_name
+
+    def ensure_bucket(self, bucket: str | None = None) -> None:
+        bucket = bucket or self.bucket
+        if not self.client.bucket_exists(bucket):
+            self.client.make_bucket(bucket)
+
+
+# ── Local directory ───────────────────────────────────────────────────────────
+
+
+class LocalTileStore(TileStore):
+    """Objects are files under ``root/{bucket}/{key}``; reads are memory-mapped."""
+
+    name = "local"
+
+    def __init__(self, root: str | os.PathLike, bucket: str | None = None):
+        super().__init__(bucket)
+        self.root = Path(root)
+
+    def _path(self, key: str, bucket: str | None) -> Path:
+        if key.startswith("/") or ".." in key.split("/"):
+            raise ValueError(f"Object key {key!r} escapes the store root")
+        return self.root / (bucket or self.bucket) / key
+
+    def read(self, key, bucket=None):
+        try:
+            with open(self._path(key, bucket), "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    return b""
+                # The mapping stays valid after the file is closed.
+                return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as exc:
+            raise ObjectNotFound(key) from exc
+
+    def write(self, key, data, content_type="application/octet-stream", bucket=None):
+        path = self._path(key, bucket)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    def list_keys(self, prefix="", bucket=None):
+        base = self.root / (bucket or self.bucket)
+        # Only walk the deepest directory the prefix names.
+        start = base / prefix.rsplit("/", 1)[0] if "/" in prefix else base
+        if not start.is_dir():
+            return
+        for dirpath, dirnames, filenames in os.walk(start):
+            dirnames.sort()
+            rel_dir = Path(dirpath).relative_to(base).as_posix()
+            for filename in sorted(filenames):
+                if filename.startswith(".") and filename.endswith(".tmp"):
+                    continue
+                key = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+                if key.startswith(prefix):
+                    yield key
+
+
+# ── In memory ─────────────────────────────────────────────────────────────────
+
+
+class MemoryTileStore(TileStore):
+    name = "memory"
+
+    def __init__(self, bucket: str | None = None):
+        super().__init__(bucket)
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def read(self, key, bucket=None):
+        try:
+            return self.objects[(bucket or self.bucket, key)]
+        except KeyError:
+            raise ObjectNotFound(key) from None
+
+    def write(self, key, data, content_type="application/octet-stream", bucket=None):
+        with self._lock:
+            self.objects[(bucket or self.bucket, key)] = bytes(data)
+
+    def list_keys(self, prefix="", bucket=None):
+        bucket = bucket or self.bucket
+        with self._lock:
+            keys = sorted(k for b, k in self.objects if b == bucket and k.startswith(prefix))
+        yield from keys
+
+
+# ── Selection ─────────────────────────────────────────────────────────────────
+
+_store: Optional[TileStore] = None
+_store_lock = threading.Lock()
+
+
+def create_tile_store(kind: str | None = None) -> TileStore:
+    kind = (kind or settings.TILE_STORE).lower()
+    if kind == "minio":
+        return MinioTileStore()
+    if kind == "local":
+        return LocalTileStore(settings.TILE_STORE_LOCAL_ROOT)
+    if kind == "memory":
+        return MemoryTileStore()
+    raise ValueError(f"Unknown TILE_STORE {kind!r}; expected one of {TILE_STORES}")
+
+
+def tile_fetch_mode(mode: str | None = None) -> str:
+    """``TILE_FETCH_MODE`` (or *mode*), rejecting unknown values."""
+    mode = (mode or settings.TILE_FETCH_MODE).lower()
+    if mode not in TILE_FETCH_MODES:
+        raise ValueError(f"Unknown TILE_FETCH_MODE {mode!r}; expected one of {TILE_FETCH_MODES}")
+    return mode
+
+
+def get_tile_store() -> TileStore:
+    """The service-wide store, created from the settings on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_tile_store()
+            print(f"[tile_store] Using {_store.name} store")
+        return _store
+
+
+def set_tile_store(store: TileStore | None) -> None:
+    """Replace the service-wide store (``None`` re-reads the settings on next use)."""
+    global _store
+    with _store_lock:
+        _store = store
@@ -21,15 +21,63 @@ microscopy, or any other image type that does not rely on H&E colouring.
 The default threshold (0.15 = 15% of pixels must exceed a saturation floor)
 works well for H&E-stained slides.  It can be tuned via the
 ``TISSUE_THRESHOLD`` environment variable.
+
+Tiles may be PIL images or ``(H, W, 3)`` uint8 arrays (views into a
+:class:`~src.tile_arena.TileArena`).  Saturation and greyscale are computed
+directly from the RGB array with the same integer results as PIL's ``HSV``
+and ``L`` conversions, without materialising converted images.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Union
 
 import numpy as np
 from PIL import Image
 
+TileInput = Union[Image.Image, np.ndarray]
+
+
+def _saturation_lut() -> np.ndarray:
+    """``lut[max, max - min]`` = PIL's HSV saturation for that pixel.
+
+    Mirrors libImaging's ``rgb2hsv``: ``(int)((float)(cr / (float)max) * 255.0)``.
+    """
+    maxc = np.arange(256, dtype=np.float32)[:, None]
+    spread = np.arange(256, dtype=np.float32)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (spread / maxc).astype(np.float64)
+    lut = np.where((spread > 0) & (spread <= maxc), np.trunc(ratio * 255.0), 0.0)
+    return np.clip(lut, 0, 255).astype(np.uint8)
+
+
+# Flattened so a pixel's entry is ``(max << 8) | (max - min)``; one ``np.take``
+# is far cheaper than 2-D fancy indexing.
+_SATURATION_LUT = _saturation_lut().ravel()
+
+
+def _rgb_array(tile: TileInput) -> np.ndarray:
+    if isinstance(tile, np.ndarray):
+        return tile
+    return np.asarray(tile if tile.mode == "RGB" else tile.convert("RGB"))
+
+
+def saturation(rgb: np.ndarray) -> np.ndarray:
+    """HSV saturation (0-255) of an ``(H, W, 3)`` uint8 array, as PIL computes it."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = np.maximum(np.maximum(r, g), b)
+    index = maxc.astype(np.uint16)
+    index <<= 8
+    index += maxc - np.minimum(np.minimum(r, g), b)
+    return np.take(_SATURATION_LUT, index)
+
+
+def luminance(rgb: np.ndarray) -> np.ndarray:
+    """ITU-R 601-2 greyscale (0-255), bit-identical to PIL's ``convert("L")``."""
+    r, g, b = (rgb[..., idx].astype(np.uint32) for idx in range(3))
+    return ((r * 19595 + g * 38470 + b * 7471 + 0x8000) >> 16).astype(np.uint8)
+
 
 @dataclass
 class TissueResult:
@@ -37,10 +85,12 @@ class TissueResult:
 
     is_tissue: bool
     tissue_ratio: float  # 0.0 – 1.0
+    # Greyscale standard deviation, when the variance fallback computed it.
+    gray_std: float | None = None
 
 
 def detect_tissue(
-    tile: Image.Image,
+    tile: TileInput,
     threshold: float = 0.15,
     saturation_floor: int = 30,
     variance_fallback: bool = True,
@@ -55,7 +105,8 @@ def detect_tissue(
     Parameters
     ----------
     tile:
-        A PIL RGB image (typically 256×256 from a DZI pyramid).
+        A PIL RGB image or ``(H, W, 3)`` uint8 array (typically 256×256
+        from a DZI pyramid).
     threshold:
         Minimum fraction of pixels that must exceed *saturation_floor*
         for the tile to pass the saturation check.
@@ -77,10 +128,10 @@ def detect_tissue(
         ``is_tissue`` flag and the computed ``tissue_ratio``.
     """
     # ── Primary: H&E saturation check ────────────────────────────────────
-    hsv = np.array(tile.convert("HSV"))
-    saturation = hsv[:, :, 1]  # 0 = grey/white, 255 = fully saturated
-    tissue_pixels = np.sum(saturation > saturation_floor)
-    total_pixels = saturation.size
+    rgb = _rgb_array(tile)
+    sat = saturation(rgb)  # 0 = grey/white, 255 = fully saturated
+    tissue_pixels = np.count_nonzero(sat > saturation_floor)
+    total_pixels = sat.size
     ratio = float(tissue_pixels / total_pixels)
 
     if ratio >= threshold:
@@ -90,12 +141,37 @@ def detect_tissue(
     # Catches non-H&E images (photos, X-rays, fluorescence, etc.) where
     # saturation is low but the tile still contains real content.
     if variance_fallback:
-        gray = np.array(tile.convert("L"), dtype=np.float32)
+        gray = luminance(rgb).astype(np.float32)
         std = float(np.std(gray))
-        if std >= std_floor:
-            # Express tissue_ratio as normalised std so callers have a
-            # meaningful 0-1 value regardless of detection strategy.
-            variance_ratio = min(std / 255.0, 1.0)
-            return TissueResult(is_tissue=True, tissue_ratio=max(ratio, variance_ratio))
+        return _variance_check(ratio, std, std_floor)
 
     return TissueResult(is_tissue=False, tissue_ratio=ratio)
+
+
+def _variance_check(ratio: float, std: float, std_floor: float) -> TissueResult:
+    if std >= std_floor:
+        # Express tissue_ratio as normalised std so callers have a
+        # meaningful 0-1 value regardless of detection strategy.
+        variance_ratio = min(std / 255.0, 1.0)
+        return TissueResult(is_tissue=True, tissue_ratio=max(ratio, variance_ratio), gray_std=std)
+    return TissueResult(is_tissue=False, tissue_ratio=ratio, gray_std=std)
+
+
+def recheck_tissue(
+    result: TissueResult,
+    threshold: float,
+    std_floor: float,
+) -> TissueResult | None:
+    """Repeat :func:`detect_tissue` with new thresholds, from a rejected tile's stats.
+
+    *result* must be a rejection (so ``tissue_ratio`` is the plain saturation
+    ratio) from a check with the same *saturation_floor*.  Returns what
+    ``detect_tissue(tile, threshold, std_floor=std_floor)`` would, or ``None``
+    when the decision needs ``gray_std`` and it was not recorded.
+    """
+    ratio = result.tissue_ratio
+    if ratio >= threshold:
+        return TissueResult(is_tissue=True, tissue_ratio=ratio, gray_std=result.gray_std)
+    if result.gray_std is None:
+        return None
+    return _variance_check(ratio, result.gray_std, std_floor)
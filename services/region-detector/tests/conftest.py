@@ -0,0 +1,57 @@
+"""Shared fixtures for the region-detector test suite."""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def tiny_backbone(tmp_path_factory):
+    """A randomly initialised, 2-layer DINOv2 saved to disk.
+
+    Lets embedder tests exercise the real Hugging Face loading path without
+    network access or the 350 MB ``dinov2-base`` checkpoint.
+    """
+    pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    path = tmp_path_factory.mktemp("tiny_dinov2")
+    config = transformers.Dinov2Config(
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        image_size=224,
+        patch_size=14,
+    )
+    transformers.Dinov2Model(config).save_pretrained(path)
+    transformers.BitImageProcessor(
+        size={"shortest_edge": 256},
+        crop_size={"height": 224, "width": 224},
+        do_center_crop=True,
+        image_mean=[0.485, 0.456, 0.406],
+        image_std=[0.229, 0.224, 0.225],
+    ).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def stained_slide():
+    """Synthetic H&E-like slide served through the ``minio_io`` stand-ins."""
+    from .fakes import SyntheticSlide
+
+    return SyntheticSlide()
+
+
+@pytest.fixture(scope="session")
+def faint_slide():
+    """Unstained slide that fails the first tissue pass."""
+    from .fakes import SyntheticSlide
+
+    return SyntheticSlide(image_id="faint", stained=False)
+
+
+@pytest.fixture(scope="session")
+def fine_slide():
+    """Smaller tiles give a deeper pyramid, closer to a real slide's grid."""
+    from .fakes import SyntheticSlide
+
+    return SyntheticSlide(image_id="fine", tile_size=128)
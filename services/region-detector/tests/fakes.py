@@ -0,0 +1,316 @@
+"""In-memory stand-ins used to run the full pipeline in tests.
+
+``SyntheticSlide`` renders a small H&E-like slide (white glass, a pink tissue
+ellipse and a purple "tumour" blob inside it) — or, with ``stained=False``, a
+faint unstained greyscale one that fails the first tissue pass — cuts it into
+a DZI pyramid and
+serves it through the ``minio_io`` functions that ``src.pipeline`` imports.
+``install_stub_models`` replaces DINOv2 with a mean-colour "embedding" and
+the classifier head with a fixed logistic function of it, so results are
+deterministic and fast.  ``FakeS3Server`` serves objects over real HTTP for
+the tile fetch clients.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+from PIL import Image
+
+from src.classifier import Classifier
+from src.minio_io import DZIInfo, TileManifest, TileRef
+
+
+class SyntheticSlide:
+    def __init__(
+        self,
+        image_id: str = "synthetic",
+        width: int = 3000,
+        height: int = 2000,
+        tile_size: int = 256,
+        seed: int = 0,
+        stained: bool = True,
+        noise: float | None = None,
+    ):
+        self.image_id = image_id
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.max_level = int(math.ceil(math.log2(max(width, height))))
+        self.uploads: Dict[str, bytes] = {}
+        self.download_count = 0
+
+        rng = np.random.default_rng(seed)
+        yy, xx = np.mgrid[0:height, 0:width]
+        image = np.full((height, width, 3), 240, dtype=np.float32)
+
+        tissue = ((xx - width * 0.45) / (width * 0.3)) ** 2 + (
+            (yy - height * 0.5) / (height * 0.35)
+        ) ** 2 <= 1.0
+        tumour = ((xx - width * 0.55) / (width * 0.12)) ** 2 + (
+            (yy - height * 0.45) / (height * 0.18)
+        ) ** 2 <= 1.0
+        if stained:
+            image[tissue] = (200, 120, 180)
+            image[tumour & tissue] = (120, 40, 140)
+            image += rng.normal(0, 6 if noise is None else noise, image.shape)
+        else:
+            image[tissue] = 232
+            image[tumour & tissue] = 222
+            image += rng.normal(0, 4 if noise is None else noise, (height, width, 1))
+        self.fullres = np.clip(image, 0, 255).astype(np.uint8)
+
+        self.tiles: Dict[Tuple[int, int, int], bytes] = {}
+        for level in range(self.max_level + 1):
+            scale = 2 ** (self.max_level - level)
+            lw = max(1, math.ceil(width / scale))
+            lh = max(1, math.ceil(height / scale))
+            level_img = Image.fromarray(self.fullres).resize((lw, lh), Image.Resampling.BOX)
+            for ty in range(math.ceil(lh / tile_size)):
+                for tx in range(math.ceil(lw / tile_size)):
+                    box = (
+                        tx * tile_size,
+                        ty * tile_size,
+                        min(lw, (tx + 1) * tile_size),
+                        min(lh, (ty + 1) * tile_size),
+                    )
+                    buf = io.BytesIO()
+                    level_img.crop(box).save(buf, format="PNG")
+                    self.tiles[(level, tx, ty)] = buf.getvalue()
+
+    # ── minio_io stand-ins ────────────────────────────────────────────
+
+    def key(self, level: int, x: int, y: int) -> str:
+        return f"{self.image_id}/image_files/{level}/{x}_{y}.png"
+
+    def parse_dzi(self, image_id, bucket=None) -> DZIInfo:
+        return DZIInfo(
+            width=self.width, height=self.height, tile_size=self.tile_size, overlap=0, format="png"
+        )
+
+    def available_levels(self) -> List[int]:
+        return list(range(self.max_level + 1))
+
+    def list_available_tile_levels(self, image_id, bucket=None) -> List[int]:
+        return self.available_levels()
+
+    def load_tile_manifest(self, image_id, bucket=None) -> TileManifest:
+        counts: Dict[int, int] = {}
+        for level, _, _ in self.tiles:
+            counts[level] = counts.get(level, 0) + 1
+        return TileManifest(
+            image_id=self.image_id,
+            width=self.width,
+            height=self.height,
+            tile_size=self.tile_size,
+            format="png",
+            available_levels=self.available_levels(),
+            level_tile_counts=counts,
+        )
+
+    def list_tiles_at_level(self, image_id, level, bucket=None) -> List[TileRef]:
+        return [
+            TileRef(level=lvl, x=x, y=y, object_key=self.key(lvl, x, y))
+            for (lvl, x, y) in sorted(self.tiles)
+            if lvl == level
+        ]
+
+    def download_tile_bytes(self, object_key, bucket=None) -> bytes:
+        self.download_count += 1
+        level, name = object_key.split("/")[-2:]
+        x, y = name.split(".")[0].split("_")
+        return self.tiles[(int(level), int(x), int(y))]
+
+    def download_tile_image(self, object_key, bucket=None) -> Image.Image:
+        return Image.open(io.BytesIO(self.download_tile_bytes(object_key))).convert("RGB")
+
+    def upload_bytes(self, data, object_key, content_type="application/octet-stream", bucket=None):
+        self.uploads[object_key] = bytes(data)
+
+    def upload_json(self, payload, object_key, bucket=None, indent=2):
+        import json
+
+        self.uploads[object_key] = json.dumps(payload, indent=indent).encode("utf-8")
+
+    def install(self, monkeypatch, module) -> "SyntheticSlide":
+        """Point *module*'s imported ``minio_io`` helpers at this slide."""
+        _install_minio(self, monkeypatch, module)
+        return self
+
+
+class SyntheticCohort:
+    """Several :class:`SyntheticSlide` objects served together, routed by image id."""
+
+    def __init__(self, *slides: SyntheticSlide):
+        self.slides = {slide.image_id: slide for slide in slides}
+        self.uploads: Dict[str, bytes] = {}
+
+    def _for_key(self, object_key: str) -> SyntheticSlide:
+        return self.slides[object_key.split("/")[0]]
+
+    def parse_dzi(self, image_id, bucket=None) -> DZIInfo:
+        return self.slides[image_id].parse_dzi(image_id)
+
+    def list_available_tile_levels(self, image_id, bucket=None) -> List[int]:
+        return self.slides[image_id].available_levels()
+
+    def load_tile_manifest(self, image_id, bucket=None) -> TileManifest:
+        return self.slides[image_id].load_tile_manifest(image_id)
+
+    def list_tiles_at_level(self, image_id, level, bucket=None) -> List[TileRef]:
+        return self.slides[image_id].list_tiles_at_level(image_id, level)
+
+    def download_tile_bytes(self, object_key, bucket=None) -> bytes:
+        return self._for_key(object_key).download_tile_bytes(object_key)
+
+    def download_tile_image(self, object_key, bucket=None) -> Image.Image:
+        return self._for_key(object_key).download_tile_image(object_key)
+
+    upload_bytes = SyntheticSlide.upload_bytes
+    upload_json = SyntheticSlide.upload_json
+
+    def install(self, monkeypatch, *modules) -> "SyntheticCohort":
+        for module in modules:
+            _install_minio(self, monkeypatch, module)
+        return self
+
+
+def _install_minio(fake, monkeypatch, module) -> None:
+    for name in (
+        "parse_dzi",
+        "list_available_tile_levels",
+        "load_tile_manifest",
+        "list_tiles_at_level",
+        "download_tile_bytes",
+        "download_tile_image",
+        "upload_bytes",
+        "upload_json",
+    ):
+        if hasattr(module, name):
+            monkeypatch.setattr(module, name, getattr(fake, name))
+
+
+class MeanColourEmbedder:
+    """Embeds a tile as its mean RGB colour scaled to ``[0, 1]``."""
+
+    model_name = "stub-mean-colour"
+    embedding_dim = 3
+
+    def embed_batch(self, images, batch_size=16):
+        return np.stack(
+            [np.asarray(img, dtype=np.float32).reshape(-1, 3).mean(axis=0) / 255.0 for img in images]
+        )
+
+    def describe(self):
+        return {"backbone": self.model_name, "backend": "stub", "precision": "fp32"}
+
+
+class _GreenChannelHead:
+    """Logistic head: low green (purple tumour stain) → high tumour probability."""
+
+    def predict_proba(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        logits = 20.0 * (0.35 - x[:, 1])
+        tumour = 1.0 / (1.0 + np.exp(-logits))
+        return np.stack([1.0 - tumour, tumour], axis=1)
+
+
+def stub_classifier() -> Classifier:
+    classifier = Classifier(model_path="stub.pkl")
+    classifier._clf = _GreenChannelHead()
+    return classifier
+
+
+def install_stub_models(monkeypatch, pipeline_module) -> None:
+    monkeypatch.setattr(pipeline_module, "_embedder", MeanColourEmbedder())
+    monkeypatch.setattr(pipeline_module, "_classifier", stub_classifier())
+    monkeypatch.setattr(pipeline_module, "_inference_server", None)
+    monkeypatch.setattr(pipeline_module.settings, "INFERENCE_SERVER_ENABLED", False)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # many clients connect at once
+
+
+class FakeS3Server:
+    """S3 GetObject over HTTP/1.1 keep-alive on localhost, from an in-memory dict.
+
+    ``objects`` maps ``(bucket, key)`` to bytes.  Each response is delayed by
+    *latency_ms*; ``connections`` and ``requests`` count what clients did.
+    Signatures are not checked beyond requiring a SigV4 ``Authorization``.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.latency_ms = latency_ms
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def put(self, bucket: str, key: str, data: bytes) -> None:
+        self.objects[(bucket, key)] = data
+
+    def __enter__(self) -> "FakeS3Server":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                url = urlsplit(self.path)
+                bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+                if "location" in url.query:  # SDK region lookup
+                    body, status = b'<LocationConstraint xmlns="http://s3.amazonaws.com/doc/2006-03-01/"/>', 200
+                elif not self.headers.get("Authorization", "").startswith("AWS4-HMAC-SHA256 "):
+                    body, status = b"<Error><Code>AccessDenied</Code></Error>", 403
+                elif (bucket, key) in server.objects:
+                    body, status = server.objects[(bucket, key)], 200
+                else:
+                    body = (
+                        b"<Error><Code>NoSuchKey</Code><Message>missing</Message>"
+                        b"<Key>" + key.encode() + b"</Key><BucketName>" + bucket.encode() + b"</BucketName>"
+                        b"<Resource>" + url.path.encode() + b"</Resource><RequestId>1</RequestId>"
+                        b"<HostId>1</HostId></Error>"
+                    )
+                    status = 404
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if status == 200 else "application/xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
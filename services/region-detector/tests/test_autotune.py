@@ -0,0 +1,189 @@
+"""Tests for the startup batch-size / worker-count calibration in src.autotune."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src import autotune, pipeline
+
+from .fakes import install_stub_models
+
+
+class TestPickBest:
+    def test_prefers_smallest_candidate_near_the_best(self):
+        rates = {1: 10.0, 2: 19.0, 4: 30.0, 8: 31.0, 16: 31.2}
+        chosen, results = autotune.pick_best(rates.__getitem__, [1, 2, 4, 8, 16])
+        assert chosen == 4
+        assert results["16"] == 31.2
+
+    def test_stops_past_the_knee(self):
+        measured = []
+        rates = {1: 10.0, 2: 20.0, 4: 12.0, 8: 40.0}
+
+        def measure(c):
+            measured.append(c)
+            return rates[c]
+
+        chosen, _ = autotune.pick_best(measure, [1, 2, 4, 8])
+        assert chosen == 2
+        assert measured == [1, 2, 4]
+
+    def test_disallowed_candidate_ends_search(self):
+        chosen, results = autotune.pick_best(
+            float, [1, 2, 4, 8], allowed=lambda c: c < 4
+        )
+        assert chosen == 2
+        assert list(results) == ["1", "2"]
+
+
+class TestTuneBatchSize:
+    def test_memory_limit_caps_batch_size(self):
+        rss = {"mb": 100.0}
+
+        def embed(batch):
+            rss["mb"] = 100.0 + 10.0 * len(batch)  # activations grow with the batch
+            time.sleep(0.001 + 0.0001 * len(batch))
+
+        chosen, results = autotune.tune_batch_size(
+            embed, [np.zeros((4, 4, 3))], memory_mb=100.0, rss_mb=lambda: rss["mb"]
+        )
+        assert chosen <= 8
+        assert "16" not in results
+
+    def test_rss_is_current_not_peak(self):
+        before = autotune.current_rss_mb()
+        block = np.ones(64 * 2**20, dtype=np.uint8)  # touch 64 MB
+        grown = autotune.current_rss_mb()
+        del block
+        assert grown - before >= 48
+        assert autotune.current_rss_mb() < grown - 32
+
+    def test_chunk_size_fits_memory_and_batch(self):
+        assert autotune.chunk_size_for(16, 16, memory_mb=512) == 128
+        assert autotune.chunk_size_for(64, 16, memory_mb=512) == 512
+        small = autotune.chunk_size_for(64, 16, memory_mb=16)
+        assert small % 16 == 0 and (small + 16) * 256 * 256 * 3 <= 16 * 2**20
+        large_tiles = autotune.chunk_size_for(64, 16, memory_mb=64, tile_px=512)
+        assert (large_tiles + 16) * 512 * 512 * 3 <= 64 * 2**20 < (large_tiles + 32) * 512 * 512 * 3
+
+
+class TestCalibrate:
+    def test_io_bound_downloads_get_more_workers(self):
+        tiles = [np.zeros((8, 8, 3), np.uint8)] * 4
+        result = autotune.calibrate(
+            embed_fn=lambda batch: time.sleep(0.002),
+            tiles=tiles,
+            fetch_fn=lambda key: time.sleep(0.005),
+            sample_keys=[f"k{i}" for i in range(32)],
+            detect_fn=lambda tile: None,
+            host="test-host",
+            memory_mb=1024,
+            budget_s=30,
+        )
+        assert result.download_workers >= 16
+        assert result.batch_size >= 16
+        assert set(result.measurements) == {"batch_size", "download_workers", "tissue_workers"}
+
+    def test_without_sample_tiles_download_workers_are_kept(self, monkeypatch):
+        monkeypatch.setattr(autotune.settings, "DOWNLOAD_WORKERS", 12)
+        result = autotune.calibrate(
+            embed_fn=lambda batch: None,
+            tiles=[np.zeros((8, 8, 3), np.uint8)],
+            fetch_fn=None,
+            sample_keys=[],
+            detect_fn=lambda tile: None,
+            host="h",
+            memory_mb=256,
+            budget_s=5,
+        )
+        assert result.download_workers == 12
+        assert "download_workers" not in result.measurements
+
+
+class TestCache:
+    def _result(self, host="h", age_s=0.0):
+        return autotune.TuningResult(
+            batch_size=32, download_workers=8, download_chunk_size=128, tissue_workers=4,
+            host=host, calibrated_at=time.time() - age_s,
+        )
+
+    def test_round_trip_per_host(self, tmp_path):
+        path = str(tmp_path / "tune" / "autotune.json")
+        autotune.store_cached(path, self._result("a"))
+        autotune.store_cached(path, self._result("b"))
+
+        cached = autotune.load_cached(path, "a", max_age_s=60)
+        assert cached.batch_size == 32 and cached.source == "cache"
+        assert autotune.load_cached(path, "c", max_age_s=60) is None
+
+    def test_stale_entry_is_ignored(self, tmp_path):
+        path = str(tmp_path / "autotune.json")
+        autotune.store_cached(path, self._result(age_s=120))
+        assert autotune.load_cached(path, "h", max_age_s=60) is None
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        path = tmp_path / "autotune.json"
+        path.write_text("{not json")
+        assert autotune.load_cached(str(path), "h", max_age_s=60) is None
+
+
+class TestAutotuneSettings:
+    @pytest.fixture
+    def tuned_settings(self, monkeypatch, tmp_path):
+        install_stub_models(monkeypatch, pipeline)
+        for name in (
+            "DEFAULT_BATCH_SIZE", "INFERENCE_MAX_BATCH_SIZE", "DOWNLOAD_WORKERS",
+            "DOWNLOAD_CHUNK_SIZE", "TISSUE_WORKERS",
+        ):
+            monkeypatch.setattr(pipeline.settings, name, getattr(pipeline.settings, name))
+        monkeypatch.setattr(pipeline.settings, "AUTOTUNE_CACHE_PATH", str(tmp_path / "a.json"))
+        monkeypatch.setattr(pipeline.settings, "AUTOTUNE_BUDGET_S", 5.0)
+
+        monkeypatch.setattr(autotune, "PINNED", frozenset())
+
+        def no_minio(limit, default_level):
+            raise ConnectionError("minio unavailable")
+
+        monkeypatch.setattr(pipeline, "sample_analysis_tiles", no_minio)
+        return pipeline.settings
+
+    def test_calibrates_once_then_reuses_cache(self, tuned_settings):
+        first = pipeline.autotune_settings()
+        assert first.source == "calibrated"
+        assert tuned_settings.DEFAULT_BATCH_SIZE == first.batch_size
+        assert tuned_settings.DOWNLOAD_CHUNK_SIZE == first.download_chunk_size
+
+        second = pipeline.autotune_settings()
+        assert second.source == "cache"
+        assert second.to_dict() == {**first.to_dict(), "source": "cache"}
+
+    def test_server_batch_keeps_cross_job_headroom(self, tuned_settings):
+        result = pipeline.autotune_settings()
+        multiple = tuned_settings.AUTOTUNE_SERVER_BATCH_MULTIPLE
+        assert tuned_settings.INFERENCE_MAX_BATCH_SIZE == result.batch_size * multiple
+        assert tuned_settings.INFERENCE_MAX_BATCH_SIZE > tuned_settings.DEFAULT_BATCH_SIZE
+
+    def test_unwritable_cache_does_not_block_startup(self, tuned_settings, tmp_path):
+        blocker = tmp_path / "not_a_dir"
+        blocker.write_text("")
+        tuned_settings.AUTOTUNE_CACHE_PATH = str(blocker / "autotune.json")
+
+        result = pipeline.autotune_settings()
+        assert result.source == "calibrated"
+        assert tuned_settings.DEFAULT_BATCH_SIZE == result.batch_size
+
+    def test_settings_from_the_environment_are_kept(self, tuned_settings, monkeypatch):
+        monkeypatch.setattr(
+            autotune, "PINNED", frozenset({"DEFAULT_BATCH_SIZE", "DOWNLOAD_CHUNK_SIZE"})
+        )
+        tuned_settings.DEFAULT_BATCH_SIZE = 3
+        tuned_settings.DOWNLOAD_CHUNK_SIZE = 99
+
+        result = pipeline.autotune_settings()
+        assert "batch_size" not in result.measurements  # not even measured
+        assert (tuned_settings.DEFAULT_BATCH_SIZE, tuned_settings.DOWNLOAD_CHUNK_SIZE) == (3, 99)
+        assert tuned_settings.TISSUE_WORKERS == result.tissue_workers
+        assert tuned_settings.INFERENCE_MAX_BATCH_SIZE == (
+            3 * tuned_settings.AUTOTUNE_SERVER_BATCH_MULTIPLE
+        )
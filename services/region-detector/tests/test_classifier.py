@@ -0,0 +1,75 @@
+"""Tests for the fused linear classifier head in src.classifier."""
+
+import joblib
+import numpy as np
+import pytest
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from src.classifier import Classifier, LinearHead
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(0)
+    x = rng.normal(loc=0.3, scale=2.0, size=(400, 32)).astype(np.float32)
+    y = (x[:, :4].sum(axis=1) + rng.normal(scale=0.5, size=400) > 1.2).astype(int)
+    return x, y
+
+
+def _load(tmp_path, clf):
+    path = tmp_path / "head.pkl"
+    joblib.dump(clf, path)
+    classifier = Classifier(model_path=str(path))
+    classifier.load()
+    return classifier
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda: LogisticRegression(max_iter=1000),
+        lambda: Pipeline([("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=1000))]),
+    ],
+    ids=["logreg", "scaler+logreg"],
+)
+def test_linear_heads_are_fused_with_predict_proba_parity(tmp_path, training_data, make):
+    x, y = training_data
+    clf = make().fit(x, y)
+    classifier = _load(tmp_path, clf)
+
+    assert classifier.fused
+    probs = classifier.predict_tumor_probability(x)
+    assert probs.shape == (len(x),)
+    np.testing.assert_allclose(probs, clf.predict_proba(x)[:, 1], atol=1e-6)
+
+
+def test_non_linear_head_falls_back_to_sklearn(tmp_path, training_data):
+    x, y = training_data
+    clf = DecisionTreeClassifier(max_depth=3, random_state=0).fit(x, y)
+    classifier = _load(tmp_path, clf)
+
+    assert not classifier.fused
+    np.testing.assert_array_equal(
+        classifier.predict_tumor_probability(x), clf.predict_proba(x)[:, 1]
+    )
+
+
+def test_multiclass_head_is_not_fused(training_data):
+    x, y = training_data
+    clf = LogisticRegression(max_iter=1000).fit(x, y + (x[:, 5] > 1).astype(int))
+    assert LinearHead.from_estimator(clf) is None
+
+
+def test_predict_batch_matches_array_output(tmp_path, training_data):
+    x, y = training_data
+    classifier = _load(tmp_path, LogisticRegression(max_iter=1000).fit(x, y))
+
+    results = classifier.predict_batch(x[:10], threshold=0.5)
+    probs = classifier.predict_tumor_probability(x[:10])
+    assert [r.tumor_probability for r in results] == probs.tolist()
+    assert [r.label for r in results] == ["Tumor" if p >= 0.5 else "Normal" for p in probs]
@@ -0,0 +1,112 @@
+"""Tests for multi-slide cohort analysis in src.cohort."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src import cohort, pipeline
+from src.cancellation import CancellationToken, JobCancelled
+from src.inference_server import InferenceServer
+
+from .fakes import MeanColourEmbedder, SyntheticCohort, SyntheticSlide, install_stub_models
+
+
+@pytest.fixture(scope="module")
+def slides(stained_slide):
+    return SyntheticCohort(
+        stained_slide,
+        SyntheticSlide(image_id="small", width=900, height=700, seed=1),
+        SyntheticSlide(image_id="tall", width=800, height=2400, seed=2),
+    )
+
+
+@pytest.fixture
+def installed(monkeypatch, slides):
+    slides.install(monkeypatch, pipeline, cohort)
+    install_stub_models(monkeypatch, pipeline)
+    return slides
+
+
+class TestRunCohort:
+    def test_rows_match_single_slide_runs(self, installed):
+        image_ids = list(installed.slides)
+        result = cohort.run_cohort(
+            "cohort-job", image_ids, slide_workers=3, tile_level=11, prescreen=False
+        )
+
+        table, meta = cohort.decode(installed.uploads[result.table_key])
+        assert table["image_id"].tolist() == image_ids
+        assert table["completed"].all()
+        assert meta["slides"] == 3 and meta["parameters"]["tile_level"] == 11
+
+        for row in table:
+            single = pipeline.run_analysis(
+                "single", str(row["image_id"]), tile_level=11, prescreen=False
+            )
+            assert row["total_tiles"] == single.summary.total_tiles
+            assert row["flagged_tiles"] == single.summary.flagged_tiles
+            assert row["tumor_area_percentage"] == pytest.approx(
+                single.summary.tumor_area_percentage, abs=1e-4
+            )
+
+        summary = json.loads(installed.uploads[result.summary_key])
+        assert summary["cohort"]["completed"] == 3
+        assert summary["cohort"]["total_tiles"] == int(table["total_tiles"].sum())
+        assert summary["slides_columnar_key"] == result.table_key
+        assert summary["timings"]["tiles_per_s"] > 0
+
+    def test_progress_is_one_stream(self, installed):
+        reports = []
+        cohort.run_cohort(
+            "cohort-progress", list(installed.slides), slide_workers=2, tile_level=10,
+            prescreen=False, progress_cb=lambda *args: reports.append(args),
+        )
+        done, total, msg, level = reports[-1]
+        assert done == total > 0
+        assert msg.startswith("[3/3 slides]")
+        assert level is None
+
+    def test_failed_slide_does_not_fail_cohort(self, installed):
+        result = cohort.run_cohort(
+            "cohort-missing", ["small", "missing"], tile_level=10, prescreen=False
+        )
+        assert [s.image_id for s in result.failed] == ["missing"]
+        table, _ = cohort.decode(installed.uploads[result.table_key])
+        assert table["completed"].tolist() == [True, False]
+
+    def test_cancel_stops_every_slide(self, installed):
+        token = CancellationToken()
+        token.cancel()
+        with pytest.raises(JobCancelled):
+            cohort.run_cohort(
+                "cohort-cancelled", list(installed.slides), tile_level=11,
+                prescreen=False, cancel_token=token,
+            )
+        assert not any("cohort-cancelled" in key for key in installed.uploads)
+
+    def test_slides_share_inference_batches(self, monkeypatch, installed):
+        server = InferenceServer(
+            MeanColourEmbedder().embed_batch, max_batch_size=64, max_wait_ms=200
+        ).start()
+        monkeypatch.setattr(pipeline, "_inference_server", server)
+        monkeypatch.setattr(pipeline.settings, "INFERENCE_SERVER_ENABLED", True)
+        try:
+            cohort.run_cohort(
+                "cohort-batched", list(installed.slides), slide_workers=3,
+                tile_level=12, batch_size=8, prescreen=False,
+            )
+        finally:
+            server.stop()
+        # Each slide submits at most 8 tiles at a time.
+        assert server.stats()["mean_batch_size"] > 8
+
+
+class TestCohortTable:
+    def test_long_image_ids_are_kept_whole(self):
+        image_ids = ["p" * 200 + "-a", "p" * 200 + "-b", "short"]
+        table = cohort.to_columnar([cohort.CohortSlide(image_id) for image_id in image_ids])
+
+        decoded, _ = cohort.decode(cohort.encode(table, {}))
+        assert decoded["image_id"].tolist() == image_ids
+        assert decoded.dtype["image_id"] == np.dtype("U202")
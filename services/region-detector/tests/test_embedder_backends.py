@@ -0,0 +1,110 @@
+"""Unit tests for the pluggable embedder inference backends."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+torch = pytest.importorskip("torch")
+
+from src.config import settings
+from src.embedder import Embedder
+from src.embedder_backends import _legacy_onnx_exporter, export_cache_path
+
+
+def _tiles(n=3, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), "RGB")
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EMBEDDER_PARITY_CHECK", False)
+    return tmp_path
+
+
+class TestEmbedderBackends:
+    def test_unknown_backend_is_rejected(self, tiny_backbone, cache_dir):
+        with pytest.raises(ValueError, match="EMBEDDER_BACKEND"):
+            Embedder(model_name=tiny_backbone, backend="tensorrt")
+
+    def test_torchscript_matches_eager(self, tiny_backbone, cache_dir):
+        eager = Embedder(model_name=tiny_backbone, backend="torch")
+        traced = Embedder(model_name=tiny_backbone, backend="torchscript")
+        images = _tiles()
+        expected = eager.embed_batch(images, batch_size=2)
+        actual = traced.embed_batch(images, batch_size=2)
+        assert actual.shape == (3, eager.embedding_dim)
+        np.testing.assert_allclose(actual, expected, atol=1e-4)
+        assert traced.check_parity() < 1e-4
+
+    def test_onnx_matches_eager(self, tiny_backbone, cache_dir):
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("onnx")
+        eager = Embedder(model_name=tiny_backbone, backend="torch")
+        exported = Embedder(model_name=tiny_backbone, backend="onnx")
+        images = _tiles(n=5)
+        np.testing.assert_allclose(
+            exported.embed_batch(images, batch_size=4),
+            eager.embed_batch(images, batch_size=4),
+            atol=1e-4,
+        )
+
+    def test_onnx_exporter_keyword_follows_torch_signature(self, monkeypatch):
+        def old_export(model, args, f, input_names=None, output_names=None,
+                       dynamic_axes=None, opset_version=None):
+            pass
+
+        def new_export(model, args, f, *, dynamo=True, **kwargs):
+            pass
+
+        monkeypatch.setattr(torch.onnx, "export", old_export)
+        assert _legacy_onnx_exporter() == {}
+        monkeypatch.setattr(torch.onnx, "export", new_export)
+        assert _legacy_onnx_exporter() == {"dynamo": False}
+
+    def test_export_is_cached_by_revision(self, tiny_backbone, cache_dir):
+        first = Embedder(model_name=tiny_backbone, backend="torchscript")
+        path = export_cache_path(first.model, tiny_backbone, "torchscript", str(cache_dir))
+        assert path.exists()
+        mtime = path.stat().st_mtime_ns
+
+        Embedder(model_name=tiny_backbone, backend="torchscript")
+        assert path.stat().st_mtime_ns == mtime
+        assert len(list(cache_dir.iterdir())) == 1
+
+
+class TestEmbedderPrecision:
+    def test_bf16_requires_torch_backend(self, tiny_backbone, cache_dir):
+        with pytest.raises(ValueError, match="bf16"):
+            Embedder(model_name=tiny_backbone, backend="torchscript", precision="bf16")
+
+    @pytest.mark.parametrize("backend,precision", [("torch", "bf16"), ("torch", "int8"), ("torchscript", "int8")])
+    def test_reduced_precision_tracks_fp32(self, tiny_backbone, cache_dir, backend, precision):
+        embedder = Embedder(model_name=tiny_backbone, backend=backend, precision=precision)
+        images = _tiles(n=4)
+        reduced = embedder.embed_batch(images, batch_size=4)
+        reference = embedder.embed_batch_reference(images)
+        cosine = np.sum(reduced * reference, axis=1) / (
+            np.linalg.norm(reduced, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        assert reduced.dtype == np.float32
+        assert cosine.min() > 0.99
+
+    def test_describe_and_fp32_fallback(self, tiny_backbone, cache_dir):
+        embedder = Embedder(model_name=tiny_backbone, backend="torch", precision="int8")
+        assert embedder.describe()["precision"] == "int8"
+
+        embedder.use_fp32()
+        assert embedder.describe() == {
+            "backbone": tiny_backbone,
+            "backend": "torch",
+            "precision": "fp32",
+        }
+        images = _tiles(n=2)
+        np.testing.assert_array_equal(
+            embedder.embed_batch(images), embedder.embed_batch_reference(images)
+        )
@@ -0,0 +1,141 @@
+"""Tests for the SSE progress broadcast hub in src.event_stream."""
+
+import asyncio
+import threading
+import time
+
+from src.event_stream import BackendNotifier, EventHub, format_sse
+
+
+def _collect(hub, job_id, publish, heartbeat_s=1.0):
+    """Run *publish(hub)* on a worker thread and gather the SSE chunks."""
+
+    async def consume():
+        subscription = hub.subscribe(job_id)
+        worker = threading.Thread(target=publish, args=(hub,))
+        worker.start()
+        chunks = [chunk async for chunk in hub.stream(subscription, heartbeat_s)]
+        worker.join()
+        return chunks
+
+    return asyncio.run(consume())
+
+
+def _events(chunks):
+    return [c for c in chunks if c.startswith("id:")]
+
+
+class TestEventHub:
+    def test_rapid_updates_are_coalesced_and_terminal_is_delivered(self):
+        def publish(hub):
+            for i in range(500):
+                hub.publish("j1", "progress", {"tiles_processed": i})
+            hub.publish("j1", "completed", {"tiles_processed": 500}, terminal=True)
+
+        hub = EventHub(min_interval_s=0.05)
+        events = _events(_collect(hub, "j1", publish))
+
+        assert len(events) < 50
+        assert events[-1].startswith(f"id: {500 + 1}\nevent: completed\n")
+        assert '"tiles_processed": 500' in events[-1]
+        assert hub.stats()["subscribers"] == 0
+
+    def test_late_subscriber_starts_from_latest_event(self):
+        hub = EventHub(min_interval_s=0.0)
+        hub.publish("j1", "progress", {"tiles_processed": 7})
+
+        def finish(hub):
+            hub.publish("j1", "failed", {"message": "boom"}, terminal=True)
+
+        events = _events(_collect(hub, "j1", finish))
+        assert '"tiles_processed": 7' in events[0]
+        assert "event: failed" in events[-1]
+
+    def test_idle_stream_sends_heartbeats(self):
+        def finish_later(hub):
+            threading.Event().wait(0.15)
+            hub.publish("j1", "completed", {}, terminal=True)
+
+        chunks = _collect(EventHub(), "j1", finish_later, heartbeat_s=0.05)
+        assert chunks[0].startswith("retry:")
+        assert ": keep-alive\n\n" in chunks
+
+    def test_other_jobs_are_not_delivered(self):
+        def publish(hub):
+            hub.publish("j2", "progress", {"tiles_processed": 1})
+            hub.publish("j1", "completed", {}, terminal=True)
+
+        events = _events(_collect(EventHub(min_interval_s=0.0), "j1", publish))
+        assert len(events) == 1
+
+    def test_retention_is_bounded(self):
+        hub = EventHub(max_retained=2)
+        for job in ("a", "b", "c"):
+            hub.publish(job, "progress", {})
+        assert hub.latest("a") is None
+        assert hub.latest("c") is not None
+
+    def test_format_sse(self):
+        event = EventHub().make_event("progress", {"a": 1})
+        assert format_sse(event) == 'id: 1\nevent: progress\ndata: {"a": 1}\n\n'
+
+
+class TestBackendNotifier:
+    def test_submit_does_not_wait_for_a_slow_backend(self):
+        release = threading.Event()
+        sent = []
+
+        def post(job_id, payload):
+            release.wait(5)
+            sent.append((job_id, payload["n"]))
+
+        notifier = BackendNotifier(post)
+        start = time.perf_counter()
+        for i in range(100):
+            notifier.submit("j", {"n": i}, coalesce=True)
+        assert time.perf_counter() - start < 0.5
+        release.set()
+        assert notifier.flush(timeout=5)
+        # At most the first update got in flight; the rest collapse into the latest.
+        assert sent[-1] == ("j", 99) and len(sent) <= 2
+        assert notifier.coalesced == 100 - len(sent)
+
+    def test_progress_never_overtakes_or_replaces_other_events(self):
+        release = threading.Event()
+        sent = []
+
+        def post(job_id, payload):
+            release.wait(5)
+            sent.append((job_id, payload["status"]))
+
+        notifier = BackendNotifier(post)
+        notifier.submit("busy", {"status": "BLOCKER"})
+        notifier.submit("a", {"status": "PROCESSING"}, coalesce=True)
+        notifier.submit("b", {"status": "PROCESSING"}, coalesce=True)
+        notifier.submit("a", {"status": "COMPLETED"})
+        notifier.submit("a", {"status": "PROCESSING"}, coalesce=True)
+        notifier.submit("b", {"status": "PROCESSING"}, coalesce=True)
+        release.set()
+
+        assert notifier.flush(timeout=5)
+        assert sent == [
+            ("busy", "BLOCKER"),
+            ("a", "PROCESSING"),
+            ("b", "PROCESSING"),
+            ("a", "COMPLETED"),
+            ("a", "PROCESSING"),
+        ]
+
+    def test_failed_post_does_not_stop_later_events(self):
+        sent = []
+
+        def post(job_id, payload):
+            if payload["n"] == 0:
+                raise OSError("backend down")
+            sent.append(payload["n"])
+
+        notifier = BackendNotifier(post)
+        notifier.submit("j", {"n": 0})
+        notifier.submit("j", {"n": 1})
+        assert notifier.flush(timeout=5)
+        assert sent == [1]
@@ -1,9 +1,21 @@
 """Unit tests for the heatmap generator."""
 
+import matplotlib
 import numpy as np
 from PIL import Image
 
-from src.heatmap import generate_heatmap, heatmap_to_png_bytes
+from src import heatmap
+from src.heatmap import TileCell, TileCellArrays, colormap_lut, generate_heatmap, heatmap_to_png_bytes
+
+
+def _grid_cells(width, height, cell_px, probs):
+    cells = []
+    for row, y in enumerate(range(0, height, cell_px)):
+        for col, x in enumerate(range(0, width, cell_px)):
+            cells.append(TileCell(
+                x, y, min(cell_px, width - x), min(cell_px, height - y), float(probs[row, col])
+            ))
+    return cells
 
 
 class TestHeatmap:
@@ -77,3 +89,71 @@ class TestHeatmap:
         img = generate_heatmap(grid, upscale=False, colormap="RdYlGn_r")
         r, g, b, a = img.getpixel((0, 0))
         assert g > r
+
+
+class TestVectorizedHeatmap:
+    """LUT colouring and aligned downscaled rendering."""
+
+    def test_lut_matches_per_cell_colormap(self):
+        cmap = matplotlib.colormaps["RdYlGn_r"]
+        lut = colormap_lut("RdYlGn_r")
+        probs = np.linspace(0.0, 1.0, 1001)
+        img = np.asarray(generate_heatmap(probs[None, :]))
+        for idx, prob in enumerate(probs):
+            expected = [int(c * 255) for c in cmap(prob)[:3]]
+            assert img[0, idx, :3].tolist() == expected
+        assert lut.shape == (256, 3)
+
+    def test_pixel_accurate_cells_cover_exact_extents(self):
+        probs = np.array([[0.1, -1.0, 0.9], [0.5, 0.7, -1.0]])
+        cells = _grid_cells(250, 150, 100, probs)
+        img = np.asarray(generate_heatmap(
+            probs, image_width=250, image_height=150, tile_cells=cells, skipped_alpha=0
+        ))
+        assert img.shape == (150, 250, 4)
+        assert (img[:100, 100:200, 3] == 0).all()        # skipped cell
+        assert (img[100:, 200:, 3] == 0).all()           # skipped edge cell
+        assert (img[:100, :100] == img[0, 0]).all()
+        assert (img[100:, 100:200] == img[149, 199]).all()
+        assert not (img[0, 0] == img[0, 200]).all()
+
+    def test_cell_arrays_render_like_cells(self):
+        probs = np.array([[0.1, -1.0, 0.9], [0.5, 0.7, -1.0]])
+        cells = _grid_cells(250, 150, 100, probs)
+        arrays = TileCellArrays(
+            pixel_x=np.array([c.pixel_x for c in cells]),
+            pixel_y=np.array([c.pixel_y for c in cells]),
+            width=np.array([c.width for c in cells]),
+            height=np.array([c.height for c in cells]),
+            tumor_probability=np.array([c.tumor_probability for c in cells]),
+        )
+        kwargs = dict(image_width=250, image_height=150)
+        expected = np.asarray(generate_heatmap(probs, tile_cells=cells, **kwargs))
+        assert np.array_equal(np.asarray(generate_heatmap(probs, tile_cells=arrays, **kwargs)), expected)
+
+    def test_missing_cells_stay_transparent(self):
+        probs = np.array([[0.2, 0.8]])
+        cells = _grid_cells(200, 100, 100, probs)[:1]
+        img = np.asarray(generate_heatmap(
+            probs, image_width=200, image_height=100, tile_cells=cells
+        ))
+        assert (img[:, 100:, 3] == 0).all()
+        assert (img[:, :100, 3] == 160).all()
+
+    def test_aligned_downscaled_keeps_cell_boundaries(self):
+        probs = np.array([[0.0, 1.0, 0.0, 1.0]])
+        cells = _grid_cells(400, 100, 100, probs)
+        img = np.asarray(generate_heatmap(
+            probs, image_width=400, image_height=100, tile_cells=cells, output_scale=0.1
+        ))
+        assert img.shape == (10, 40, 4)
+        reds = img[0, :, 0] > img[0, :, 1]
+        assert reds.tolist() == [False] * 10 + [True] * 10 + [False] * 10 + [True] * 10
+
+    def test_large_images_render_downscaled(self, monkeypatch):
+        monkeypatch.setattr(heatmap, "MAX_FULLRES_PIXELS", 10_000)
+        monkeypatch.setattr(heatmap, "MAX_DOWNSCALED_PIXELS", 2_500)
+        probs = np.array([[0.3, 0.6], [0.9, -1.0]])
+        cells = _grid_cells(200, 200, 100, probs)
+        img = generate_heatmap(probs, image_width=200, image_height=200, tile_cells=cells)
+        assert img.size == (50, 50)
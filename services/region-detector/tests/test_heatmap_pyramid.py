@@ -0,0 +1,144 @@
+"""Unit tests for the heatmap DZI pyramid."""
+
+import io
+import json
+import math
+from xml.etree import ElementTree
+
+import numpy as np
+from PIL import Image
+
+from src.geometry import DZIShape, max_dzi_level, tile_rect_in_fullres
+from src.heatmap import TileCell, render_cells
+from src.heatmap_pyramid import build_heatmap_pyramid, deepest_heatmap_level
+
+
+def _grid(rows=4, cols=6, seed=0):
+    rng = np.random.default_rng(seed)
+    grid = rng.random((rows, cols))
+    grid[rng.random((rows, cols)) < 0.4] = -1.0
+    grid[0, :] = -1.0  # fully transparent top band
+    return grid
+
+
+def _build(grid, shape, tile_level, **kwargs):
+    uploads = {}
+
+    def upload(data, key, content_type):
+        uploads[key] = data
+
+    result = build_heatmap_pyramid(grid, shape, tile_level, "img/analysis/job", upload, **kwargs)
+    return result, uploads
+
+
+def _stitch(uploads, manifest, level, shape):
+    scale = 2 ** (max_dzi_level(shape) - level)
+    width = -(-shape.width // scale)
+    height = -(-shape.height // scale)
+    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+    prefix = "img/analysis/job/heatmap_files"
+    for key, data in uploads.items():
+        if not key.startswith(f"{prefix}/{level}/"):
+            continue
+        x, y = (int(v) for v in key.rsplit("/", 1)[1][:-4].split("_"))
+        tile = np.asarray(Image.open(io.BytesIO(data)))
+        ts = shape.tile_size
+        canvas[y * ts: y * ts + tile.shape[0], x * ts: x * ts + tile.shape[1]] = tile
+    return canvas
+
+
+class TestHeatmapPyramid:
+    def test_deepest_level(self):
+        assert deepest_heatmap_level(12, 256, 16) == 8
+        assert deepest_heatmap_level(12, 256, 256) == 12
+        assert deepest_heatmap_level(2, 256, 1) == 0
+
+    def test_descriptor_and_manifest(self):
+        shape = DZIShape(width=1500, height=1000, tile_size=64)
+        # Level 8 is 188×125 px: 3×2 tiles, one analysis cell each.
+        grid = np.array([[0.2, -1.0, 0.9], [-1.0, -1.0, 0.4]])
+        result, uploads = _build(grid, shape, tile_level=8, min_cell_px=64)
+
+        root = ElementTree.fromstring(uploads[result.dzi_key])
+        size = root.find("{http://schemas.microsoft.com/deepzoom/2008}Size")
+        # The descriptor stops at the deepest rendered level (3 below the slide's).
+        assert (size.attrib["Width"], size.attrib["Height"]) == ("188", "125")
+        assert root.attrib["TileSize"] == "64"
+
+        manifest = json.loads(uploads[result.manifest_key])
+        assert (manifest["slide_width"], manifest["slide_height"]) == (1500, 1000)
+        assert (manifest["width"], manifest["height"], manifest["level_offset"]) == (188, 125, 3)
+        assert manifest["max_level"] == result.max_level == 8
+        assert manifest["transparent_tiles"]["8"] == [[1, 0], [0, 1], [1, 1]]
+        tile_keys = [k for k in uploads if "/heatmap_files/" in k]
+        assert len(tile_keys) == result.tiles_uploaded
+        assert sum(manifest["level_tile_counts"].values()) == result.tiles_uploaded
+        transparent = manifest["transparent_tiles"]
+        assert sum(len(v) for v in transparent.values()) == result.tiles_skipped > 0
+        for level, coords in transparent.items():
+            for x, y in coords:
+                assert f"img/analysis/job/heatmap_files/{level}/{x}_{y}.png" not in uploads
+
+    def test_levels_align_with_pixel_accurate_render(self):
+        shape = DZIShape(width=1500, height=1000, tile_size=64)
+        tile_level = 8
+        grid = _grid()
+        result, uploads = _build(grid, shape, tile_level, min_cell_px=8)
+        manifest = json.loads(uploads[result.manifest_key])
+
+        max_level = max_dzi_level(shape)
+        cells = []
+        for y in range(grid.shape[0]):
+            for x in range(grid.shape[1]):
+                px, py, w, h = tile_rect_in_fullres(
+                    shape=shape, tile_level=tile_level, max_level=max_level, tile_x=x, tile_y=y
+                )
+                cells.append(TileCell(px, py, w, h, float(grid[y, x])))
+
+        for level in range(2, manifest["max_level"] + 1):
+            stitched = _stitch(uploads, manifest, level, shape)
+            expected = render_cells(
+                cells, shape.width, shape.height,
+                output_scale=2.0 ** (level - max_level), skipped_alpha=0,
+            )
+            assert stitched.shape == expected.shape
+            assert np.array_equal(stitched, expected), f"level {level} misaligned"
+
+    def test_descriptor_levels_are_all_served(self):
+        # Every tile a standard DZI viewer derives from the descriptor is either
+        # uploaded or listed as transparent (served by the shared tile).
+        shape = DZIShape(width=1500, height=1000, tile_size=64)
+        result, uploads = _build(_grid(), shape, tile_level=8, min_cell_px=8)
+        manifest = json.loads(uploads[result.manifest_key])
+
+        root = ElementTree.fromstring(uploads[result.dzi_key])
+        size = root.find("{http://schemas.microsoft.com/deepzoom/2008}Size")
+        descriptor = DZIShape(
+            width=int(size.attrib["Width"]), height=int(size.attrib["Height"]), tile_size=64
+        )
+        assert max_dzi_level(descriptor) == manifest["max_level"] == result.max_level
+        # The descriptor's levels have the slide pyramid's sizes.
+        scale = 2 ** manifest["level_offset"]
+        assert descriptor.width == -(-shape.width // scale)
+        assert descriptor.height == -(-shape.height // scale)
+
+        transparent = {
+            (int(level), x, y)
+            for level, coords in manifest["transparent_tiles"].items()
+            for x, y in coords
+        }
+        for level in range(max_dzi_level(descriptor) + 1):
+            level_scale = 2 ** (max_dzi_level(descriptor) - level)
+            cols = math.ceil(math.ceil(descriptor.width / level_scale) / 64)
+            rows = math.ceil(math.ceil(descriptor.height / level_scale) / 64)
+            for y in range(rows):
+                for x in range(cols):
+                    key = f"img/analysis/job/heatmap_files/{level}/{x}_{y}.png"
+                    assert (key in uploads) != ((level, x, y) in transparent)
+        assert not (
+            set(k.rsplit("/", 2)[1] for k in uploads if "/heatmap_files/" in k)
+            - {str(level) for level in range(result.max_level + 1)}
+        )
+
+        blank = np.asarray(Image.open(io.BytesIO(uploads[manifest["transparent_tile_key"]])))
+        assert blank.shape == (64, 64, 4) and not blank[..., 3].any()
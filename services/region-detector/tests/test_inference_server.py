@@ -0,0 +1,171 @@
+"""Unit tests for the cross-job micro-batching inference server."""
+
+import threading
+import time
+from contextlib import ExitStack
+
+import numpy as np
+import pytest
+
+from src.inference_server import InferenceServer
+
+
+class RecordingEmbedder:
+    """Embeds integer payloads as ``[value, value * 2]`` and records batches."""
+
+    def __init__(self, delay_event=None):
+        self.batches = []
+        self.delay_event = delay_event
+
+    def __call__(self, payloads):
+        if self.delay_event is not None:
+            self.delay_event.wait(timeout=5)
+        self.batches.append(list(payloads))
+        return np.array([[p, p * 2] for p in payloads], dtype=np.float32)
+
+
+def _wait_for_sessions(server, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while server.stats()["sessions"] < count:
+        assert time.monotonic() < deadline, "sessions did not open in time"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def make(embed_fn, **kwargs):
+        server = InferenceServer(embed_fn, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+class TestInferenceServer:
+    def test_results_are_routed_back_in_order(self, server_factory):
+        server = server_factory(RecordingEmbedder(), max_batch_size=4, max_wait_ms=1)
+        out = server.embed(list(range(10)), job_id="a")
+        np.testing.assert_array_equal(out[:, 0], np.arange(10))
+        np.testing.assert_array_equal(out[:, 1], np.arange(10) * 2)
+
+    def test_concurrent_jobs_share_batches(self, server_factory):
+        embedder = RecordingEmbedder()
+        server = server_factory(embedder, max_batch_size=8, max_wait_ms=200)
+
+        futures = [
+            server.submit([100 * job + i for i in range(4)], job_id=f"job-{job}")
+            for job in range(2)
+        ]
+        results = [f.result(timeout=5) for f in futures]
+
+        np.testing.assert_array_equal(results[0][:, 0], [0, 1, 2, 3])
+        np.testing.assert_array_equal(results[1][:, 0], [100, 101, 102, 103])
+        assert len(embedder.batches) == 1
+        assert sorted(embedder.batches[0]) == [0, 1, 2, 3, 100, 101, 102, 103]
+
+    def test_small_job_is_not_starved_by_large_job(self, server_factory):
+        gate = threading.Event()
+        embedder = RecordingEmbedder(delay_event=gate)
+        server = server_factory(embedder, max_batch_size=4, max_wait_ms=0)
+
+        # Block the worker on a first batch so both jobs queue up behind it.
+        first = server.submit([-1], job_id="warmup")
+        big = server.submit(list(range(100)), job_id="big")
+        small = server.submit([1000, 1001], job_id="small")
+        gate.set()
+
+        small.result(timeout=5)
+        first.result(timeout=5)
+        big.result(timeout=5)
+        # Round-robin filling puts the small job's tiles in the first couple
+        # of batches rather than behind the big job's 25 batches.
+        small_batches = [i for i, b in enumerate(embedder.batches) if {1000, 1001} & set(b)]
+        assert max(small_batches) <= 1
+        assert server.stats()["items"] == 103
+
+    def test_single_session_does_not_wait_for_a_full_batch(self, server_factory):
+        embedder = RecordingEmbedder()
+        server = server_factory(embedder, max_batch_size=32, max_wait_ms=2000)
+
+        with server.session("a"):
+            start = time.perf_counter()
+            server.embed(list(range(16)), job_id="a")
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 1.0
+        assert embedder.batches == [list(range(16))]
+        assert server.stats()["early_batches"] == 1
+
+    def test_sessions_wait_for_every_job_to_contribute(self, server_factory):
+        embedder = RecordingEmbedder()
+        server = server_factory(embedder, max_batch_size=32, max_wait_ms=2000)
+        second_open = threading.Event()
+        results = {}
+
+        def job(name, values):
+            with server.session(name):
+                second_open.wait(timeout=5)
+                if name == "b":
+                    time.sleep(0.1)  # "a" has queued by now; the batch waits for "b"
+                results[name] = server.embed(values, job_id=name)
+
+        threads = [
+            threading.Thread(target=job, args=("a", [1, 2, 3])),
+            threading.Thread(target=job, args=("b", [10, 11])),
+        ]
+        for thread in threads:
+            thread.start()
+        _wait_for_sessions(server, 2)
+        second_open.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(embedder.batches) == 1
+        assert sorted(embedder.batches[0]) == [1, 2, 3, 10, 11]
+        np.testing.assert_array_equal(results["b"][:, 0], [10, 11])
+        assert server.stats()["sessions"] == 0
+
+    def test_closing_a_session_releases_the_waiting_batch(self, server_factory):
+        embedder = RecordingEmbedder()
+        server = server_factory(embedder, max_batch_size=32, max_wait_ms=2000)
+
+        with server.session("a"), ExitStack() as idle:
+            idle.enter_context(server.session("idle"))
+            future = server.submit([1, 2], job_id="a")
+            time.sleep(0.05)
+            assert not future.done()  # still waiting for "idle" to contribute
+            idle.close()
+            future.result(timeout=1)
+
+    def test_requests_outside_sessions_do_not_stand_in_for_a_session(self, server_factory):
+        embedder = RecordingEmbedder()
+        server = server_factory(embedder, max_batch_size=32, max_wait_ms=300)
+
+        with server.session("a"), server.session("b"):
+            server.submit([1], job_id="a")
+            server.submit([2], job_id="outsider")
+            server.submit([3], job_id="outsider")
+            time.sleep(0.1)
+            assert embedder.batches == []  # "b" has not queued anything yet
+            server.embed([4], job_id="b")
+
+        assert sorted(embedder.batches[0]) == [1, 2, 3, 4]
+        assert server.stats()["early_batches"] == 1
+
+    def test_embed_errors_are_forwarded(self, server_factory):
+        def boom(payloads):
+            raise RuntimeError("model exploded")
+
+        server = server_factory(boom, max_batch_size=4, max_wait_ms=0)
+        with pytest.raises(RuntimeError, match="model exploded"):
+            server.embed([1, 2, 3], job_id="a")
+
+    def test_submit_after_stop_is_rejected(self):
+        server = InferenceServer(RecordingEmbedder()).start()
+        server.stop()
+        with pytest.raises(RuntimeError, match="not running"):
+            server.submit([1], job_id="a")
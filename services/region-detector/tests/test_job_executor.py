@@ -0,0 +1,168 @@
+"""Unit tests for the bounded, priority-ordered job executor."""
+
+import threading
+import time
+
+import pytest
+
+from src.cancellation import CancellationToken, JobPreempted
+from src.job_executor import JobExecutor, estimate_job_memory_mb
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.005)
+    raise AssertionError("condition not met in time")
+
+
+class Blocker:
+    """Job body that records start order and blocks until released."""
+
+    def __init__(self, started):
+        self.started = started
+        self.release = threading.Event()
+
+    def __call__(self, name):
+        def run():
+            self.started.append(name)
+            self.release.wait(timeout=5)
+
+        return run
+
+
+@pytest.fixture
+def executor_factory():
+    executors = []
+
+    def make(**kwargs):
+        executor = JobExecutor(**kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown(wait=False)
+
+
+class TestJobExecutor:
+    def test_limits_concurrency_and_reports_queue_position(self, executor_factory):
+        started = []
+        blocker = Blocker(started)
+        executor = executor_factory(max_concurrent=1, memory_budget_mb=1e9)
+
+        for name in ("a", "b", "c"):
+            executor.submit(name, blocker(name))
+        _wait_for(lambda: started == ["a"])
+
+        assert executor.queue_position("a") is None
+        assert executor.queue_position("b") == 1
+        assert executor.queue_position("c") == 2
+        assert executor.stats()["running"] == 1
+
+        blocker.release.set()
+        _wait_for(lambda: started == ["a", "b", "c"])
+
+    def test_higher_priority_jumps_the_queue(self, executor_factory):
+        started = []
+        blocker = Blocker(started)
+        executor = executor_factory(max_concurrent=1, memory_budget_mb=1e9)
+
+        executor.submit("first", blocker("first"))
+        _wait_for(lambda: started == ["first"])
+        executor.submit("low", blocker("low"), priority=0)
+        executor.submit("high", blocker("high"), priority=10)
+        assert executor.queue_position("high") == 1
+
+        blocker.release.set()
+        _wait_for(lambda: len(started) == 3)
+        assert started == ["first", "high", "low"]
+
+    def test_memory_admission_holds_back_jobs_over_budget(self, executor_factory):
+        started = []
+        blocker = Blocker(started)
+        executor = executor_factory(max_concurrent=4, memory_budget_mb=1000)
+
+        executor.submit("a", blocker("a"), memory_mb=600)
+        executor.submit("b", blocker("b"), memory_mb=600)
+        _wait_for(lambda: started == ["a"])
+        time.sleep(0.05)
+        assert started == ["a"]
+        assert executor.queue_position("b") == 1
+
+        blocker.release.set()
+        _wait_for(lambda: started == ["a", "b"])
+
+    def test_oversized_job_runs_when_idle(self, executor_factory):
+        done = threading.Event()
+        executor = executor_factory(max_concurrent=2, memory_budget_mb=100)
+        executor.submit("huge", done.set, memory_mb=10_000)
+        assert done.wait(timeout=5)
+
+    def test_memory_estimate_grows_with_tiles(self):
+        assert estimate_job_memory_mb(100_000) > estimate_job_memory_mb(100) > 0
+        assert estimate_job_memory_mb(None) == estimate_job_memory_mb(0)
+
+
+class TestPreemptionAndCancel:
+    def test_higher_priority_preempts_and_low_resumes(self, executor_factory):
+        started = []
+        token = CancellationToken()
+        high_release = threading.Event()
+        executor = executor_factory(max_concurrent=1, memory_budget_mb=1e9)
+
+        def low():
+            started.append("low")
+            token.clear_preemption()
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if token.preemption_requested:
+                    raise JobPreempted()
+                if started.count("low") > 1:
+                    return
+                time.sleep(0.005)
+
+        def high():
+            started.append("high")
+            high_release.wait(timeout=5)
+
+        executor.submit("low", low, priority=0, on_preempt=token.request_preemption)
+        _wait_for(lambda: started == ["low"])
+        executor.submit("high", high, priority=5)
+
+        _wait_for(lambda: started == ["low", "high"])
+        assert executor.queue_position("low") == 1
+        high_release.set()
+        _wait_for(lambda: started == ["low", "high", "low"])
+        _wait_for(lambda: executor.stats()["running"] == 0)
+        assert executor.stats()["preemptions"] == 1
+
+    def test_equal_priority_does_not_preempt(self, executor_factory):
+        started = []
+        blocker = Blocker(started)
+        token = CancellationToken()
+        executor = executor_factory(max_concurrent=1, memory_budget_mb=1e9)
+
+        executor.submit("a", blocker("a"), on_preempt=token.request_preemption)
+        _wait_for(lambda: started == ["a"])
+        executor.submit("b", blocker("b"))
+        assert not token.preemption_requested
+        blocker.release.set()
+
+    def test_cancel_removes_queued_job(self, executor_factory):
+        started = []
+        blocker = Blocker(started)
+        executor = executor_factory(max_concurrent=1, memory_budget_mb=1e9)
+
+        executor.submit("a", blocker("a"))
+        executor.submit("b", blocker("b"))
+        executor.submit("c", blocker("c"))
+        _wait_for(lambda: started == ["a"])
+
+        assert executor.cancel("b") is True
+        assert executor.cancel("a") is False
+        assert executor.queue_position("c") == 1
+        blocker.release.set()
+        _wait_for(lambda: started == ["a", "c"])
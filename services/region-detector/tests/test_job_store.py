@@ -0,0 +1,66 @@
+"""Unit tests for the SQLite job store."""
+
+from src.job_store import JobStore
+
+
+def _record(job_id, status="accepted", **extra):
+    return {
+        "job_id": job_id,
+        "image_id": "img-1",
+        "status": status,
+        "tile_level": 12,
+        "threshold": 0.5,
+        "request_json": {"image_id": "img-1", "tile_level": 12},
+        **extra,
+    }
+
+
+class TestJobStore:
+    def test_save_and_get_roundtrip(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.save(_record("a", priority=3))
+        record = store.get("a")
+        assert record["status"] == "accepted"
+        assert record["priority"] == 3
+        assert record["request"] == {"image_id": "img-1", "tile_level": 12}
+        assert store.get("missing") is None
+
+    def test_updates_preserve_created_at(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.save(_record("a"))
+        created = store.get("a")["created_at"]
+        store.save(_record("a", status="completed", summary_key="img-1/summary.json"))
+        record = store.get("a")
+        assert record["created_at"] == created
+        assert record["status"] == "completed"
+        assert record["summary_key"] == "img-1/summary.json"
+
+    def test_state_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "jobs.sqlite3")
+        store = JobStore(path)
+        store.save(_record("a", status="processing", tiles_processed=40, total_tiles=100))
+        store.close()
+
+        reopened = JobStore(path)
+        assert [r["job_id"] for r in reopened.unfinished()] == ["a"]
+        assert reopened.get("a")["tiles_processed"] == 40
+
+    def test_ttl_evicts_only_finished_jobs(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.save(_record("done", status="completed"))
+        store.save(_record("failed", status="failed"))
+        store.save(_record("running", status="processing"))
+
+        assert store.evict_expired(ttl_seconds=3600) == 0
+        assert store.evict_expired(ttl_seconds=3600, now=store.get("done")["updated_at"] + 7200) == 2
+        assert store.get("done") is None
+        assert store.get("running") is not None
+
+    def test_cancelled_jobs_are_not_resumed(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.save(_record("a", status="cancelled"))
+        store.save(_record("b"))
+        assert [r["job_id"] for r in store.unfinished()] == ["b"]
+        assert store.delete("a") is True
+        assert store.delete("a") is False
+        assert store.get("a") is None
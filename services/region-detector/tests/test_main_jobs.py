@@ -0,0 +1,456 @@
+"""API tests for job submission, queueing and persistence in src.main."""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from src import main
+from src.event_stream import EventHub
+from src.job_executor import JobExecutor
+from src.job_store import JobStore
+from src.results_cache import DecodedCache
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.005)
+    raise AssertionError("condition not met in time")
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """TestClient with an isolated store/executor and a stubbed pipeline."""
+    release = threading.Event()
+
+    def fake_run_analysis(job_id, image_id, progress_cb=None, cancel_token=None, **kwargs):
+        progress_cb(0, 10, "Analysing tiles", 12)
+        deadline = time.monotonic() + 5
+        while not release.wait(timeout=0.01) and time.monotonic() < deadline:
+            cancel_token.raise_if_cancelled()
+        return SimpleNamespace(
+            image_id=image_id,
+            tile_level=12,
+            summary_key=f"{image_id}/analysis/{job_id}/summary.json",
+            results_key=f"{image_id}/analysis/{job_id}/tile_predictions.json",
+            heatmap_key=f"{image_id}/analysis/{job_id}/heatmap_level_12.png",
+            summary=SimpleNamespace(tumor_area_percentage=1.0, aggregate_score=0.1, max_score=0.9),
+        )
+
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    executor = JobExecutor(max_concurrent=1, memory_budget_mb=1e9)
+    monkeypatch.setattr(main, "_store", store)
+    monkeypatch.setattr(main, "_executor", executor)
+    monkeypatch.setattr(main, "_jobs", {})
+    monkeypatch.setattr(main, "_events", EventHub(min_interval_s=0.01))
+    monkeypatch.setattr(main, "_prediction_indexes", DecodedCache(max_bytes=64 * 2**20))
+    monkeypatch.setattr(main, "_prediction_summaries", DecodedCache(max_bytes=2**20))
+    monkeypatch.setattr(main, "run_analysis", fake_run_analysis)
+    monkeypatch.setattr(main, "_estimate_tile_count", lambda image_id, level: 100)
+    monkeypatch.setattr(main.settings, "BACKEND_INTERNAL_BASE_URL", None)
+
+    client = TestClient(main.app)
+    client.release = release
+    client.store = store
+    yield client
+    release.set()
+    executor.shutdown(wait=True)
+
+
+class TestJobQueueApi:
+    def test_second_job_reports_queue_position(self, api):
+        first = api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"}).json()
+        second = api.post("/jobs/analyze", json={"image_id": "img-2", "job_id": "j2"}).json()
+        assert first["status"] == second["status"] == "accepted"
+
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "processing")
+        status = api.get("/jobs/j2/status").json()
+        assert status["status"] == "accepted"
+        assert status["queue_position"] == 1
+
+    def test_finished_job_is_served_from_store(self, api):
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"})
+        api.release.set()
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "completed")
+
+        assert "j1" not in main._jobs
+        record = api.store.get("j1")
+        assert record["summary_key"] == "img-1/analysis/j1/summary.json"
+        assert api.get("/jobs/j1/status").json()["tiles_processed"] == 0
+
+    def test_unknown_job_is_404(self, api):
+        assert api.get("/jobs/nope/status").status_code == 404
+
+    def test_progress_does_not_wait_for_the_backend(self, monkeypatch):
+        from src.event_stream import BackendNotifier
+
+        release = threading.Event()
+        posted = []
+        monkeypatch.setattr(main.settings, "BACKEND_INTERNAL_BASE_URL", "http://backend")
+        monkeypatch.setattr(main, "_store", SimpleNamespace(save=lambda record: None))
+        monkeypatch.setattr(
+            main, "_notifier",
+            BackendNotifier(lambda job_id, payload: (release.wait(5), posted.append(payload))),
+        )
+        state = main.JobState("slow", "img-1", 12, 0.5, None)
+
+        start = time.perf_counter()
+        for i in range(50):
+            state.update_progress(i, 50, "Analysing tiles", 12)
+        assert time.perf_counter() - start < 1.0
+        release.set()
+        assert main._notifier.flush(timeout=5)
+        assert posted[-1]["tiles_processed"] == 49 and len(posted) <= 2
+
+    @pytest.mark.parametrize("extra", [
+        {"tile_levels": []},
+        {"tile_levels": [11, 11]},
+        {"tile_levels": [11, 12], "tile_level": 12},
+        {"tile_levels": [11, 12], "hierarchical": True},
+    ])
+    def test_invalid_tile_levels_are_422(self, api, extra):
+        response = api.post("/jobs/analyze", json={"image_id": "img-1", **extra})
+        assert response.status_code == 422
+
+
+class TestBatchApi:
+    def test_cohort_job_runs_every_slide_as_one_job(self, api, monkeypatch):
+        calls = []
+
+        def fake_run_cohort(job_id, image_ids, slide_workers, progress_cb, cancel_token, **kwargs):
+            calls.append((image_ids, slide_workers, kwargs["tile_level"]))
+            progress_cb(3, 6, "[1/2 slides] img-1: Complete", None)
+            return SimpleNamespace(
+                summary_key=f"cohorts/{job_id}/cohort_summary.json",
+                slides=[object(), object()],
+                failed=[],
+            )
+
+        monkeypatch.setattr(main, "run_cohort", fake_run_cohort)
+        body = api.post(
+            "/jobs/analyze-batch",
+            json={"job_id": "c1", "image_ids": ["img-1", "img-2"], "tile_level": 11},
+        ).json()
+        assert body["status"] == "accepted"
+
+        _wait_for(lambda: api.get("/jobs/c1/status").json()["status"] == "completed")
+        status = api.get("/jobs/c1/status").json()
+        assert status["image_id"] == "cohort:2"
+        assert status["message"] == "Cohort complete: 2/2 slides analysed"
+        assert calls == [(["img-1", "img-2"], main.settings.COHORT_SLIDE_WORKERS, 11)]
+        assert api.store.get("c1")["summary_key"] == "cohorts/c1/cohort_summary.json"
+
+    @pytest.mark.parametrize("image_ids", [[], ["a", "a"]])
+    def test_invalid_slide_lists_are_422(self, api, image_ids):
+        response = api.post("/jobs/analyze-batch", json={"image_ids": image_ids})
+        assert response.status_code == 422
+
+
+class TestPredictionsApi:
+    @pytest.fixture
+    def finished(self, api, monkeypatch, stained_slide):
+        from src import pipeline
+
+        from .fakes import install_stub_models
+
+        slide = stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        result = pipeline.run_analysis("done", slide.image_id, tile_level=12)
+        api.store.save({
+            "job_id": "done",
+            "image_id": slide.image_id,
+            "status": "completed",
+            "summary_key": result.summary_key,
+            "results_key": result.results_key,
+        })
+        monkeypatch.setattr(main, "download_bytes", lambda key: slide.uploads[key])
+        monkeypatch.setattr(main, "download_json", lambda key: json.loads(slide.uploads[key]))
+        return slide
+
+    def test_pages_cover_all_tiles(self, api, finished):
+        first = api.get("/jobs/done/predictions", params={"page_size": 40}).json()
+        last = api.get("/jobs/done/predictions", params={"page_size": 40, "page": 3}).json()
+
+        assert first["total"] == 96 and first["pages"] == 3
+        assert len(first["predictions"]) == 40
+        assert len(last["predictions"]) == 16
+        assert first["predictions"][0]["tile_level"] == 12
+
+    def test_bbox_at_level_selects_viewport(self, api, finished):
+        # Level 8 is 1/16 scale: this box is full-res (0..512, 0..256),
+        # i.e. level-12 tiles x 0-1, y 0.
+        body = api.get(
+            "/jobs/done/predictions", params={"bbox": "0,0,32,16", "level": 8}
+        ).json()
+        assert [(p["tile_x"], p["tile_y"]) for p in body["predictions"]] == [(0, 0), (1, 0)]
+
+    def test_tissue_only(self, api, finished):
+        body = api.get("/jobs/done/predictions", params={"tissue_only": True}).json()
+        assert body["total"] == 41
+        assert all(p["is_tissue"] for p in body["predictions"])
+
+    def test_index_is_decoded_once_per_artifact(self, api, finished, monkeypatch):
+        fetched = []
+        monkeypatch.setattr(
+            main, "download_bytes", lambda key: fetched.append(key) or finished.uploads[key]
+        )
+        for page in (1, 2, 3):
+            api.get("/jobs/done/predictions", params={"page_size": 40, "page": page})
+        assert len(fetched) == 1
+        api.get("/jobs/done/predictions", params={"tissue_only": True})
+        assert len(fetched) == 2 and fetched[0] != fetched[1]
+
+        stats = main._prediction_indexes.stats()
+        assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 2, 2)
+
+        api.delete("/jobs/done")
+        assert main._prediction_indexes.stats()["entries"] == 0
+
+    def test_results_without_predictions(self, api, finished):
+        body = api.get("/jobs/done/results", params={"include_predictions": False}).json()
+        assert "tile_predictions" not in body
+        assert body["summary"]["tissue_tiles"] == 41
+
+    def test_bad_bbox_is_422(self, api, finished):
+        assert api.get("/jobs/done/predictions", params={"bbox": "1,2,3"}).status_code == 422
+        for bbox in ("nan,0,10,10", "0,0,inf,10", "-inf,0,10,10"):
+            assert api.get("/jobs/done/predictions", params={"bbox": bbox}).status_code == 422
+
+    def test_summary_is_downloaded_once_per_level(self, api, finished, monkeypatch):
+        fetched = []
+        monkeypatch.setattr(
+            main, "download_json", lambda key: fetched.append(key) or json.loads(finished.uploads[key])
+        )
+        for page in (1, 2):
+            api.get("/jobs/done/predictions", params={"page_size": 40, "page": page})
+        api.get("/jobs/done/predictions", params={"tissue_only": True})
+        assert fetched == [api.store.get("done")["summary_key"]]
+
+    def test_other_tile_level_of_single_level_job_is_422(self, api, finished):
+        response = api.get("/jobs/done/predictions", params={"tile_level": 11})
+        assert response.status_code == 422
+
+
+class TestMultiLevelApi:
+    @pytest.fixture
+    def finished(self, api, monkeypatch, stained_slide):
+        from src import pipeline
+
+        from .fakes import install_stub_models
+
+        slide = stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        calls = []
+
+        def run_multilevel(**kwargs):
+            calls.append(kwargs)
+            return pipeline.run_multilevel_analysis(**kwargs)
+
+        monkeypatch.setattr(main, "run_multilevel_analysis", run_multilevel)
+        monkeypatch.setattr(main, "download_bytes", lambda key: slide.uploads[key])
+        monkeypatch.setattr(main, "download_json", lambda key: json.loads(slide.uploads[key]))
+        api.post("/jobs/analyze", json={"image_id": slide.image_id, "job_id": "ml", "tile_levels": [12, 11]})
+        _wait_for(lambda: api.get("/jobs/ml/status").json()["status"] == "completed", timeout=30)
+        assert calls[0]["tile_levels"] == [12, 11]
+        return slide
+
+    def test_results_list_every_level(self, api, finished):
+        body = api.get("/jobs/ml/results").json()
+
+        assert body["tile_levels"] == [11, 12]
+        assert body["summary_key"] == f"{finished.image_id}/analysis/ml/summary.json"
+        assert api.get("/jobs/ml/status").json()["tile_level"] == 12
+        for level, count in (("11", 24), ("12", 96)):
+            entry = body["levels"][level]
+            assert entry["summary"]["total_tiles"] == count
+            assert len(entry["tile_predictions"]) == count
+
+    def test_predictions_per_level(self, api, finished):
+        default = api.get("/jobs/ml/predictions").json()
+        coarse = api.get("/jobs/ml/predictions", params={"tile_level": 11}).json()
+
+        assert default["tile_level"] == 12 and default["total"] == 96
+        assert coarse["tile_level"] == 11 and coarse["total"] == 24
+        assert api.get("/jobs/ml/predictions", params={"tile_level": 10}).status_code == 422
+
+
+class TestResultsCaching:
+    @pytest.fixture
+    def completed(self, api, monkeypatch):
+        from src.results_cache import ResultsCache
+
+        api.store.save({
+            "job_id": "done",
+            "image_id": "img",
+            "status": "completed",
+            "summary_key": "img/summary.json",
+            "results_key": "img/tile_predictions.json",
+        })
+        artifacts = {
+            "img/summary.json": {"image_id": "img", "summary": {"tissue_tiles": 3}},
+            "img/tile_predictions.json": [{"tile_x": i, "label": "Normal"} for i in range(200)],
+        }
+        calls = []
+
+        def fake_download_json(key):
+            calls.append(key)
+            return artifacts[key]
+
+        monkeypatch.setattr(main, "download_json", fake_download_json)
+        monkeypatch.setattr(
+            main, "_results_cache", ResultsCache(max_bytes=1_000_000, compress_min_bytes=100)
+        )
+        return calls
+
+    def test_repeat_requests_hit_cache(self, api, completed):
+        first = api.get("/jobs/done/results")
+        second = api.get("/jobs/done/results")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert len(first.json()["tile_predictions"]) == 200
+        assert len(completed) == 2  # summary + predictions, downloaded once
+        stats = api.get("/health").json()["results_cache"]
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_if_none_match_returns_304(self, api, completed):
+        first = api.get("/jobs/done/results", headers={"Accept-Encoding": "gzip"})
+        assert first.headers["content-encoding"] == "gzip"
+        etag = first.headers["etag"]
+
+        again = api.get(
+            "/jobs/done/results", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+        )
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+        assert again.content == b""
+
+    def test_identity_when_client_does_not_accept_compression(self, api, completed):
+        resp = api.get("/jobs/done/results", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in resp.headers
+        assert resp.json()["summary"]["tissue_tiles"] == 3
+
+
+def _sse_events(resp):
+    events = []
+    for block in resp.text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestEventStream:
+    def test_streams_progress_until_completion(self, api):
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"})
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "processing")
+        threading.Timer(0.2, api.release.set).start()
+
+        resp = api.get("/jobs/j1/events")
+
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(resp)
+        assert events[0] == ("progress", {
+            "status": "processing",
+            "image_id": "img-1",
+            "tile_level": 12,
+            "tiles_processed": 0,
+            "total_tiles": 10,
+            "message": "Analysing tiles",
+        })
+        assert events[-1][0] == "completed"
+        assert events[-1][1]["status"] == "completed"
+
+    def test_finished_job_sends_single_terminal_event(self, api):
+        api.store.save({"job_id": "old", "image_id": "img", "status": "failed", "message": "x"})
+
+        events = _sse_events(api.get("/jobs/old/events"))
+
+        assert [name for name, _ in events] == ["failed"]
+
+    def test_unknown_job_is_404(self, api):
+        assert api.get("/jobs/nope/events").status_code == 404
+
+
+class TestCancelApi:
+    def test_cancel_queued_job(self, api):
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"})
+        api.post("/jobs/analyze", json={"image_id": "img-2", "job_id": "j2"})
+
+        resp = api.delete("/jobs/j2")
+
+        assert resp.json() == {"job_id": "j2", "status": "cancelled"}
+        assert api.get("/jobs/j2/status").json()["status"] == "cancelled"
+        assert api.get("/jobs/j2/results").status_code == 409
+
+    def test_cancel_running_job(self, api):
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"})
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "processing")
+
+        resp = api.delete("/jobs/j1")
+
+        assert resp.status_code == 202
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "cancelled")
+        assert api.store.get("j1")["status"] == "cancelled"
+        assert "j1" not in main._jobs
+
+    def test_delete_finished_job_forgets_it(self, api):
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "j1"})
+        api.release.set()
+        _wait_for(lambda: api.get("/jobs/j1/status").json()["status"] == "completed")
+
+        assert api.delete("/jobs/j1").json()["status"] == "deleted"
+        assert api.get("/jobs/j1/status").status_code == 404
+
+    def test_high_priority_job_preempts_and_low_resumes(self, api, monkeypatch):
+        from src.cancellation import JobPreempted
+
+        runs = []
+
+        def preemptible(job_id, image_id, progress_cb=None, cancel_token=None, **kwargs):
+            runs.append(job_id)
+            progress_cb(0, 10, "Analysing tiles", 12)
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                cancel_token.raise_if_cancelled()
+                if cancel_token.preemption_requested:
+                    raise JobPreempted()
+                if job_id == "high" or runs.count(job_id) > 1:
+                    break
+                time.sleep(0.005)
+            return SimpleNamespace(
+                image_id=image_id,
+                tile_level=12,
+                summary_key="s", results_key="r", heatmap_key="h",
+                summary=SimpleNamespace(
+                    tumor_area_percentage=0.0, aggregate_score=0.0, max_score=0.0
+                ),
+            )
+
+        monkeypatch.setattr(main, "run_analysis", preemptible)
+        api.post("/jobs/analyze", json={"image_id": "img-1", "job_id": "low"})
+        _wait_for(lambda: runs == ["low"])
+        api.post("/jobs/analyze", json={"image_id": "img-2", "job_id": "high", "priority": 5})
+
+        _wait_for(lambda: api.get("/jobs/low/status").json()["status"] == "completed")
+        assert runs == ["low", "high", "low"]
+        assert api.get("/jobs/high/status").json()["status"] == "completed"
+
+
+class TestMetricsEndpoint:
+    def test_exposes_prometheus_text(self, api):
+        resp = api.get("/metrics")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE region_detector_tiles_total counter" in resp.text
+        assert "region_detector_active_jobs 0" in resp.text
+        assert "region_detector_queue_depth 0" in resp.text
@@ -0,0 +1,145 @@
+"""Tests for the per-thread metrics in src.metrics and the pipeline's use of them."""
+
+import threading
+
+import pytest
+
+from src import metrics, pipeline
+from src.metrics import Counter, Gauge, Histogram, Registry
+
+from .fakes import install_stub_models
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in output")
+
+
+class TestCounter:
+    def test_sums_increments_from_many_threads(self):
+        counter = Counter("c", "help")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counter.inc(0.5)
+
+        assert counter.value() == 8000.5
+
+    def test_folds_shards_of_finished_threads(self):
+        counter = Counter("c", "help")
+        for _ in range(20):
+            t = threading.Thread(target=counter.inc, args=(2,))
+            t.start()
+            t.join()
+
+        assert counter.value() == 40
+        assert len(counter._values._shards) == 0
+        assert counter.value() == 40
+
+    def test_labelled_children_render_separately(self):
+        counter = Counter("tiles_total", "Tiles.", ["outcome"])
+        counter.labels("skipped").inc(3)
+        counter.labels("processed").inc()
+
+        lines = counter.render()
+        assert lines[:2] == ["# HELP tiles_total Tiles.", "# TYPE tiles_total counter"]
+        assert 'tiles_total{outcome="processed"} 1' in lines
+        assert 'tiles_total{outcome="skipped"} 3' in lines
+        assert counter.labels("skipped") is counter.labels("skipped")
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+
+class TestGauge:
+    def test_inc_dec_across_threads(self):
+        gauge = Gauge("g", "help")
+        entered, release = threading.Barrier(5), threading.Event()
+
+        def work():
+            with gauge.track_inprogress():
+                entered.wait()
+                release.wait()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        entered.wait()
+        assert gauge.value() == 4
+        release.set()
+        for t in threads:
+            t.join()
+        assert gauge.value() == 0
+
+    def test_callback_is_read_at_scrape_time(self):
+        depth = [3]
+        gauge = Gauge("g", "help", lambda: depth[0])
+        depth[0] = 7
+        assert gauge.render()[-1] == "g 7"
+
+
+class TestHistogram:
+    def test_cumulative_buckets_sum_and_count(self):
+        hist = Histogram("h", "help", buckets=(1, 5, 10))
+        for value in (0.5, 1, 3, 7, 50):
+            hist.observe(value)
+
+        cumulative, total, count = hist.snapshot()
+        assert cumulative == [2, 3, 4, 5]
+        assert total == 61.5
+        assert count == 5
+        lines = hist.render()
+        assert 'h_bucket{le="1"} 2' in lines
+        assert 'h_bucket{le="+Inf"} 5' in lines
+        assert "h_count 5" in lines
+
+    def test_time_records_one_observation(self):
+        hist = Histogram("h", "help")
+        with hist.time():
+            pass
+        assert hist.snapshot()[2] == 1
+
+
+class TestRegistry:
+    def test_register_returns_existing_metric(self):
+        registry = Registry()
+        first = registry.register(Counter("c", "help"))
+        assert registry.register(Counter("c", "help")) is first
+        with pytest.raises(ValueError):
+            registry.register(Gauge("c", "help"))
+
+    def test_render_ends_with_newline(self):
+        registry = Registry()
+        registry.register(Counter("c", "help")).inc()
+        assert registry.render().endswith("c 1\n")
+
+
+class TestPipelineMetrics:
+    def test_run_records_tile_outcomes_and_stage_latencies(self, monkeypatch, stained_slide):
+        stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        before = metrics.render()
+
+        pipeline.run_analysis("job", stained_slide.image_id, tile_level=12, prescreen=False)
+
+        after = metrics.render()
+
+        def delta(name):
+            return _sample(after, name) - _sample(before, name)
+
+        assert delta('region_detector_tiles_total{outcome="processed"}') == 41
+        assert delta('region_detector_tiles_total{outcome="skipped"}') == 55
+        assert delta("region_detector_tile_download_seconds_count") == 96
+        assert delta("region_detector_tile_decode_seconds_count") == 96
+        assert delta("region_detector_tissue_detect_seconds_count") == 96
+        assert delta("region_detector_embed_batch_size_sum") == 41
+        assert delta("region_detector_classifier_seconds_count") >= 1
+        assert _sample(after, "region_detector_download_threads_busy") == 0
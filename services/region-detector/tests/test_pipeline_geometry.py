@@ -1,6 +1,8 @@
 """Unit tests for tile geometry conversion in the analysis pipeline."""
 
-from src.geometry import DZIShape, max_dzi_level, tile_rect_in_fullres
+import numpy as np
+
+from src.geometry import DZIShape, max_dzi_level, tile_rect_in_fullres, tile_rects_in_fullres
 
 
 class TestPipelineGeometry:
@@ -43,3 +45,20 @@ class TestPipelineGeometry:
         assert py == 0
         assert w == 904  # 226 * 4
         assert h == 1024
+
+    def test_vectorised_rects_match_per_tile(self):
+        shape = DZIShape(width=5000, height=3000, tile_size=256)
+        max_level = max_dzi_level(shape)
+        for tile_level in (8, 11, 13):
+            xs, ys = np.meshgrid(np.arange(22), np.arange(13))
+            rects = tile_rects_in_fullres(
+                shape=shape, tile_level=tile_level, max_level=max_level,
+                tile_x=xs.ravel(), tile_y=ys.ravel(),
+            )
+            expected = [
+                tile_rect_in_fullres(
+                    shape=shape, tile_level=tile_level, max_level=max_level, tile_x=x, tile_y=y
+                )
+                for x, y in zip(xs.ravel().tolist(), ys.ravel().tolist())
+            ]
+            assert np.column_stack(rects).tolist() == [list(r) for r in expected]
@@ -0,0 +1,377 @@
+"""End-to-end tests for run_analysis on synthetic slides with stub models."""
+
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import pipeline
+from src.cancellation import CancellationToken, JobCancelled, JobPreempted
+from src.geometry import DZIShape
+from src.minio_io import TileRef
+from src.pipeline import AnalysisCheckpoint, LevelOutcomes
+
+from .fakes import install_stub_models
+
+
+def _run(monkeypatch, slide, **kwargs):
+    slide.install(monkeypatch, pipeline)
+    install_stub_models(monkeypatch, pipeline)
+    slide.download_count = 0
+    result = pipeline.run_analysis("job", slide.image_id, **kwargs)
+    predictions = json.loads(slide.uploads[result.results_key])
+    heatmap = np.asarray(Image.open(io.BytesIO(slide.uploads[result.heatmap_key])))
+    return result, {(p["tile_x"], p["tile_y"]): p for p in predictions}, heatmap
+
+
+class TestFlatAnalysis:
+    def test_summary_matches_reference(self, monkeypatch, stained_slide):
+        result, predictions, _ = _run(monkeypatch, stained_slide, tile_level=12, prescreen=False)
+
+        assert result.summary.total_tiles == 96
+        assert result.summary.tissue_tiles == 41
+        assert result.summary.skipped_tiles == 55
+        assert result.summary.flagged_tiles == 8
+        assert result.summary.tumor_area_percentage == pytest.approx(19.51)
+        assert len(predictions) == 96
+        assert stained_slide.download_count == 96
+        assert result.hierarchy is None
+
+    def test_uploads_heatmap_pyramid(self, monkeypatch, stained_slide):
+        result, _, _ = _run(monkeypatch, stained_slide, tile_level=12)
+
+        summary = json.loads(stained_slide.uploads[result.summary_key])
+        assert summary["heatmap_dzi_key"] == result.heatmap_dzi_key
+        assert result.heatmap_dzi_key in stained_slide.uploads
+        manifest = json.loads(stained_slide.uploads[summary["heatmap_manifest_key"]])
+        assert manifest["max_level"] == 8
+        assert result.timings["heatmap_dzi_tiles"] > 0
+
+    def test_forced_content_fallback_keeps_counts_consistent(
+        self, monkeypatch, faint_slide, capsys
+    ):
+        result, predictions, _ = _run(monkeypatch, faint_slide, tile_level=12)
+
+        summary = result.summary
+        assert summary.tissue_tiles > 0
+        assert summary.skipped_tiles >= 0
+        assert summary.tissue_tiles + summary.skipped_tiles == summary.total_tiles
+        assert len(predictions) == summary.total_tiles
+        log = capsys.readouterr().out
+        assert (
+            f"Forced content: {summary.tissue_tiles}/{summary.total_tiles} tiles passed "
+            "(0 without first-pass stats"
+        ) in log
+
+    def test_forced_content_fallback_reuses_first_pass_tiles(self, monkeypatch, faint_slide):
+        result, predictions, _ = _run(monkeypatch, faint_slide, tile_level=12, prescreen=False)
+
+        assert result.summary.tissue_tiles > 0
+        assert faint_slide.download_count == result.summary.total_tiles
+        assert result.timings["fallback_downloads"] == 0
+        assert result.timings["fallback_cache_hits"] == result.summary.tissue_tiles
+
+        monkeypatch.setattr(pipeline.settings, "FALLBACK_TILE_CACHE_MB", 0.0)
+        uncached, uncached_preds, _ = _run(monkeypatch, faint_slide, tile_level=12, prescreen=False)
+        assert uncached.summary == result.summary
+        assert uncached_preds == predictions
+        assert uncached.timings["fallback_downloads"] == result.summary.tissue_tiles
+        assert faint_slide.download_count == 2 * result.summary.total_tiles
+
+    def test_forced_content_reports_once_per_chunk(self, monkeypatch, faint_slide):
+        monkeypatch.setattr(pipeline.settings, "DOWNLOAD_CHUNK_SIZE", 16)
+        reports = []
+        _run(
+            monkeypatch, faint_slide, tile_level=12, prescreen=False,
+            progress_cb=lambda done, total, msg, level: reports.append((done, total, msg)),
+        )
+
+        forced = [(done, total) for done, total, msg in reports if msg == "Forced content analysis"]
+        total = forced[-1][1]
+        assert forced == [(min(done, total), total) for done in range(16, total + 16, 16)]
+
+
+class TestPrescreen:
+    def test_skips_background_downloads_without_changing_summary(self, monkeypatch, stained_slide):
+        reference, reference_preds, _ = _run(
+            monkeypatch, stained_slide, tile_level=12, prescreen=False
+        )
+        result, predictions, _ = _run(monkeypatch, stained_slide, tile_level=12)
+
+        assert result.summary == reference.summary
+        assert predictions.keys() == reference_preds.keys()
+        assert all(
+            predictions[k]["label"] == reference_preds[k]["label"] for k in reference_preds
+        )
+        timings = result.timings
+        assert timings["prescreen_level"] == 8
+        assert timings["tiles_screened_out"] > 0
+        assert stained_slide.download_count == (
+            96 - timings["tiles_screened_out"] + timings["prescreen_tiles_downloaded"]
+        )
+        assert timings["downloads_saved"] == (
+            timings["tiles_screened_out"] - timings["prescreen_tiles_downloaded"]
+        )
+
+    def test_unstained_slide_is_not_screened(self, monkeypatch, faint_slide):
+        result, _, _ = _run(monkeypatch, faint_slide, tile_level=12)
+
+        assert result.timings["tiles_screened_out"] == 0
+        assert result.summary.tissue_tiles > 0
+
+
+class TestHierarchicalAnalysis:
+    def test_outcomes_are_written_by_tile_index(self):
+        outcomes = LevelOutcomes(DZIShape(width=1000, height=600, tile_size=256), 10)
+        refs = [TileRef(10, x, y, f"t/{x}_{y}.jpeg") for y in range(3) for x in range(4)]
+        outcomes.record_tissue(outcomes.index(refs[5]), 0.8, 0.9, "Tumor")
+        outcomes.record_failed(outcomes.index(refs[6]))
+        outcomes.fill_background(refs[:6])
+
+        predictions = outcomes.predictions(refs)
+        assert outcomes.cols == 4 and outcomes.tiles_done == 7
+        assert predictions["tile_x"].tolist() == [0, 1, 2, 3, 0, 1]
+        assert predictions["is_tissue"].tolist() == [False] * 5 + [True]
+        assert predictions[5]["pixel_x"] == 256 and predictions[5]["width"] == 256
+        assert predictions[3]["width"] == 1000 - 3 * 256
+
+    def test_agrees_with_flat_run_on_fewer_tiles(self, monkeypatch, fine_slide):
+        flat, flat_preds, flat_heatmap = _run(monkeypatch, fine_slide, tile_level=12)
+        flat_downloads = fine_slide.download_count
+        hier, hier_preds, hier_heatmap = _run(
+            monkeypatch, fine_slide, tile_level=12, hierarchical=True
+        )
+
+        stats = hier.hierarchy
+        assert stats["levels"] == [11, 12]
+        assert stats["flat_tiles"] == flat.summary.total_tiles
+        assert stats["evaluated_fraction"] < 1.0
+        assert fine_slide.download_count < flat_downloads
+
+        assert hier_preds.keys() == flat_preds.keys()
+        tumour_agreement = np.mean(
+            [hier_preds[k]["label"] == flat_preds[k]["label"] for k in flat_preds]
+        )
+        tissue_agreement = np.mean(
+            [hier_preds[k]["is_tissue"] == flat_preds[k]["is_tissue"] for k in flat_preds]
+        )
+        assert tumour_agreement >= 0.95
+        assert tissue_agreement >= 0.95
+
+        assert hier_heatmap.shape == flat_heatmap.shape
+        pixel_diff = np.abs(hier_heatmap.astype(int) - flat_heatmap.astype(int)).max(axis=2)
+        assert np.mean(pixel_diff <= 8) >= 0.95
+
+    def test_summary_reports_hierarchy(self, monkeypatch, fine_slide):
+        result, _, _ = _run(monkeypatch, fine_slide, tile_level=12, hierarchical=True)
+
+        summary = json.loads(fine_slide.uploads[result.summary_key])
+        assert summary["hierarchical"]["tiles_evaluated"] == sum(
+            summary["hierarchical"]["tiles_evaluated_by_level"].values()
+        )
+
+    def test_no_tissue_falls_back_to_flat(self, monkeypatch, faint_slide):
+        result, predictions, _ = _run(
+            monkeypatch, faint_slide, tile_level=12, hierarchical=True
+        )
+
+        assert result.hierarchy["fell_back_to_flat"] is True
+        assert result.summary.tissue_tiles > 0
+        assert len(predictions) == result.summary.total_tiles
+
+
+def _level_predictions(slide, result):
+    return {(p["tile_x"], p["tile_y"]): p for p in json.loads(slide.uploads[result.results_key])}
+
+
+class TestMultiLevelAnalysis:
+    def test_derives_coarser_levels_from_finest_downloads(self, monkeypatch, stained_slide):
+        singles = {
+            level: _run(monkeypatch, stained_slide, tile_level=level, prescreen=False)[:2]
+            for level in (10, 11)
+        }
+        stained_slide.download_count = 0
+        multi = pipeline.run_multilevel_analysis(
+            "multi", stained_slide.image_id, [12, 10, 11], prescreen=False
+        )
+
+        assert multi.tile_levels == [10, 11, 12]
+        assert stained_slide.download_count == 96
+        assert multi.timings["tiles_derived"] == 6 + 24
+
+        finest = multi.levels[12]
+        assert finest.summary.tissue_tiles == 41
+        assert finest.summary.flagged_tiles == 8
+        assert finest.heatmap_key.startswith(f"{stained_slide.image_id}/analysis/multi/level_12/")
+
+        # Averaged tiles differ from the tiler's by at most one grey level.
+        for level, (single, single_preds) in singles.items():
+            result = multi.levels[level]
+            assert result.timings["tiles_derived"] == single.summary.total_tiles
+            assert result.summary.tissue_tiles == single.summary.tissue_tiles
+            assert result.summary.flagged_tiles == single.summary.flagged_tiles
+            assert result.summary.aggregate_score == pytest.approx(single.summary.aggregate_score, abs=0.01)
+            predictions = _level_predictions(stained_slide, result)
+            assert {k: p["label"] for k, p in predictions.items()} == {
+                k: p["label"] for k, p in single_preds.items()
+            }
+
+        combined = json.loads(stained_slide.uploads[multi.summary_key])
+        assert combined["tile_levels"] == [10, 11, 12]
+        assert combined["levels"]["11"]["summary_key"] == multi.levels[11].summary_key
+        assert combined["levels"]["10"]["summary"]["total_tiles"] == 6
+
+    def test_without_derivation_each_level_is_downloaded(self, monkeypatch, stained_slide):
+        monkeypatch.setattr(pipeline.settings, "MULTILEVEL_DERIVE_TILES", False)
+        single, single_preds, _ = _run(monkeypatch, stained_slide, tile_level=11, prescreen=False)
+        stained_slide.download_count = 0
+
+        multi = pipeline.run_multilevel_analysis(
+            "multi", stained_slide.image_id, [11, 12], prescreen=False
+        )
+
+        assert stained_slide.download_count == 96 + 24
+        assert multi.timings["tiles_derived"] == 0
+        assert multi.levels[11].summary == single.summary
+        assert _level_predictions(stained_slide, multi.levels[11]) == single_preds
+
+    def test_failed_child_download_falls_back_to_fetching_the_parent(self, monkeypatch, stained_slide):
+        stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        broken = stained_slide.key(12, 4, 2)
+        download = pipeline.download_tile_bytes
+
+        def flaky(key):
+            if key == broken:
+                raise OSError("connection reset")
+            return download(key)
+
+        monkeypatch.setattr(pipeline, "download_tile_bytes", flaky)
+        stained_slide.download_count = 0
+
+        multi = pipeline.run_multilevel_analysis(
+            "multi", stained_slide.image_id, [11, 12], prescreen=False
+        )
+
+        # Parent (2, 1) of the broken tile is fetched at level 11 instead.
+        assert multi.levels[11].timings["tiles_derived"] == 23
+        assert (2, 1) in _level_predictions(stained_slide, multi.levels[11])
+        assert len(_level_predictions(stained_slide, multi.levels[12])) == 95
+
+    def test_shares_one_prescreen(self, monkeypatch, stained_slide):
+        stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        built = []
+        build = pipeline._build_prescreen
+
+        def counting_build(*args, **kwargs):
+            built.append(args[3])
+            return build(*args, **kwargs)
+
+        monkeypatch.setattr(pipeline, "_build_prescreen", counting_build)
+
+        multi = pipeline.run_multilevel_analysis("multi", stained_slide.image_id, [11, 12])
+
+        assert built == [11]
+        assert multi.levels[12].timings["tiles_screened_out"] > 0
+        assert multi.levels[12].summary.tissue_tiles == 41
+
+
+class TestCancellationAndPreemption:
+    def _token_after(self, token, tiles, action):
+        def progress(done, total, msg, level=None):
+            if msg.startswith("Analysing") and done >= tiles:
+                action()
+
+        return progress
+
+    def test_preempted_run_resumes_from_checkpoint(self, monkeypatch, stained_slide):
+        reference, reference_preds, _ = _run(
+            monkeypatch, stained_slide, tile_level=12, prescreen=False
+        )
+        monkeypatch.setattr(pipeline.settings, "DOWNLOAD_CHUNK_SIZE", 16)
+        token = CancellationToken()
+        checkpoint = AnalysisCheckpoint()
+        stained_slide.download_count = 0
+
+        with pytest.raises(JobPreempted):
+            pipeline.run_analysis(
+                "job", stained_slide.image_id, tile_level=12, prescreen=False,
+                progress_cb=self._token_after(token, 32, token.request_preemption),
+                cancel_token=token, checkpoint=checkpoint,
+            )
+        # Progress is reported every 20 tiles: requested at 40, honoured after chunk 3.
+        assert checkpoint.tiles_done == 48
+        assert stained_slide.download_count == 48
+
+        token.clear_preemption()
+        result, predictions, _ = _run(
+            monkeypatch, stained_slide, tile_level=12, prescreen=False,
+            cancel_token=token, checkpoint=checkpoint,
+        )
+        assert stained_slide.download_count == 96 - 48
+        assert result.summary == reference.summary
+        assert predictions == reference_preds
+
+    def test_cancel_stops_before_artifacts(self, monkeypatch, stained_slide):
+        stained_slide.install(monkeypatch, pipeline)
+        install_stub_models(monkeypatch, pipeline)
+        monkeypatch.setattr(pipeline.settings, "DOWNLOAD_CHUNK_SIZE", 16)
+        stained_slide.download_count = 0
+        token = CancellationToken()
+
+        with pytest.raises(JobCancelled):
+            pipeline.run_analysis(
+                "cancelled-job", stained_slide.image_id, tile_level=12, prescreen=False,
+                progress_cb=self._token_after(token, 16, token.cancel),
+                cancel_token=token,
+            )
+        assert stained_slide.download_count <= 32
+        assert not any("cancelled-job" in key for key in stained_slide.uploads)
+
+
+@pytest.fixture(scope="module")
+def clean_slide():
+    """Noise-free slide: tiles inside the tissue regions are pixel-identical."""
+    from .fakes import SyntheticSlide
+
+    return SyntheticSlide(image_id="clean", noise=0)
+
+
+class TestTileDedup:
+    def test_exact_dedup_folds_identical_tiles_without_changing_results(
+        self, monkeypatch, clean_slide
+    ):
+        reference, reference_preds, _ = _run(
+            monkeypatch, clean_slide, tile_level=12, prescreen=False, dedup="off"
+        )
+        assert "dedup_rate" not in reference.timings
+
+        result, predictions, _ = _run(
+            monkeypatch, clean_slide, tile_level=12, prescreen=False, dedup="exact"
+        )
+        timings = result.timings
+        assert timings["dedup_tiles_folded"] > 0
+        assert timings["dedup_rate"] == pytest.approx(
+            timings["dedup_tiles_folded"] / reference.summary.tissue_tiles, abs=1e-4
+        )
+        assert timings["dedup_saved_inference_s"] >= 0
+        assert result.summary == reference.summary
+        assert predictions == reference_preds
+
+    def test_perceptual_dedup_keeps_labels(self, monkeypatch, stained_slide):
+        reference, reference_preds, _ = _run(
+            monkeypatch, stained_slide, tile_level=12, prescreen=False
+        )
+        result, predictions, _ = _run(
+            monkeypatch, stained_slide, tile_level=12, prescreen=False, dedup="perceptual"
+        )
+
+        assert result.timings["dedup_tiles_folded"] > 0
+        assert result.summary.tissue_tiles == reference.summary.tissue_tiles
+        agreement = np.mean(
+            [predictions[k]["label"] == reference_preds[k]["label"] for k in reference_preds]
+        )
+        assert agreement >= 0.95
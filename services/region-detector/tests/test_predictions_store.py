@@ -0,0 +1,76 @@
+"""Unit tests for the columnar prediction artifact and its grid index."""
+
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from src.predictions_store import (
+    PredictionIndex,
+    TilePrediction,
+    decode,
+    encode,
+    to_columnar,
+    to_records,
+)
+
+
+def _predictions(cols=4, rows=3, cell=100):
+    preds = []
+    for y in range(rows):
+        for x in range(cols):
+            tissue = (x + y) % 2 == 0
+            prob = 0.25 * x if tissue else 0.0
+            preds.append(TilePrediction(
+                tile_x=x, tile_y=y, tile_level=9,
+                pixel_x=x * cell, pixel_y=y * cell, width=cell, height=cell,
+                is_tissue=tissue, tissue_ratio=0.5 if tissue else 0.0,
+                tumor_probability=prob,
+                label=("Tumor" if prob >= 0.5 else "Normal") if tissue else "Background",
+            ))
+    return preds
+
+
+class TestPredictionsStore:
+    def test_roundtrip_matches_json_rows(self):
+        preds = _predictions()
+        arr, meta = decode(encode(to_columnar(preds), {"tile_level": 9, "tile_size": 100}))
+
+        assert meta == {"tile_level": 9, "tile_size": 100}
+        records = to_records(arr, meta["tile_level"])
+        for record, pred in zip(records, preds):
+            expected = asdict(pred)
+            assert record.keys() == expected.keys()
+            for key, value in expected.items():
+                assert record[key] == pytest.approx(value)
+
+    def test_records_keep_full_precision_on_request(self):
+        arr = to_columnar(_predictions())
+        arr["tumor_probability"][0] = 0.123456789
+
+        assert to_records(arr, 9)[0]["tumor_probability"] == 0.123457
+        assert to_records(arr, 9, decimals=None)[0]["tumor_probability"] == pytest.approx(0.123456789, rel=1e-7)
+
+    def test_columnar_is_smaller_than_json(self):
+        import json
+
+        preds = _predictions(cols=100, rows=100)
+        as_json = json.dumps([asdict(p) for p in preds]).encode()
+        assert len(encode(to_columnar(preds), {})) < len(as_json) / 5
+
+    def test_bbox_query_returns_covered_tiles(self):
+        index = PredictionIndex(to_columnar(_predictions()), cell_px=100)
+
+        rows = index.query(150, 50, 260, 120)
+        coords = [(int(index.predictions["tile_x"][r]), int(index.predictions["tile_y"][r])) for r in rows]
+        assert coords == [(1, 0), (2, 0), (1, 1), (2, 1)]
+        assert len(index.query(-50, -50, 10_000, 10_000)) == 12
+        assert len(index.query(1000, 1000, 2000, 2000)) == 0
+
+    def test_sparse_index_skips_missing_tiles(self):
+        arr = to_columnar(_predictions())
+        index = PredictionIndex(arr[arr["is_tissue"]], cell_px=100)
+        rows = index.query(0, 0, 400, 300)
+        assert len(rows) == 6
+        assert index.predictions["is_tissue"][rows].all()
+        assert np.array_equal(np.sort(rows), np.arange(6))
@@ -0,0 +1,55 @@
+"""Unit tests for the thumbnail tissue pre-screen."""
+
+import numpy as np
+
+from src.geometry import DZIShape
+from src.minio_io import TileRef
+from src.prescreen import TissuePrescreen, choose_prescreen_level, dilate
+
+
+def _thumbnail(height=32, width=48):
+    rgb = np.full((height, width, 3), 245, dtype=np.uint8)
+    rgb[8:12, 20:24] = (190, 90, 170)  # small stained patch
+    return rgb
+
+
+class TestPrescreen:
+    def test_dilate_grows_by_radius(self):
+        mask = np.zeros((9, 9), dtype=bool)
+        mask[4, 4] = True
+        grown = dilate(mask, 2)
+        assert grown.sum() == 25
+        assert grown[2:7, 2:7].all()
+
+    def test_no_saturation_gives_no_prescreen(self):
+        rgb = np.full((16, 16, 3), 230, dtype=np.uint8)
+        assert TissuePrescreen.from_thumbnail(rgb, mask_level=8, tile_size=256) is None
+
+    def test_intersects_maps_tiles_to_thumbnail(self):
+        screen = TissuePrescreen.from_thumbnail(
+            _thumbnail(), mask_level=8, tile_size=256, dilation_px=0
+        )
+        # At level 12 each tile covers 16×16 thumbnail pixels: the patch at
+        # x 20-23, y 8-11 lies in tile (1, 0) only.
+        assert screen.intersects(12, 1, 0)
+        assert not screen.intersects(12, 0, 0)
+        assert not screen.intersects(12, 2, 1)
+        assert screen.intersects(8, 0, 0)
+
+    def test_dilation_keeps_neighbouring_tiles(self):
+        screen = TissuePrescreen.from_thumbnail(
+            _thumbnail(), mask_level=8, tile_size=256, dilation_px=5
+        )
+        refs = [TileRef(level=12, x=x, y=y, object_key=f"{x}_{y}") for y in range(2) for x in range(3)]
+        kept, skipped = screen.filter(refs)
+        # The 5px margin reaches x=15 (tile column 0) and y=16 (tile row 1).
+        assert {(t.x, t.y) for t in kept} == {(0, 0), (1, 0), (0, 1), (1, 1)}
+        assert len(kept) + len(skipped) == len(refs)
+
+    def test_choose_level_respects_offset_and_tile_budget(self):
+        shape = DZIShape(width=100_000, height=80_000, tile_size=256)
+        levels = range(18)
+        # Level 13 has 25×20 tiles; level 10 (4×3) is the finest within 16.
+        assert choose_prescreen_level(shape, levels, 17, level_offset=4, max_tiles=16) == 10
+        assert choose_prescreen_level(shape, levels, 17, level_offset=4, max_tiles=4) == 9
+        assert choose_prescreen_level(shape, [16, 17], 17, level_offset=4, max_tiles=16) is None
@@ -0,0 +1,102 @@
+"""Unit tests for the results LRU cache."""
+
+import gzip
+
+import pytest
+
+from src import results_cache
+from src.results_cache import (
+    DecodedCache,
+    ResultsCache,
+    choose_encoding,
+    encoded_etag,
+    etag_matches,
+)
+
+
+class TestResultsCache:
+    def test_hits_misses_and_lru_eviction(self):
+        payload = {"data": "x" * 400}
+        cache = ResultsCache(max_bytes=1000, compress_min_bytes=10_000)
+        cache.put("a", payload)
+        cache.put("b", payload)
+        assert cache.get("a") is not None  # a is now most recent
+        cache.put("c", payload)            # evicts b
+
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+        assert stats["bytes"] <= 1000
+
+    def test_oversized_payload_is_not_cached(self):
+        cache = ResultsCache(max_bytes=100)
+        entry = cache.put("big", {"data": "x" * 500})
+        assert entry.body
+        assert cache.get("big") is None
+
+    def test_compressed_encoding_is_created_once(self):
+        cache = ResultsCache(max_bytes=1_000_000, compress_min_bytes=10)
+        entry = cache.put("a", {"data": "abc" * 1000})
+        first, used = cache.encode("a", entry, "gzip")
+        second, _ = cache.encode("a", entry, "gzip")
+        assert used == "gzip"
+        assert first is second
+        assert gzip.decompress(first) == entry.body
+        assert cache.stats()["bytes"] == len(entry.body) + len(first)
+
+    def test_small_bodies_stay_identity(self):
+        cache = ResultsCache(max_bytes=1_000_000, compress_min_bytes=1024)
+        entry = cache.put("a", {"ok": True})
+        assert cache.encode("a", entry, "gzip") == (entry.body, None)
+
+    def test_etags(self):
+        etag = '"abc123"'
+        assert encoded_etag(etag, "gzip") == '"abc123-gzip"'
+        assert etag_matches('"abc123-gzip"', etag)
+        assert etag_matches('W/"abc123", "zzz"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0, gzip;q=0.5", "gzip"),
+            ("identity", None),
+            (None, None),
+            ("*", "br"),
+        ],
+    )
+    def test_choose_encoding(self, header, expected):
+        assert choose_encoding(header, ("br", "gzip")) == expected
+
+    def test_brotli_is_optional(self, monkeypatch):
+        monkeypatch.setattr(results_cache, "brotli", None)
+        assert ResultsCache(max_bytes=10).encodings == ("gzip",)
+
+
+class TestDecodedCache:
+    def test_lru_by_reported_size(self):
+        cache = DecodedCache(max_bytes=100)
+        cache.put("a", "A", 40)
+        cache.put("b", "B", 40)
+        assert cache.get("a") == "A"  # b is now least recently used
+        cache.put("c", "C", 40)
+        assert cache.get("b") is None
+        assert cache.get("c") == "C"
+        cache.put("huge", "H", 101)
+        assert cache.get("huge") is None
+        stats = cache.stats()
+        assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 80, 1)
+
+    def test_invalidate_where(self):
+        cache = DecodedCache(max_bytes=100)
+        cache.put(("job1", 12), 1, 10)
+        cache.put(("job1", 11), 2, 10)
+        cache.put(("job2", 12), 3, 10)
+        cache.invalidate_where(lambda key: key[0] == "job1")
+        assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 10
+        assert cache.get(("job2", 12)) == 3
@@ -0,0 +1,65 @@
+"""Tests for the preallocated tile arena and array-based tissue detection."""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.tile_arena import ArenaFull, TileArena
+from src.tissue_detector import detect_tissue, luminance, saturation
+
+
+def _jpeg(array: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(array, "RGB").save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+class TestTileArena:
+    def test_decode_writes_into_reserved_slot(self):
+        arena = TileArena(capacity=2, tile_px=8)
+        data = _jpeg(np.full((8, 8, 3), 200, dtype=np.uint8))
+        slot = arena.reserve()
+
+        view = arena.decode(slot, data)
+
+        assert np.shares_memory(view, arena.buffer)
+        expected = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+        np.testing.assert_array_equal(view, expected)
+
+    def test_edge_tiles_are_partial_views(self):
+        arena = TileArena(capacity=1, tile_px=8)
+        view = arena.decode(arena.reserve(), _jpeg(np.zeros((5, 3, 3), dtype=np.uint8)))
+        assert view.shape == (5, 3, 3)
+
+    def test_oversized_tile_gets_private_copy(self):
+        arena = TileArena(capacity=1, tile_px=4)
+        view = arena.decode(arena.reserve(), _jpeg(np.zeros((8, 8, 3), dtype=np.uint8)))
+        assert view.shape == (8, 8, 3)
+        assert not np.shares_memory(view, arena.buffer)
+        assert arena.oversized == 1
+
+    def test_reserve_and_release_recycle_slots(self):
+        arena = TileArena(capacity=2, tile_px=4)
+        first, second = arena.reserve(), arena.reserve()
+        assert arena.in_use == 2
+        with pytest.raises(ArenaFull):
+            arena.reserve()
+        arena.release(first)
+        assert arena.reserve() == first
+        arena.release(second)
+        assert arena.in_use == 1
+
+
+class TestArrayTissueDetection:
+    def test_channels_match_pil_conversions(self):
+        rgb = np.random.default_rng(0).integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+        img = Image.fromarray(rgb, "RGB")
+        np.testing.assert_array_equal(saturation(rgb), np.asarray(img.convert("HSV"))[..., 1])
+        np.testing.assert_array_equal(luminance(rgb), np.asarray(img.convert("L")))
+
+    def test_array_and_image_give_same_result(self, stained_slide):
+        for data in list(stained_slide.tiles.values())[:32]:
+            img = Image.open(io.BytesIO(data)).convert("RGB")
+            assert detect_tissue(np.asarray(img)) == detect_tissue(img)
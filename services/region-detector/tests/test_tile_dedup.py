@@ -0,0 +1,50 @@
+"""Tests for the duplicate-tile hashing in src.tile_dedup."""
+
+import numpy as np
+import pytest
+
+from src.tile_dedup import TileDeduplicator, exact_key, perceptual_key
+
+
+def _tile(value, shape=(64, 64, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+class TestKeys:
+    def test_exact_key_only_matches_identical_pixels(self):
+        tile = _tile(120)
+        changed = tile.copy()
+        changed[0, 0, 0] += 1
+        assert exact_key(tile) == exact_key(tile.copy())
+        assert exact_key(tile) != exact_key(changed)
+
+    def test_exact_key_accepts_strided_views(self):
+        arena = np.zeros((2, 64, 64, 3), dtype=np.uint8)
+        view = arena[1, :40, :30]
+        assert exact_key(view) == exact_key(np.ascontiguousarray(view))
+
+    def test_perceptual_key_ignores_small_noise(self):
+        rng = np.random.default_rng(0)
+        base = _tile((200, 120, 180))
+        noisy = np.clip(base + rng.normal(0, 2, base.shape), 0, 255).astype(np.uint8)
+        assert perceptual_key(base) == perceptual_key(noisy)
+
+    def test_perceptual_key_sees_layout_and_shape(self):
+        half = _tile(230)
+        half[:, :32] = (120, 40, 140)
+        assert perceptual_key(half) != perceptual_key(_tile(230))
+        assert perceptual_key(_tile(230)) != perceptual_key(_tile(230, (64, 32, 3)))
+
+
+class TestTileDeduplicator:
+    def test_counts_hashed_tiles(self):
+        dedup = TileDeduplicator("exact")
+        dedup.key(_tile(1))
+        dedup.key(_tile(1))
+        dedup.folded = 1
+        assert dedup.tiles == 2
+        assert dedup.rate == 0.5
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError):
+            TileDeduplicator("off")
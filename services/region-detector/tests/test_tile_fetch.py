@@ -0,0 +1,187 @@
+"""Tests for the dedicated tile fetch clients against an in-process S3 stand-in."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import pytest
+
+from src import pipeline, tile_store
+from src.config import settings
+from src.tile_fetch import AsyncTileFetcher, SigV4Signer, TileFetchClient, TileFetchError, object_path
+from src.tile_store import MemoryTileStore, MinioTileStore, ObjectNotFound
+
+from .fakes import FakeS3Server, install_stub_models
+
+
+@pytest.fixture
+def server():
+    with FakeS3Server() as server:
+        for i in range(64):
+            server.put("tiles", f"slide/image_files/12/{i}_0.png", bytes([i % 256]) * (1000 + 37 * i))
+        yield server
+
+
+class TestSigV4Signer:
+    def test_matches_the_minio_sdk(self):
+        from minio.credentials import Credentials
+        from minio.signer import sign_v4_s3
+
+        now = datetime(2026, 3, 14, 15, 9, 26, tzinfo=timezone.utc)
+        path = object_path("tiles", "slide id/image_files/12/3_4.jpeg")
+        ours = SigV4Signer("AKID", "SECRET", "eu-west-1").headers("minio:9000", path, now=now)
+
+        headers = {
+            "Host": "minio:9000",
+            "x-amz-date": ours["x-amz-date"],
+            "x-amz-content-sha256": ours["x-amz-content-sha256"],
+        }
+        sdk = sign_v4_s3(
+            method="GET",
+            url=urlsplit(f"http://minio:9000{path}"),
+            region="eu-west-1",
+            headers=headers,
+            credentials=Credentials("AKID", "SECRET"),
+            content_sha256=ours["x-amz-content-sha256"],
+            date=now,
+        )
+        assert ours["Authorization"] == sdk["Authorization"]
+
+    def test_signing_key_is_derived_once_per_day(self):
+        signer = SigV4Signer("AKID", "SECRET")
+        key = signer.signing_key("20260314")
+        assert signer.signing_key("20260314") is key
+        assert signer.signing_key("20260315") != key
+
+
+class TestTileFetchClient:
+    def test_reuses_at_most_pool_size_connections(self, server):
+        client = TileFetchClient(server.endpoint, "k", "s", pool_size=4)
+        keys = [k for _, k in server.objects]
+
+        def fetch(key):
+            return key, bytes(client.get("tiles", key))
+
+        with ThreadPoolExecutor(16) as pool:
+            results = dict(pool.map(fetch, keys * 3))
+
+        assert all(results[k] == server.objects[("tiles", k)] for k in keys)
+        assert server.requests == 3 * len(keys)
+        assert server.connections <= 4
+
+    def test_reads_into_a_reused_buffer(self, server):
+        client = TileFetchClient(server.endpoint, "k", "s", pool_size=1)
+        first = client.get("tiles", "slide/image_files/12/1_0.png")
+        second = client.get("tiles", "slide/image_files/12/2_0.png")
+        assert first.obj is second.obj
+        assert bytes(second) == server.objects[("tiles", "slide/image_files/12/2_0.png")]
+
+    def test_missing_object_raises_with_status(self, server):
+        client = TileFetchClient(server.endpoint, "k", "s", pool_size=1)
+        with pytest.raises(TileFetchError) as exc:
+            client.get("tiles", "nope.png")
+        assert exc.value.status == 404
+        # The connection is still usable afterwards.
+        assert len(client.get("tiles", "slide/image_files/12/0_0.png")) == 1000
+
+
+class TestAsyncTileFetcher:
+    def test_fetches_in_order_over_few_connections(self, server):
+        fetcher = AsyncTileFetcher(server.endpoint, "k", "s", concurrency=8)
+        keys = [k for _, k in server.objects] + ["missing.png"]
+
+        results = fetcher.fetch_many("tiles", keys)
+
+        assert [bytes(r) for r in results[:-1]] == [server.objects[("tiles", k)] for k in keys[:-1]]
+        assert isinstance(results[-1], TileFetchError) and results[-1].status == 404
+        assert server.connections <= 8
+        fetcher.close()
+
+    def test_many_requests_in_flight_on_one_thread(self):
+        with FakeS3Server(latency_ms=50) as server:
+            for i in range(100):
+                server.put("tiles", f"t{i}", b"x")
+            fetcher = AsyncTileFetcher(server.endpoint, "k", "s", concurrency=100)
+            results = fetcher.fetch_many("tiles", [f"t{i}" for i in range(100)])
+            fetcher.close()
+        assert results == [b"x"] * 100
+        # Serial fetching would take 5 s; all requests overlap instead.
+        assert server.connections > 50
+
+    def test_escaped_keys_are_requested_as_signed(self, server):
+        server.put("tiles", "slide id/image_files/12/0_0.png", b"spaced")
+        fetcher = AsyncTileFetcher(server.endpoint, "k", "s", concurrency=2)
+        assert fetcher.fetch_many("tiles", ["slide id/image_files/12/0_0.png"]) == [b"spaced"]
+        fetcher.close()
+
+
+class _FetchingStore(MinioTileStore):
+    """Tile reads over HTTP from the stand-in; everything else from memory."""
+
+    def __init__(self, bucket, memory):
+        super().__init__(bucket)
+        self.memory = memory
+
+    def read(self, key, bucket=None):
+        return self.memory.read(key, bucket)
+
+    def write(self, key, data, content_type="application/octet-stream", bucket=None):
+        self.memory.write(key, data, content_type, bucket)
+
+    def list_keys(self, prefix="", bucket=None):
+        return self.memory.list_keys(prefix, bucket)
+
+
+class TestMinioTileStoreFetching:
+    @pytest.fixture
+    def store(self, monkeypatch, stained_slide):
+        with FakeS3Server() as server:
+            memory = MemoryTileStore(settings.TILES_BUCKET)
+            memory.write(
+                f"{stained_slide.image_id}/image.dzi",
+                (
+                    f'<Image Format="png" Overlap="0" TileSize="{stained_slide.tile_size}">'
+                    f'<Size Width="{stained_slide.width}" Height="{stained_slide.height}"/></Image>'
+                ).encode(),
+            )
+            for (level, x, y), data in stained_slide.tiles.items():
+                memory.write(stained_slide.key(level, x, y), data)
+                server.put(settings.TILES_BUCKET, stained_slide.key(level, x, y), data)
+            monkeypatch.setattr(settings, "MINIO_ENDPOINT", server.endpoint)
+            store = _FetchingStore(settings.TILES_BUCKET, memory)
+            monkeypatch.setattr(tile_store, "_store", store)
+            yield store
+
+    def test_missing_tiles_map_to_object_not_found(self, store):
+        with pytest.raises(ObjectNotFound):
+            store.read_tile("nope.png")
+        assert isinstance(store.read_many(["nope.png"])[0], ObjectNotFound)
+
+    def test_pool_follows_the_download_worker_count(self, store, monkeypatch):
+        monkeypatch.setattr(settings, "TILE_FETCH_POOL_SIZE", 0)
+        monkeypatch.setattr(settings, "DOWNLOAD_WORKERS", 3)
+        previous = store.fetcher
+        assert previous.pool_size == 3 and store.fetcher is previous
+        monkeypatch.setattr(settings, "DOWNLOAD_WORKERS", 5)
+        assert store.fetcher.pool_size == 5
+        assert previous._pool.pool is None  # the replaced pool was closed
+
+    def test_unknown_fetch_mode_is_rejected(self, store, monkeypatch, stained_slide):
+        monkeypatch.setattr(settings, "TILE_FETCH_MODE", "asnyc")
+        install_stub_models(monkeypatch, pipeline)
+
+        with pytest.raises(ValueError, match="TILE_FETCH_MODE"):
+            pipeline.preload_models()
+        with pytest.raises(ValueError, match="TILE_FETCH_MODE"):
+            pipeline.run_analysis("job", stained_slide.image_id, tile_level=12, prescreen=False)
+
+    @pytest.mark.parametrize("mode", ["threads", "async"])
+    def test_run_analysis_in_each_fetch_mode(self, store, monkeypatch, stained_slide, mode):
+        monkeypatch.setattr(settings, "TILE_FETCH_MODE", mode)
+        install_stub_models(monkeypatch, pipeline)
+
+        result = pipeline.run_analysis("job", stained_slide.image_id, tile_level=12, prescreen=False)
+
+        assert result.summary.total_tiles == 96
+        assert result.summary.tissue_tiles == 41
+        assert result.summary.flagged_tiles == 8
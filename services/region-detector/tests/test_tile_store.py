@@ -0,0 +1,157 @@
+"""Tests for the TileStore backends and the minio_io helpers built on them."""
+
+import io
+import mmap
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import minio_io, pipeline, tile_store
+from src.tile_arena import TileArena
+from src.tile_store import LocalTileStore, MemoryTileStore, ObjectNotFound
+
+from .fakes import install_stub_models
+
+DZI = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="png" Overlap="1" '
+    b'TileSize="254"><Size Width="1000" Height="600"/></Image>'
+)
+
+
+@pytest.fixture(params=["memory", "local"])
+def store(request, tmp_path, monkeypatch):
+    store = MemoryTileStore("tiles") if request.param == "memory" else LocalTileStore(tmp_path, "tiles")
+    monkeypatch.setattr(tile_store, "_store", store)
+    return store
+
+
+def _png(colour=(200, 120, 180), size=(8, 8)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, colour).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestTileStore:
+    def test_write_read_roundtrip(self, store):
+        store.write("a/b/c.bin", b"payload")
+        assert bytes(store.read("a/b/c.bin")) == b"payload"
+        with pytest.raises(ObjectNotFound):
+            store.read("a/b/missing.bin")
+
+    def test_buckets_are_separate(self, store):
+        store.write("k", b"1")
+        store.write("k", b"2", bucket="artifacts")
+        assert bytes(store.read("k")) == b"1"
+        assert bytes(store.read("k", bucket="artifacts")) == b"2"
+
+    def test_lists_levels_and_tiles(self, store):
+        for level, x, y in [(10, 0, 0), (11, 0, 0), (11, 1, 0), (11, 0, 1)]:
+            store.write(f"img/image_files/{level}/{x}_{y}.png", b"t")
+        store.write("img/image.dzi", DZI)
+        store.write("img2/image_files/12/0_0.png", b"t")
+
+        assert store.list_levels("img") == [10, 11]
+        tiles = store.list_tiles("img", 11)
+        assert sorted((t.x, t.y) for t in tiles) == [(0, 0), (0, 1), (1, 0)]
+        assert {t.object_key for t in tiles} >= {"img/image_files/11/1_0.png"}
+        assert [bytes(d) for d in store.read_many(["img2/image_files/12/0_0.png", "img/image.dzi"])] == [
+            b"t", DZI
+        ]
+
+
+class TestMinioIoHelpers:
+    def test_parse_dzi_and_manifest(self, store):
+        store.write("img/image.dzi", DZI)
+        info = minio_io.parse_dzi("img")
+        assert (info.width, info.height, info.tile_size, info.overlap, info.format) == (
+            1000, 600, 254, 1, "png"
+        )
+        assert minio_io.load_tile_manifest("img") is None
+
+        minio_io.upload_json(
+            {"image_id": "img", "width": 1000, "height": 600, "tile_size": 254,
+             "available_levels": [9, 10], "level_tile_counts": {"10": 12}},
+            "img/manifest.json",
+        )
+        manifest = minio_io.load_tile_manifest("img")
+        assert manifest.available_levels == [9, 10]
+        assert manifest.level_tile_counts == {10: 12}
+
+    def test_tile_download_decodes(self, store):
+        minio_io.upload_bytes(_png(), "img/image_files/3/0_0.png", "image/png")
+        img = minio_io.download_tile_image("img/image_files/3/0_0.png")
+        assert img.getpixel((0, 0)) == (200, 120, 180)
+        assert isinstance(minio_io.download_bytes("img/image_files/3/0_0.png"), bytes)
+
+
+    def test_sample_comes_from_the_analysis_level(self, store):
+        assert minio_io.sample_analysis_tiles(4, default_level=11) is None
+        for level in (3, 10, 11):
+            for x in range(4):
+                for y in range(2):
+                    store.write(f"img/image_files/{level}/{x}_{y}.png", b"t")
+        store.write("img/image.dzi", DZI)
+
+        sample = minio_io.sample_analysis_tiles(4, default_level=12)
+        assert (sample.image_id, sample.level, sample.tile_px) == ("img", 11, 256)
+        assert len(sample.keys) == 4 and len(set(sample.keys)) == 4
+        assert all(key.startswith("img/image_files/11/") for key in sample.keys)
+
+
+class TestLocalTileStore:
+    def test_tiles_are_memory_mapped_and_decode_in_place(self, tmp_path):
+        store = LocalTileStore(tmp_path, "tiles")
+        store.write("img/image_files/3/0_0.png", _png((10, 20, 30)))
+
+        data = store.read("img/image_files/3/0_0.png")
+        assert isinstance(data, mmap.mmap)
+        arena = TileArena(capacity=1, tile_px=16)
+        view = arena.decode(0, data)
+        assert view.shape == (8, 8, 3)
+        assert np.all(view == (10, 20, 30))
+
+    def test_reads_files_written_by_another_process(self, tmp_path):
+        path = tmp_path / "tiles" / "img" / "image_files" / "0" / "0_0.jpg"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"jpeg")
+        store = LocalTileStore(tmp_path, "tiles")
+        assert store.list_levels("img") == [0]
+        assert bytes(store.read("img/image_files/0/0_0.jpg")) == b"jpeg"
+
+    def test_rejects_keys_outside_the_root(self, tmp_path):
+        store = LocalTileStore(tmp_path, "tiles")
+        with pytest.raises(ValueError):
+            store.read("../secrets")
+
+
+class TestSelection:
+    def test_create_from_settings(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(tile_store.settings, "TILE_STORE_LOCAL_ROOT", str(tmp_path))
+        assert isinstance(tile_store.create_tile_store("local"), LocalTileStore)
+        assert isinstance(tile_store.create_tile_store("memory"), MemoryTileStore)
+        assert tile_store.create_tile_store("minio").name == "minio"
+        with pytest.raises(ValueError, match="TILE_STORE"):
+            tile_store.create_tile_store("s3fs")
+
+
+class TestPipelineOnTileStore:
+    def test_run_analysis_reads_and_writes_through_the_store(self, store, monkeypatch, stained_slide):
+        store.write(
+            f"{stained_slide.image_id}/image.dzi",
+            (
+                f'<Image Format="png" Overlap="0" TileSize="{stained_slide.tile_size}">'
+                f'<Size Width="{stained_slide.width}" Height="{stained_slide.height}"/></Image>'
+            ).encode(),
+        )
+        for (level, x, y), data in stained_slide.tiles.items():
+            store.write(stained_slide.key(level, x, y), data)
+        install_stub_models(monkeypatch, pipeline)
+
+        result = pipeline.run_analysis("job", stained_slide.image_id, tile_level=12, prescreen=False)
+
+        assert result.summary.total_tiles == 96
+        assert result.summary.tissue_tiles == 41
+        assert result.summary.flagged_tiles == 8
+        assert bytes(store.read(result.summary_key)).startswith(b"{")
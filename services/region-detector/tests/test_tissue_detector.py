@@ -3,7 +3,7 @@
 import numpy as np
 from PIL import Image
 
-from src.tissue_detector import detect_tissue, TissueResult
+from src.tissue_detector import detect_tissue, recheck_tissue, TissueResult
 
 
 class TestTissueDetector:
@@ -110,3 +110,30 @@ class TestTissueDetector:
         assert isinstance(result.is_tissue, bool)
         assert isinstance(result.tissue_ratio, float)
         assert 0.0 <= result.tissue_ratio <= 1.0
+
+
+class TestRecheckTissue:
+    """recheck_tissue() reproduces detect_tissue() from a rejection's stats."""
+
+    def _tiles(self):
+        rng = np.random.default_rng(3)
+        for base, noise in [(240, 1), (235, 4), (200, 6), (128, 12), (60, 2)]:
+            grey = np.clip(base + rng.normal(0, noise, (64, 64, 1)), 0, 255)
+            tile = np.repeat(grey, 3, axis=2).astype(np.uint8)
+            tile[:8, :8] = (200, 120, 180)  # a few saturated pixels
+            yield tile
+
+    def test_matches_detect_tissue_with_new_thresholds(self):
+        for tile in self._tiles():
+            first = detect_tissue(tile, threshold=0.15, std_floor=20.0)
+            assert not first.is_tissue
+            assert first.gray_std is not None
+            for threshold, std_floor in [(0.0, 3.0), (0.01, 3.0), (0.05, 5.0), (0.15, 8.0)]:
+                expected = detect_tissue(tile, threshold=threshold, std_floor=std_floor)
+                result = recheck_tissue(first, threshold, std_floor)
+                assert (result.is_tissue, result.tissue_ratio) == (expected.is_tissue, expected.tissue_ratio)
+
+    def test_needs_pixels_without_recorded_std(self):
+        rejected = TissueResult(is_tissue=False, tissue_ratio=0.01)
+        assert recheck_tissue(rejected, threshold=0.15, std_floor=3.0) is None
+        assert recheck_tissue(rejected, threshold=0.0, std_floor=3.0).is_tissue
@@ -17,5 +17,9 @@ class Settings(BaseSettings):
     TEMP_STORAGE_PATH: str = "/tmp/histoflow_tiling"
     BACKEND_INTERNAL_BASE_URL: Optional[str] = None
 
+    # Progress event stream (GET /jobs/{id}/events)
+    EVENTS_MIN_INTERVAL_S: float = 0.5
+    EVENTS_HEARTBEAT_S: float = 15.0
+
 # Create a single, importable instance of the settings
 settings = Settings()
@@ -1,15 +1,22 @@
 from typing import Optional
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from . import metrics
+from .config import settings
+from .event_stream import EventHub
 from .tiling_service import TilingService
 
 # Create the FastAPI app
 app = FastAPI(title="HistoFlow Tiling Service")
 
+# Progress fan-out for GET /jobs/{id}/events
+events = EventHub(min_interval_s=settings.EVENTS_MIN_INTERVAL_S)
+
 # Create a single, reusable instance of our service
-tiling_service = TilingService()
+tiling_service = TilingService(events=events)
 
 # Define the data we expect to receive in a job request
 class TilingJob(BaseModel):
@@ -26,7 +33,9 @@ async def create_tiling_job(job: TilingJob, background_tasks: BackgroundTasks):
     and run the long tiling process in the background.
     """
     print(f"Accepted job for image_id: {job.image_id}")
-    
+    if job.job_id:
+        events.publish(job.job_id, "progress", {"stage": "QUEUED", "message": "Tiling job queued."})
+
     # Add the long-running task to be executed after the response is sent
     background_tasks.add_task(
         tiling_service.process_image,
@@ -40,7 +49,29 @@ async def create_tiling_job(job: TilingJob, background_tasks: BackgroundTasks):
     # Respond immediately to the caller (your Kotlin backend)
     return {"message": "Tiling job accepted and started in the background.", "job": job}
 
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events stream of a tiling job's stage and progress updates,
+    ending with a `completed` or `failed` event. Only jobs submitted to this
+    process (and still retained in memory) can be watched.
+    """
+    subscription = events.subscribe(job_id)
+    if not subscription.has_pending:
+        events.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail=f"No events for job {job_id}")
+    return StreamingResponse(
+        events.stream(subscription, settings.EVENTS_HEARTBEAT_S),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/health")
 def health_check():
     """A simple endpoint to check if the service is running."""
     return {"status": "ok"}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Per-stage metrics in Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,288 @@
+"""Prometheus text-format metrics with lock-free per-thread accumulation.
+
+Counters and histograms are updated from download, tissue and upload worker
+threads for every tile, so a shared lock per update would serialise them.
+Instead each thread writes to its own shard (a plain list reached through
+``threading.local``).  Only the thread that owns a shard writes to it, so
+updates take no lock.  A scrape sums the shards.  Shards of finished threads
+(thread pools are created per chunk) are folded into a retired total during
+scrapes, so the number of live shards stays bounded.
+
+Gauges that describe service state (active jobs, queue depth) are read from
+a callback at scrape time and cost nothing in between.
+
+:func:`render` produces the ``text/plain; version=0.0.4`` exposition format
+for a ``GET /metrics`` endpoint.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _Sharded:
+    """Per-thread ``[float] * width`` shards plus the totals of dead threads."""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * width
+        self._lock = threading.Lock()  # guards shard registration and scrapes only
+
+    def shard(self) -> List[float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0.0] * self._width
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for i, value in enumerate(shard):
+                        self._retired[i] += value
+            self._shards = live
+            totals = list(self._retired)
+            for _, shard in live:
+                for i, value in enumerate(shard):
+                    totals[i] += value
+        return totals
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._children_lock = threading.Lock()
+
+    def labels(self, *values: str) -> "_Metric":
+        """Child metric for one combination of label values (cached)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._children_lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def _series(self) -> Iterator[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            yield from sorted(self._children.items())
+        else:
+            yield (), self
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in self._series():
+            lines.extend(series._samples(self, values))
+        return lines
+
+    def _samples(self, parent: "_Metric", values: Tuple[str, ...]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values = _Sharded(1)
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.help)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._values.shard()[0] += amount
+
+    def value(self) -> float:
+        return self._values.totals()[0]
+
+    def _samples(self, parent, values):
+        return [f"{parent.name}{parent._label_text(values)} {_fmt(self.value())}"]
+
+
+class Gauge(_Metric):
+    """Up/down gauge summed over threads, or read from *fn* at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        fn: Callable[[], float] | None = None,
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self._fn = fn
+        self._values = _Sharded(1)
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.help)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._values.shard()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._values.shard()[0] -= amount
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def value(self) -> float:
+        if self._fn is not None:
+            return float(self._fn())
+        return self._values.totals()[0]
+
+    def _samples(self, parent, values):
+        return [f"{parent.name}{parent._label_text(values)} {_fmt(self.value())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Shard layout: one count per bucket, then +Inf, sum and count.
+        self._values = _Sharded(len(self.buckets) + 3)
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.help, self.buckets)
+
+    def observe(self, value: float) -> None:
+        shard = self._values.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Cumulative bucket counts (including +Inf), sum and count."""
+        totals = self._values.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-2], totals[-1]
+
+    def _samples(self, parent, values):
+        cumulative, total, count = self.snapshot()
+        lines = []
+        for bound, value in zip((*self.buckets, math.inf), cumulative):
+            le = 'le="+Inf"' if bound == math.inf else f'le="{_fmt(bound)}"'
+            lines.append(f"{parent.name}_bucket{parent._label_text(values, le)} {_fmt(value)}")
+        lines.append(f"{parent.name}_sum{parent._label_text(values)} {_fmt(total)}")
+        lines.append(f"{parent.name}_count{parent._label_text(values)} {_fmt(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(
+    name: str, help: str, fn: Callable[[], float] | None = None, labelnames: Sequence[str] = ()
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, fn, labelnames))
+
+
+def histogram(
+    name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS, labelnames: Sequence[str] = ()
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, buckets, labelnames))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
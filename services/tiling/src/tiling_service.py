@@ -14,16 +14,41 @@ from xml.etree import ElementTree
 import pyvips
 from minio import Minio
 
+from . import metrics
 from .config import settings
+from .event_stream import EventHub
 
 # Number of parallel tile upload threads.  16 gives a good balance between
 # throughput and MinIO connection-pool pressure.
 _UPLOAD_WORKERS = 16
 
+_TERMINAL_STAGES = {"COMPLETED", "FAILED"}
+
+STAGE_SECONDS = metrics.histogram(
+    "tiling_stage_seconds",
+    "Duration of each job stage.",
+    (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+    ["stage"],
+)
+UPLOAD_SECONDS = metrics.histogram("tiling_upload_seconds", "Latency of one tile file upload.")
+BYTES_TRANSFERRED = metrics.counter(
+    "tiling_bytes_total", "Bytes transferred to or from MinIO.", ["direction"]
+)
+FILES_UPLOADED = metrics.counter("tiling_files_uploaded_total", "Tile files uploaded.")
+JOBS_TOTAL = metrics.counter("tiling_jobs_total", "Finished tiling jobs by outcome.", ["outcome"])
+ACTIVE_JOBS = metrics.gauge("tiling_active_jobs", "Tiling jobs currently running.")
+UPLOAD_THREADS_BUSY = metrics.gauge(
+    "tiling_upload_threads_busy", "Upload pool threads currently uploading a file."
+)
+
 
 class TilingService:
-    def __init__(self):
-        """Initializes the service and the MinIO client."""
+    def __init__(self, events: Optional[EventHub] = None):
+        """Initializes the service and the MinIO client.
+
+        Job events are also published to *events* for SSE subscribers.
+        """
+        self.events = events
         self.minio_client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
@@ -45,6 +70,7 @@ class TilingService:
         print(f"Starting processing for image_id='{image_id}'")
         local_image_path = None
         local_tiles_dir = None
+        ACTIVE_JOBS.inc()
 
         try:
             print(
@@ -63,6 +89,8 @@ class TilingService:
             download_start = time.perf_counter()
             local_image_path, source_stat = self._download_source_image(source_object_name, source_bucket)
             download_duration = time.perf_counter() - download_start
+            STAGE_SECONDS.labels("download").observe(download_duration)
+            BYTES_TRANSFERRED.labels("download").inc(getattr(source_stat, "size", 0) or 0)
 
             # 2. Tile
             self._notify_job_event(
@@ -75,6 +103,7 @@ class TilingService:
             tiling_start = time.perf_counter()
             local_tiles_dir = self._generate_tiles(local_image_path, image_id)
             tiling_duration = time.perf_counter() - tiling_start
+            STAGE_SECONDS.labels("tiling").observe(tiling_duration)
 
             # 3. Upload (parallel)
             self._notify_job_event(
@@ -88,6 +117,7 @@ class TilingService:
             upload_start = time.perf_counter()
             file_count, total_bytes = self._upload_tiles(local_tiles_dir, image_id, job_id, dataset_name)
             upload_duration = time.perf_counter() - upload_start
+            STAGE_SECONDS.labels("upload").observe(upload_duration)
             manifest = self._build_manifest(local_tiles_dir, image_id)
 
             self._notify_job_event(
@@ -141,9 +171,11 @@ class TilingService:
                 stage_progress_percent=100,
                 activity_entries=[self._build_activity_entry("COMPLETED", "Tiles are ready.")],
             )
+            JOBS_TOTAL.labels("completed").inc()
 
         except Exception as e:
             print(f"ERROR processing image_id='{image_id}': {e}")
+            JOBS_TOTAL.labels("failed").inc()
             self._notify_job_event(
                 job_id=job_id,
                 stage="FAILED",
@@ -153,6 +185,7 @@ class TilingService:
                 activity_entries=[self._build_activity_entry("FAILED", "Tiling failed.", detail=str(e))],
             )
         finally:
+            ACTIVE_JOBS.dec()
             print("Cleaning up local files...")
             if local_image_path and os.path.exists(local_image_path):
                 os.remove(local_image_path)
@@ -174,13 +207,9 @@ class TilingService:
         stage_progress_percent: Optional[int] = None,
         activity_entries: Optional[list[dict[str, Any]]] = None,
     ) -> None:
-        if not job_id or not settings.BACKEND_INTERNAL_BASE_URL:
+        if not job_id:
             return
 
-        endpoint = (
-            f"{settings.BACKEND_INTERNAL_BASE_URL.rstrip('/')}"
-            f"/api/v1/internal/tiling/jobs/{job_id}/events"
-        )
         payload = {
             "stage": stage,
             "message": message,
@@ -190,6 +219,18 @@ class TilingService:
             "stageProgressPercent": stage_progress_percent,
             "activityEntries": activity_entries or [],
         }
+        if self.events is not None:
+            terminal = stage in _TERMINAL_STAGES
+            self.events.publish(
+                job_id, stage.lower() if terminal else "progress", payload, terminal=terminal
+            )
+
+        if not settings.BACKEND_INTERNAL_BASE_URL:
+            return
+        endpoint = (
+            f"{settings.BACKEND_INTERNAL_BASE_URL.rstrip('/')}"
+            f"/api/v1/internal/tiling/jobs/{job_id}/events"
+        )
         body = json.dumps(payload).encode("utf-8")
         req = request.Request(
             endpoint,
@@ -268,12 +309,17 @@ class TilingService:
         total_bytes = 0
         last_reported_percent = -1
         lock = threading.Lock()
+        uploaded_bytes = BYTES_TRANSFERRED.labels("upload")
 
         def upload_one(file_path: Path) -> int:
             relative = file_path.relative_to(tiles_dir)
             object_name = f"{image_id}/{relative}"
-            self.minio_client.fput_object(bucket, object_name, str(file_path))
-            return file_path.stat().st_size
+            with UPLOAD_THREADS_BUSY.track_inprogress(), UPLOAD_SECONDS.time():
+                self.minio_client.fput_object(bucket, object_name, str(file_path))
+            size = file_path.stat().st_size
+            uploaded_bytes.inc(size)
+            FILES_UPLOADED.inc()
+            return size
 
         with ThreadPoolExecutor(max_workers=_UPLOAD_WORKERS) as executor:
             futures = {executor.submit(upload_one, fp): fp for fp in file_paths}